@@ -0,0 +1,209 @@
+// Agent Edit Patches
+// The agent sends search/replace hunks instead of whole files. Each hunk is
+// located in the current document (exact match first, then ignoring trailing
+// whitespace / indentation, then a fuzzy line match), checked for ambiguity and
+// overlap, and turned into the smallest CodeMirror change covering the edit.
+// Anything that cannot be placed is reported as a conflict; the caller falls
+// back to full-file content.
+
+const FUZZY_MIN_SCORE = 0.75; // Share of matching lines a fuzzy window needs
+const FUZZY_MARGIN = 0.1; // ... and how much better than the runner-up it must be
+
+function normalizeNewlines(text) {
+    return String(text ?? '').replace(/\r\n?/g, '\n');
+}
+
+function leadingSpace(line) {
+    return line.match(/^[ \t]*/)[0];
+}
+
+// Line table with the offset of every line start
+function indexLines(text) {
+    const lines = text.split('\n');
+    const starts = [];
+    let pos = 0;
+    for (const line of lines) {
+        starts.push(pos);
+        pos += line.length + 1;
+    }
+    return { lines, starts };
+}
+
+// Windows of the document whose lines equal `needle` under `normalize`
+function findLineMatches(table, needle, normalize) {
+    const target = needle.map(normalize);
+    const matches = [];
+    for (let i = 0; i + target.length <= table.lines.length; i++) {
+        let ok = true;
+        for (let j = 0; j < target.length && ok; j++) {
+            ok = normalize(table.lines[i + j]) === target[j];
+        }
+        if (ok) matches.push(i);
+    }
+    return matches;
+}
+
+function fuzzyMatch(table, needle) {
+    const target = needle.map(l => l.trim());
+    const scores = [];
+    for (let i = 0; i + target.length <= table.lines.length; i++) {
+        let same = 0;
+        for (let j = 0; j < target.length; j++) {
+            if (table.lines[i + j].trim() === target[j]) same++;
+        }
+        scores.push({ line: i, score: same / target.length });
+    }
+    scores.sort((a, b) => b.score - a.score);
+    const [best, second] = scores;
+    if (!best || best.score < FUZZY_MIN_SCORE) return { error: 'not found' };
+    if (second && best.score - second.score < FUZZY_MARGIN) return { error: 'ambiguous' };
+    return { line: best.line };
+}
+
+// The indentation change { from, to } that maps every matched search line onto
+// its document line (`from` prefix replaced by `to`), or null when the lines
+// disagree, e.g. the header matches but the body is indented differently
+function indentShift(searchLines, docLines) {
+    let shift = null;
+    for (let i = 0; i < searchLines.length; i++) {
+        const search = searchLines[i];
+        if (!search.trim() || search.trim() !== docLines[i].trim()) continue;
+        const a = leadingSpace(search);
+        const b = leadingSpace(docLines[i]);
+        // Canonical form: drop the common tail ("  " -> "    " is "" -> "  ")
+        let k = 0;
+        while (k < a.length && k < b.length && a[a.length - 1 - k] === b[b.length - 1 - k]) k++;
+        const from = a.slice(0, a.length - k);
+        const to = b.slice(0, b.length - k);
+        if (!shift) shift = { from, to };
+        else if (shift.from !== from || shift.to !== to) return null;
+    }
+    return shift || { from: '', to: '' };
+}
+
+// Shift the replacement's indentation when the hunk matched at a different depth
+function reindent(replace, shift) {
+    const { from, to } = shift;
+    if (from === to) return replace;
+    return replace.split('\n').map(line => {
+        if (!line.trim()) return line;
+        if (line.startsWith(from)) return to + line.slice(from.length);
+        return line;
+    }).join('\n');
+}
+
+// Locate one hunk: { from, to, insert } in document offsets, or { error }
+function locateHunk(text, table, hunk) {
+    const search = normalizeNewlines(hunk.search);
+    const replace = normalizeNewlines(hunk.replace);
+
+    if (!search.trim()) {
+        // Empty search only makes sense for an empty (new) file
+        return text.trim() ? { error: 'empty search text' } : { from: 0, to: text.length, insert: replace };
+    }
+
+    // 1. Exact text
+    const first = text.indexOf(search);
+    if (first !== -1) {
+        if (text.indexOf(search, first + 1) !== -1) return { error: 'ambiguous' };
+        return { from: first, to: first + search.length, insert: replace };
+    }
+
+    // 2. Whole lines, ignoring trailing whitespace, then indentation
+    const needle = search.replace(/\n$/, '').split('\n');
+    const insertText = replace.replace(/\n$/, '');
+    for (const normalize of [l => l.trimEnd(), l => l.trim()]) {
+        const matches = findLineMatches(table, needle, normalize);
+        if (matches.length > 1) return { error: 'ambiguous' };
+        if (matches.length === 1) {
+            return placeLines(table, matches[0], needle, insertText);
+        }
+    }
+
+    // 3. Fuzzy: the best window of the same height, if clearly the best
+    if (needle.length >= 3) {
+        const fuzzy = fuzzyMatch(table, needle);
+        if (fuzzy.error) return fuzzy;
+        return placeLines(table, fuzzy.line, needle, insertText);
+    }
+    return { error: 'not found' };
+}
+
+// Replace whole matched lines; the newline after the block is kept unless the
+// block is deleted outright. Matches whose lines are not all shifted by the same
+// indentation are rejected, so the caller falls back to full-file content.
+function placeLines(table, line, needle, insertText) {
+    const last = line + needle.length - 1;
+    const from = table.starts[line];
+    let to = table.starts[last] + table.lines[last].length;
+    const shift = indentShift(needle, table.lines.slice(line, last + 1));
+    if (!shift) return { error: 'indentation differs from the file' };
+    const insert = reindent(insertText, shift);
+    if (!insert && last + 1 < table.lines.length) to++;
+    return { from, to, insert, fuzzy: true };
+}
+
+// Trim the parts of a change that leave the text as it was, so the editor
+// only sees (and the undo history / cursor only reflect) what actually changed
+export function minimalChange(text, from, to, insert) {
+    let start = 0;
+    const maxStart = Math.min(to - from, insert.length);
+    while (start < maxStart && text.charCodeAt(from + start) === insert.charCodeAt(start)) start++;
+    let end = 0;
+    const maxEnd = Math.min(to - from - start, insert.length - start);
+    while (end < maxEnd && text.charCodeAt(to - 1 - end) === insert.charCodeAt(insert.length - 1 - end)) end++;
+    return { from: from + start, to: to - end, insert: insert.slice(start, insert.length - end) };
+}
+
+/**
+ * Applies search/replace hunks to `text`. All hunks are located against the
+ * original text; if any fails or two overlap, nothing is applied.
+ * @param {string} text - Current file content.
+ * @param {Array<{search: string, replace: string}>} hunks
+ * @returns {{ ok: boolean, content: string, changes: Array<{from, to, insert}>, conflicts: Array<{hunk: number, reason: string}>, fuzzy: number }}
+ */
+export function applyPatch(text, hunks) {
+    text = normalizeNewlines(text);
+    const table = indexLines(text);
+    const located = [];
+    const conflicts = [];
+
+    (Array.isArray(hunks) ? hunks : []).forEach((hunk, i) => {
+        const place = hunk && typeof hunk === 'object' ? locateHunk(text, table, hunk) : { error: 'malformed hunk' };
+        if (place.error) conflicts.push({ hunk: i + 1, reason: place.error });
+        else located.push({ ...place, hunk: i + 1 });
+    });
+
+    located.sort((a, b) => a.from - b.from);
+    for (let i = 1; i < located.length; i++) {
+        if (located[i].from < located[i - 1].to) {
+            conflicts.push({ hunk: located[i].hunk, reason: `overlaps hunk ${located[i - 1].hunk}` });
+        }
+    }
+    if (conflicts.length > 0 || located.length === 0) {
+        if (located.length === 0 && conflicts.length === 0) conflicts.push({ hunk: 0, reason: 'no hunks' });
+        return { ok: false, content: text, changes: [], conflicts, fuzzy: 0 };
+    }
+
+    const changes = located
+        .map(c => minimalChange(text, c.from, c.to, c.insert))
+        .filter(c => c.from !== c.to || c.insert);
+    let content = '';
+    let pos = 0;
+    for (const c of changes) {
+        content += text.slice(pos, c.from) + c.insert;
+        pos = c.to;
+    }
+    content += text.slice(pos);
+    return { ok: true, content, changes, conflicts, fuzzy: located.filter(c => c.fuzzy).length };
+}
+
+// Single change turning `text` into `content` (used for full-file fallbacks)
+export function diffToChange(text, content) {
+    const change = minimalChange(text, 0, text.length, content);
+    return change.from === change.to && !change.insert ? [] : [change];
+}
+
+export function describeConflicts(conflicts) {
+    return conflicts.map(c => c.hunk ? `hunk ${c.hunk}: ${c.reason}` : c.reason).join('; ');
+}
@@ -1,7 +1,17 @@
 import { getCurrentAiModel } from "./settings.js";
+import { cachedResponse } from "./response-cache.js";
 
-async function callAiProxy(messages, useStream = false) {
+// cache: deterministic request (temperature 0 on the proxy), answered from the
+// proxy cache / local mirror when the same code was processed before
+async function callAiProxy(messages, useStream = false, { cache = false } = {}) {
     const model = getCurrentAiModel();
+    if (cache && !useStream) {
+        return cachedResponse(['ai-proxy', model, messages], () => requestAiProxy(messages, model, false, true));
+    }
+    return requestAiProxy(messages, model, useStream, false);
+}
+
+async function requestAiProxy(messages, model, useStream, cache) {
 
     const maxRetries = 2;
     let response;
@@ -25,7 +35,8 @@ async function callAiProxy(messages, useStream = false) {
                 body: JSON.stringify({
                     messages: messages,
                     model: model,
-                    stream: useStream
+                    stream: useStream,
+                    cache: cache
                 }),
                 signal: controller.signal
             });
@@ -135,7 +146,7 @@ export async function refactorCode(code) {
     ];
 
     // Use Non-Streaming
-    let result = await callAiProxy(messages, false);
+    let result = await callAiProxy(messages, false, { cache: true });
     return result.replace(/^```python\s*/i, "").replace(/^```\s*/, "").replace(/```$/, "").trim();
 }
 
@@ -163,7 +174,7 @@ export async function generateDocs(code) {
         { role: "user", content: userPrompt }
     ];
 
-    let result = await callAiProxy(messages, false);
+    let result = await callAiProxy(messages, false, { cache: true });
     return result.replace(/^```python\s*/i, "").replace(/^```\s*/, "").replace(/```$/, "").trim();
 }
 
@@ -196,5 +207,5 @@ export async function explainCode(code) {
         { role: "user", content: userPrompt }
     ];
 
-    return await callAiProxy(messages, false);
+    return await callAiProxy(messages, false, { cache: true });
 }
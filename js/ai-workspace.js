@@ -1,8 +1,13 @@
-import { getCurrentAiModel } from "./settings.js";
+import { getCurrentAiModel, getContextTokenBudget } from "./settings.js";
 import { showConfirm, showToast, showPrompt } from "./ui-utils.js";
-import { renderMarkdown } from "./markdown-renderer.js";
+import { renderMarkdownInto } from "./markdown-renderer.js";
 import { saveChatSession } from "./saved-chats.js";
 import { createMessageElement, handleMessageClick } from "./chat-component.js";
+import { packContext, STRUCTURE_FILE } from "./context-packer.js";
+import { compactHistory, refreshSummary, resetHistorySummary } from "./chat-history.js";
+import { symbolIndex } from "./symbol-index.js";
+import { applyPatch, diffToChange, describeConflicts } from "./agent-patch.js";
+import { buildRunFeedback } from "./run-feedback.js";
 
 // State
 let appState = null;
@@ -13,6 +18,7 @@ let isDevMode = false; // Default: Chat Mode (Read-only reasoning)
 let wakeLock = null;
 let agentLoopActive = false;
 let agentRetryCount = 0;
+let pendingFollowUp = null; // Agent message to send once the current turn has finished
 
 // DOM Elements
 const els = {
@@ -29,6 +35,11 @@ export function initWorkspace(state) {
     appState = state;
     bindWorkspaceEvents();
 
+    // Opening the workspace pre-warms the proxy and its upstream connection
+    window.addEventListener('view-changed', (e) => {
+        if (e.detail.targetId === 'view-ai-workspace') warmUpProxy();
+    });
+
     // Initial Context Check
     setTimeout(() => {
         updateContextBadge();
@@ -44,6 +55,8 @@ export function initWorkspace(state) {
 
 async function resolveAiInput(prompt, logs) {
     console.log("AI Input Resolver triggered", prompt);
+    const predicted = await takePredictedInput(prompt);
+    if (predicted !== null) return predicted;
     try {
         const response = await fetch("/.netlify/functions/ai-workspace-proxy", {
             method: "POST",
@@ -70,6 +83,116 @@ async function resolveAiInput(prompt, logs) {
     }
 }
 
+// Cheap ping that keeps the function instance warm and opens the pooled upstream
+// connection before the first real request (at most once per WARMUP_INTERVAL_MS)
+const WARMUP_INTERVAL_MS = 2 * 60 * 1000;
+let lastWarmup = 0;
+
+function warmUpProxy() {
+    if (!navigator.onLine || Date.now() - lastWarmup < WARMUP_INTERVAL_MS) return;
+    lastWarmup = Date.now();
+    fetch(PROXY_URL, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ mode: 'warmup' })
+    }).catch(e => console.warn("Proxy Warm-up Failed:", e));
+}
+
+// --- Batched Input Prediction ---
+// Agent runs without explicit inputs ask the proxy for every stdin value up
+// front, in one request that overlaps program start-up. Each input() takes the
+// next prediction if its prompt matches the expected one; after the first
+// mismatch the rest is dropped and the per-prompt solver takes over.
+const PREDICTION_TIMEOUT_MS = 8000;
+const predictionStats = { runs: 0, predicted: 0, hits: 0, misses: 0 };
+let inputPrediction = null; // { promise, queue, predicted, hits, misses, diverged }
+
+function startInputPrediction(code) {
+    const controller = new AbortController();
+    const timeoutId = setTimeout(() => controller.abort(), PREDICTION_TIMEOUT_MS);
+    const run = { queue: [], predicted: 0, hits: 0, misses: 0, diverged: false };
+    run.promise = fetch(PROXY_URL, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({
+            mode: 'input_solver',
+            batch: true,
+            code: code,
+            currentFile: appState.currentFile,
+            model: 'LongCat-Flash-Lite'
+        }),
+        signal: controller.signal
+    })
+        .then(response => response.ok ? response.json() : { inputs: [] })
+        .then(data => {
+            run.queue = Array.isArray(data.inputs) ? data.inputs : [];
+            run.predicted = run.queue.length;
+        })
+        .catch(e => console.warn("Input Prediction Failed:", e))
+        .finally(() => clearTimeout(timeoutId));
+    inputPrediction = run;
+}
+
+// Loose comparison: prompts are often reworded or empty in the prediction
+function promptMatches(expected, actual) {
+    const norm = s => String(s || '').toLowerCase().replace(/[^a-z0-9]+/g, ' ').trim();
+    const e = norm(expected);
+    const a = norm(actual);
+    if (!e || !a || e.includes(a) || a.includes(e)) return true;
+    const words = new Set(e.split(' '));
+    return a.split(' ').filter(w => words.has(w)).length / words.size >= 0.5;
+}
+
+async function takePredictedInput(prompt) {
+    const run = inputPrediction;
+    if (!run) return null;
+    await run.promise;
+    if (!run.diverged) {
+        const next = run.queue.shift();
+        if (next && promptMatches(next.prompt, prompt)) {
+            run.hits++;
+            return next.value;
+        }
+        // The program went somewhere the prediction didn't: stop trusting the rest
+        run.diverged = true;
+        run.queue = [];
+    }
+    run.misses++;
+    return null;
+}
+
+function finishInputPrediction() {
+    const run = inputPrediction;
+    inputPrediction = null;
+    if (!run) return;
+    predictionStats.runs++;
+    predictionStats.predicted += run.predicted;
+    predictionStats.hits += run.hits;
+    predictionStats.misses += run.misses;
+    const prompts = predictionStats.hits + predictionStats.misses;
+    console.log(`Input Prediction: ${run.hits}/${run.hits + run.misses} prompts served from ${run.predicted} predicted ` +
+        `(${run.queue.length} unused); session hit rate ${prompts ? Math.round(predictionStats.hits / prompts * 100) : 0}% ` +
+        `over ${predictionStats.runs} runs`);
+}
+
+// Folds older turns into a rolling summary (cheap model, non-streaming)
+async function summarizeTurns(previousSummary, messages) {
+    const response = await fetch("/.netlify/functions/ai-workspace-proxy", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({
+            mode: 'summarize',
+            summary: previousSummary,
+            messages: messages,
+            model: 'LongCat-Flash-Lite'
+        })
+    });
+    if (!response.ok) {
+        throw new Error(`Summary request failed: ${response.status} ${response.statusText}`);
+    }
+    return (await response.text()).trim();
+}
+
 function bindWorkspaceEvents() {
     els.view = document.getElementById('view-ai-workspace');
     els.output = document.getElementById('ai-chat-output');
@@ -120,6 +243,7 @@ function bindWorkspaceEvents() {
         btnClear.onclick = async () => {
             if (await showConfirm("Clear Chat", "Are you sure you want to clear the chat history?")) {
                 chatHistory = [];
+                resetHistorySummary();
                 els.output.innerHTML = '';
                 addSystemMessage("Chat cleared. Context reset.");
             }
@@ -209,12 +333,17 @@ async function handleSend(textOverride = null) {
     addMessage("user", text);
     chatHistory.push({ role: "user", content: text });
 
-    // Prepare Context
-    const contextFiles = getProjectContext(text);
+    // Prepare Context (chunk boundaries come from the symbol index, so let it catch up with the active file)
     const currentFile = appState.currentFile;
+    if (currentFile && appState.files[currentFile] !== undefined) {
+        await symbolIndex.whenIndexed(currentFile, appState.files[currentFile], 500);
+    }
+    const context = getProjectContext(text);
+    const contextFiles = context.files;
+    const history = compactHistory(chatHistory);
     const model = getCurrentAiModel();
 
-    updateContextBadge(contextFiles);
+    updateContextBadge(context, history);
 
     // Start Generation
     isGenerating = true;
@@ -239,16 +368,39 @@ async function handleSend(textOverride = null) {
         }
     }, MAX_TIMEOUT_MS);
 
-    try {
-        // Create Placeholder for AI Response
-        const aiMessageId = addMessage("assistant", "Thinking...");
+    // Create Placeholder for AI Response
+    const aiMessageId = addMessage("assistant", "Thinking...");
+    const requestStart = performance.now();
+    let aiText = "";
+    let firstTokenAt = 0;
+    let renderFrame = null;
+    let completed = false;
 
+    try {
         // --- Retry Logic for Fetch ---
+        // Only connection failures and "busy" answers (429 / 503 with Retry-After)
+        // are retried; the proxy already queues and paces upstream calls, so any
+        // other error status is final
         const maxRetries = 2;
         let response;
         let lastError;
+        let retryDelayMs = 0;
 
         for (let i = 0; i <= maxRetries; i++) {
+            if (i > 0) {
+                updateMessageContent(aiMessageId, retryDelayMs >= 2000
+                    ? `AI service is busy, retrying in ${Math.ceil(retryDelayMs / 1000)}s... (Attempt ${i+1}/${maxRetries+1})`
+                    : `Connecting... (Attempt ${i+1}/${maxRetries+1})`);
+                await new Promise(resolve => {
+                    const timer = setTimeout(resolve, retryDelayMs);
+                    abortController.signal.addEventListener('abort', () => {
+                        clearTimeout(timer);
+                        resolve();
+                    }, { once: true });
+                });
+                if (abortController.signal.aborted) throw new Error("Generation stopped.");
+            }
+
             // Local Controller for Connection Timeout (15s)
             const connController = new AbortController();
             const connTimeoutId = setTimeout(() => connController.abort(), 15000); // 15s Strict Connection Timeout
@@ -258,24 +410,15 @@ async function handleSend(textOverride = null) {
             abortController.signal.addEventListener('abort', onGlobalAbort);
 
             try {
-                if (i > 0) {
-                     updateMessageContent(aiMessageId, `Connecting... (Attempt ${i+1}/${maxRetries+1})`);
-                     await new Promise(r => setTimeout(r, 1000 * i)); // Exponential backoff
-                }
-
-                response = await fetch("/.netlify/functions/ai-workspace-proxy", {
-                    method: "POST",
-                    headers: { "Content-Type": "application/json" },
-                    body: JSON.stringify({
-                        messages: chatHistory,
-                        files: contextFiles,
-                        currentFile: currentFile,
-                        model: model,
-                        mode: isDevMode ? 'developer' : 'chat',
-                        stream: false // FORCE NON-STREAMING
-                    }),
-                    signal: connController.signal // Use local controller
-                });
+                response = await postWithContext({
+                    messages: history.messages,
+                    summary: history.summary,
+                    partialFiles: context.partial,
+                    currentFile: currentFile,
+                    model: model,
+                    mode: isDevMode ? 'developer' : 'chat',
+                    stream: true
+                }, contextFiles, connController.signal); // Use local controller
 
                 clearTimeout(connTimeoutId); // Connection succeeded
 
@@ -289,7 +432,11 @@ async function handleSend(textOverride = null) {
                     if (json.error) cleanMsg = json.error;
                 } catch (e) {}
 
-                throw new Error(`Server Error ${response.status}: ${cleanMsg}`);
+                lastError = new Error(`Server Error ${response.status}: ${cleanMsg}`);
+                const retryAfter = retryAfterMs(response);
+                if (retryAfter === null || retryAfter > MAX_RETRY_AFTER_MS) break;
+                retryDelayMs = retryAfter;
+                console.warn(`Attempt ${i+1}: AI service busy (${response.status}, queue ${response.headers.get('X-Queue-Depth') || '?'}), retrying in ${retryDelayMs}ms`);
 
             } catch (e) {
                 clearTimeout(connTimeoutId);
@@ -303,6 +450,7 @@ async function handleSend(textOverride = null) {
                 } else {
                      lastError = e;
                 }
+                retryDelayMs = 1000 * (i + 1);
                 console.warn(`Attempt ${i+1} failed:`, e);
             } finally {
                 abortController.signal.removeEventListener('abort', onGlobalAbort);
@@ -313,71 +461,35 @@ async function handleSend(textOverride = null) {
             throw lastError || new Error("Failed to connect to AI Service.");
         }
 
-        // --- Custom Stream Cleaning / Parsing Logic ---
-        const rawText = await response.text();
-        let aiText = "";
-
-        // Check for "data:" anywhere in the response (robust check)
-        if (rawText.indexOf("data:") !== -1) {
-            console.log("Detecting SSE Stream in Non-Streaming Response. Cleaning...");
-
-            const lines = rawText.split('\n');
-            for (const line of lines) {
-                const trimmed = line.trim();
-                // Check for data: with or without space
-                if (trimmed.startsWith("data:") && !trimmed.includes("[DONE]")) {
-                    // Remove "data:" prefix (case sensitive usually, but being safe)
-                    // .substring(5) handles "data:" (length 5)
-                    let jsonStr = trimmed.substring(5).trim();
-                    try {
-                        const chunk = JSON.parse(jsonStr);
-                        // Strict Extraction Logic
-                        if (chunk.choices && chunk.choices[0] && chunk.choices[0].delta && chunk.choices[0].delta.content) {
-                            aiText += chunk.choices[0].delta.content;
-                        }
-                        else if (chunk.choices && chunk.choices[0] && chunk.choices[0].message && chunk.choices[0].message.content) {
-                            aiText += chunk.choices[0].message.content;
-                        }
-                    } catch (e) {
-                        console.warn("Failed to parse cleaned stream chunk:", e);
-                    }
-                }
+        // --- Progressive Rendering ---
+        aiText = await readCompletionStream(response, abortController.signal, (partial) => {
+            aiText = partial;
+            if (!firstTokenAt) {
+                firstTokenAt = performance.now();
+                setMessageMeta(aiMessageId, `First token ${formatSeconds(firstTokenAt - requestStart)}`);
             }
-
-            if (!aiText) {
-                 // Fallback if parsing failed but it looked like SSE
-                 // Or if it was just a string containing "data:" (unlikely conflict but possible)
-                 try {
-                     const data = JSON.parse(rawText);
-                     if (data.choices && data.choices[0].message) {
-                         aiText = data.choices[0].message.content;
-                     }
-                 } catch(e) {
-                     throw new Error("Failed to parse AI response (Invalid SSE/JSON).");
-                 }
+            // Coalesce deltas into one render per frame
+            if (!renderFrame) {
+                renderFrame = requestAnimationFrame(() => {
+                    renderFrame = null;
+                    renderStreamingContent(aiMessageId, aiText);
+                });
             }
+        });
+        if (renderFrame) cancelAnimationFrame(renderFrame);
 
-        } else {
-            // Standard JSON Parsing
-            try {
-                const data = JSON.parse(rawText);
-                if (data.choices && data.choices[0] && data.choices[0].message) {
-                    aiText = data.choices[0].message.content;
-                }
-            } catch (e) {
-                console.error("JSON Parse Error:", e);
-                // Fallback: Use raw text if it looks like content (dangerous but better than crash)
-                if (rawText.length > 0 && !rawText.startsWith("{")) {
-                    aiText = rawText;
-                } else {
-                    throw new Error("Failed to parse AI response: Invalid JSON.");
-                }
-            }
-        }
+        const totalTime = formatSeconds(performance.now() - requestStart);
+        setMessageMeta(aiMessageId, firstTokenAt
+            ? `First token ${formatSeconds(firstTokenAt - requestStart)} · ${totalTime} total`
+            : `${totalTime} total`);
 
         // Update Chat History
         chatHistory.push({ role: "assistant", content: aiText });
         updateMessageContent(aiMessageId, aiText);
+        completed = true;
+
+        // Prepare the summary of turns that fall out of the verbatim window next time
+        refreshSummary(chatHistory, summarizeTurns).catch(e => console.error("History Summary Error:", e));
 
         // --- File Operation Options (3-Button Prompt) ---
         if (aiText.includes("<<SHOW_OPTIONS>>")) {
@@ -410,6 +522,13 @@ async function handleSend(textOverride = null) {
         }
 
     } catch (err) {
+        // Keep whatever was streamed before a stop/error
+        if (renderFrame) cancelAnimationFrame(renderFrame);
+        if (aiText && !completed) {
+            updateMessageContent(aiMessageId, aiText);
+            chatHistory.push({ role: "assistant", content: aiText });
+        }
+
         // If this was an abort (user stop or timeout)
         if (abortController && abortController.signal.aborted) {
              // Check if it was timeout or user stop?
@@ -430,7 +549,124 @@ async function handleSend(textOverride = null) {
         isGenerating = false;
         abortController = null;
         updateUIState(false);
+
+        if (pendingFollowUp) {
+            const followUp = pendingFollowUp;
+            pendingFollowUp = null;
+            handleSend(followUp);
+        }
+    }
+}
+
+// Agent follow-ups decided while a turn is still generating (handleSend ignores
+// those) are sent from that turn's `finally`
+function sendFollowUp(text) {
+    if (isGenerating) pendingFollowUp = text;
+    else handleSend(text);
+}
+
+// --- Streaming ---
+
+// Reads an OpenAI-style SSE body incrementally, calling onText(fullText) as
+// deltas arrive, and resolves with the complete text. Events are assembled line
+// by line, so chunks split mid-line or mid-event are handled. Aborting `signal`
+// cancels the body, which closes the connection and lets the proxy cancel the
+// upstream request. Non-SSE (plain JSON) bodies are still accepted.
+async function readCompletionStream(response, signal, onText) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    const onAbort = () => reader.cancel().catch(() => {});
+    signal.addEventListener('abort', onAbort);
+
+    let buffer = "";
+    let raw = ""; // Only kept until the body turns out to be SSE
+    let isSSE = false;
+    let dataLines = [];
+    let text = "";
+    let finished = false;
+
+    const dispatchEvent = () => {
+        if (dataLines.length === 0) return;
+        const data = dataLines.join('\n');
+        dataLines = [];
+
+        if (data === '[DONE]') {
+            finished = true;
+            return;
+        }
+
+        let chunk;
+        try {
+            chunk = JSON.parse(data);
+        } catch (e) {
+            console.warn("SSE Parse Error:", e);
+            return;
+        }
+        if (chunk.error) {
+            throw new Error(typeof chunk.error === 'string' ? chunk.error : (chunk.error.message || "Upstream stream error"));
+        }
+
+        const choice = chunk.choices && chunk.choices[0];
+        const delta = choice && ((choice.delta && choice.delta.content) || (choice.message && choice.message.content));
+        if (delta) {
+            text += delta;
+            onText(text);
+        }
+    };
+
+    const processLine = (line) => {
+        if (line.endsWith('\r')) line = line.slice(0, -1);
+        if (line === '') return dispatchEvent(); // Blank line ends an event
+        if (line.startsWith(':')) return; // Comment / keep-alive
+        if (line.startsWith('data:')) {
+            isSSE = true;
+            dataLines.push(line.slice(5).replace(/^ /, ''));
+        }
+        // event:, id: and retry: fields are not used by the proxy
+    };
+
+    try {
+        while (!finished) {
+            const { done, value } = await reader.read();
+            if (done) break;
+
+            const chunkText = decoder.decode(value, { stream: true });
+            if (!isSSE) raw += chunkText;
+            buffer += chunkText;
+
+            const lines = buffer.split('\n');
+            buffer = lines.pop(); // Keep incomplete line
+            lines.forEach(processLine);
+        }
+        buffer += decoder.decode();
+        if (buffer) processLine(buffer);
+        dispatchEvent();
+    } finally {
+        signal.removeEventListener('abort', onAbort);
+    }
+
+    if (signal.aborted) throw new DOMException("Generation stopped", "AbortError");
+    return isSSE ? text : parseCompletionBody(raw);
+}
+
+function parseCompletionBody(rawText) {
+    try {
+        const data = JSON.parse(rawText);
+        if (data.error) throw new Error(data.error);
+        if (data.choices && data.choices[0] && data.choices[0].message) {
+            return data.choices[0].message.content || "";
+        }
+    } catch (e) {
+        if (!(e instanceof SyntaxError)) throw e;
+        console.error("JSON Parse Error:", e);
     }
+    // Fallback: Use raw text if it looks like content (dangerous but better than crash)
+    if (rawText.length > 0 && !rawText.startsWith("{")) return rawText;
+    throw new Error("Failed to parse AI response: Invalid JSON.");
+}
+
+function formatSeconds(ms) {
+    return `${(ms / 1000).toFixed(ms < 10000 ? 2 : 1)}s`;
 }
 
 function stopGeneration() {
@@ -439,61 +675,130 @@ function stopGeneration() {
     }
 }
 
+// Sensitive files never leave the device
+const CONTEXT_BLACKLIST = ['.env', 'firebase-auth.js', 'secrets.py', 'config.js', 'keys.json'];
+
+// Relevance-ranked, token-budgeted project context (see context-packer.js)
 function getProjectContext(prompt) {
-    if (!appState || !appState.files) return {};
+    if (!appState || !appState.files) return { files: {}, partial: [], tokens: 0, budget: 0 };
 
-    const MAX_CHARS = 50000; // Limit payload
-    let currentChars = 0;
-    const filtered = {};
     const allFiles = Object.keys(appState.files);
+    const candidates = {};
+    allFiles.forEach(file => {
+        if (!CONTEXT_BLACKLIST.includes(file.split('/').pop())) candidates[file] = appState.files[file];
+    });
 
-    // 1. Always include active file
-    const activeFile = appState.currentFile;
-    if (activeFile && appState.files[activeFile]) {
-        filtered[activeFile] = appState.files[activeFile];
-        currentChars += filtered[activeFile].length;
-    }
+    return packContext(candidates, {
+        prompt,
+        activeFile: appState.currentFile,
+        budget: getContextTokenBudget(),
+        allPaths: allFiles
+    });
+}
 
-    // 2. Scan prompt for filenames (Basic Heuristic)
-    if (prompt) {
-        const lowerPrompt = prompt.toLowerCase();
-        allFiles.forEach(file => {
-            if (file === activeFile) return;
+// --- Content-Addressed Context Upload ---
+// Files are sent as SHA-256 references. The proxy keeps recently uploaded blobs
+// per session, so a file's content only goes over the wire when it changed (or
+// when the proxy answers 409 with the hashes it no longer has).
+
+const PROXY_URL = "/.netlify/functions/ai-workspace-proxy";
+const MAX_RETRY_AFTER_MS = 30000; // Longer waits are reported instead of retried
+
+// Delay requested by a "busy" response (429 / 503 with Retry-After), or null
+function retryAfterMs(response) {
+    if (response.status !== 429 && response.status !== 503) return null;
+    const header = response.headers.get('Retry-After');
+    if (header === null) return null;
+    const seconds = Number(header);
+    const ms = Number.isFinite(seconds) ? seconds * 1000 : Date.parse(header) - Date.now();
+    return Number.isFinite(ms) ? Math.max(ms, 0) : null;
+}
+const COMPRESS_MIN_BYTES = 1024;
+let lastUploadBytes = 0; // Size of the latest workspace request body
 
-            const name = file.split('/').pop();
-            const nameNoExt = name.split('.')[0];
+const contextSession = {
+    id: null, // Created on first use
+    uploaded: new Set(), // hashes the proxy should already have
+    hashes: new Map() // path -> { content, hash }
+};
 
-            // If filename referenced
-            if (lowerPrompt.includes(name.toLowerCase()) || (nameNoExt.length > 2 && lowerPrompt.includes(nameNoExt.toLowerCase()))) {
-                 if (currentChars + appState.files[file].length < MAX_CHARS) {
-                     filtered[file] = appState.files[file];
-                     currentChars += filtered[file].length;
-                 }
-            }
-        });
+// crypto.randomUUID and crypto.subtle only exist in secure contexts (https,
+// localhost); on a plain-http LAN host (server_preview.py) they are missing
+function contextSessionId() {
+    if (!contextSession.id) {
+        contextSession.id = globalThis.crypto?.randomUUID
+            ? crypto.randomUUID()
+            : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}${Math.random().toString(36).slice(2)}`;
     }
+    return contextSession.id;
+}
 
-    // 3. Fill remaining space with other files (excluding sensitive ones)
-    const BLACKLIST = ['.env', 'firebase-auth.js', 'secrets.py', 'config.js', 'keys.json'];
+async function sha256Hex(text) {
+    const digest = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(text));
+    return Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, '0')).join('');
+}
 
-    for (const file of allFiles) {
-        if (filtered[file]) continue;
+async function hashContextFiles(files) {
+    const refs = {};
+    for (const [path, content] of Object.entries(files)) {
+        let entry = contextSession.hashes.get(path);
+        if (!entry || entry.content !== content) {
+            entry = { content, hash: await sha256Hex(content) };
+            contextSession.hashes.set(path, entry);
+        }
+        refs[path] = entry.hash;
+    }
+    return refs;
+}
 
-        // Security Check: Skip blacklisted files
-        const filename = file.split('/').pop();
-        if (BLACKLIST.includes(filename)) continue;
+// JSON body, gzip-compressed when the browser supports CompressionStream
+async function encodeRequestBody(payload) {
+    const json = JSON.stringify(payload);
+    const headers = { "Content-Type": "application/json" };
+    if (typeof CompressionStream === 'undefined' || json.length < COMPRESS_MIN_BYTES) {
+        return { body: json, headers, size: json.length };
+    }
+    const compressed = new Blob([json]).stream().pipeThrough(new CompressionStream('gzip'));
+    const body = await new Response(compressed).arrayBuffer();
+    headers["Content-Encoding"] = "gzip";
+    return { body, headers, size: body.byteLength };
+}
 
-        const content = appState.files[file];
-        if (currentChars + content.length < MAX_CHARS) {
-            filtered[file] = content;
-            currentChars += content.length;
-        }
+async function postWithContext(payload, contextFiles, signal) {
+    if (!globalThis.crypto?.subtle) {
+        // No SHA-256 for hash references: send the files inline
+        const { body, headers, size } = await encodeRequestBody({ ...payload, files: contextFiles });
+        lastUploadBytes = size;
+        return fetch(PROXY_URL, { method: "POST", headers, body, signal });
     }
+    const fileRefs = await hashContextFiles(contextFiles);
+
+    const send = async (hashes) => {
+        const blobs = {};
+        for (const [path, hash] of Object.entries(fileRefs)) {
+            if (hashes.has(hash)) blobs[hash] = contextFiles[path];
+        }
+        const { body, headers, size } = await encodeRequestBody({
+            ...payload,
+            session: contextSessionId(),
+            fileRefs,
+            blobs
+        });
+        console.log(`Context upload: ${Object.keys(blobs).length}/${Object.keys(fileRefs).length} files, ${(size / 1024).toFixed(1)} KB request`);
+        lastUploadBytes = size;
+        const response = await fetch(PROXY_URL, { method: "POST", headers, body, signal });
+        Object.keys(blobs).forEach(h => contextSession.uploaded.add(h));
+        return response;
+    };
 
-    // 4. Inject Full Project Tree (so AI knows about omitted files)
-    filtered['__project_structure__.txt'] = allFiles.join('\n');
+    const unsent = new Set(Object.values(fileRefs).filter(h => !contextSession.uploaded.has(h)));
+    const response = await send(unsent);
+    if (response.status !== 409) return response;
 
-    return filtered;
+    // Proxy instance lost some blobs (expired or cold start): upload exactly those
+    const { missing = [] } = await response.json().catch(() => ({}));
+    missing.forEach(h => contextSession.uploaded.delete(h));
+    return send(new Set(missing));
 }
 
 // --- Agent Flow & UI ---
@@ -616,7 +921,8 @@ async function handleAgentExecution(response) {
         agentLoopActive = true;
 
         // --- File Operation Guard ---
-        const allFiles = Object.keys(data.files || {});
+        const edits = data.edits || {};
+        const allFiles = [...new Set([...Object.keys(data.files || {}), ...Object.keys(edits)])];
         const currentFile = appState.currentFile;
 
         // STRICT FILTER: Only allow modification of the currently open file
@@ -628,6 +934,7 @@ async function handleAgentExecution(response) {
             addSystemMessage(`Security: Blocked modification of ${blockedFiles.length} files (${blockedList}). AI can only modify the active file: ${currentFile}`);
         }
 
+        const failedPatches = [];
         if (filesToModify.length > 0) {
             addSystemMessage(`Agent Action: Updating active file (${currentFile})...`);
 
@@ -635,26 +942,55 @@ async function handleAgentExecution(response) {
             const BLACKLIST = ['.env', 'firebase-auth.js', 'secrets.py', 'config.js', 'keys.json'];
 
             for (const filename of filesToModify) {
-                const content = data.files[filename];
-
                 // Security Check (Redundant but safe)
                 if (BLACKLIST.some(b => filename.endsWith(b))) {
                     addSystemMessage(`Security Alert: Blocked write to ${filename}`);
                     continue;
                 }
 
+                // The editor holds the authoritative (possibly unsaved) text of the active file
+                const current = appState.editor ? appState.editor.state.doc.toString() : (appState.files[filename] || '');
+                const fullContent = typeof data.files?.[filename] === 'string' ? data.files[filename] : null;
+                let content = null;
+                let changes = null;
+
+                // Search/replace hunks first; full content only when they don't apply
+                if (edits[filename]) {
+                    const patch = applyPatch(current, edits[filename]);
+                    if (patch.ok) {
+                        content = patch.content;
+                        changes = patch.changes;
+                    } else if (fullContent === null) {
+                        failedPatches.push(`${filename} (${describeConflicts(patch.conflicts)})`);
+                        continue;
+                    } else {
+                        addSystemMessage(`Patch for ${filename} did not apply (${describeConflicts(patch.conflicts)}). Using full content.`);
+                    }
+                }
+                if (changes === null) {
+                    if (fullContent === null) continue;
+                    content = fullContent;
+                    changes = diffToChange(current, content);
+                }
+
                 // Update State
                 appState.files[filename] = content;
 
-                // Update Editor (Always active by definition of filter)
-                if (appState.editor) {
-                        appState.editor.dispatch({
-                        changes: {from: 0, to: appState.editor.state.doc.length, insert: content}
-                    });
+                // Update Editor with only the changed ranges (keeps cursor, scroll and undo granular)
+                if (appState.editor && changes.length > 0) {
+                    appState.editor.dispatch({ changes });
                 }
             }
         }
 
+        if (failedPatches.length > 0) {
+            // Nothing useful to run: ask for the whole file instead
+            agentRetryCount++;
+            addSystemMessage(`Agent Action: Patch failed for ${failedPatches.join(', ')}. Requesting full file...`);
+            sendFollowUp(`Patch Failed: the edits for ${failedPatches.join(', ')} could not be applied. The file may have changed or the search text was not unique. Resend this change as a \`json_agent\` with the complete file content in "files".`);
+            return;
+        }
+
         // Trigger UI Refresh via Event
         // script.js should listen to this? Actually script.js polls or we can trigger a save.
         // Forcing a "files updated" event might help if we add a listener elsewhere.
@@ -667,17 +1003,20 @@ async function handleAgentExecution(response) {
             if (window.cmdRunCodeWithCallback) {
                 // Pass Inputs if any
                 const inputs = data.inputs || [];
-                const result = await window.cmdRunCodeWithCallback(inputs);
+                const runSource = appState.editor ? appState.editor.state.doc.toString() : (appState.files[currentFile] || '');
+                finishInputPrediction();
+                if (inputs.length === 0 && /\binput\s*\(/.test(runSource)) startInputPrediction(runSource);
 
-                // Collect Output
-                const stdout = result.logs.filter(l => l.type === 'stdout' || l.type === 'input-echo').map(l => l.content).join('');
-                const stderr = result.logs.filter(l => l.type === 'stderr').map(l => l.content).join('');
+                const startedAt = performance.now();
+                const result = await window.cmdRunCodeWithCallback(inputs);
+                finishInputPrediction();
 
-                // Feedback Loop: Send Output back to AI
+                // Feedback Loop: Send a bounded summary of the output back to AI
                 agentRetryCount++;
-                const feedback = `Execution Result:\n[STDOUT]\n${stdout}\n[STDERR]\n${stderr}\n\nAnalyze this output. Explain the behavior clearly. If there is an error or unexpected output, provide a \`json_agent\` fix. If it worked as expected, just explain the logic flow.`;
+                const summary = buildRunFeedback(result, { durationMs: performance.now() - startedAt, inputs });
+                const feedback = `${summary}\nAnalyze this output. Explain the behavior clearly. If there is an error or unexpected output, provide a \`json_agent\` fix. If it worked as expected, just explain the logic flow.`;
 
-                handleSend(feedback);
+                sendFollowUp(feedback);
 
             } else {
                 addSystemMessage("Error: Agent cannot run code (Internal Error).");
@@ -723,7 +1062,7 @@ function updateMessageContent(id, content) {
 
         const contentDiv = div.querySelector('.message-content');
         if (contentDiv) {
-            contentDiv.innerHTML = renderMarkdown(content);
+            renderMarkdownInto(contentDiv, content);
         }
         div.classList.remove('opacity-75');
 
@@ -741,7 +1080,33 @@ function updateMessageContent(id, content) {
     }
 }
 
-function updateContextBadge(files = null) {
+// Lightweight update while tokens are arriving (no copy button / raw-content churn)
+function renderStreamingContent(id, content) {
+    const div = document.getElementById(id);
+    if (!div) return;
+    const contentDiv = div.querySelector('.message-content');
+    if (contentDiv) renderMarkdownInto(contentDiv, content, { streaming: true });
+    div.classList.remove('opacity-75');
+    scrollToBottom();
+}
+
+function setMessageMeta(id, text) {
+    const div = document.getElementById(id);
+    if (!div) return;
+    let meta = div.querySelector('.ai-msg-meta');
+    if (!meta) {
+        meta = document.createElement('div');
+        meta.className = "ai-msg-meta text-[10px] text-muted font-mono mt-2 opacity-70";
+        div.appendChild(meta);
+    }
+    meta.textContent = text;
+}
+
+function formatTokens(n) {
+    return n >= 1000 ? `${(n / 1000).toFixed(1)}k` : String(n);
+}
+
+function updateContextBadge(context = null, history = null) {
     if (!els.contextBadge) return;
 
     if (!appState || !appState.files) {
@@ -749,10 +1114,19 @@ function updateContextBadge(files = null) {
         return;
     }
 
-    // If files not provided, calculate default context (e.g. active file only)
-    const contextFiles = files || getProjectContext("");
-    const fileCount = Object.keys(contextFiles).filter(k => k !== '__project_structure__.txt').length;
-    els.contextBadge.textContent = `${fileCount} Files Context`;
+    // If context not provided, calculate the default (no prompt: ranked by proximity to the active file)
+    const packed = context || getProjectContext("");
+    const fileCount = Object.keys(packed.files).filter(k => k !== STRUCTURE_FILE).length;
+    const historyTokens = history ? history.tokens : 0;
+    els.contextBadge.textContent = `${fileCount} Files · ~${formatTokens(packed.tokens + historyTokens)} tokens`;
+
+    const details = [`Files: ~${packed.tokens.toLocaleString()} / ${packed.budget.toLocaleString()} tokens`];
+    if (packed.partial.length) details.push(`${packed.partial.length} files summarized`);
+    if (history) {
+        details.push(`Chat: ~${history.tokens.toLocaleString()} tokens (${history.messages.length} messages verbatim${history.folded ? `, ${history.folded} summarized` : ''})`);
+    }
+    if (lastUploadBytes) details.push(`Last upload: ${(lastUploadBytes / 1024).toFixed(1)} KB`);
+    els.contextBadge.title = details.join('\n');
 }
 
 // --- Edit Mode Logic ---
@@ -780,7 +1154,7 @@ function enterEditMode(msgEl) {
     btnCancel.textContent = "Cancel";
     btnCancel.onclick = () => {
         // Revert
-        contentDiv.innerHTML = renderMarkdown(rawContent);
+        renderMarkdownInto(contentDiv, rawContent);
         contentDiv.style.display = 'block';
         editContainer.remove();
         msgEl.querySelector('.ai-msg-actions').style.display = ''; // Show actions again
@@ -875,7 +1249,7 @@ async function saveChatToStorage() {
         messages: chatHistory // Store full array of {role, content}
     };
 
-    saveChatSession(chatSession);
+    await saveChatSession(chatSession);
     addSystemMessage("Chat Saved to Sidebar.");
 }
 
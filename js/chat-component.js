@@ -1,4 +1,4 @@
-import { renderMarkdown } from "./markdown-renderer.js";
+import { renderMarkdownInto } from "./markdown-renderer.js";
 
 /**
  * Creates a chat message DOM element.
@@ -88,7 +88,7 @@ export function createMessageElement(role, content, options = {}) {
          contentDiv.innerHTML = '<div class="flex items-center gap-2"><i class="fa-solid fa-circle-notch fa-spin"></i> Analyzing Project...</div>';
          div.classList.add('opacity-75');
     } else {
-         contentDiv.innerHTML = renderMarkdown(content);
+         renderMarkdownInto(contentDiv, content);
     }
 
     div.appendChild(contentDiv);
@@ -106,8 +106,7 @@ export async function handleMessageClick(e, callbacks = {}) {
     // Copy Code Block
     const btnCopyCode = e.target.closest('.btn-copy-code');
     if (btnCopyCode) {
-        const targetId = btnCopyCode.getAttribute('data-target');
-        const codeEl = document.getElementById(targetId);
+        const codeEl = btnCopyCode.closest('.code-block-wrapper')?.querySelector('pre code');
         if (codeEl) {
             await copyToClipboard(codeEl.textContent, btnCopyCode);
         }
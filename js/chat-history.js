@@ -0,0 +1,170 @@
+// Conversation History Compaction
+// chatHistory keeps every message verbatim (saving, editing and replay need it).
+// What goes upstream is a compacted view: the last KEEP_TURNS turns verbatim,
+// older turns folded into a rolling summary written by a cheap model call, and
+// bulky tool outputs / agent file dumps replaced with digests. Token counts are
+// cached per message so accounting stays cheap as the chat grows.
+
+import { estimateTokens } from "./context-packer.js";
+
+const KEEP_TURNS = 4; // Most recent user turns sent verbatim
+const DIGEST_MIN_TOKENS = 400; // Older tool outputs above this are digested
+const DIGEST_HEAD_LINES = 12;
+const DIGEST_TAIL_LINES = 12;
+const FALLBACK_MESSAGES = 20; // Folded messages quoted while no summary exists yet
+const FALLBACK_CHARS = 300; // ... each cut to this length
+
+const TOOL_OUTPUT_PREFIX = "Execution Result:";
+
+const tokenCache = new WeakMap(); // message -> { content, tokens }
+const digestCache = new WeakMap(); // message -> { content, digest }
+
+// Rolling summary of the first `count` messages; `key` detects edits to them
+let summary = { count: 0, key: '', text: '' };
+let summarizing = false;
+
+// FNV-1a (32-bit) over roles and contents
+function prefixKey(messages, count) {
+    let h = 0x811c9dc5;
+    for (let m = 0; m < count; m++) {
+        const str = messages[m].role + '\u0000' + messages[m].content + '\u0001';
+        for (let i = 0; i < str.length; i++) {
+            h ^= str.charCodeAt(i);
+            h = Math.imul(h, 0x01000193);
+        }
+    }
+    return (h >>> 0).toString(16) + ':' + count;
+}
+
+export function messageTokens(message) {
+    const cached = tokenCache.get(message);
+    if (cached && cached.content === message.content) return cached.tokens;
+    const tokens = estimateTokens(message.content || "") + 4; // + role/framing overhead
+    tokenCache.set(message, { content: message.content, tokens });
+    return tokens;
+}
+
+// Index of the first message of the last `keepTurns` user turns
+function foldIndex(messages, keepTurns) {
+    let turns = 0;
+    for (let i = messages.length - 1; i >= 0; i--) {
+        if (messages[i].role === 'user' && ++turns === keepTurns) return i;
+    }
+    return 0;
+}
+
+// --- Digests ---
+
+function truncateLines(text) {
+    const lines = text.split('\n');
+    if (lines.length <= DIGEST_HEAD_LINES + DIGEST_TAIL_LINES) {
+        return text.length > 4000 ? `${text.slice(0, 2000)}\n... [${text.length - 4000} chars omitted] ...\n${text.slice(-2000)}` : text;
+    }
+    const omitted = lines.length - DIGEST_HEAD_LINES - DIGEST_TAIL_LINES;
+    return lines.slice(0, DIGEST_HEAD_LINES)
+        .concat([`... [${omitted} lines omitted] ...`], lines.slice(-DIGEST_TAIL_LINES))
+        .join('\n');
+}
+
+// Agent responses carry whole files; older ones only need to say what was written
+function digestAgentResponse(content) {
+    return content.replace(/```json_agent\s*([\s\S]*?)\s*```/g, (block, json) => {
+        try {
+            const data = JSON.parse(json);
+            Object.keys(data.files || {}).forEach(path => {
+                const lines = String(data.files[path]).split('\n').length;
+                data.files[path] = `<${lines} lines written; current content is in the project context>`;
+            });
+            Object.keys(data.edits || {}).forEach(path => {
+                const hunks = Array.isArray(data.edits[path]) ? data.edits[path].length : 0;
+                data.edits[path] = `<${hunks} hunks applied; current content is in the project context>`;
+            });
+            return "```json_agent\n" + JSON.stringify(data, null, 2) + "\n```";
+        } catch (e) {
+            return block;
+        }
+    });
+}
+
+function digestMessage(message) {
+    const cached = digestCache.get(message);
+    if (cached && cached.content === message.content) return cached.digest;
+
+    let digest = message;
+    if (messageTokens(message) > DIGEST_MIN_TOKENS) {
+        let content = message.content;
+        if (message.role === 'user' && content.startsWith(TOOL_OUTPUT_PREFIX)) {
+            content = truncateLines(content);
+        } else if (message.role === 'assistant' && content.includes("```json_agent")) {
+            content = digestAgentResponse(content);
+        }
+        if (content !== message.content) digest = { role: message.role, content };
+    }
+    digestCache.set(message, { content: message.content, digest });
+    return digest;
+}
+
+function fallbackSummary(messages) {
+    const quoted = messages.slice(-FALLBACK_MESSAGES).map(m => {
+        const text = digestMessage(m).content.replace(/\s+/g, ' ').trim();
+        return `${m.role}: ${text.length > FALLBACK_CHARS ? text.slice(0, FALLBACK_CHARS) + '…' : text}`;
+    });
+    const skipped = messages.length - quoted.length;
+    return (skipped > 0 ? `(${skipped} earlier messages omitted)\n` : '') + quoted.join('\n');
+}
+
+// --- Public API ---
+
+/**
+ * Compacted view of the conversation for the next request.
+ * @param {Array<{role: string, content: string}>} messages - Full history (ends with the new user message).
+ * @returns {{ messages: Array, summary: string, folded: number, tokens: number }}
+ */
+export function compactHistory(messages) {
+    const start = foldIndex(messages, KEEP_TURNS);
+    const recent = messages.slice(start);
+    // The newest message is always verbatim; older tool outputs and agent dumps are digested
+    const sent = recent.map((m, i) => i === recent.length - 1 ? m : digestMessage(m));
+
+    let text = '';
+    if (start > 0) {
+        const valid = summary.count > 0 && summary.count <= start && summary.key === prefixKey(messages, summary.count);
+        if (valid) {
+            text = summary.text;
+            if (summary.count < start) text += '\n' + fallbackSummary(messages.slice(summary.count, start));
+        } else {
+            text = fallbackSummary(messages.slice(0, start));
+        }
+    }
+
+    const tokens = sent.reduce((sum, m) => sum + messageTokens(m), 0) + estimateTokens(text);
+    return { messages: sent, summary: text, folded: start, tokens };
+}
+
+/**
+ * Brings the rolling summary up to date for the next turn, in the background.
+ * @param {Array} messages - Full history after a completed response.
+ * @param {function} summarize - async (previousSummary, messages) -> summary text.
+ */
+export async function refreshSummary(messages, summarize) {
+    if (summarizing) return;
+    // The next request adds a user message, which pushes one more turn out of the window
+    const target = foldIndex(messages.concat([{ role: 'user', content: '' }]), KEEP_TURNS);
+    if (target === 0 || summary.count === target) return;
+
+    const extend = summary.count > 0 && summary.count < target && summary.key === prefixKey(messages, summary.count);
+    const from = extend ? summary.count : 0;
+    const snapshot = messages.slice(0, target);
+
+    summarizing = true;
+    try {
+        const text = await summarize(extend ? summary.text : '', snapshot.slice(from).map(digestMessage));
+        if (text) summary = { count: target, key: prefixKey(snapshot, target), text: text.trim() };
+    } finally {
+        summarizing = false;
+    }
+}
+
+export function resetHistorySummary() {
+    summary = { count: 0, key: '', text: '' };
+}
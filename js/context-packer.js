@@ -0,0 +1,355 @@
+// Context Packer
+// Chooses what project code goes into an AI request. Files are split into chunks
+// at function / class boundaries (line ranges from the symbol index), chunks are
+// ranked by BM25 relevance to the prompt plus import-graph proximity to the
+// active file, and the best ones are packed into a model-specific token budget.
+// Code that doesn't fit is kept as signature-only stubs instead of being dropped.
+
+import { symbolIndex } from "./symbol-index.js";
+
+export const STRUCTURE_FILE = '__project_structure__.txt';
+
+const MAX_CHUNK_TOKENS = 800; // Larger classes are split into header + methods
+const WINDOW_LINES = 60; // Chunk size for files without symbols
+const STRUCTURE_SHARE = 0.1; // Max share of the budget for the project file list
+const SUMMARY_SHARE = 0.3; // Budget share kept back for signature stubs
+const MARKER_TOKENS = 10; // Cost of an "... lines a-b omitted" marker
+
+// Ranking weights
+const RELEVANCE_WEIGHT = 2; // Best BM25 match scores this much
+const PROXIMITY_WEIGHT = 1.5; // Active file scores this much, halving per import hop
+const MENTION_BOOST = 1; // File name appears in the prompt
+
+// BM25 parameters (same as search-worker.js)
+const K1 = 1.2;
+const B = 0.75;
+
+// --- Token Estimation ---
+
+// Rough BPE estimate: words cost ~1 token per 4 characters, digits per 3,
+// every symbol one token, and a whitespace run (newline + indent) about one.
+export function estimateTokens(text) {
+    if (!text) return 0;
+    let tokens = 0;
+    const pieces = text.match(/[A-Za-z_]+|\d+|\s+|[^\sA-Za-z_\d]/g) || [];
+    for (const piece of pieces) {
+        const c = piece.charCodeAt(0);
+        if (c === 32 || c === 9 || c === 10 || c === 13) {
+            if (piece.length > 1 || c === 10) tokens++;
+        } else if (c >= 48 && c <= 57) {
+            tokens += Math.ceil(piece.length / 3);
+        } else {
+            // Word runs; a symbol is always a single character
+            tokens += Math.ceil(piece.length / 4);
+        }
+    }
+    return tokens;
+}
+
+// Lowercased words; snake_case identifiers also yield their parts (as in search-worker.js)
+function tokenize(text) {
+    const out = [];
+    const words = text.toLowerCase().match(/[a-z0-9_]+/g) || [];
+    for (const word of words) {
+        if (word.length >= 2) out.push(word);
+        if (word.includes('_')) {
+            for (const part of word.split('_')) {
+                if (part.length >= 2) out.push(part);
+            }
+        }
+    }
+    return out;
+}
+
+// --- Chunking ---
+
+// stub: signature-only stand-in for the chunk (null if it has nothing worth keeping)
+function makeChunk(path, lines, start, end, stub = null) {
+    const text = lines.slice(start - 1, end).join('\n');
+    return { path, start, end, text, tokens: estimateTokens(text), stub, stubTokens: estimateTokens(stub), score: 0 };
+}
+
+function omittedMarker(path, start, end) {
+    return `${path.endsWith('.py') ? '# ' : ''}... lines ${start}-${end} omitted`;
+}
+
+function indentOf(line) {
+    return (line || '').match(/^\s*/)[0];
+}
+
+function functionStub(lines, sym) {
+    const head = (lines[sym.line - 1] || '').trim().startsWith('async ') ? 'async def' : 'def';
+    const doc = sym.doc ? `  # ${sym.doc}` : '';
+    return `${indentOf(lines[sym.line - 1])}${head} ${sym.name}${sym.signature || '()'}: ...${doc}`;
+}
+
+function classHeader(lines, sym) {
+    const doc = sym.doc ? `  # ${sym.doc}` : '';
+    return `${indentOf(lines[sym.line - 1])}class ${sym.name}${sym.signature || ''}:${doc}`;
+}
+
+// Decorators belong to the definition below them
+function defStart(lines, sym, floor) {
+    let start = sym.line;
+    while (start - 1 > floor && lines[start - 2].trim().startsWith('@')) start--;
+    return start;
+}
+
+function windowChunks(path, lines) {
+    const chunks = [];
+    for (let start = 1; start <= lines.length; start += WINDOW_LINES) {
+        chunks.push(makeChunk(path, lines, start, Math.min(lines.length, start + WINDOW_LINES - 1)));
+    }
+    return chunks;
+}
+
+// Module-level code between definitions; its stub keeps the import lines
+function gapChunks(path, lines, start, end) {
+    if (end < start) return [];
+    const body = lines.slice(start - 1, end);
+    if (!body.some(l => l.trim())) return [];
+    const imports = body.filter(l => /^(from\s+\S+\s+)?import\s/.test(l));
+    return [makeChunk(path, lines, start, end, imports.length ? imports.join('\n') : null)];
+}
+
+function chunkFile(path, content) {
+    const lines = content.split('\n');
+    const symbols = symbolIndex.getSymbols(path);
+    const defs = symbols.filter(s => !s.parent && (s.kind === 'function' || s.kind === 'class') && s.end);
+    if (!defs.length) return windowChunks(path, lines);
+
+    const chunks = [];
+    let cursor = 1;
+    for (const def of defs) {
+        const start = defStart(lines, def, cursor - 1);
+        if (start < cursor) continue; // Overlapping (e.g. redefined in an if/else)
+        chunks.push(...gapChunks(path, lines, cursor, start - 1));
+
+        const methods = def.kind === 'class'
+            ? symbols.filter(s => s.parent === def.name && s.kind === 'method' && s.line > def.line && s.end <= def.end)
+            : [];
+        const whole = makeChunk(path, lines, start, def.end,
+            def.kind === 'class'
+                ? [classHeader(lines, def)].concat(methods.map(m => functionStub(lines, m))).join('\n') + (methods.length ? '' : ' ...')
+                : functionStub(lines, def));
+
+        if (whole.tokens <= MAX_CHUNK_TOKENS || !methods.length) {
+            chunks.push(whole);
+        } else {
+            // Big class: header (class line, docstring, class attributes) + one chunk per method
+            let inner = start;
+            for (const method of methods) {
+                const mStart = defStart(lines, method, inner - 1);
+                if (mStart < inner) continue;
+                if (mStart > inner) {
+                    chunks.push(makeChunk(path, lines, inner, mStart - 1, inner === start ? classHeader(lines, def) : null));
+                }
+                chunks.push(makeChunk(path, lines, mStart, method.end, functionStub(lines, method)));
+                inner = method.end + 1;
+            }
+            if (inner <= def.end) chunks.push(makeChunk(path, lines, inner, def.end));
+        }
+        cursor = def.end + 1;
+    }
+    chunks.push(...gapChunks(path, lines, cursor, lines.length));
+    return chunks;
+}
+
+// --- Ranking ---
+
+function scoreChunks(chunks, prompt, activeFile) {
+    const queryTokens = Array.from(new Set(tokenize(prompt || '')));
+
+    if (queryTokens.length) {
+        const query = new Set(queryTokens);
+        const docFreq = new Map();
+        let totalLength = 0;
+        const stats = chunks.map(chunk => {
+            const words = tokenize(chunk.text);
+            totalLength += words.length;
+            const tf = new Map();
+            words.forEach(w => { if (query.has(w)) tf.set(w, (tf.get(w) || 0) + 1); });
+            tf.forEach((_, w) => docFreq.set(w, (docFreq.get(w) || 0) + 1));
+            return { length: words.length, tf };
+        });
+
+        const avgLength = totalLength / Math.max(1, chunks.length);
+        const n = chunks.length;
+        let best = 0;
+        const bm25 = stats.map(({ length, tf }) => {
+            let score = 0;
+            tf.forEach((f, w) => {
+                const df = docFreq.get(w);
+                const idf = Math.log(1 + (n - df + 0.5) / (df + 0.5));
+                score += idf * (f * (K1 + 1)) / (f + K1 * (1 - B + B * length / Math.max(1, avgLength)));
+            });
+            best = Math.max(best, score);
+            return score;
+        });
+        if (best > 0) chunks.forEach((chunk, i) => { chunk.score += RELEVANCE_WEIGHT * bm25[i] / best; });
+    }
+
+    const distances = activeFile && activeFile.endsWith('.py')
+        ? symbolIndex.importDistances(activeFile)
+        : new Map(activeFile ? [[activeFile, 0]] : []);
+
+    const lowerPrompt = (prompt || '').toLowerCase();
+    const mentioned = new Map();
+    const isMentioned = (path) => {
+        if (!mentioned.has(path)) {
+            const name = path.split('/').pop().toLowerCase();
+            const stem = name.split('.')[0];
+            mentioned.set(path, !!lowerPrompt && (lowerPrompt.includes(name) || (stem.length > 2 && lowerPrompt.includes(stem))));
+        }
+        return mentioned.get(path);
+    };
+
+    chunks.forEach(chunk => {
+        if (distances.has(chunk.path)) chunk.score += PROXIMITY_WEIGHT / Math.pow(2, distances.get(chunk.path));
+        if (isMentioned(chunk.path)) chunk.score += MENTION_BOOST;
+    });
+}
+
+// --- Packing ---
+
+function projectStructure(paths, maxTokens) {
+    let text = '';
+    let tokens = 0;
+    for (let i = 0; i < paths.length; i++) {
+        const line = (i ? '\n' : '') + paths[i];
+        const cost = estimateTokens(line);
+        if (tokens + cost > maxTokens) {
+            text += `\n... (${paths.length - i} more files)`;
+            break;
+        }
+        text += line;
+        tokens += cost;
+    }
+    return text;
+}
+
+// Decide which chunks go in full and which as stubs within `limit` tokens
+function selectChunks(ranked, limit) {
+    // Each kept chunk may be followed by one omitted-run marker
+    const full = new Set();
+    const stubbed = new Set();
+    let used = 0;
+    const take = (set, chunk, cost, max) => {
+        if (used + cost + MARKER_TOKENS > max) return false;
+        set.add(chunk);
+        used += cost + MARKER_TOKENS;
+        return true;
+    };
+
+    // 1. Best chunks in full, keeping a share of the budget back for stubs
+    ranked.forEach(c => take(full, c, c.tokens, limit * (1 - SUMMARY_SHARE)));
+    // 2. Signature stubs for the rest, most relevant first
+    ranked.forEach(c => { if (c.stub && !full.has(c)) take(stubbed, c, c.stubTokens, limit); });
+    // 3. Whatever is left upgrades more stubs to full chunks
+    ranked.forEach(c => {
+        if (full.has(c)) return;
+        const refund = stubbed.has(c) ? c.stubTokens + MARKER_TOKENS : 0;
+        used -= refund;
+        if (take(full, c, c.tokens, limit)) stubbed.delete(c);
+        else used += refund;
+    });
+    return { full, stubbed };
+}
+
+// Assemble packed file contents; consecutive omitted chunks collapse into one marker
+function renderPacked(ordered, files, fileTokens, chunksByFile, { full, stubbed }) {
+    const packed = {};
+    const partial = [];
+    let tokens = 0;
+    ordered.forEach(p => {
+        const chunks = chunksByFile.get(p);
+        if (chunks.every(c => full.has(c))) {
+            packed[p] = files[p];
+            tokens += fileTokens.get(p);
+            return;
+        }
+        if (!chunks.some(c => full.has(c) || stubbed.has(c))) return; // Only listed in the structure
+
+        const out = [];
+        let omittedStart = null;
+        let omittedEnd = null;
+        const flushOmitted = () => {
+            if (omittedStart !== null) out.push(omittedMarker(p, omittedStart, omittedEnd));
+            omittedStart = null;
+        };
+        chunks.forEach(c => {
+            if (full.has(c) || stubbed.has(c)) {
+                flushOmitted();
+                out.push(full.has(c) ? c.text : c.stub);
+            } else {
+                if (omittedStart === null) omittedStart = c.start;
+                omittedEnd = c.end;
+            }
+        });
+        flushOmitted();
+
+        partial.push(p);
+        packed[p] = out.join('\n');
+        tokens += estimateTokens(packed[p]);
+    });
+    return { packed, partial, tokens };
+}
+
+/**
+ * Packs project files into a token budget.
+ * @param {object} files - path -> content (already filtered for sensitive files).
+ * @param {object} options
+ * @param {string} options.prompt - Current user message (drives BM25 relevance).
+ * @param {string} options.activeFile - File open in the editor (drives import proximity).
+ * @param {number} options.budget - Token budget for all packed files.
+ * @param {string[]} [options.allPaths] - Paths listed in the project structure (defaults to files).
+ * @returns {{ files: object, partial: string[], tokens: number, budget: number }}
+ *     files maps path -> packed content (full file or chunks + stubs); partial lists
+ *     files whose content was reduced.
+ */
+export function packContext(files, { prompt = '', activeFile = null, budget, allPaths = null }) {
+    const paths = Object.keys(files);
+    const structure = projectStructure(allPaths || paths, Math.floor(budget * STRUCTURE_SHARE));
+    const structureTokens = estimateTokens(structure);
+    const available = Math.max(0, budget - structureTokens);
+
+    const fileTokens = new Map(paths.map(p => [p, estimateTokens(files[p])]));
+    let total = 0;
+    fileTokens.forEach(t => { total += t; });
+
+    const ordered = activeFile && activeFile in files
+        ? [activeFile].concat(paths.filter(p => p !== activeFile))
+        : paths;
+
+    // Everything fits: no ranking needed
+    if (total <= available) {
+        const packed = {};
+        ordered.forEach(p => { packed[p] = files[p]; });
+        packed[STRUCTURE_FILE] = structure;
+        return { files: packed, partial: [], tokens: total + structureTokens, budget };
+    }
+
+    const chunksByFile = new Map();
+    const allChunks = [];
+    paths.forEach(p => {
+        const chunks = chunkFile(p, files[p]);
+        chunksByFile.set(p, chunks);
+        allChunks.push(...chunks);
+    });
+    scoreChunks(allChunks, prompt, activeFile);
+    const ranked = allChunks.slice().sort((a, b) => b.score - a.score);
+
+    // Marker costs are reserved pessimistically, so if the first packing leaves
+    // budget unused, pack once more with the slack added back
+    let result = renderPacked(ordered, files, fileTokens, chunksByFile, selectChunks(ranked, available));
+    const slack = available - result.tokens;
+    if (slack > available * 0.05) {
+        const retry = renderPacked(ordered, files, fileTokens, chunksByFile, selectChunks(ranked, available + slack));
+        if (retry.tokens <= available) result = retry;
+    }
+
+    const packed = result.packed;
+    packed[STRUCTURE_FILE] = structure;
+
+    return { files: packed, partial: result.partial, tokens: result.tokens + structureTokens, budget };
+}
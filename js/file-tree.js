@@ -0,0 +1,108 @@
+// In-memory directory trie for the File Explorer.
+// Maintained incrementally as files are added/removed, so listing a directory
+// costs O(children) instead of a scan over every path in state.files.
+
+function createDirNode(name, path) {
+    return { name, path, isDir: true, children: new Map(), fileCount: 0, sorted: null };
+}
+
+export class FileTree {
+    constructor() {
+        this.root = createDirNode('', '');
+        this.size = 0; // Total number of files
+    }
+
+    // Rebuild from a list of paths (e.g. Object.keys(state.files))
+    reset(paths) {
+        this.root = createDirNode('', '');
+        this.size = 0;
+        paths.forEach(p => this.add(p));
+    }
+
+    has(path) {
+        const node = this._find(path);
+        return !!node && !node.isDir;
+    }
+
+    add(path) {
+        const parts = path.split('/');
+        let dir = this.root;
+        const chain = [dir];
+
+        for (let i = 0; i < parts.length - 1; i++) {
+            let child = dir.children.get(parts[i]);
+            if (!child || !child.isDir) {
+                child = createDirNode(parts[i], parts.slice(0, i + 1).join('/') + '/');
+                dir.children.set(parts[i], child);
+                dir.sorted = null;
+            }
+            dir = child;
+            chain.push(dir);
+        }
+
+        const name = parts[parts.length - 1];
+        if (dir.children.has(name)) return false;
+
+        dir.children.set(name, { name, path, isDir: false });
+        dir.sorted = null;
+        chain.forEach(d => d.fileCount++);
+        this.size++;
+        return true;
+    }
+
+    remove(path) {
+        const parts = path.split('/');
+        const chain = [this.root];
+        let dir = this.root;
+
+        for (let i = 0; i < parts.length - 1; i++) {
+            dir = dir.children.get(parts[i]);
+            if (!dir || !dir.isDir) return false;
+            chain.push(dir);
+        }
+
+        const name = parts[parts.length - 1];
+        const node = dir.children.get(name);
+        if (!node || node.isDir) return false;
+
+        dir.children.delete(name);
+        dir.sorted = null;
+        chain.forEach(d => d.fileCount--);
+        this.size--;
+
+        // Prune directories that no longer contain any files
+        for (let i = chain.length - 1; i > 0; i--) {
+            if (chain[i].fileCount > 0) break;
+            chain[i - 1].children.delete(chain[i].name);
+            chain[i - 1].sorted = null;
+        }
+        return true;
+    }
+
+    rename(oldPath, newPath) {
+        if (this.remove(oldPath)) this.add(newPath);
+    }
+
+    // Sorted entries (folders first, then by name) of a directory path like '' or 'src/'
+    list(dirPath) {
+        const dir = dirPath ? this._find(dirPath.slice(0, -1)) : this.root;
+        if (!dir || !dir.isDir) return [];
+
+        if (!dir.sorted) {
+            dir.sorted = Array.from(dir.children.values()).sort((a, b) => {
+                if (a.isDir === b.isDir) return a.name.localeCompare(b.name);
+                return a.isDir ? -1 : 1;
+            });
+        }
+        return dir.sorted;
+    }
+
+    _find(path) {
+        let node = this.root;
+        for (const part of path.split('/')) {
+            if (!node || !node.isDir) return null;
+            node = node.children.get(part);
+        }
+        return node || null;
+    }
+}
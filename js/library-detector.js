@@ -29,47 +29,120 @@ const STD_LIBS = new Set([
     "xdrlib", "xml", "xmlrpc", "zipapp", "zipfile", "zipimport", "zlib", "zoneinfo"
 ]);
 
-const MAP_OVERRIDES = {
+// Modules provided by the Pyodide runtime itself
+const RUNTIME_MODULES = new Set(["js", "pyodide", "pyodide_js", "_pyodide", "micropip"]);
+
+// Top-level import name -> distribution, for packages whose import name differs
+// from the name they are installed under
+const MODULE_INDEX = {
     'PIL': 'pillow',
     'sklearn': 'scikit-learn',
+    'skimage': 'scikit-image',
     'bs4': 'beautifulsoup4',
     'cv2': 'opencv-python',
     'yaml': 'pyyaml',
-    'dateutil': 'python-dateutil'
+    'dateutil': 'python-dateutil',
+    'dotenv': 'python-dotenv',
+    'docx': 'python-docx',
+    'pptx': 'python-pptx',
+    'jwt': 'pyjwt',
+    'Crypto': 'pycryptodome',
+    'Cryptodome': 'pycryptodomex',
+    'OpenSSL': 'pyopenssl',
+    'nacl': 'pynacl',
+    'attr': 'attrs',
+    'serial': 'pyserial',
+    'usb': 'pyusb',
+    'zmq': 'pyzmq',
+    'magic': 'python-magic',
+    'fitz': 'pymupdf',
+    'Levenshtein': 'python-levenshtein',
+    'slugify': 'python-slugify',
+    'jose': 'python-jose',
+    'multipart': 'python-multipart',
+    'telegram': 'python-telegram-bot',
+    'discord': 'discord.py',
+    'google': 'protobuf',
+    'mpl_toolkits': 'matplotlib',
+    'pkg_resources': 'setuptools',
+    'sentence_transformers': 'sentence-transformers',
+    'wx': 'wxpython',
+    'gi': 'pygobject',
+    'git': 'gitpython',
+    'github': 'pygithub',
+    'win32api': 'pywin32',
+    'websocket': 'websocket-client',
+    'faiss': 'faiss-cpu',
+    'tflite_runtime': 'tflite-runtime',
+    'Bio': 'biopython',
+    'lxml': 'lxml',
+    'markdown': 'markdown',
+    'ruamel': 'ruamel.yaml'
 };
 
-export function detectMissingLibraries(code, files, installedPackages) {
-    if (!code) return [];
+// Filled from Pyodide's lockfile (PACKAGE_INDEX message from the Python worker)
+const pyodideImports = new Map(); // import name -> Pyodide package name
+const pyodidePackages = new Set(); // lowercase Pyodide package names
 
-    const missing = new Set();
-    const installedSet = new Set(installedPackages);
+export function setPyodidePackageIndex({ imports, packages }) {
+    pyodideImports.clear();
+    pyodidePackages.clear();
+    Object.entries(imports || {}).forEach(([name, pkg]) => pyodideImports.set(name, pkg));
+    (packages || []).forEach(pkg => pyodidePackages.add(pkg.toLowerCase()));
+}
 
-    // Regex to capture 'import x' or 'from x import y'
-    const importRegex = /^\s*(?:import|from)\s+([a-zA-Z0-9_]+)/gm;
+export function hasPyodidePackageIndex() {
+    return pyodidePackages.size > 0;
+}
 
-    let match;
-    while ((match = importRegex.exec(code)) !== null) {
-        const lib = match[1];
+// Fallback when the worker's import graph isn't available: top-level module
+// names from import statements, ignoring comments and relative imports
+export function scanImports(code) {
+    const names = new Set();
+    if (!code) return [];
+
+    code.split('\n').forEach(rawLine => {
+        const line = rawLine.replace(/#.*$/, '');
+        const fromMatch = line.match(/^\s*from\s+([A-Za-z_][\w.]*)\s+import\b/);
+        if (fromMatch) {
+            names.add(fromMatch[1].split('.')[0]);
+            return;
+        }
+        const importMatch = line.match(/^\s*import\s+(.+)$/);
+        if (importMatch) {
+            importMatch[1].split(',').forEach(part => {
+                const name = part.trim().split(/\s+/)[0];
+                if (/^[A-Za-z_][\w.]*$/.test(name)) names.add(name.split('.')[0]);
+            });
+        }
+    });
+    return Array.from(names);
+}
 
-        // 1. Check Stdlib
-        if (STD_LIBS.has(lib)) continue;
+// moduleNames: top-level names of external (non-project) imports.
+// Returns [{ name, builtin }] - builtin packages ship with Pyodide and are
+// loaded with loadPackage; the rest are installed through micropip.
+export function detectMissingLibraries(moduleNames, installedPackages) {
+    const missing = new Map();
+    const installedSet = new Set(installedPackages.map(p => p.toLowerCase()));
 
-        // 2. Check Local Files
-        // Simple check: does any file match name.py
-        const isLocal = Object.keys(files).some(f => {
-            const name = f.split('/').pop();
-            return name === `${lib}.py`;
-        });
-        if (isLocal) continue;
+    moduleNames.forEach(lib => {
+        if (RUNTIME_MODULES.has(lib)) return;
 
-        // 3. Check Overrides
-        const mapped = MAP_OVERRIDES[lib] || lib;
+        // 1. Pyodide lockfile (also covers unvendored stdlib modules such as sqlite3/ssl)
+        let name = pyodideImports.get(lib);
+        if (!name) {
+            // 2. Stdlib
+            if (STD_LIBS.has(lib)) return;
+            // 3. Bundled module index
+            name = MODULE_INDEX[lib] || lib;
+        }
 
-        // 4. Check Installed
-        if (installedSet.has(mapped)) continue;
+        // 4. Installed
+        if (installedSet.has(name.toLowerCase())) return;
 
-        missing.add(mapped);
-    }
+        missing.set(name, { name, builtin: pyodidePackages.has(name.toLowerCase()) });
+    });
 
-    return Array.from(missing);
+    return Array.from(missing.values());
 }
@@ -1,5 +1,11 @@
 import { marked } from "https://esm.sh/marked";
 import DOMPurify from "https://esm.sh/dompurify";
+import { highlightTree, classHighlighter } from "https://esm.sh/@lezer/highlight";
+import { pythonLanguage } from "https://esm.sh/@codemirror/lang-python";
+import { javascriptLanguage } from "https://esm.sh/@codemirror/lang-javascript";
+import { htmlLanguage } from "https://esm.sh/@codemirror/lang-html";
+import { cssLanguage } from "https://esm.sh/@codemirror/lang-css";
+import { jsonLanguage } from "https://esm.sh/@codemirror/lang-json";
 
 // Configure Marked Renderer
 const renderer = {
@@ -22,7 +28,6 @@ const renderer = {
 
         const lang = (language || 'text').split('\n')[0];
         const validLang = lang ? lang : 'Text';
-        const id = `code-${Date.now()}-${Math.random().toString(36).substr(2, 9)}`;
 
         // Escape code content to prevent HTML rendering of code tags
         const escapedCode = code.replace(/&/g, "&amp;")
@@ -34,17 +39,23 @@ const renderer = {
         return `<div class="code-block-wrapper">
             <div class="code-block-header">
                 <span class="code-lang">${validLang}</span>
-                <button class="btn-copy-code" data-target="${id}">
+                <button class="btn-copy-code">
                     <i class="fa-regular fa-copy"></i> Copy
                 </button>
             </div>
-            <pre><code id="${id}" class="language-${lang}">${escapedCode}</code></pre>
+            <pre><code class="language-${lang}">${escapedCode}</code></pre>
         </div>`;
     }
 };
 
 marked.use({ renderer });
 
+const SANITIZE_OPTIONS = {
+    USE_PROFILES: { html: true }, // allow standard HTML
+    FORBID_TAGS: ['script', 'iframe', 'object', 'embed', 'form'], // explicitly forbid dangerous tags
+    FORBID_ATTR: ['onerror', 'onload', 'onclick', 'onmouseover'] // forbid event handlers
+};
+
 // Simple Markdown Renderer (Wrapper around marked)
 export function renderMarkdown(text) {
     // 1. Strict Type Guard
@@ -60,11 +71,7 @@ export function renderMarkdown(text) {
         const rawHtml = marked.parse(text);
 
         // Sanitize HTML (prevent XSS)
-        const cleanHtml = DOMPurify.sanitize(rawHtml, {
-            USE_PROFILES: { html: true }, // allow standard HTML
-            FORBID_TAGS: ['script', 'iframe', 'object', 'embed', 'form'], // explicitly forbid dangerous tags
-            FORBID_ATTR: ['onerror', 'onload', 'onclick', 'onmouseover'] // forbid event handlers
-        });
+        const cleanHtml = DOMPurify.sanitize(rawHtml, SANITIZE_OPTIONS);
 
         return cleanHtml;
     } catch (err) {
@@ -74,3 +81,232 @@ export function renderMarkdown(text) {
         </div>`;
     }
 }
+
+// --- Incremental Rendering ---
+// Streamed messages are re-rendered every frame. Rather than re-parsing the whole
+// text and replacing innerHTML, content is split into top-level markdown blocks;
+// blocks whose source is unchanged keep their DOM nodes (and any text selection),
+// and only the trailing blocks are re-lexed and re-rendered. Sanitized HTML of
+// finished blocks is cached by content hash, so reopening a chat is cheap too.
+
+const BLOCK_CACHE_LIMIT = 500;
+const blockCache = new Map(); // hash -> { raw, html } (Map order doubles as LRU order)
+const containerState = new WeakMap(); // container -> { text, blocks: [{ raw, tokens, nodes, highlighted }] }
+
+// Reference-style link definitions are resolved at lex time, so a text that has
+// them cannot be re-lexed from the middle and its blocks cannot be cached alone.
+const LINK_DEF_RE = /^ {0,3}\[[^\]]+\]:/m;
+
+function hashString(str) {
+    let hash = 0x811c9dc5;
+    for (let i = 0; i < str.length; i++) {
+        hash ^= str.charCodeAt(i);
+        hash = Math.imul(hash, 0x01000193);
+    }
+    return (hash >>> 0).toString(36);
+}
+
+function lexBlocks(text) {
+    const blocks = [];
+    for (const token of marked.lexer(text)) {
+        // Blank-line tokens render nothing; fold them into the preceding block
+        const prev = blocks[blocks.length - 1];
+        if (token.type === 'space' && prev) {
+            prev.raw += token.raw;
+            prev.tokens.push(token);
+            continue;
+        }
+        blocks.push({ raw: token.raw, tokens: [token], nodes: [], highlighted: false });
+    }
+    return blocks;
+}
+
+function renderBlock(block, cacheable) {
+    const hash = cacheable ? hashString(block.raw) : null;
+    if (hash) {
+        const hit = blockCache.get(hash);
+        if (hit && hit.raw === block.raw) {
+            blockCache.delete(hash);
+            blockCache.set(hash, hit);
+            return hit.html;
+        }
+    }
+
+    const tokens = block.tokens.slice();
+    tokens.links = {};
+    const html = DOMPurify.sanitize(marked.parser(tokens), SANITIZE_OPTIONS);
+
+    if (hash) {
+        blockCache.set(hash, { raw: block.raw, html });
+        if (blockCache.size > BLOCK_CACHE_LIMIT) {
+            blockCache.delete(blockCache.keys().next().value);
+        }
+    }
+    return html;
+}
+
+function isAttached(state, container) {
+    return state.blocks.every(b => b.nodes.length === 0 || b.nodes[0].parentNode === container);
+}
+
+/**
+ * Renders markdown into a container, reusing the DOM of unchanged leading blocks.
+ * @param {HTMLElement} container - Element that holds only this message's content.
+ * @param {string} text - Full markdown text.
+ * @param {object} [options]
+ * @param {boolean} [options.streaming=false] - Text is still growing; the trailing
+ *     block is neither cached nor highlighted.
+ */
+export function renderMarkdownInto(container, text, { streaming = false } = {}) {
+    if (typeof text !== 'string') {
+        containerState.delete(container);
+        container.innerHTML = renderMarkdown(text);
+        return;
+    }
+
+    try {
+        text = text.replace(/\r\n?/g, '\n');
+
+        let state = containerState.get(container);
+        if (!state || !isAttached(state, container)) {
+            container.innerHTML = '';
+            state = { text: '', blocks: [] };
+            containerState.set(container, state);
+        }
+        if (state.text === text && !streaming) {
+            queueBlockHighlights(state.blocks);
+            return;
+        }
+
+        const hasLinkDefs = LINK_DEF_RE.test(text);
+
+        // When text was only appended, everything but the last two blocks is final
+        // (the second-to-last can still turn into a setext heading or absorb a lazy
+        // list continuation), so lexing restarts at that boundary.
+        let keep = 0;
+        if (!hasLinkDefs && text.startsWith(state.text)) {
+            keep = Math.max(0, state.blocks.length - 2);
+        }
+        let prefix = '';
+        for (let i = 0; i < keep; i++) prefix += state.blocks[i].raw;
+        if (!text.startsWith(prefix)) {
+            keep = 0;
+            prefix = '';
+        }
+
+        const blocks = state.blocks.slice(0, keep).concat(lexBlocks(text.slice(prefix.length)));
+
+        // Reuse every leading block whose source did not change
+        let same = keep;
+        while (same < blocks.length && same < state.blocks.length && blocks[same].raw === state.blocks[same].raw) {
+            blocks[same] = state.blocks[same];
+            same++;
+        }
+        for (let i = same; i < state.blocks.length; i++) {
+            state.blocks[i].nodes.forEach(n => n.remove());
+        }
+
+        const template = document.createElement('template');
+        for (let i = same; i < blocks.length; i++) {
+            const trailing = streaming && i === blocks.length - 1;
+            template.innerHTML = renderBlock(blocks[i], !hasLinkDefs && !trailing);
+            blocks[i].nodes = Array.from(template.content.childNodes);
+            container.appendChild(template.content);
+        }
+
+        state.text = text;
+        state.blocks = blocks;
+        queueBlockHighlights(streaming ? blocks.slice(0, -1) : blocks);
+    } catch (err) {
+        console.error("Markdown Parsing Error:", err);
+        containerState.delete(container);
+        container.innerHTML = renderMarkdown(text);
+    }
+}
+
+// --- Idle-Time Code Highlighting ---
+// Code blocks are emitted as plain escaped text and highlighted later with the
+// same lezer parsers the editor uses, one block per idle slice.
+
+const HIGHLIGHT_PARSERS = {
+    python: pythonLanguage.parser,
+    py: pythonLanguage.parser,
+    javascript: javascriptLanguage.parser,
+    js: javascriptLanguage.parser,
+    html: htmlLanguage.parser,
+    css: cssLanguage.parser,
+    json: jsonLanguage.parser
+};
+
+const highlightQueue = [];
+let highlightScheduled = false;
+
+const requestIdle = typeof requestIdleCallback === 'function'
+    ? cb => requestIdleCallback(cb, { timeout: 1000 })
+    : cb => setTimeout(() => cb({ timeRemaining: () => 10 }), 50);
+
+function queueBlockHighlights(blocks) {
+    for (const block of blocks) {
+        if (block.highlighted) continue;
+        block.highlighted = true;
+        block.nodes.forEach(node => {
+            if (node.nodeType === Node.ELEMENT_NODE) queueCodeElements(node);
+        });
+    }
+    scheduleHighlight();
+}
+
+function queueCodeElements(root) {
+    root.querySelectorAll('pre > code[class*="language-"]').forEach(el => {
+        if (!el.dataset.highlighted) {
+            el.dataset.highlighted = 'pending';
+            highlightQueue.push(el);
+        }
+    });
+}
+
+// Highlight code blocks of markup produced by renderMarkdown()
+export function highlightCodeBlocks(root) {
+    queueCodeElements(root);
+    scheduleHighlight();
+}
+
+function scheduleHighlight() {
+    if (highlightScheduled || highlightQueue.length === 0) return;
+    highlightScheduled = true;
+    requestIdle(deadline => {
+        highlightScheduled = false;
+        do {
+            highlightElement(highlightQueue.shift());
+        } while (highlightQueue.length && deadline.timeRemaining() > 4);
+        scheduleHighlight();
+    });
+}
+
+function highlightElement(el) {
+    el.dataset.highlighted = 'true';
+    // Blocks replaced while streaming never make it to the screen
+    if (!el.isConnected) return;
+
+    const langClass = Array.from(el.classList).find(c => c.startsWith('language-'));
+    const parser = HIGHLIGHT_PARSERS[langClass.slice('language-'.length).toLowerCase()];
+    if (!parser) return;
+
+    try {
+        const code = el.textContent;
+        const fragment = document.createDocumentFragment();
+        let pos = 0;
+        highlightTree(parser.parse(code), classHighlighter, (from, to, classes) => {
+            if (from > pos) fragment.appendChild(document.createTextNode(code.slice(pos, from)));
+            const span = document.createElement('span');
+            span.className = classes;
+            span.textContent = code.slice(from, to);
+            fragment.appendChild(span);
+            pos = to;
+        });
+        if (pos < code.length) fragment.appendChild(document.createTextNode(code.slice(pos)));
+        el.replaceChildren(fragment);
+    } catch (e) {
+        console.error("Highlight Error:", e);
+    }
+}
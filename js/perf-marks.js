@@ -0,0 +1,30 @@
+// User Timing Marks
+// Named spans around the app's latency-sensitive paths (Python boot, runs,
+// lint, file switches, saved chat rendering). They show up in the DevTools
+// Performance panel and are read by tests/e2e/bench_browser.py through
+// performance.getEntriesByName("pymob:<name>", "measure").
+
+const PREFIX = "pymob:";
+
+/** Starts span `name` (a later start replaces an unfinished one). */
+export function perfStart(name) {
+    performance.mark(`${PREFIX}${name}:start`);
+}
+
+/** Ends span `name` with a measure; no-op when it was not started or already ended. */
+export function perfEnd(name) {
+    const start = `${PREFIX}${name}:start`;
+    if (performance.getEntriesByName(start, "mark").length === 0) return;
+    performance.measure(`${PREFIX}${name}`, start);
+    performance.clearMarks(start);
+}
+
+/** Drops an unfinished span (e.g. a run that printed nothing). */
+export function perfCancel(name) {
+    performance.clearMarks(`${PREFIX}${name}:start`);
+}
+
+/** Point-in-time mark, relative to navigation start. */
+export function perfMark(name) {
+    performance.mark(`${PREFIX}${name}`);
+}
@@ -1,14 +1,20 @@
 
 const DB_NAME = 'PWA_CodeEditor_State';
-const DB_VERSION = 1;
+const DB_VERSION = 2;
 
 const STORES = {
     FILES: 'files',
     EDITOR: 'editor',
     TERMINAL: 'terminal',
-    SETTINGS: 'settings'
+    SETTINGS: 'settings',
+    SESSIONS: 'sessions', // Full saved chat sessions (one record each, incl. messages)
+    SESSION_INDEX: 'session_index' // Lightweight summaries for the Saved Chats list
 };
 
+// Legacy localStorage keys for saved chats
+const LEGACY_CHATS_KEY = 'pyide_saved_chats';
+const LEGACY_SESSIONS_KEY = 'pyide_saved_sessions';
+
 let dbPromise = null;
 
 function openDB() {
@@ -31,6 +37,13 @@ function openDB() {
             if (!db.objectStoreNames.contains(STORES.SETTINGS)) {
                 db.createObjectStore(STORES.SETTINGS, { keyPath: 'id' });
             }
+            if (!db.objectStoreNames.contains(STORES.SESSIONS)) {
+                db.createObjectStore(STORES.SESSIONS, { keyPath: 'id' });
+            }
+            if (!db.objectStoreNames.contains(STORES.SESSION_INDEX)) {
+                const index = db.createObjectStore(STORES.SESSION_INDEX, { keyPath: 'id' });
+                index.createIndex('timestamp', 'timestamp');
+            }
         };
 
         request.onsuccess = (event) => {
@@ -89,6 +102,42 @@ async function remove(storeName, key) {
     });
 }
 
+// Runs `work(stores)` inside a single transaction spanning several stores.
+// Resolves once the transaction commits, so multi-store writes are atomic.
+async function withStores(storeNames, mode, work) {
+    const db = await openDB();
+    return new Promise((resolve, reject) => {
+        const tx = db.transaction(storeNames, mode);
+        const stores = {};
+        storeNames.forEach(name => stores[name] = tx.objectStore(name));
+        let result;
+        try {
+            result = work(stores);
+        } catch (e) {
+            tx.abort();
+            reject(e);
+            return;
+        }
+        tx.oncomplete = () => resolve(result);
+        tx.onerror = () => reject(tx.error);
+        tx.onabort = () => reject(tx.error);
+    });
+}
+
+// Builds the list-view summary for a saved session (never includes messages)
+function summarizeSession(session) {
+    const messages = session.messages || [];
+    const lastMsg = messages[messages.length - 1];
+    return {
+        id: session.id,
+        title: session.title,
+        timestamp: session.timestamp,
+        messageCount: messages.length,
+        preview: lastMsg ? (lastMsg.content || "").slice(0, 120) : "",
+        legacyRole: session.legacyRole || null
+    };
+}
+
 // --- Specific Operations ---
 
 export const persistence = {
@@ -162,6 +211,131 @@ export const persistence = {
         return await get(STORES.SETTINGS, 'config');
     },
 
+    // --- Saved Chat Sessions ---
+
+    saveSession: async (session) => {
+        await withStores([STORES.SESSIONS, STORES.SESSION_INDEX], 'readwrite', (stores) => {
+            stores[STORES.SESSIONS].put(session);
+            stores[STORES.SESSION_INDEX].put(summarizeSession(session));
+        });
+        return summarizeSession(session);
+    },
+
+    getSession: async (id) => {
+        return await get(STORES.SESSIONS, id);
+    },
+
+    // Returns one page of session summaries, newest first
+    listSessions: async (offset = 0, limit = 20) => {
+        const store = await getStore(STORES.SESSION_INDEX, 'readonly');
+        return new Promise((resolve, reject) => {
+            const results = [];
+            let skipped = offset === 0;
+            const request = store.index('timestamp').openCursor(null, 'prev');
+            request.onsuccess = () => {
+                const cursor = request.result;
+                if (!cursor || results.length >= limit) {
+                    resolve(results);
+                    return;
+                }
+                if (!skipped) {
+                    skipped = true;
+                    cursor.advance(offset);
+                    return;
+                }
+                results.push(cursor.value);
+                cursor.continue();
+            };
+            request.onerror = () => reject(request.error);
+        });
+    },
+
+    countSessions: async () => {
+        const store = await getStore(STORES.SESSION_INDEX, 'readonly');
+        return new Promise((resolve, reject) => {
+            const request = store.count();
+            request.onsuccess = () => resolve(request.result);
+            request.onerror = () => reject(request.error);
+        });
+    },
+
+    renameSession: async (id, title) => {
+        await withStores([STORES.SESSIONS, STORES.SESSION_INDEX], 'readwrite', (stores) => {
+            const sessionReq = stores[STORES.SESSIONS].get(id);
+            sessionReq.onsuccess = () => {
+                if (!sessionReq.result) return;
+                stores[STORES.SESSIONS].put({ ...sessionReq.result, title });
+            };
+            const indexReq = stores[STORES.SESSION_INDEX].get(id);
+            indexReq.onsuccess = () => {
+                if (!indexReq.result) return;
+                stores[STORES.SESSION_INDEX].put({ ...indexReq.result, title });
+            };
+        });
+    },
+
+    deleteSession: async (id) => {
+        await withStores([STORES.SESSIONS, STORES.SESSION_INDEX], 'readwrite', (stores) => {
+            stores[STORES.SESSIONS].delete(id);
+            stores[STORES.SESSION_INDEX].delete(id);
+        });
+    },
+
+    // Moves saved chats out of the legacy localStorage arrays (one record per session).
+    // Keys are only removed after the IndexedDB transaction has committed.
+    // Returns the migrated session records.
+    migrateSavedChatsFromLocalStorage: async () => {
+        const legacySessions = localStorage.getItem(LEGACY_SESSIONS_KEY);
+        const legacyChats = localStorage.getItem(LEGACY_CHATS_KEY);
+        if (legacySessions === null && legacyChats === null) return [];
+
+        // Older versions did not always store an id or timestamp. A record without an id
+        // makes put() throw and abort the whole transaction, and one without a timestamp
+        // is missing from the timestamp index the list reads.
+        const now = Date.now();
+        const records = [];
+        const addRecord = (entry, record) => {
+            if (!entry || typeof entry !== 'object') return;
+            records.push({
+                ...record,
+                id: entry.id ?? `legacy-${now}-${records.length}`,
+                title: entry.title,
+                timestamp: entry.timestamp ?? now
+            });
+        };
+        try {
+            JSON.parse(legacySessions || '[]').forEach(s => {
+                addRecord(s, { messages: s?.messages || [], isSession: true });
+            });
+        } catch (e) {
+            console.error("Saved Sessions Migration Failed:", e);
+        }
+        try {
+            // Legacy entries were single saved messages
+            JSON.parse(legacyChats || '[]').forEach(c => {
+                addRecord(c, {
+                    messages: [{ role: c?.role, content: c?.content || "" }],
+                    legacyRole: c?.role || 'assistant',
+                    isSession: true
+                });
+            });
+        } catch (e) {
+            console.error("Saved Chats Migration Failed:", e);
+        }
+
+        await withStores([STORES.SESSIONS, STORES.SESSION_INDEX], 'readwrite', (stores) => {
+            records.forEach(record => {
+                stores[STORES.SESSIONS].put(record);
+                stores[STORES.SESSION_INDEX].put(summarizeSession(record));
+            });
+        });
+
+        localStorage.removeItem(LEGACY_SESSIONS_KEY);
+        localStorage.removeItem(LEGACY_CHATS_KEY);
+        console.log(`Migrated ${records.length} saved chats to IndexedDB.`);
+        return records;
+    },
+
     migrateFromLocalStorage: async () => {
         console.log("Migrating from localStorage...");
 
@@ -1,24 +1,46 @@
+import { DEFAULT_PYODIDE_INDEX_URL } from "./pyodide-config.js";
+
 export class PyMainThread {
     constructor() {
         this.onmessage = null;
         this.pyodide = null;
         this.micropip = null;
+        this.lockfilePromise = null;
+        this.supportSource = ""; // py/runtime_support.py, sent with INIT
+        this.config = { indexURL: DEFAULT_PYODIDE_INDEX_URL, packageIndexURL: null, packageIndexOnly: false, integrity: {} };
     }
 
-    async init() {
-        // Load Pyodide Script dynamically if not already loaded
-        if (!window.loadPyodide) {
-            await new Promise((resolve, reject) => {
-                const script = document.createElement('script');
-                script.src = "https://cdn.jsdelivr.net/pyodide/v0.23.4/full/pyodide.js";
-                script.onload = resolve;
-                script.onerror = reject;
-                document.head.appendChild(script);
-            });
-        }
+    async init(config, supportSource) {
+        if (config) this.config = config;
+        this.supportSource = supportSource;
+        const integrity = this.config.integrity;
 
         try {
+            // Load Pyodide Script dynamically if not already loaded
+            if (!window.loadPyodide) {
+                await new Promise((resolve, reject) => {
+                    const script = document.createElement('script');
+                    script.src = this.config.indexURL + "pyodide.js";
+                    if (integrity["pyodide.js"]) {
+                        script.integrity = integrity["pyodide.js"];
+                        script.crossOrigin = "anonymous";
+                    }
+                    script.onload = resolve;
+                    script.onerror = reject;
+                    document.head.appendChild(script);
+                });
+            }
+
+            let lockFileURL;
+            if (integrity["repodata.json"]) {
+                // Packages are checked by Pyodide against the hashes in the (verified) lockfile
+                const repodata = await this.loadLockfile();
+                lockFileURL = URL.createObjectURL(new Blob([JSON.stringify(repodata)], { type: "application/json" }));
+            }
+
             this.pyodide = await loadPyodide({
+                indexURL: this.config.indexURL,
+                lockFileURL,
                 stdout: (text) => this.sendMsg({ type: 'OUTPUT', content: text }),
                 stderr: (text) => this.sendMsg({ type: 'OUTPUT', content: text, error: true }),
                 stdin: () => {
@@ -27,6 +49,10 @@ export class PyMainThread {
                      return prompt("Python Input Request:") || "";
                 }
             });
+            if (lockFileURL) URL.revokeObjectURL(lockFileURL);
+
+            // Syntax check, symbol index, safety analyzer and package index hook
+            this.pyodide.runPython(this.supportSource);
 
             // Expose js_print to allow immediate printing before blocking input
             this.pyodide.globals.set("js_print", (text) => {
@@ -36,6 +62,7 @@ export class PyMainThread {
             this.sendMsg({ type: 'OUTPUT', content: "Python environment loaded (Main Thread Fallback).\n", system: true });
 
             await this.pyodide.loadPackage("micropip");
+            if (this.config.packageIndexURL) this.configurePackageIndex();
             this.micropip = this.pyodide.pyimport("micropip");
             this.sendMsg({ type: 'OUTPUT', content: "Package Manager (Micropip) Ready.\n", system: true });
 
@@ -60,27 +87,6 @@ def _input_patch(prompt=""):
 builtins.input = _input_patch
 `);
 
-            // Define syntax check function
-            this.pyodide.runPython(`
-import ast
-import json
-
-def check_syntax_json(code):
-    try:
-        ast.parse(code)
-        return json.dumps({"error": False})
-    except SyntaxError as e:
-        return json.dumps({
-            "error": True,
-            "lineno": e.lineno,
-            "offset": e.offset,
-            "msg": e.msg,
-            "text": e.text
-        })
-    except Exception:
-        return json.dumps({"error": False})
-`);
-
             this.sendMsg({ type: 'LOADED' });
 
         } catch (err) {
@@ -88,6 +94,37 @@ def check_syntax_json(code):
         }
     }
 
+    // A file of the Pyodide distribution, fetched with Subresource Integrity when it has a listed hash
+    // (pyodide.js and repodata.json; Pyodide fetches pyodide.asm.js/.wasm and the stdlib itself)
+    fetchDistFile(name) {
+        const integrity = this.config.integrity[name];
+        return fetch(this.config.indexURL + name, integrity ? { integrity } : undefined)
+            .then(response => {
+                if (!response.ok) throw new Error(`${name}: HTTP ${response.status}`);
+                return response;
+            });
+    }
+
+    // Points micropip at the configured package index (server_preview.py --wheels)
+    configurePackageIndex() {
+        this.pyodide.globals.set("package_index_url", this.config.packageIndexURL);
+        this.pyodide.globals.set("package_index_only", this.config.packageIndexOnly);
+        this.pyodide.runPython(`configure_package_index(package_index_url, package_index_only)`);
+    }
+
+    // Pyodide's package lockfile (repodata.json)
+    loadLockfile() {
+        if (!this.lockfilePromise) {
+            this.lockfilePromise = this.fetchDistFile("repodata.json")
+                .then(response => response.json())
+                .catch(err => {
+                    this.lockfilePromise = null;
+                    throw err;
+                });
+        }
+        return this.lockfilePromise;
+    }
+
     sendMsg(msg) {
         if (this.onmessage) {
             this.onmessage({ data: msg });
@@ -102,7 +139,7 @@ def check_syntax_json(code):
         await new Promise(r => setTimeout(r, 0));
 
         if (type === 'INIT') {
-            await this.init();
+            await this.init(data.pyodideConfig, data.supportSource);
         } else if (type === 'RUN') {
             if (!this.pyodide) return;
             try {
@@ -134,12 +171,55 @@ def check_syntax_json(code):
                 const res = this.pyodide.runPython(`check_syntax_json(code_to_check)`);
                 this.sendMsg({ type: 'LINT_RESULT', content: res });
              } catch (e) {}
+        } else if (type === 'INDEX_SYMBOLS') {
+             if (!this.pyodide) return;
+             try {
+                this.pyodide.globals.set("symbols_payload", JSON.stringify(content));
+                const res = this.pyodide.runPython(`index_symbols_json(symbols_payload)`);
+                this.sendMsg({ type: 'SYMBOLS_RESULT', content: res });
+             } catch (e) {}
+        } else if (type === 'ANALYZE_SAFETY') {
+             if (!this.pyodide) return;
+             let res = null;
+             try {
+                this.pyodide.globals.set("code_to_analyze", content);
+                res = this.pyodide.runPython(`analyze_safety_json(code_to_analyze)`);
+             } catch (e) {}
+             this.sendMsg({ type: 'SAFETY_RESULT', content: res });
+        } else if (type === 'LOAD_PACKAGES') {
+             if (!this.pyodide) return;
+             const packages = content;
+             try {
+                 await this.pyodide.loadPackage(packages);
+                 packages.forEach(pkg => this.sendMsg({ type: 'OUTPUT', content: `Successfully installed ${pkg}\n`, system: true }));
+             } catch (err) {
+                 this.sendMsg({ type: 'OUTPUT', content: `Failed to install ${packages.join(', ')}: ${err}\n`, error: true });
+             }
+        } else if (type === 'PACKAGE_INDEX') {
+             try {
+                 const repodata = await this.loadLockfile();
+                 const imports = {};
+                 Object.entries(repodata.packages).forEach(([key, pkg]) => {
+                     (pkg.imports || []).forEach(name => { imports[name] = key; });
+                 });
+                 this.sendMsg({ type: 'PACKAGE_INDEX', content: { imports, packages: Object.keys(repodata.packages) } });
+             } catch (e) {}
         } else if (type === 'RESTORE_PACKAGES') {
              const packages = content;
              if (packages && packages.length > 0) {
                  this.sendMsg({ type: 'OUTPUT', content: "Restoring installed packages...\n", system: true });
                  try {
+                     let bundled = [];
+                     try {
+                         const repodata = await this.loadLockfile();
+                         bundled = packages.filter(pkg => repodata.packages[pkg.toLowerCase()]);
+                     } catch (e) {}
+                     if (bundled.length > 0) {
+                         await this.pyodide.loadPackage(bundled.map(pkg => pkg.toLowerCase()));
+                     }
+
                      for (const pkg of packages) {
+                         if (bundled.includes(pkg)) continue;
                          await this.micropip.install(pkg);
                      }
                      this.sendMsg({ type: 'OUTPUT', content: "Packages restored.\n", system: true });
@@ -0,0 +1,63 @@
+// Pyodide Distribution Config
+// Where the Python runtime and extra wheels come from. Defaults to the public
+// CDN and PyPI. A build can point elsewhere with VITE_PYODIDE_INDEX_URL /
+// VITE_PACKAGE_INDEX_URL, and a self-hosted deployment (server_preview.py
+// --pyodide / --wheels) publishes pyodide-local.json next to index.html, which
+// wins when present. The resolved config is sent to the worker with INIT.
+
+export const DEFAULT_PYODIDE_INDEX_URL = "https://cdn.jsdelivr.net/pyodide/v0.23.4/full/";
+
+const LOCAL_CONFIG_URL = "pyodide-local.json";
+const LOCAL_CONFIG_TIMEOUT_MS = 1500;
+
+let configPromise = null;
+
+const getEnv = (key) => {
+    try {
+        return (import.meta.env && import.meta.env[key]) || "";
+    } catch (e) {
+        return "";
+    }
+};
+
+// Absolute, with a trailing slash: the worker resolves relative URLs against its own script
+function directoryURL(url) {
+    if (!url) return null;
+    const absolute = new URL(url, window.location.href).href;
+    return absolute.endsWith("/") ? absolute : absolute + "/";
+}
+
+async function fetchLocalConfig() {
+    const controller = new AbortController();
+    const timer = setTimeout(() => controller.abort(), LOCAL_CONFIG_TIMEOUT_MS);
+    try {
+        const response = await fetch(LOCAL_CONFIG_URL, { cache: "no-cache", signal: controller.signal });
+        // Static hosts answer unknown paths with the SPA's index.html
+        if (!response.ok || !(response.headers.get("Content-Type") || "").includes("json")) return null;
+        return await response.json();
+    } catch (e) {
+        return null;
+    } finally {
+        clearTimeout(timer);
+    }
+}
+
+async function resolveConfig() {
+    const local = await fetchLocalConfig() || {};
+    return {
+        indexURL: directoryURL(local.indexURL || getEnv("VITE_PYODIDE_INDEX_URL") || DEFAULT_PYODIDE_INDEX_URL),
+        packageIndexURL: directoryURL(local.packageIndexURL || getEnv("VITE_PACKAGE_INDEX_URL")),
+        // Only the local index: no PyPI fallback (air-gapped deployments)
+        packageIndexOnly: Boolean(local.packageIndexOnly),
+        // { "pyodide.js": "sha384-...", "repodata.json": "sha256-..." }
+        integrity: local.integrity || {}
+    };
+}
+
+/** Resolved once per page; restarts reuse it. */
+export function loadPyodideConfig() {
+    if (!configPromise) {
+        configPromise = resolveConfig();
+    }
+    return configPromise;
+}
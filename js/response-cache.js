@@ -0,0 +1,118 @@
+// AI Response Mirror
+// Small IndexedDB copy of deterministic AI answers (safety check, explain, docs,
+// refactor), keyed by a SHA-256 of the request. Fresh entries are served without
+// a network round trip; stale ones are still used when the request fails (offline).
+
+const DB_NAME = 'PyMob_ResponseCache';
+const DB_VERSION = 1;
+const STORE = 'responses';
+
+const MAX_ENTRIES = 200;
+const DEFAULT_TTL_MS = 24 * 60 * 60 * 1000;
+
+let dbPromise = null;
+
+function openDB() {
+    if (dbPromise) return dbPromise;
+    dbPromise = new Promise((resolve, reject) => {
+        const request = indexedDB.open(DB_NAME, DB_VERSION);
+        request.onupgradeneeded = (event) => {
+            const db = event.target.result;
+            if (!db.objectStoreNames.contains(STORE)) {
+                const store = db.createObjectStore(STORE, { keyPath: 'key' });
+                store.createIndex('timestamp', 'timestamp');
+            }
+        };
+        request.onsuccess = (event) => resolve(event.target.result);
+        request.onerror = (event) => reject(event.target.error);
+    });
+    return dbPromise;
+}
+
+// cyrb53: fast non-cryptographic 53-bit string hash
+function cyrb53(text, seed) {
+    let h1 = 0xdeadbeef ^ seed, h2 = 0x41c6ce57 ^ seed;
+    for (let i = 0; i < text.length; i++) {
+        const ch = text.charCodeAt(i);
+        h1 = Math.imul(h1 ^ ch, 2654435761);
+        h2 = Math.imul(h2 ^ ch, 1597334677);
+    }
+    h1 = Math.imul(h1 ^ (h1 >>> 16), 2246822507) ^ Math.imul(h2 ^ (h2 >>> 13), 3266489909);
+    h2 = Math.imul(h2 ^ (h2 >>> 16), 2246822507) ^ Math.imul(h1 ^ (h1 >>> 13), 3266489909);
+    return 4294967296 * (2097151 & h2) + (h1 >>> 0);
+}
+
+async function hashKey(parts) {
+    const text = JSON.stringify(parts);
+    if (!globalThis.crypto?.subtle) {
+        // Insecure origins (plain http on a LAN host) have no crypto.subtle:
+        // two seeded 53-bit hashes are plenty for a local cache key
+        return `cyrb53:${cyrb53(text, 1).toString(16)}-${cyrb53(text, 2).toString(16)}`;
+    }
+    const digest = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(text));
+    return Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, '0')).join('');
+}
+
+async function readEntry(key) {
+    const db = await openDB();
+    return new Promise((resolve, reject) => {
+        const request = db.transaction(STORE, 'readonly').objectStore(STORE).get(key);
+        request.onsuccess = () => resolve(request.result || null);
+        request.onerror = () => reject(request.error);
+    });
+}
+
+async function writeEntry(key, value) {
+    const db = await openDB();
+    return new Promise((resolve, reject) => {
+        const tx = db.transaction(STORE, 'readwrite');
+        const store = tx.objectStore(STORE);
+        store.put({ key, value, timestamp: Date.now() });
+
+        // Keep the mirror small: drop the oldest entries beyond MAX_ENTRIES
+        const countRequest = store.count();
+        countRequest.onsuccess = () => {
+            let excess = countRequest.result - MAX_ENTRIES;
+            if (excess <= 0) return;
+            store.index('timestamp').openCursor().onsuccess = (event) => {
+                const cursor = event.target.result;
+                if (!cursor || excess-- <= 0) return;
+                cursor.delete();
+                cursor.continue();
+            };
+        };
+        tx.oncomplete = () => resolve();
+        tx.onerror = () => reject(tx.error);
+    });
+}
+
+/**
+ * Returns the mirrored answer for `parts` if it is fresh, otherwise calls
+ * `fetcher()` and mirrors its result. If `fetcher` throws, a stale answer is
+ * returned instead when one exists.
+ * @param {Array} parts - Everything that determines the answer (mode, model, inputs).
+ * @param {function} fetcher - async () => JSON-serializable value; throw to skip caching.
+ */
+export async function cachedResponse(parts, fetcher, { ttlMs = DEFAULT_TTL_MS } = {}) {
+    let key = null;
+    let entry = null;
+    try {
+        key = await hashKey(parts);
+        entry = await readEntry(key);
+        if (entry && Date.now() - entry.timestamp < ttlMs) return entry.value;
+    } catch (e) {
+        console.warn("Response Cache Read Error:", e);
+    }
+
+    try {
+        const value = await fetcher();
+        if (key) writeEntry(key, value).catch(e => console.warn("Response Cache Write Error:", e));
+        return value;
+    } catch (e) {
+        if (entry) {
+            console.warn("AI request failed; using mirrored response.", e);
+            return entry.value;
+        }
+        throw e;
+    }
+}
@@ -0,0 +1,150 @@
+// Agent Run Feedback
+// Turns the logs of an agent-driven run into a bounded prompt: a compact
+// metrics line, the exception with its last user frames, and stdout / stderr
+// cut to head and tail windows with repeated lines collapsed. The block is
+// kept under FEEDBACK_MAX_TOKENS however much the program printed.
+
+import { estimateTokens } from "./context-packer.js";
+
+const FEEDBACK_MAX_TOKENS = 1500;
+const WINDOW_LINES = 40; // Head and tail lines kept per stream
+const MIN_WINDOW_LINES = 4; // Windows shrink down to this before hard clipping
+const MAX_LINE_CHARS = 300;
+const TRACEBACK_FRAMES = 4;
+
+const TRACEBACK_HEADER = 'Traceback (most recent call last):';
+// Frames from the Pyodide runtime / stdlib rather than the project
+const INTERNAL_FRAME_RE = /^\s*File "(\/lib\/python3[^"]*|[^"]*_pyodide[^"]*)"/;
+
+function splitLines(text) {
+    const lines = text.split('\n');
+    if (lines[lines.length - 1] === '') lines.pop();
+    return lines;
+}
+
+function clipLine(line) {
+    return line.length > MAX_LINE_CHARS
+        ? `${line.slice(0, MAX_LINE_CHARS)}… (+${line.length - MAX_LINE_CHARS} chars)`
+        : line;
+}
+
+// Consecutive identical lines become one line with a count
+function collapseRepeats(lines) {
+    const out = [];
+    for (const line of lines) {
+        const last = out[out.length - 1];
+        if (last && last.text === line) last.count++;
+        else out.push({ text: line, count: 1 });
+    }
+    return out.map(({ text, count }) => count > 1 ? `${clipLine(text)}  [repeated ${count} times]` : clipLine(text));
+}
+
+function headTail(lines, head, tail) {
+    if (lines.length <= head + tail) return lines;
+    return lines.slice(0, head)
+        .concat([`... [${lines.length - head - tail} lines omitted] ...`], lines.slice(-tail));
+}
+
+/**
+ * Last traceback in `stderr`: exception type / message and the innermost
+ * project frames (runtime frames dropped).
+ * @returns {{ type: string, message: string, frames: string[], hiddenFrames: number, start: number } | null}
+ */
+export function extractTraceback(stderr) {
+    const start = stderr.lastIndexOf(TRACEBACK_HEADER);
+    if (start === -1) return null;
+    const lines = splitLines(stderr.slice(start + TRACEBACK_HEADER.length + 1));
+
+    const frames = [];
+    let i = 0;
+    while (i < lines.length && /^\s/.test(lines[i])) {
+        if (/^\s*File "/.test(lines[i])) {
+            // A frame is its File line plus the indented source / caret lines under it
+            const frame = [lines[i].trim()];
+            i++;
+            while (i < lines.length && /^\s{4,}/.test(lines[i]) && !/^\s*File "/.test(lines[i])) {
+                frame.push('  ' + clipLine(lines[i].replace(/^ {4}/, '')));
+                i++;
+            }
+            frames.push(frame);
+        } else {
+            i++;
+        }
+    }
+    const projectFrames = frames.filter(f => !INTERNAL_FRAME_RE.test(f[0]));
+    const exception = lines.slice(i).join('\n').trim();
+    const colon = exception.indexOf(':');
+    const kept = projectFrames.slice(-TRACEBACK_FRAMES);
+    return {
+        type: colon === -1 ? exception : exception.slice(0, colon),
+        message: colon === -1 ? '' : exception.slice(colon + 1).trim(),
+        frames: kept.map(f => f.join('\n')),
+        hiddenFrames: frames.length - kept.length,
+        start
+    };
+}
+
+function streamSection(label, text, window) {
+    if (!text.trim()) return '';
+    const raw = splitLines(text);
+    const lines = collapseRepeats(raw);
+    const shown = headTail(lines, window, window);
+    const notes = [`${raw.length} lines`];
+    if (lines.length < raw.length) notes.push('repeats collapsed');
+    if (shown.length < lines.length) notes.push(`first ${window} and last ${window} shown`);
+    return `[${label}] (${notes.join(', ')})\n${shown.join('\n')}\n`;
+}
+
+/**
+ * Compact feedback for one agent run.
+ * @param {{ logs: Array<{content: string, type: string}>, error: string|null }} result - From cmdRunCodeWithCallback.
+ * @param {{ durationMs?: number, inputs?: Array }} run
+ * @returns {string} Starts with "Execution Result:" (history compaction keys on it).
+ */
+export function buildRunFeedback(result, { durationMs = 0, inputs = [] } = {}) {
+    const logs = result.logs || [];
+    const stdout = logs.filter(l => l.type === 'stdout' || l.type === 'input-echo').map(l => l.content).join('');
+    let stderr = logs.filter(l => l.type === 'stderr').map(l => l.content).join('');
+
+    const traceback = extractTraceback(stderr);
+    // The traceback is reported on its own; keep only what was printed before it
+    if (traceback) stderr = stderr.slice(0, traceback.start).replace(/PythonError:\s*$/, '');
+
+    const metrics = {
+        status: traceback || result.error ? 'error' : 'ok',
+        duration_ms: Math.round(durationMs),
+        stdout_lines: splitLines(stdout).length,
+        stdout_bytes: stdout.length,
+        stderr_lines: splitLines(stderr).length,
+        inputs_given: inputs.length
+    };
+    if (traceback) metrics.exception = traceback.type;
+
+    let header = `Execution Result:\n[RUN] ${JSON.stringify(metrics)}\n`;
+    if (traceback) {
+        header += `[EXCEPTION] ${traceback.type}${traceback.message ? ': ' + clipLine(traceback.message) : ''}\n`;
+        if (traceback.frames.length > 0) {
+            const hidden = traceback.hiddenFrames > 0 ? ` (${traceback.hiddenFrames} outer/runtime frames hidden)` : '';
+            header += `[TRACEBACK]${hidden}\n${traceback.frames.join('\n')}\n`;
+        }
+    } else if (result.error && !stderr.trim()) {
+        header += `[ERROR] ${clipLine(String(result.error).trim())}\n`;
+    }
+
+    // Shrink the output windows until the whole block fits the token cap
+    let window = WINDOW_LINES;
+    let feedback;
+    for (;;) {
+        feedback = header + streamSection('STDOUT', stdout, window) + streamSection('STDERR', stderr, window);
+        if (estimateTokens(feedback) <= FEEDBACK_MAX_TOKENS || window <= MIN_WINDOW_LINES) break;
+        window = Math.max(MIN_WINDOW_LINES, Math.floor(window / 2));
+    }
+    // Still over (a few enormous lines): hard clip, keeping the start and the end
+    // (at most one token per character)
+    if (estimateTokens(feedback) > FEEDBACK_MAX_TOKENS) {
+        const keep = Math.floor(FEEDBACK_MAX_TOKENS / 2) - 10;
+        feedback = `${feedback.slice(0, keep)}\n... [output clipped] ...\n${feedback.slice(-keep)}`;
+    }
+    if (!stdout.trim() && !stderr.trim() && !traceback) feedback += '(no output)\n';
+    return feedback;
+}
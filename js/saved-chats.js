@@ -1,9 +1,28 @@
 import { showToast, showConfirm, showPrompt } from "./ui-utils.js";
 import { createMessageElement, handleMessageClick } from "./chat-component.js";
 import { renderMarkdown } from "./markdown-renderer.js";
-
-const STORAGE_KEY = 'pyide_saved_chats'; // Legacy
-const SESSIONS_KEY = 'pyide_saved_sessions'; // New
+import { persistence } from "./persistence.js";
+import { searchIndex } from "./search-index.js";
+import { perfStart, perfEnd } from "./perf-marks.js";
+
+const PAGE_SIZE = 20; // Sessions rendered per page in the list view
+
+// Moves legacy localStorage chats into IndexedDB. Concurrent calls share one
+// pass. Once a pass has succeeded its settled promise is kept, so later list
+// renders skip the localStorage check; after a failure the next call retries.
+let migrationPromise = null;
+
+function ensureMigrated() {
+    if (!migrationPromise) {
+        migrationPromise = persistence.migrateSavedChatsFromLocalStorage().then(records => {
+            records.forEach(record => searchIndex.indexSession(record));
+        }).catch(e => {
+            console.error("Saved Chats Migration Error:", e);
+            migrationPromise = null;
+        });
+    }
+    return migrationPromise;
+}
 
 export function initSavedChats() {
     // Bind Sidebar Button
@@ -21,11 +40,13 @@ export function initSavedChats() {
              }
         };
     }
+
+    // Move any legacy localStorage chats into IndexedDB in the background
+    ensureMigrated();
 }
 
 // New Session Save
-export function saveChatSession(sessionData) {
-    const sessions = getSavedSessions();
+export async function saveChatSession(sessionData) {
     const newSession = {
         id: Date.now(),
         title: `Session ${new Date().toLocaleString()}`,
@@ -33,41 +54,21 @@ export function saveChatSession(sessionData) {
         messages: sessionData.messages || [],
         isSession: true
     };
-    sessions.unshift(newSession);
-    localStorage.setItem(SESSIONS_KEY, JSON.stringify(sessions));
-    showToast("Session Saved!", "success");
-    return newSession;
-}
-
-function getSavedSessions() {
     try {
-        return JSON.parse(localStorage.getItem(SESSIONS_KEY) || '[]');
+        await persistence.saveSession(newSession);
+        searchIndex.indexSession(newSession);
+        showToast("Session Saved!", "success");
     } catch (e) {
-        console.error("Failed to parse saved sessions", e);
-        return [];
+        console.error("Failed to save session", e);
+        showToast("Failed to save session.", "error");
     }
+    return newSession;
 }
 
-function getLegacySavedChats() {
-    try {
-        return JSON.parse(localStorage.getItem(STORAGE_KEY) || '[]');
-    } catch (e) {
-        console.error("Failed to parse saved chats", e);
-        return [];
-    }
-}
-
-function getAllSavedChats() {
-    const legacyChats = getLegacySavedChats().map(c => ({...c, isLegacy: true}));
-    const sessions = getSavedSessions();
-
-    // Merge and Sort (Newest First)
-    return [...sessions, ...legacyChats].sort((a, b) => b.timestamp - a.timestamp);
-}
-
-export function renderSavedChatsList() {
+export async function renderSavedChatsList() {
     const container = document.getElementById('view-saved-chats');
     if (!container) return;
+    perfStart('saved-chats-render');
 
     // Reset Container
     container.innerHTML = '';
@@ -98,9 +99,16 @@ export function renderSavedChatsList() {
     list.className = "flex-1 overflow-y-auto p-4 space-y-3 pb-20";
     container.appendChild(list);
 
-    const chats = getAllSavedChats();
+    await ensureMigrated();
+
+    let total = 0;
+    try {
+        total = await persistence.countSessions();
+    } catch (e) {
+        console.error("Failed to read saved sessions", e);
+    }
 
-    if (chats.length === 0) {
+    if (total === 0) {
         list.innerHTML = `
             <div class="text-center text-muted text-sm mt-10 opacity-50 flex flex-col items-center gap-2">
                 <i class="fa-regular fa-bookmark text-4xl mb-2"></i>
@@ -108,85 +116,102 @@ export function renderSavedChatsList() {
                 <p class="text-xs">Use "Save to File" in AI Workspace.</p>
             </div>
         `;
+        perfEnd('saved-chats-render');
         return;
     }
 
-    chats.forEach(chat => {
-        const div = document.createElement('div');
-        div.className = "bg-surface border border-white/5 rounded-xl p-4 flex flex-col gap-2 hover:bg-white/5 transition-colors cursor-pointer group relative";
-
-        // Preview logic
-        let preview = "";
-        let count = 0;
-
-        if (chat.isSession) {
-            // New Session: Preview last message or count
-            const lastMsg = chat.messages[chat.messages.length - 1];
-            preview = lastMsg ? (lastMsg.content || "").slice(0, 100) : "Empty Session";
-            count = chat.messages.length;
-        } else {
-            // Legacy: Single Message
-            const contentStr = chat.content || "";
-            preview = contentStr.slice(0, 100);
-            count = 1;
-        }
+    await appendSavedChatsPage(list, 0, total);
+    requestAnimationFrame(() => perfEnd('saved-chats-render')); // Includes the first page's layout and paint
+}
 
-        // Clean newlines
-        preview = preview.replace(/\n/g, ' ') + (preview.length > 100 ? '...' : '');
-        const dateStr = new Date(chat.timestamp).toLocaleString();
+// Renders one page of summaries, plus a "Load more" row if more remain
+async function appendSavedChatsPage(list, offset, total) {
+    let page = [];
+    try {
+        page = await persistence.listSessions(offset, PAGE_SIZE);
+    } catch (e) {
+        console.error("Failed to read saved sessions", e);
+    }
 
-        // Icon
-        let iconClass = 'fa-solid fa-comments text-yellow-500';
-        if (chat.isLegacy) {
-             iconClass = chat.role === 'user' ? 'fa-solid fa-user text-blue-400' : 'fa-solid fa-robot text-accent';
-        }
+    page.forEach(summary => list.appendChild(createSavedChatRow(summary)));
+
+    const loaded = offset + page.length;
+    if (page.length > 0 && loaded < total) {
+        const more = document.createElement('button');
+        more.className = "btn-load-more-chats w-full py-3 rounded-xl bg-white/5 hover:bg-white/10 text-xs font-bold text-muted hover:text-white transition-colors";
+        more.textContent = `Load more (${total - loaded} remaining)`;
+        more.onclick = async () => {
+            more.disabled = true;
+            more.remove();
+            await appendSavedChatsPage(list, loaded, total);
+        };
+        list.appendChild(more);
+    }
+}
 
-        div.innerHTML = `
-            <div class="flex justify-between items-start">
-                <div class="flex items-center gap-2">
-                    <i class="${iconClass} text-xs"></i>
-                    <h3 class="font-bold text-white text-sm truncate max-w-[180px] sm:max-w-[250px]">${chat.title}</h3>
-                </div>
-                <div class="flex items-center gap-2 opacity-100 sm:opacity-0 group-hover:opacity-100 transition-opacity">
-                     <button class="btn-rename-chat w-8 h-8 rounded-full hover:bg-white/10 flex items-center justify-center text-gray-400 hover:text-white transition-colors" title="Rename">
-                        <i class="fa-solid fa-pen text-xs"></i>
-                    </button>
-                    <button class="btn-delete-chat w-8 h-8 rounded-full hover:bg-red-500/20 flex items-center justify-center text-gray-400 hover:text-red-400 transition-colors" title="Delete">
-                        <i class="fa-solid fa-trash text-xs"></i>
-                    </button>
-                </div>
-            </div>
-            <p class="text-xs text-gray-400 line-clamp-2 font-mono bg-black/20 p-2 rounded">${preview}</p>
-            <span class="text-[10px] text-gray-600 mt-1">${dateStr} • ${count} msg${count!==1?'s':''}</span>
-        `;
+function createSavedChatRow(chat) {
+    const div = document.createElement('div');
+    div.className = "bg-surface border border-white/5 rounded-xl p-4 flex flex-col gap-2 hover:bg-white/5 transition-colors cursor-pointer group relative";
 
-        div.onclick = (e) => {
-            if (!e.target.closest('button')) {
-                openSavedChat(chat);
-            }
-        };
+    // Preview logic (summary only - messages are loaded when opened)
+    const count = chat.messageCount || 0;
+    let preview = chat.preview || (count === 0 ? "Empty Session" : "");
 
-        const renameBtn = div.querySelector('.btn-rename-chat');
-        if (renameBtn) {
-            renameBtn.onclick = (e) => {
-                e.stopPropagation();
-                renameSavedChat(chat);
-            };
-        }
+    // Clean newlines
+    preview = preview.slice(0, 100).replace(/\n/g, ' ') + ((chat.preview || "").length > 100 ? '...' : '');
+    const dateStr = new Date(chat.timestamp).toLocaleString();
+
+    // Icon
+    let iconClass = 'fa-solid fa-comments text-yellow-500';
+    if (chat.legacyRole) {
+         iconClass = chat.legacyRole === 'user' ? 'fa-solid fa-user text-blue-400' : 'fa-solid fa-robot text-accent';
+    }
+
+    div.innerHTML = `
+        <div class="flex justify-between items-start">
+            <div class="flex items-center gap-2">
+                <i class="${iconClass} text-xs"></i>
+                <h3 class="font-bold text-white text-sm truncate max-w-[180px] sm:max-w-[250px]">${chat.title}</h3>
+            </div>
+            <div class="flex items-center gap-2 opacity-100 sm:opacity-0 group-hover:opacity-100 transition-opacity">
+                 <button class="btn-rename-chat w-8 h-8 rounded-full hover:bg-white/10 flex items-center justify-center text-gray-400 hover:text-white transition-colors" title="Rename">
+                    <i class="fa-solid fa-pen text-xs"></i>
+                </button>
+                <button class="btn-delete-chat w-8 h-8 rounded-full hover:bg-red-500/20 flex items-center justify-center text-gray-400 hover:text-red-400 transition-colors" title="Delete">
+                    <i class="fa-solid fa-trash text-xs"></i>
+                </button>
+            </div>
+        </div>
+        <p class="text-xs text-gray-400 line-clamp-2 font-mono bg-black/20 p-2 rounded">${preview}</p>
+        <span class="text-[10px] text-gray-600 mt-1">${dateStr} • ${count} msg${count!==1?'s':''}</span>
+    `;
 
-        const deleteBtn = div.querySelector('.btn-delete-chat');
-        if (deleteBtn) {
-            deleteBtn.onclick = (e) => {
-                e.stopPropagation();
-                deleteSavedChat(chat);
-            };
+    div.onclick = (e) => {
+        if (!e.target.closest('button')) {
+            openSavedChat(chat);
         }
+    };
 
-        list.appendChild(div);
-    });
+    const renameBtn = div.querySelector('.btn-rename-chat');
+    if (renameBtn) {
+        renameBtn.onclick = (e) => {
+            e.stopPropagation();
+            renameSavedChat(chat);
+        };
+    }
+
+    const deleteBtn = div.querySelector('.btn-delete-chat');
+    if (deleteBtn) {
+        deleteBtn.onclick = (e) => {
+            e.stopPropagation();
+            deleteSavedChat(chat);
+        };
+    }
+
+    return div;
 }
 
-export function openSavedChat(chat) {
+export async function openSavedChat(chat) {
     const container = document.getElementById('view-saved-chats');
     if (!container) return;
 
@@ -217,24 +242,30 @@ export function openSavedChat(chat) {
     // Exact same class as AI Workspace Output (pb-20 added for navbar clearance as no input area)
     contentDiv.className = "flex-1 overflow-y-auto p-4 space-y-4 pb-20";
     contentDiv.id = "saved-chat-output"; // Hook for testing if needed
+    container.appendChild(contentDiv);
 
-    if (chat.isSession) {
-        // Render Array of Messages
-        chat.messages.forEach(msg => {
-            // Reuse createMessageElement for exact replica
-            const msgEl = createMessageElement(msg.role, msg.content || "", {
-                readOnly: true,
-                onSave: null
-            });
-            contentDiv.appendChild(msgEl);
-        });
-    } else {
-        // Legacy: Single Message
-        const msgEl = createMessageElement(chat.role, chat.content || "", { readOnly: true });
-        contentDiv.appendChild(msgEl);
+    // Lazy-load messages (the list only holds summaries)
+    let session = null;
+    try {
+        session = await persistence.getSession(chat.id);
+    } catch (e) {
+        console.error("Failed to load saved session", e);
     }
 
-    container.appendChild(contentDiv);
+    if (!session) {
+        contentDiv.innerHTML = `<div class="text-center text-muted text-sm mt-10 opacity-50">Session could not be loaded.</div>`;
+        return;
+    }
+
+    // Render Array of Messages
+    session.messages.forEach(msg => {
+        // Reuse createMessageElement for exact replica
+        const msgEl = createMessageElement(msg.role, msg.content || "", {
+            readOnly: true,
+            onSave: null
+        });
+        contentDiv.appendChild(msgEl);
+    });
 
     // Bind Event Delegation (Copy, etc.)
     contentDiv.addEventListener('click', (e) => handleMessageClick(e, {}));
@@ -243,21 +274,8 @@ export function openSavedChat(chat) {
 async function renameSavedChat(chat) {
     const newTitle = await showPrompt("Rename Chat", "Enter new title:", chat.title);
     if (newTitle && newTitle.trim() !== "") {
-        if (chat.isSession) {
-            let sessions = getSavedSessions();
-            const target = sessions.find(c => c.id === chat.id);
-            if (target) {
-                target.title = newTitle.trim();
-                localStorage.setItem(SESSIONS_KEY, JSON.stringify(sessions));
-            }
-        } else {
-            let chats = getLegacySavedChats();
-            const target = chats.find(c => c.id === chat.id);
-            if (target) {
-                target.title = newTitle.trim();
-                localStorage.setItem(STORAGE_KEY, JSON.stringify(chats));
-            }
-        }
+        await persistence.renameSession(chat.id, newTitle.trim());
+        searchIndex.renameSession(chat.id, newTitle.trim());
         renderSavedChatsList();
         showToast("Chat renamed", "success");
     }
@@ -265,15 +283,8 @@ async function renameSavedChat(chat) {
 
 async function deleteSavedChat(chat) {
     if (await showConfirm("Delete Chat", "Are you sure?")) {
-        if (chat.isSession) {
-            let sessions = getSavedSessions();
-            sessions = sessions.filter(c => c.id !== chat.id);
-            localStorage.setItem(SESSIONS_KEY, JSON.stringify(sessions));
-        } else {
-            let chats = getLegacySavedChats();
-            chats = chats.filter(c => c.id !== chat.id);
-            localStorage.setItem(STORAGE_KEY, JSON.stringify(chats));
-        }
+        await persistence.deleteSession(chat.id);
+        searchIndex.deleteSession(chat.id);
         renderSavedChatsList();
         showToast("Chat deleted", "info");
     }
@@ -0,0 +1,62 @@
+// Search Index Client
+// Thin main-thread wrapper around search-worker.js. All tokenizing, ranking and
+// IndexedDB persistence happen in the worker; calls here are fire-and-forget
+// except query(), which resolves with ranked hits.
+
+let worker = null;
+let nextRequestId = 1;
+const pending = new Map(); // requestId -> resolve
+
+function post(type, content) {
+    if (!worker) return;
+    worker.postMessage({ type, content });
+}
+
+export const searchIndex = {
+    init: () => {
+        if (worker || typeof Worker === 'undefined') return;
+        try {
+            worker = new Worker(new URL('../search-worker.js', import.meta.url), { type: 'classic' });
+            worker.onmessage = (event) => {
+                const { type, requestId, content } = event.data;
+                if (type === 'QUERY_RESULT' && pending.has(requestId)) {
+                    pending.get(requestId)(content);
+                    pending.delete(requestId);
+                }
+            };
+            worker.onerror = (e) => console.error("Search Worker Error:", e);
+            worker.postMessage({ type: 'INIT' });
+        } catch (e) {
+            console.error("Search Index Init Failed:", e);
+            worker = null;
+        }
+    },
+
+    // Full project snapshot; the worker only re-indexes files whose hash changed
+    syncFiles: (files) => post('SYNC_FILES', files),
+
+    updateFile: (path, data) => post('UPDATE_FILE', { path, data }),
+
+    deleteFile: (path) => post('DELETE_FILE', { path }),
+
+    indexSession: (session) => post('INDEX_SESSION', {
+        id: session.id,
+        title: session.title,
+        timestamp: session.timestamp,
+        messages: (session.messages || []).map(m => ({ content: m.content || "" }))
+    }),
+
+    renameSession: (id, title) => post('RENAME_SESSION', { id, title }),
+
+    deleteSession: (id) => post('DELETE_SESSION', { id }),
+
+    // Resolves with { hits: [{ kind, ref, title, meta, score, lines: [{ line, text }] }], elapsed }
+    query: (query, { limit = 20, kind = null } = {}) => {
+        if (!worker) return Promise.resolve({ hits: [], elapsed: 0 });
+        const requestId = nextRequestId++;
+        return new Promise((resolve) => {
+            pending.set(requestId, resolve);
+            worker.postMessage({ type: 'QUERY', requestId, content: { query, limit, kind } });
+        });
+    }
+};
@@ -16,11 +16,12 @@ const gutterWidths = [
     { id: 'wide', name: 'Wide', desc: 'Extra space for readability' }
 ];
 
+// contextTokens: budget for project files packed into each request (see context-packer.js)
 export const aiModes = [
-    { id: 'super-fast', name: 'Super Fast', model: 'LongCat-Flash-Lite', desc: 'For easy / lightweight code' },
-    { id: 'fast', name: 'Fast', model: 'LongCat-Flash-Chat', desc: 'For medium-level codes' },
-    { id: 'ultra', name: 'Ultra', model: 'LongCat-Flash-Thinking', desc: 'For high-level codes' },
-    { id: 'super-ultra', name: 'Super Ultra', model: 'LongCat-Flash-Thinking-2601', desc: 'For ultra high-level / complex code' }
+    { id: 'super-fast', name: 'Super Fast', model: 'LongCat-Flash-Lite', desc: 'For easy / lightweight code', contextTokens: 12000 },
+    { id: 'fast', name: 'Fast', model: 'LongCat-Flash-Chat', desc: 'For medium-level codes', contextTokens: 24000 },
+    { id: 'ultra', name: 'Ultra', model: 'LongCat-Flash-Thinking', desc: 'For high-level codes', contextTokens: 32000 },
+    { id: 'super-ultra', name: 'Super Ultra', model: 'LongCat-Flash-Thinking-2601', desc: 'For ultra high-level / complex code', contextTokens: 48000 }
 ];
 
 let currentTheme = 'one-dark'; // Default changed to one-dark
@@ -146,6 +147,11 @@ export function getCurrentAiModel() {
     return modeObj ? modeObj.model : 'LongCat-Flash-Lite';
 }
 
+export function getContextTokenBudget(model = getCurrentAiModel()) {
+    const modeObj = aiModes.find(m => m.model === model);
+    return modeObj ? modeObj.contextTokens : 12000;
+}
+
 function bindEvents() {
     const themeBtn = document.getElementById('setting-theme');
     if (themeBtn) {
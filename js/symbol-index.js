@@ -0,0 +1,517 @@
+// Project Symbol Index
+// Definitions, imports, class members and signatures for every Python file in
+// the project, plus the import graph between them. Parsing happens in the Python worker (ast, see INDEX_SYMBOLS);
+// results are cached here by content hash so only changed files are re-parsed,
+// and completion / go-to-definition / outline queries never touch Python.
+
+const BATCH_SIZE = 50; // Files per INDEX_SYMBOLS message
+const FLUSH_DELAY_MS = 300;
+
+const files = new Map(); // path -> { hash, symbols, imports, error }
+const byName = new Map(); // name -> [{ path, symbol }] (definitions only, no imports)
+const modules = new Map(); // dotted module name -> path
+const localNames = new Map(); // importable top-level name -> number of project files providing it
+const tracked = new Set(); // .py paths registered in modules/localNames
+
+const pending = new Map(); // path -> { hash, code } waiting to be sent
+const inFlight = new Map(); // path -> { hash, code } sent, waiting for SYMBOLS_RESULT
+const listeners = [];
+const waiters = new Set(); // Called after every SYMBOLS_RESULT (see whenIndexed)
+
+let post = null;
+let ready = false;
+let flushTimeout = null;
+
+// FNV-1a (32-bit) - cheap change detection, not a security hash
+function hashString(str) {
+    let h = 0x811c9dc5;
+    for (let i = 0; i < str.length; i++) {
+        h ^= str.charCodeAt(i);
+        h = Math.imul(h, 0x01000193);
+    }
+    return (h >>> 0).toString(16) + ':' + str.length;
+}
+
+function isPython(path) {
+    return path.endsWith('.py');
+}
+
+function moduleName(path) {
+    return path.replace(/\.py$/, '').replace(/(^|\/)__init__$/, '').split('/').join('.');
+}
+
+// Names a file makes importable: its top-level package and, since scripts are
+// run with their folder on sys.path, its own basename
+function providedNames(path) {
+    const parts = moduleName(path).split('.');
+    return parts.length > 1 ? [parts[0], parts[parts.length - 1]] : parts;
+}
+
+function track(path) {
+    if (tracked.has(path)) return;
+    tracked.add(path);
+    modules.set(moduleName(path), path);
+    providedNames(path).forEach(name => localNames.set(name, (localNames.get(name) || 0) + 1));
+}
+
+function untrack(path) {
+    if (!tracked.has(path)) return;
+    tracked.delete(path);
+    if (modules.get(moduleName(path)) === path) modules.delete(moduleName(path));
+    providedNames(path).forEach(name => {
+        const count = (localNames.get(name) || 0) - 1;
+        if (count > 0) localNames.set(name, count);
+        else localNames.delete(name);
+    });
+}
+
+// --- Index Maintenance ---
+
+function setSymbols(path, symbols) {
+    const old = files.get(path);
+    if (old) {
+        old.symbols.forEach(sym => {
+            const list = byName.get(sym.name);
+            if (!list) return;
+            const next = list.filter(entry => entry.path !== path);
+            if (next.length) byName.set(sym.name, next);
+            else byName.delete(sym.name);
+        });
+    }
+
+    symbols.forEach(sym => {
+        if (sym.kind === 'import') return;
+        const list = byName.get(sym.name);
+        if (list) list.push({ path, symbol: sym });
+        else byName.set(sym.name, [{ path, symbol: sym }]);
+    });
+}
+
+function scheduleFlush() {
+    if (flushTimeout) clearTimeout(flushTimeout);
+    flushTimeout = setTimeout(flush, FLUSH_DELAY_MS);
+}
+
+function flush() {
+    flushTimeout = null;
+    if (!ready || !post || pending.size === 0) return;
+
+    let batch = {};
+    let count = 0;
+    for (const [path, item] of pending) {
+        batch[path] = item;
+        inFlight.set(path, item);
+        if (++count === BATCH_SIZE) {
+            post({ type: 'INDEX_SYMBOLS', content: batch });
+            batch = {};
+            count = 0;
+        }
+    }
+    if (count > 0) post({ type: 'INDEX_SYMBOLS', content: batch });
+    pending.clear();
+}
+
+// --- Resolution Helpers ---
+
+// Resolve an import spec ('pkg.mod', '.sibling', 'helpers') to a project file
+function resolveModule(spec, fromPath) {
+    const level = spec.match(/^\.*/)[0].length;
+    const rest = spec.slice(level);
+    const dirParts = fromPath.split('/').slice(0, -1);
+
+    if (level > 0) {
+        const base = dirParts.slice(0, Math.max(0, dirParts.length - (level - 1)));
+        const name = base.concat(rest ? rest.split('.') : []).join('.');
+        return modules.get(name) || null;
+    }
+
+    // Absolute from the project root, then relative to the importing script's folder
+    if (modules.has(rest)) return modules.get(rest);
+    if (dirParts.length) return modules.get(dirParts.concat(rest.split('.')).join('.')) || null;
+    return null;
+}
+
+function topLevel(path) {
+    const entry = files.get(path);
+    return entry ? entry.symbols.filter(s => !s.parent && s.kind !== 'import') : [];
+}
+
+function findInFile(path, name) {
+    const entry = files.get(path);
+    if (!entry) return null;
+    return entry.symbols.find(s => s.name === name && !s.parent && s.kind !== 'import') || null;
+}
+
+// Innermost class whose body contains the given line
+function enclosingClass(path, line) {
+    const entry = files.get(path);
+    if (!entry) return null;
+    let best = null;
+    entry.symbols.forEach(s => {
+        if (s.kind === 'class' && s.line <= line && line <= s.end && (!best || s.line > best.line)) best = s;
+    });
+    return best;
+}
+
+// Members of a class, including those inherited from project base classes
+function classMembers(path, cls, seen = new Set()) {
+    const key = `${path}:${cls.name}`;
+    if (seen.has(key)) return [];
+    seen.add(key);
+
+    const entry = files.get(path);
+    if (!entry) return [];
+    const own = entry.symbols.filter(s => s.parent === cls.name).map(symbol => ({ path, symbol }));
+    const names = new Set(own.map(m => m.symbol.name));
+
+    (cls.bases || []).forEach(base => {
+        const target = resolveName(base, path);
+        if (!target || target.module || target.symbol.kind !== 'class') return;
+        classMembers(target.path, target.symbol, seen).forEach(m => {
+            if (!names.has(m.symbol.name)) {
+                names.add(m.symbol.name);
+                own.push(m);
+            }
+        });
+    });
+    return own;
+}
+
+// Resolve a (possibly dotted) name as seen from a file to { path, symbol } or { path, module: true }
+function resolveName(name, path) {
+    const parts = name.split('.');
+    let target = resolveHead(parts[0], path);
+
+    for (let i = 1; i < parts.length && target; i++) {
+        if (target.module) {
+            const sym = findInFile(target.path, parts[i]);
+            if (sym) {
+                target = { path: target.path, symbol: sym };
+            } else {
+                const sub = resolveModule(moduleName(target.path) + '.' + parts[i], target.path);
+                target = sub ? { path: sub, module: true } : null;
+            }
+        } else if (target.symbol.kind === 'class') {
+            const member = classMembers(target.path, target.symbol).find(m => m.symbol.name === parts[i]);
+            target = member || null;
+        } else {
+            target = null;
+        }
+    }
+    return target;
+}
+
+function resolveHead(name, path) {
+    const entry = files.get(path);
+    if (entry) {
+        const local = entry.symbols.find(s => s.name === name && !s.parent && s.kind !== 'import');
+        if (local) return { path, symbol: local };
+
+        const imp = entry.symbols.find(s => s.name === name && s.kind === 'import');
+        if (imp) {
+            if (imp.target) {
+                // from module import target
+                const modPath = resolveModule(imp.module, path);
+                const subPath = resolveModule(imp.module + (imp.module.endsWith('.') ? '' : '.') + imp.target, path);
+                if (subPath) return { path: subPath, module: true };
+                if (modPath) {
+                    const sym = findInFile(modPath, imp.target);
+                    return sym ? { path: modPath, symbol: sym } : { path: modPath, module: true };
+                }
+                return null;
+            }
+            const modPath = resolveModule(imp.module, path);
+            return modPath ? { path: modPath, module: true } : null;
+        }
+    }
+
+    // Fall back to any top-level definition in the project
+    const defs = (byName.get(name) || []).filter(d => !d.symbol.parent);
+    return defs.length ? defs[0] : null;
+}
+
+const COMPLETION_TYPES = {
+    function: 'function',
+    method: 'method',
+    class: 'class',
+    variable: 'variable',
+    attribute: 'property',
+    import: 'namespace'
+};
+
+function toOption(symbol, boost = 0, detail = null) {
+    return {
+        label: symbol.name,
+        type: COMPLETION_TYPES[symbol.kind] || 'variable',
+        detail: detail || symbol.signature || undefined,
+        info: symbol.doc || undefined,
+        boost
+    };
+}
+
+// --- Public API ---
+
+export const symbolIndex = {
+    // postFn forwards messages to the current Python worker
+    init: (postFn) => {
+        post = postFn;
+    },
+
+    // Called with false when the worker restarts and true on LOADED
+    setReady: (flag) => {
+        ready = flag;
+        if (!flag) {
+            // Anything in flight was lost with the old worker
+            inFlight.forEach((item, path) => {
+                if (!pending.has(path)) pending.set(path, item);
+            });
+            inFlight.clear();
+        } else {
+            scheduleFlush();
+        }
+    },
+
+    onUpdate: (callback) => listeners.push(callback),
+
+    update: (path, code) => {
+        if (!isPython(path)) return;
+        track(path);
+
+        const hash = hashString(code || "");
+        const cached = files.get(path);
+        const queued = pending.get(path) || inFlight.get(path);
+        if ((queued && queued.hash === hash) || (!queued && cached && cached.hash === hash)) return;
+
+        pending.set(path, { hash, code: code || "" });
+        scheduleFlush();
+    },
+
+    remove: (path) => {
+        if (!isPython(path)) return;
+        untrack(path);
+        pending.delete(path);
+        inFlight.delete(path);
+        if (files.has(path)) {
+            setSymbols(path, []);
+            files.delete(path);
+            listeners.forEach(cb => cb([path]));
+        }
+    },
+
+    // Full project snapshot: index changed files, drop removed ones
+    sync: (projectFiles) => {
+        Object.entries(projectFiles).forEach(([path, code]) => symbolIndex.update(path, code));
+        Array.from(files.keys()).forEach(path => {
+            if (!(path in projectFiles)) symbolIndex.remove(path);
+        });
+    },
+
+    // SYMBOLS_RESULT from the worker: { path: { hash, symbols } | { hash, error: true } }
+    handleResult: (json) => {
+        let result;
+        try {
+            result = JSON.parse(json);
+        } catch (e) {
+            console.error("Symbol Index Error:", e);
+            return;
+        }
+
+        const changed = [];
+        Object.entries(result).forEach(([path, item]) => {
+            const sent = inFlight.get(path);
+            if (!sent) return; // Removed (or worker restarted) while parsing
+            if (sent.hash === item.hash) inFlight.delete(path);
+
+            const previous = files.get(path);
+            if (item.error) {
+                // Keep the last good symbols while the file has a syntax error
+                files.set(path, {
+                    hash: item.hash,
+                    symbols: previous ? previous.symbols : [],
+                    imports: previous ? previous.imports : [],
+                    error: true
+                });
+                return;
+            }
+            setSymbols(path, item.symbols);
+            files.set(path, { hash: item.hash, symbols: item.symbols, imports: item.imports || [], error: false });
+            changed.push(path);
+        });
+
+        if (changed.length) listeners.forEach(cb => cb(changed));
+        waiters.forEach(cb => cb());
+    },
+
+    // Index `code` for `path` now; resolves true once the index reflects it,
+    // false if the worker is unavailable or doesn't answer in time
+    whenIndexed: (path, code, timeoutMs = 1500) => {
+        symbolIndex.update(path, code);
+        const hash = hashString(code || "");
+        const isCurrent = () => {
+            const entry = files.get(path);
+            return !!entry && entry.hash === hash;
+        };
+
+        if (isCurrent()) return Promise.resolve(true);
+        if (!ready || !isPython(path)) return Promise.resolve(false);
+
+        if (flushTimeout) clearTimeout(flushTimeout);
+        flush();
+
+        return new Promise((resolve) => {
+            const finish = (result) => {
+                clearTimeout(timer);
+                waiters.delete(check);
+                resolve(result);
+            };
+            const check = () => { if (isCurrent()) finish(true); };
+            const timer = setTimeout(() => finish(false), timeoutMs);
+            waiters.add(check);
+        });
+    },
+
+    // O(1): does a top-level import name refer to a project module?
+    isLocalModule: (name) => localNames.has(name.split('.')[0]),
+
+    // Top-level names of non-project modules imported by `path` or, transitively,
+    // by any project module it imports
+    externalImports: (path) => {
+        const external = new Set();
+        const visited = new Set();
+        const stack = [path];
+
+        while (stack.length) {
+            const current = stack.pop();
+            if (visited.has(current)) continue;
+            visited.add(current);
+
+            const entry = files.get(current);
+            if (!entry) continue;
+            entry.imports.forEach(name => {
+                const local = resolveModule(name, current) || resolveModule(name.split('.')[0], current);
+                if (local) {
+                    stack.push(local);
+                } else if (!name.startsWith('.') && !symbolIndex.isLocalModule(name)) {
+                    external.add(name.split('.')[0]);
+                }
+            });
+        }
+        return Array.from(external);
+    },
+
+    // path -> number of import hops from `path`, following imports in both
+    // directions (modules it uses and modules that use it). Unreachable files are absent.
+    importDistances: (path) => {
+        const edges = new Map();
+        const link = (a, b) => {
+            if (!edges.has(a)) edges.set(a, new Set());
+            edges.get(a).add(b);
+        };
+        files.forEach((entry, from) => {
+            entry.imports.forEach(name => {
+                const to = resolveModule(name, from) || resolveModule(name.split('.')[0], from);
+                if (to && to !== from) {
+                    link(from, to);
+                    link(to, from);
+                }
+            });
+        });
+
+        const distances = new Map([[path, 0]]);
+        let frontier = [path];
+        while (frontier.length) {
+            const next = [];
+            frontier.forEach(current => {
+                (edges.get(current) || []).forEach(neighbour => {
+                    if (distances.has(neighbour)) return;
+                    distances.set(neighbour, distances.get(current) + 1);
+                    next.push(neighbour);
+                });
+            });
+            frontier = next;
+        }
+        return distances;
+    },
+
+    getSymbols: (path) => {
+        const entry = files.get(path);
+        return entry ? entry.symbols : [];
+    },
+
+    // Definition location for the identifier at `name` (may be dotted) inside `path` at `line`
+    findDefinition: (name, path, line) => {
+        const parts = name.split('.');
+        let target;
+
+        if ((parts[0] === 'self' || parts[0] === 'cls') && parts.length > 1) {
+            const cls = enclosingClass(path, line);
+            if (!cls) return null;
+            target = classMembers(path, cls).find(m => m.symbol.name === parts[1]) || null;
+            for (let i = 2; i < parts.length && target; i++) {
+                target = target.symbol.kind === 'class'
+                    ? classMembers(target.path, target.symbol).find(m => m.symbol.name === parts[i]) || null
+                    : null;
+            }
+        } else {
+            target = resolveName(name, path);
+        }
+
+        if (!target) return null;
+        return { path: target.path, line: target.module ? 1 : target.symbol.line };
+    },
+
+    // CodeMirror CompletionSource; getPath returns the active file
+    completionSource: (getPath) => (context) => {
+        const before = context.matchBefore(/[\w.]*$/);
+        if (!before || (before.from === before.to && !context.explicit)) return null;
+
+        const path = getPath();
+        const text = before.text;
+        const dot = text.lastIndexOf('.');
+
+        if (dot >= 0) {
+            const objectName = text.slice(0, dot);
+            if (!objectName) return null;
+            const line = context.state.doc.lineAt(context.pos).number;
+
+            let members = [];
+            if (objectName === 'self' || objectName === 'cls') {
+                const cls = enclosingClass(path, line);
+                if (cls) members = classMembers(path, cls);
+            } else {
+                const target = resolveName(objectName, path);
+                if (target && target.module) {
+                    members = topLevel(target.path).map(symbol => ({ path: target.path, symbol }));
+                } else if (target && target.symbol.kind === 'class') {
+                    members = classMembers(target.path, target.symbol);
+                }
+            }
+            if (!members.length) return null;
+
+            return {
+                from: before.from + dot + 1,
+                options: members.map(m => toOption(m.symbol)),
+                validFor: /^\w*$/
+            };
+        }
+
+        // Plain identifier: current file first, then top-level definitions across the project
+        const options = [];
+        const seen = new Set();
+        symbolIndex.getSymbols(path).forEach(sym => {
+            if (sym.parent || seen.has(sym.name)) return;
+            seen.add(sym.name);
+            options.push(toOption(sym, 2, sym.kind === 'import' ? sym.module : null));
+        });
+        files.forEach((entry, otherPath) => {
+            if (otherPath === path) return;
+            entry.symbols.forEach(sym => {
+                if (sym.parent || sym.kind === 'import' || sym.kind === 'variable' || seen.has(sym.name)) return;
+                seen.add(sym.name);
+                options.push(toOption(sym, 0, [sym.signature, moduleName(otherPath)].filter(Boolean).join(' · ')));
+            });
+        });
+
+        return { from: before.from, options, validFor: /^\w*$/ };
+    }
+};
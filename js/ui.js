@@ -64,6 +64,8 @@ function switchView(targetId, pushState = true) {
     if (pushState) {
         history.pushState({ view: targetId }, "", `#${targetId.replace('view-', '')}`);
     }
+
+    window.dispatchEvent(new CustomEvent('view-changed', { detail: { targetId } }));
 }
 
 // Handle Back Button
@@ -0,0 +1,96 @@
+// Virtualized list with keyed DOM reconciliation.
+// Only rows inside the scroll viewport (plus overscan) exist in the DOM. Rows
+// are keyed, so an element survives re-renders and is only patched when its
+// item's signature changes.
+
+export class VirtualList {
+    /**
+     * @param {HTMLElement} container - Scrollable element that hosts the list.
+     * @param {object} options
+     * @param {number} options.rowHeight - Fixed row pitch in px (row height + gap).
+     * @param {function} options.getKey - item -> unique key.
+     * @param {function} options.getSignature - item -> string; row is re-rendered when it changes.
+     * @param {function} options.renderRow - (element, item) -> void; fills a row element.
+     * @param {number} [options.overscan=6] - Extra rows rendered above/below the viewport.
+     */
+    constructor(container, { rowHeight, getKey, getSignature, renderRow, overscan = 6 }) {
+        this.container = container;
+        this.rowHeight = rowHeight;
+        this.getKey = getKey;
+        this.getSignature = getSignature;
+        this.renderRow = renderRow;
+        this.overscan = overscan;
+
+        this.items = [];
+        this.rows = new Map(); // key -> { el, signature }
+        this.frame = null;
+
+        this.spacer = document.createElement('div');
+        this.spacer.className = "relative w-full";
+        this.container.innerHTML = '';
+        this.container.appendChild(this.spacer);
+
+        this.container.addEventListener('scroll', () => this.scheduleUpdate(), { passive: true });
+        window.addEventListener('resize', () => this.scheduleUpdate());
+    }
+
+    setItems(items) {
+        this.items = items;
+        this.spacer.style.height = `${items.length * this.rowHeight}px`;
+        this.update();
+    }
+
+    scrollToTop() {
+        this.container.scrollTop = 0;
+    }
+
+    scheduleUpdate() {
+        if (this.frame) return;
+        this.frame = requestAnimationFrame(() => {
+            this.frame = null;
+            this.update();
+        });
+    }
+
+    update() {
+        // Hidden containers report 0 height; render a screenful so the list is ready when shown
+        const viewport = this.container.clientHeight || window.innerHeight;
+        const scrollTop = this.container.scrollTop;
+        const first = Math.max(0, Math.floor(scrollTop / this.rowHeight) - this.overscan);
+        const last = Math.min(this.items.length, Math.ceil((scrollTop + viewport) / this.rowHeight) + this.overscan);
+
+        const visible = new Set();
+        for (let i = first; i < last; i++) {
+            const item = this.items[i];
+            const key = this.getKey(item);
+            const signature = this.getSignature(item);
+            visible.add(key);
+
+            let row = this.rows.get(key);
+            if (!row) {
+                const el = document.createElement('div');
+                el.style.position = 'absolute';
+                el.style.left = '0';
+                el.style.right = '0';
+                this.renderRow(el, item);
+                this.spacer.appendChild(el);
+                row = { el, signature };
+                this.rows.set(key, row);
+            } else if (row.signature !== signature) {
+                this.renderRow(row.el, item);
+                row.signature = signature;
+            }
+
+            const top = `${i * this.rowHeight}px`;
+            if (row.el.style.top !== top) row.el.style.top = top;
+        }
+
+        // Drop rows that scrolled out of view or no longer exist
+        for (const [key, row] of this.rows) {
+            if (!visible.has(key)) {
+                row.el.remove();
+                this.rows.delete(key);
+            }
+        }
+    }
+}
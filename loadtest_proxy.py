@@ -0,0 +1,428 @@
+"""Load generator and latency benchmark for the AI proxy endpoints.
+
+Drives /.netlify/functions/ai-proxy and /.netlify/functions/ai-workspace-proxy
+through the local functions server (server_functions.cjs) at several
+concurrency levels, context sizes and chat-history lengths. Records TTFB,
+time to last byte, throughput, error rates and the server's RSS, writes a JSON
+report and prints a percentile summary. With --baseline the run is compared
+with an earlier report, scenario by scenario.
+
+Standard library only (asyncio streams speak HTTP/1.1 directly). A spawned
+server inherits the environment, so upstream scheduler limits can be set for a
+run (e.g. UPSTREAM_RATE_PER_SEC=1000 measures the proxy rather than the pacing).
+
+    # Start the server against the mock upstream and run the default matrix
+    python3 loadtest_proxy.py --spawn --out loadtest_report.json
+
+    # Against an already running server, compared with a saved baseline
+    python3 loadtest_proxy.py --server-pid $(pgrep -f server_functions.cjs) \\
+        --concurrency 1,16 --payload-kb 1,100 --baseline loadtest_baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+ENDPOINTS = {
+    "feature": "/.netlify/functions/ai-proxy",
+    "workspace": "/.netlify/functions/ai-workspace-proxy",
+}
+PERCENTILES = (50, 90, 95, 99)
+FILE_CHUNK_KB = 10  # Context payloads are split into project files of this size
+REQUEST_TIMEOUT_S = 120
+
+SAMPLE_LINES = [
+    "def process(records):",
+    "    totals = {}",
+    "    for record in records:",
+    "        key = record.get('name', '').strip().lower()",
+    "        totals[key] = totals.get(key, 0) + record.get('value', 0)",
+    "    return sorted(totals.items(), key=lambda item: -item[1])",
+    "",
+    "class Inventory:",
+    "    def __init__(self):",
+    "        self.items = []",
+    "",
+    "    def add(self, name, quantity=1):",
+    "        self.items.append({'name': name, 'value': quantity})",
+    "",
+]
+
+
+# --- Payloads ---
+
+def python_source(size_bytes, seed):
+    """Deterministic Python-looking text of about size_bytes."""
+    rng = random.Random(seed)
+    lines = []
+    size = 0
+    while size < size_bytes:
+        line = rng.choice(SAMPLE_LINES)
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines)[:size_bytes]
+
+
+def chat_history(turns, seed):
+    rng = random.Random(seed)
+    messages = []
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"Step {i}: please refactor {rng.choice(['process', 'Inventory.add', 'main'])} and explain the change."})
+        messages.append({"role": "assistant", "content": "Here is the updated version.\n\n```python\n" + python_source(600, seed + i) + "\n```\n\nThis keeps the behavior the same while reducing repeated lookups."})
+    return messages
+
+
+def build_body(endpoint, payload_kb, history_turns, stream, seed):
+    files = {}
+    remaining = payload_kb * 1024
+    index = 0
+    while remaining > 0:
+        size = min(remaining, FILE_CHUNK_KB * 1024)
+        files["main.py" if index == 0 else f"module_{index}.py"] = python_source(size, seed + index)
+        remaining -= size
+        index += 1
+    messages = chat_history(history_turns, seed) + [{"role": "user", "content": "Explain what main.py does and suggest one improvement."}]
+
+    if endpoint == "workspace":
+        return {"messages": messages, "files": files, "currentFile": "main.py", "mode": "chat", "stream": stream}
+    # The feature proxy takes plain messages; context goes into the prompt like the editor features do
+    context = "\n\n".join(f"--- {path} ---\n{content}" for path, content in files.items())
+    messages[-1] = {"role": "user", "content": f"{messages[-1]['content']}\n\n{context}"}
+    return {"messages": messages, "stream": stream}
+
+
+# --- HTTP/1.1 client ---
+
+async def post(url, body):
+    """POSTs JSON and reads the response; returns a sample dict with timings."""
+    parts = urlsplit(url)
+    data = json.dumps(body).encode("utf-8")
+    sample = {"status": 0, "bytes": 0, "upload_bytes": len(data), "ttfb_ms": None, "ttlb_ms": None, "error": None}
+    start = time.perf_counter()
+    writer = None
+    try:
+        reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+        head = (f"POST {parts.path or '/'} HTTP/1.1\r\nHost: {parts.netloc}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\nConnection: close\r\n\r\n")
+        writer.write(head.encode("ascii") + data)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        sample["status"] = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+        sample["headers_ms"] = (time.perf_counter() - start) * 1000
+        sample["queue_wait_ms"] = float(headers["x-queue-wait"]) if "x-queue-wait" in headers else None
+
+        tail = b""
+        async for chunk in body_chunks(reader, headers):
+            if sample["ttfb_ms"] is None:
+                sample["ttfb_ms"] = (time.perf_counter() - start) * 1000
+            sample["bytes"] += len(chunk)
+            tail = (tail + chunk)[-64:]
+        sample["ttlb_ms"] = (time.perf_counter() - start) * 1000
+        if sample["ttfb_ms"] is None:
+            sample["ttfb_ms"] = sample["ttlb_ms"]
+
+        if sample["status"] >= 400:
+            sample["error"] = f"http_{sample['status']}"
+        elif headers.get("content-type", "").startswith("text/event-stream") and b"[DONE]" not in tail:
+            sample["error"] = "incomplete_stream"
+    except (OSError, ValueError, IndexError, asyncio.IncompleteReadError) as e:
+        sample["error"] = type(e).__name__
+        sample["ttlb_ms"] = (time.perf_counter() - start) * 1000
+    finally:
+        if writer is not None:
+            writer.close()
+    return sample
+
+
+async def body_chunks(reader, headers):
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        while True:
+            size_line = await reader.readline()
+            if not size_line:
+                raise asyncio.IncompleteReadError(b"", None)
+            size = int(size_line.split(b";")[0].strip() or b"0", 16)
+            if size == 0:
+                await reader.readline()
+                return
+            yield await reader.readexactly(size)
+            await reader.readexactly(2)
+    elif "content-length" in headers:
+        remaining = int(headers["content-length"])
+        while remaining > 0:
+            chunk = await reader.read(min(remaining, 65536))
+            if not chunk:
+                raise asyncio.IncompleteReadError(b"", remaining)
+            remaining -= len(chunk)
+            yield chunk
+    else:
+        while True:
+            chunk = await reader.read(65536)
+            if not chunk:
+                return
+            yield chunk
+
+
+# --- Server RSS ---
+
+def read_rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+async def sample_rss(pid, samples, stop):
+    while not stop.is_set():
+        rss = read_rss_mb(pid)
+        if rss is not None:
+            samples.append(rss)
+        try:
+            await asyncio.wait_for(stop.wait(), 0.2)
+        except asyncio.TimeoutError:
+            pass
+
+
+# --- Scenarios ---
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return round(ordered[low] + (ordered[high] - ordered[low]) * (rank - low), 2)
+
+
+def distribution(values):
+    stats = {f"p{p}": percentile(values, p) for p in PERCENTILES}
+    stats["max"] = round(max(values), 2) if values else None
+    stats["mean"] = round(sum(values) / len(values), 2) if values else None
+    return stats
+
+
+def scenario_key(s):
+    return f"{s['endpoint']}|c{s['concurrency']}|{s['payload_kb']}kb|h{s['history_turns']}|{'stream' if s['stream'] else 'json'}"
+
+
+async def run_scenario(base_url, scenario, total_requests, server_pid):
+    url = base_url.rstrip("/") + ENDPOINTS[scenario["endpoint"]]
+    queue = asyncio.Queue()
+    for i in range(total_requests):
+        queue.put_nowait(i)
+    samples = []
+
+    async def worker():
+        while True:
+            try:
+                i = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            # Distinct seeds keep bodies unique, so response caches don't short-circuit the run
+            body = build_body(scenario["endpoint"], scenario["payload_kb"], scenario["history_turns"], scenario["stream"], seed=i * 7919 + int(time.time()))
+            try:
+                samples.append(await asyncio.wait_for(post(url, body), REQUEST_TIMEOUT_S))
+            except asyncio.TimeoutError:
+                samples.append({"status": 0, "bytes": 0, "upload_bytes": 0, "ttfb_ms": None, "ttlb_ms": REQUEST_TIMEOUT_S * 1000, "error": "timeout"})
+
+    rss, stop = [], asyncio.Event()
+    sampler = asyncio.create_task(sample_rss(server_pid, rss, stop)) if server_pid else None
+    rss_before = read_rss_mb(server_pid) if server_pid else None
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(scenario["concurrency"])))
+    elapsed = time.perf_counter() - started
+    if sampler:
+        stop.set()
+        await sampler
+
+    ok = [s for s in samples if not s["error"]]
+    errors = {}
+    for s in samples:
+        if s["error"]:
+            errors[s["error"]] = errors.get(s["error"], 0) + 1
+    queue_waits = [s["queue_wait_ms"] for s in ok if s.get("queue_wait_ms") is not None]
+    return {
+        **scenario,
+        "key": scenario_key(scenario),
+        "requests": len(samples),
+        "ok": len(ok),
+        "error_rate": round(1 - len(ok) / len(samples), 4) if samples else 0,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else None,
+        "download_mbps": round(sum(s["bytes"] for s in ok) / elapsed / 1e6, 3) if elapsed else None,
+        "upload_kb_per_request": round(sum(s["upload_bytes"] for s in samples) / len(samples) / 1024, 1) if samples else None,
+        "ttfb_ms": distribution([s["ttfb_ms"] for s in ok]),
+        "ttlb_ms": distribution([s["ttlb_ms"] for s in ok]),
+        "queue_wait_ms": distribution(queue_waits) if queue_waits else None,
+        "server_rss_mb": {
+            "before": round(rss_before, 1) if rss_before else None,
+            "peak": round(max(rss), 1) if rss else None,
+            "after": round(rss[-1], 1) if rss else None,
+        },
+    }
+
+
+# --- Report ---
+
+def print_summary(results):
+    print(f"\n{'scenario':<38} {'ok/req':>9} {'err%':>6} {'rps':>7} {'ttfb p50':>9} {'p95':>8} {'ttlb p50':>9} {'p95':>8} {'p99':>8} {'rss peak':>9}")
+    for r in results:
+        rss = r["server_rss_mb"]["peak"]
+        print(f"{r['key']:<38} {r['ok']:>4}/{r['requests']:<4} {r['error_rate'] * 100:>6.1f} {r['throughput_rps'] or 0:>7.1f} "
+              f"{fmt(r['ttfb_ms']['p50']):>9} {fmt(r['ttfb_ms']['p95']):>8} {fmt(r['ttlb_ms']['p50']):>9} "
+              f"{fmt(r['ttlb_ms']['p95']):>8} {fmt(r['ttlb_ms']['p99']):>8} {fmt(rss, ' MB'):>9}")
+
+
+def fmt(value, unit=""):
+    return "-" if value is None else f"{value:.0f}{unit}"
+
+
+def compare(results, baseline, tolerance):
+    """Prints per-scenario deltas; returns the list of regressions."""
+    previous = {r["key"]: r for r in baseline.get("results", [])}
+    regressions = []
+    print(f"\nBaseline comparison (regression = worse by more than {tolerance * 100:.0f}%):")
+    for r in results:
+        old = previous.get(r["key"])
+        if not old:
+            print(f"  {r['key']}: not in baseline")
+            continue
+        checks = [
+            ("ttfb p50", old["ttfb_ms"]["p50"], r["ttfb_ms"]["p50"], True),
+            ("ttfb p95", old["ttfb_ms"]["p95"], r["ttfb_ms"]["p95"], True),
+            ("ttlb p50", old["ttlb_ms"]["p50"], r["ttlb_ms"]["p50"], True),
+            ("ttlb p95", old["ttlb_ms"]["p95"], r["ttlb_ms"]["p95"], True),
+            ("rps", old["throughput_rps"], r["throughput_rps"], False),
+        ]
+        parts = []
+        for name, before, after, lower_is_better in checks:
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            worse = change > tolerance if lower_is_better else change < -tolerance
+            parts.append(f"{name} {before:.0f}->{after:.0f} ({change * 100:+.0f}%{' !' if worse else ''})")
+            if worse:
+                regressions.append(f"{r['key']}: {name}")
+        if r["error_rate"] > old["error_rate"] + 0.01:
+            parts.append(f"errors {old['error_rate'] * 100:.1f}%->{r['error_rate'] * 100:.1f}% !")
+            regressions.append(f"{r['key']}: error rate")
+        print(f"  {r['key']}: " + ", ".join(parts))
+    return regressions
+
+
+def int_list(text):
+    return [int(v) for v in text.split(",") if v.strip()]
+
+
+def port_open(port):
+    try:
+        with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+            return True
+    except OSError:
+        return False
+
+
+def spawn_server(port, env_overrides):
+    if port_open(port):
+        raise RuntimeError(f"Port {port} is already in use; stop the running server or drop --spawn")
+    env = dict(os.environ)
+    env.pop("LONGCAT_API_KEY", None)  # Mock mode: the server starts its in-process mock upstream
+    env.update(env_overrides)
+    root = os.path.dirname(os.path.abspath(__file__))
+    proc = subprocess.Popen(["node", "server_functions.cjs"], cwd=root, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        if port_open(port):
+            return proc
+        time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"server_functions.cjs did not start listening on port {port}")
+
+
+async def main_async(args):
+    server = None
+    server_pid = args.server_pid
+    if args.spawn:
+        overrides = {"MOCK_SCENARIO": args.mock_scenario} if args.mock_scenario else {}
+        server = spawn_server(8888, overrides)
+        server_pid = server.pid
+        print(f"Started server_functions.cjs (pid {server_pid}, mock upstream{', scenario ' + args.mock_scenario if args.mock_scenario else ''})")
+
+    endpoints = list(ENDPOINTS) if args.endpoint == "both" else [args.endpoint]
+    scenarios = [
+        {"endpoint": e, "concurrency": c, "payload_kb": kb, "history_turns": h, "stream": args.stream}
+        for e in endpoints for kb in int_list(args.payload_kb) for h in int_list(args.history_turns) for c in int_list(args.concurrency)
+    ]
+    results = []
+    try:
+        for scenario in scenarios:
+            requests = max(args.requests, scenario["concurrency"])
+            print(f"Running {scenario_key(scenario)} ({requests} requests)...", flush=True)
+            results.append(await run_scenario(args.url, scenario, requests, server_pid))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {k: v for k, v in vars(args).items() if k not in ("baseline", "out")},
+        "results": results,
+    }
+    print_summary(results)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): " + "; ".join(regressions))
+            return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the AI proxy endpoints through server_functions.cjs.")
+    parser.add_argument("--url", default="http://localhost:8888", help="Functions server base URL")
+    parser.add_argument("--endpoint", choices=["feature", "workspace", "both"], default="both")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per scenario (at least the concurrency)")
+    parser.add_argument("--payload-kb", default="1,10,100", help="Comma-separated context sizes in KB")
+    parser.add_argument("--history-turns", default="0,40", help="Comma-separated chat history lengths (user/assistant pairs)")
+    parser.add_argument("--no-stream", dest="stream", action="store_false", help="Request non-streaming (JSON) completions")
+    parser.add_argument("--spawn", action="store_true", help="Start server_functions.cjs in mock mode for the run")
+    parser.add_argument("--mock-scenario", help="MOCK_SCENARIO for --spawn (see mock_upstream.cjs)")
+    parser.add_argument("--server-pid", type=int, help="PID of a running server, for RSS sampling")
+    parser.add_argument("--out", default="loadtest_report.json", help="JSON report path")
+    parser.add_argument("--baseline", help="Earlier report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative slowdown before a regression is reported")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,457 @@
+// Mock LLM Upstream
+// A local stand-in for the LongCat chat completions API, used to exercise the
+// proxies (streaming, caching, queueing, retries) offline and reproducibly.
+// Timing and failures come from a scenario: time to first token, tokens per
+// second, chunk size, response length, injected 500 / 429 responses and
+// mid-stream disconnects, drawn from a seeded PRNG so runs repeat exactly.
+// Requests from the workspace's special modes (safety_check, input_solver,
+// summarize, developer agent turns) get canned answers in the real formats.
+// Responses can be recorded from the real API and replayed with their timing.
+//
+//   node mock_upstream.cjs                         -> http://127.0.0.1:8899
+//   MOCK_SCENARIO=flaky node mock_upstream.cjs
+//   LONGCAT_API_BASE=http://127.0.0.1:8899 LONGCAT_API_KEY=mock-key node server_functions.cjs
+//
+// Scenario: MOCK_SCENARIO (preset name or JSON), overridden field by field by
+// MOCK_TTFT_MS, MOCK_TOKENS_PER_SEC, MOCK_CHUNK_TOKENS, MOCK_TOTAL_TOKENS,
+// MOCK_ERROR_RATE, MOCK_RATE_LIMIT_RATE, MOCK_RETRY_AFTER_S, MOCK_DISCONNECT_RATE,
+// MOCK_DISCONNECT_AFTER_TOKENS and MOCK_SEED. At runtime: POST /__mock/scenario
+// (JSON, merged into the current one), GET /__mock/stats, POST /__mock/reset.
+// Recording: MOCK_RECORD=<file.jsonl> forwards to MOCK_RECORD_UPSTREAM (the
+// real base URL) and appends every response. Replay: MOCK_REPLAY=<file.jsonl>
+// (MOCK_REPLAY_SPEED scales the recorded delays); unknown requests fall back
+// to the scenario.
+const http = require('http');
+const fs = require('fs');
+const crypto = require('crypto');
+
+const DEFAULT_PORT = 8899;
+
+const PRESETS = {
+    // Roughly the old hard-coded stand-in: a short reply in ~100 ms steps
+    default: { ttftMs: 100, tokensPerSec: 40, chunkTokens: 4, totalTokens: 24 },
+    instant: { ttftMs: 0, tokensPerSec: 0, chunkTokens: 16, totalTokens: 64 },
+    realistic: { ttftMs: 600, tokensPerSec: 60, chunkTokens: 2, totalTokens: 300 },
+    slow: { ttftMs: 3000, tokensPerSec: 8, chunkTokens: 1, totalTokens: 120 },
+    long: { ttftMs: 300, tokensPerSec: 250, chunkTokens: 8, totalTokens: 4000 },
+    flaky: { ttftMs: 300, tokensPerSec: 60, chunkTokens: 2, totalTokens: 200, errorRate: 0.1, rateLimitRate: 0.1, disconnectRate: 0.1 },
+    rate_limited: { ttftMs: 200, tokensPerSec: 60, chunkTokens: 2, totalTokens: 100, rateLimitRate: 0.5, retryAfterS: 1 }
+};
+
+const BASE_SCENARIO = {
+    ttftMs: 100, // Delay before the status line / first chunk
+    tokensPerSec: 40, // 0 = no pacing
+    chunkTokens: 4, // Tokens per SSE event
+    totalTokens: 24, // Length of generated (non-canned) replies
+    errorRate: 0, // Share of requests answered with 500
+    rateLimitRate: 0, // Share answered with 429 + Retry-After
+    retryAfterS: 2,
+    disconnectRate: 0, // Share of streams cut off mid-way
+    disconnectAfterTokens: 8,
+    seed: 1
+};
+
+const ENV_FIELDS = {
+    MOCK_TTFT_MS: 'ttftMs',
+    MOCK_TOKENS_PER_SEC: 'tokensPerSec',
+    MOCK_CHUNK_TOKENS: 'chunkTokens',
+    MOCK_TOTAL_TOKENS: 'totalTokens',
+    MOCK_ERROR_RATE: 'errorRate',
+    MOCK_RATE_LIMIT_RATE: 'rateLimitRate',
+    MOCK_RETRY_AFTER_S: 'retryAfterS',
+    MOCK_DISCONNECT_RATE: 'disconnectRate',
+    MOCK_DISCONNECT_AFTER_TOKENS: 'disconnectAfterTokens',
+    MOCK_SEED: 'seed'
+};
+
+const WORDS = ('the code reads each line from the input file and splits it into fields before ' +
+    'counting how often every word appears then sorts the totals so the most common entries ' +
+    'come first and prints a short table with one row per word').split(' ');
+
+function scenarioFromEnv(env = process.env) {
+    let scenario = { ...BASE_SCENARIO };
+    const named = env.MOCK_SCENARIO || 'default';
+    if (named.trim().startsWith('{')) {
+        scenario = { ...scenario, ...JSON.parse(named) };
+    } else if (PRESETS[named]) {
+        scenario = { ...scenario, ...PRESETS[named] };
+    } else {
+        console.warn(`[Mock Upstream] Unknown scenario "${named}"; using default. Presets: ${Object.keys(PRESETS).join(', ')}`);
+    }
+    for (const [name, field] of Object.entries(ENV_FIELDS)) {
+        if (env[name] !== undefined && env[name] !== '' && Number.isFinite(Number(env[name]))) {
+            scenario[field] = Number(env[name]);
+        }
+    }
+    return scenario;
+}
+
+// mulberry32: small seeded PRNG so injected failures repeat run to run
+function createRandom(seed) {
+    let a = seed >>> 0;
+    return () => {
+        a = (a + 0x6D2B79F5) >>> 0;
+        let t = a;
+        t = Math.imul(t ^ (t >>> 15), t | 1);
+        t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+        return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+    };
+}
+
+function sleep(ms) {
+    return ms > 0 ? new Promise(resolve => setTimeout(resolve, ms)) : Promise.resolve();
+}
+
+// Word-level "tokens", each keeping its trailing whitespace
+function tokenize(text) {
+    return text.match(/\s*\S+\s*|\s+/g) || [];
+}
+
+// Same rough count the proxies use for prompts
+function countTokens(text) {
+    return Math.ceil(String(text || '').length / 4);
+}
+
+function requestKey(request) {
+    const { model, messages, stream, temperature } = request;
+    return crypto.createHash('sha256')
+        .update(JSON.stringify({ model, messages, stream: !!stream, temperature }))
+        .digest('hex');
+}
+
+// --- Canned Replies ---
+
+function messageText(message) {
+    return message && typeof message.content === 'string' ? message.content : '';
+}
+
+function extractCode(text) {
+    const marker = text.indexOf(':\n\n');
+    return marker === -1 ? text : text.slice(marker + 3);
+}
+
+function cannedSafetyVerdict(code) {
+    const loop = /while\s+(True|1)\s*:/.test(code) && !/\bbreak\b|\breturn\b|sys\.exit/.test(code);
+    return JSON.stringify(loop
+        ? { safe: false, risk_level: 'high', reason: 'while True loop without a break or return.', type: 'infinite_loop' }
+        : { safe: true, risk_level: 'low', reason: 'Code appears safe.', type: 'none' });
+}
+
+function cannedInputs(code) {
+    const prompts = [];
+    const re = /input\(\s*(?:(['"])(.*?)\1)?\s*\)/g;
+    let match;
+    while ((match = re.exec(code)) && prompts.length < 50) {
+        prompts.push({ prompt: match[2] || '', value: /\b(int|float)\s*\(\s*input/.test(code.slice(Math.max(0, match.index - 12), match.index + 6)) ? '1' : 'test' });
+    }
+    return JSON.stringify({ inputs: prompts });
+}
+
+function cannedAgentTurn() {
+    const agent = {
+        thought: 'Write a small program and run it to check the output.',
+        files: { 'main.py': 'def main():\n    total = sum(range(10))\n    print(f"Total: {total}")\n\n\nif __name__ == "__main__":\n    main()\n' },
+        inputs: [],
+        command: 'run'
+    };
+    return 'Applying the change now.\n\n```json_agent\n' + JSON.stringify(agent, null, 2) + '\n```';
+}
+
+function generatedText(count, random) {
+    const tokens = [];
+    const start = Math.floor(random() * WORDS.length);
+    for (let i = 0; i < count; i++) {
+        let word = WORDS[(start + i) % WORDS.length];
+        if (i === 0) word = word[0].toUpperCase() + word.slice(1);
+        tokens.push(word + ((i + 1) % 14 === 0 ? '.\n\n' : ' '));
+    }
+    return tokens.join('').replace(/\.?\s*$/, '.');
+}
+
+// Picks the reply for a request from the shape of its prompt
+function cannedReply(request, scenario, random) {
+    const messages = Array.isArray(request.messages) ? request.messages : [];
+    const system = messageText(messages.find(m => m.role === 'system'));
+    const last = messageText(messages[messages.length - 1]);
+
+    if (system.includes('Code Safety Analyzer')) {
+        return { kind: 'safety_check', text: cannedSafetyVerdict(extractCode(last)) };
+    }
+    if (system.includes('predict the stdin')) {
+        return { kind: 'input_batch', text: cannedInputs(extractCode(last)) };
+    }
+    if (system.includes('input provider')) {
+        return { kind: 'input_solver', text: /number|int|age|count|how many/i.test(last) ? '1' : 'test' };
+    }
+    if (system.includes('compress the earlier part')) {
+        return { kind: 'summarize', text: 'The user is working on a Python script; earlier turns covered its structure and a fixed bug.' };
+    }
+    if (system.includes('ACTIVE MODE: DEVELOPER')) {
+        if (last.startsWith('Execution Result:')) {
+            return { kind: 'agent_done', text: 'The program ran successfully and the output looks correct. Task complete.' };
+        }
+        if (/permission granted/i.test(last)) return { kind: 'json_agent', text: cannedAgentTurn() };
+        return { kind: 'perm_request', text: 'I need to edit files to complete this request. <<PERM_REQUEST>> I will update main.py and run it.' };
+    }
+    return { kind: 'chat', text: generatedText(scenario.totalTokens, random) };
+}
+
+// --- Response Writers ---
+
+function completionId() {
+    return 'chatcmpl-mock-' + crypto.randomBytes(6).toString('hex');
+}
+
+function sseEvent(data) {
+    return `data: ${typeof data === 'string' ? data : JSON.stringify(data)}\n\n`;
+}
+
+async function writeCompletion(res, request, reply, scenario, random, stats) {
+    const tokens = tokenize(reply.text);
+    const usage = {
+        prompt_tokens: (request.messages || []).reduce((sum, m) => sum + countTokens(m.content), 0),
+        completion_tokens: tokens.length,
+        total_tokens: 0
+    };
+    usage.total_tokens = usage.prompt_tokens + usage.completion_tokens;
+    const id = completionId();
+    const created = Math.floor(Date.now() / 1000);
+    const model = request.model || 'LongCat-Flash-Lite';
+
+    await sleep(scenario.ttftMs);
+    if (res.destroyed) return;
+
+    if (!request.stream) {
+        if (scenario.tokensPerSec > 0) await sleep(tokens.length / scenario.tokensPerSec * 1000);
+        res.writeHead(200, { 'Content-Type': 'application/json' });
+        res.end(JSON.stringify({
+            id, object: 'chat.completion', created, model,
+            choices: [{ index: 0, message: { role: 'assistant', content: reply.text }, finish_reason: 'stop' }],
+            usage
+        }));
+        return;
+    }
+
+    const chunkTokens = Math.max(1, Math.floor(scenario.chunkTokens));
+    const chunkDelayMs = scenario.tokensPerSec > 0 ? chunkTokens / scenario.tokensPerSec * 1000 : 0;
+    const cutAt = random() < scenario.disconnectRate ? Math.max(1, scenario.disconnectAfterTokens) : Infinity;
+
+    res.writeHead(200, { 'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache' });
+    for (let i = 0; i < tokens.length; i += chunkTokens) {
+        if (i > 0) await sleep(chunkDelayMs);
+        if (res.destroyed) return;
+        if (i >= cutAt) {
+            stats.disconnects++;
+            console.log(`[Mock Upstream] Disconnecting mid-stream after ${i} tokens.`);
+            res.destroy();
+            return;
+        }
+        const content = tokens.slice(i, i + chunkTokens).join('');
+        const ok = res.write(sseEvent({ id, object: 'chat.completion.chunk', created, model, choices: [{ index: 0, delta: { content }, finish_reason: null }] }));
+        if (!ok) await new Promise(resolve => res.once('drain', resolve));
+    }
+    res.write(sseEvent({ id, object: 'chat.completion.chunk', created, model, choices: [{ index: 0, delta: {}, finish_reason: 'stop' }], usage }));
+    res.end(sseEvent('[DONE]'));
+}
+
+// --- Record / Replay ---
+
+function loadRecordings(file) {
+    const recordings = new Map();
+    if (!file || !fs.existsSync(file)) return recordings;
+    for (const line of fs.readFileSync(file, 'utf8').split('\n')) {
+        if (!line.trim()) continue;
+        try {
+            const entry = JSON.parse(line);
+            recordings.set(entry.key, entry);
+        } catch (e) {
+            console.warn("[Mock Upstream] Skipping malformed recording line.");
+        }
+    }
+    console.log(`[Mock Upstream] Loaded ${recordings.size} recorded responses from ${file}`);
+    return recordings;
+}
+
+async function replay(res, entry, speed) {
+    res.writeHead(entry.status, { 'Content-Type': entry.contentType || 'application/json' });
+    let last = 0;
+    for (const [offsetMs, chunk] of entry.chunks) {
+        await sleep((offsetMs - last) / speed);
+        last = offsetMs;
+        if (res.destroyed) return;
+        if (!res.write(chunk)) await new Promise(resolve => res.once('drain', resolve));
+    }
+    res.end();
+}
+
+// Forwards to the real API, streaming the answer through and saving it with timings
+async function record(req, res, rawBody, key, options) {
+    const started = Date.now();
+    const upstream = await fetch(options.recordUpstream.replace(/\/+$/, '') + req.url.replace(/^\/v1(?=\/)/, ''), {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', 'Authorization': req.headers.authorization || '' },
+        body: rawBody
+    });
+    const entry = { key, status: upstream.status, contentType: upstream.headers.get('content-type'), chunks: [] };
+    res.writeHead(upstream.status, { 'Content-Type': entry.contentType || 'application/json' });
+    const decoder = new TextDecoder();
+    for await (const value of upstream.body) {
+        const chunk = decoder.decode(value, { stream: true });
+        entry.chunks.push([Date.now() - started, chunk]);
+        if (!res.destroyed) res.write(chunk);
+    }
+    res.end();
+    fs.appendFileSync(options.recordFile, JSON.stringify(entry) + '\n');
+    options.recordings.set(key, entry);
+    console.log(`[Mock Upstream] Recorded ${entry.chunks.length} chunks (${upstream.status}) in ${Date.now() - started}ms.`);
+}
+
+// --- Server ---
+
+function readJson(req) {
+    return new Promise((resolve, reject) => {
+        const chunks = [];
+        req.on('data', chunk => chunks.push(chunk));
+        req.on('end', () => resolve(Buffer.concat(chunks).toString('utf8')));
+        req.on('error', reject);
+    });
+}
+
+/**
+ * Starts the mock upstream.
+ * @param {{ port?: number, host?: string, scenario?: object, recordFile?: string, recordUpstream?: string, replayFile?: string, replaySpeed?: number }} options
+ * @returns {Promise<{ server: http.Server, url: string, setScenario: function, stats: function }>}
+ */
+function startMockUpstream(options = {}) {
+    const env = process.env;
+    const config = {
+        port: options.port ?? Number(env.MOCK_UPSTREAM_PORT || DEFAULT_PORT),
+        host: options.host || '127.0.0.1',
+        recordFile: options.recordFile ?? env.MOCK_RECORD,
+        recordUpstream: options.recordUpstream ?? env.MOCK_RECORD_UPSTREAM,
+        replaySpeed: options.replaySpeed ?? (Number(env.MOCK_REPLAY_SPEED) || 1)
+    };
+    config.recordings = loadRecordings(options.replayFile ?? env.MOCK_REPLAY);
+    if (config.recordFile && !config.recordUpstream) {
+        throw new Error("MOCK_RECORD needs MOCK_RECORD_UPSTREAM (the real API base URL)");
+    }
+
+    let scenario = { ...scenarioFromEnv(env), ...(options.scenario || {}) };
+    let random = createRandom(scenario.seed);
+    const stats = { requests: 0, byKind: {}, errors: 0, rateLimited: 0, disconnects: 0, replayed: 0, recorded: 0 };
+    const resetStats = () => {
+        Object.assign(stats, { requests: 0, byKind: {}, errors: 0, rateLimited: 0, disconnects: 0, replayed: 0, recorded: 0 });
+    };
+    const setScenario = (changes) => {
+        scenario = { ...scenario, ...changes };
+        random = createRandom(scenario.seed);
+        console.log("[Mock Upstream] Scenario:", JSON.stringify(scenario));
+    };
+
+    const server = http.createServer(async (req, res) => {
+        try {
+            // Control endpoints
+            if (req.url === '/__mock/stats') {
+                res.writeHead(200, { 'Content-Type': 'application/json' });
+                res.end(JSON.stringify({ scenario, ...stats }));
+                return;
+            }
+            if (req.url === '/__mock/scenario' && req.method === 'POST') {
+                const { preset, ...changes } = JSON.parse((await readJson(req)) || '{}');
+                // A preset starts from scratch; plain fields adjust the current scenario
+                setScenario(preset ? { ...BASE_SCENARIO, ...PRESETS[preset], ...changes } : changes);
+                res.writeHead(200, { 'Content-Type': 'application/json' });
+                res.end(JSON.stringify(scenario));
+                return;
+            }
+            if (req.url === '/__mock/reset' && req.method === 'POST') {
+                resetStats();
+                random = createRandom(scenario.seed);
+                res.writeHead(204);
+                res.end();
+                return;
+            }
+
+            if (req.method !== 'POST') {
+                res.statusCode = 204; // Warm-up pings and anything else
+                res.end();
+                return;
+            }
+
+            const rawBody = await readJson(req);
+            let request;
+            try {
+                request = JSON.parse(rawBody);
+            } catch (e) {
+                res.writeHead(400, { 'Content-Type': 'application/json' });
+                res.end(JSON.stringify({ error: { message: 'Invalid JSON body', type: 'invalid_request_error' } }));
+                return;
+            }
+            stats.requests++;
+            const key = requestKey(request);
+            res.on('close', () => {
+                if (!res.writableFinished) console.log("[Mock Upstream] Request aborted.");
+            });
+
+            const recorded = config.recordings.get(key);
+            if (recorded) {
+                stats.replayed++;
+                await replay(res, recorded, config.replaySpeed);
+                return;
+            }
+            if (config.recordFile) {
+                stats.recorded++;
+                await record(req, res, rawBody, key, config);
+                return;
+            }
+
+            // Draws happen in a fixed order per request, so a seed gives one exact sequence
+            const failDraw = random();
+            const reply = cannedReply(request, scenario, random);
+            stats.byKind[reply.kind] = (stats.byKind[reply.kind] || 0) + 1;
+            console.log(`[Mock Upstream] ${req.url} (${reply.kind}, stream: ${!!request.stream})`);
+
+            if (failDraw < scenario.rateLimitRate) {
+                stats.rateLimited++;
+                res.writeHead(429, { 'Content-Type': 'application/json', 'Retry-After': String(scenario.retryAfterS) });
+                res.end(JSON.stringify({ error: { message: 'Rate limit exceeded (mock)', type: 'rate_limit_error' } }));
+                return;
+            }
+            if (failDraw < scenario.rateLimitRate + scenario.errorRate) {
+                stats.errors++;
+                await sleep(scenario.ttftMs);
+                res.writeHead(500, { 'Content-Type': 'application/json' });
+                res.end(JSON.stringify({ error: { message: 'Internal error (mock)', type: 'server_error' } }));
+                return;
+            }
+
+            await writeCompletion(res, request, reply, scenario, random, stats);
+        } catch (e) {
+            console.error("Mock Upstream Error:", e);
+            if (!res.headersSent) {
+                res.writeHead(500, { 'Content-Type': 'application/json' });
+                res.end(JSON.stringify({ error: { message: e.message } }));
+            } else {
+                res.destroy();
+            }
+        }
+    });
+
+    return new Promise((resolve, reject) => {
+        server.once('error', reject);
+        server.listen(config.port, config.host, () => {
+            const url = `http://${config.host}:${server.address().port}`;
+            console.log(`[Mock Upstream] Listening on ${url} (scenario: ${JSON.stringify(scenario)})`);
+            resolve({ server, url, setScenario, stats: () => ({ scenario, ...stats }) });
+        });
+    });
+}
+
+module.exports = { startMockUpstream, scenarioFromEnv, PRESETS };
+
+if (require.main === module) {
+    startMockUpstream().catch(e => {
+        console.error("Mock Upstream Error:", e.message);
+        process.exit(1);
+    });
+}
@@ -1,6 +1,14 @@
 const { stream } = require("@netlify/functions");
+const { createResponseCache } = require("../lib/response-cache.cjs");
+const { scheduledFetch, queueHeaders, rejectionResponse } = require("../lib/upstream-scheduler.cjs");
+const { withMetrics } = require("../lib/request-metrics.cjs");
 
-exports.handler = stream(async (event, context) => {
+// Cache for requests the client marks deterministic (`cache: true`, non-streaming:
+// explain / docs / refactor). Those are pinned to temperature 0 so a cached answer
+// is the answer upstream would give again.
+const responseCache = createResponseCache({ ttlMs: 60 * 60 * 1000, maxEntries: 200 });
+
+exports.handler = stream(withMetrics("ai-proxy", async (event, context, metrics) => {
     // 1. Method Check
     if (event.httpMethod !== "POST") {
         return { statusCode: 405, body: JSON.stringify({ error: "Method Not Allowed" }) };
@@ -22,19 +30,77 @@ exports.handler = stream(async (event, context) => {
         return { statusCode: 400, body: JSON.stringify({ error: "Invalid JSON in request body" }) };
     }
 
-    const { messages, model, stream: shouldStream = true } = body;
+    const { messages, model, stream: shouldStream = true, cache: useCache = false } = body;
+    metrics.mark("parse");
+    metrics.set({ mode: useCache && !shouldStream ? "cached" : shouldStream ? "stream" : "json", body_bytes: (event.body || "").length });
 
     // 4. Validate Payload
     if (!messages || !Array.isArray(messages)) {
         console.error("Validation Error: Missing or invalid 'messages'");
         return { statusCode: 400, body: JSON.stringify({ error: "Missing or invalid 'messages' in request body" }) };
     }
+    metrics.prompt(messages);
+    metrics.mark("context");
+
+    // --- Deterministic Requests: Cached + Single-Flight ---
+    if (useCache && !shouldStream) {
+        const request = {
+            model: model || "LongCat-Flash-Lite",
+            messages: messages,
+            temperature: 0,
+            stream: false
+        };
+        try {
+            return await responseCache.run(responseCache.key(["ai-proxy", request]), async () => {
+                console.log(`Sending cacheable request to LongCat API (Model: ${request.model})...`);
+                const response = await scheduledFetch("feature", "/chat/completions", {
+                    method: "POST",
+                    headers: {
+                        "Content-Type": "application/json",
+                        "Authorization": `Bearer ${API_KEY}`
+                    },
+                    body: JSON.stringify(request)
+                });
+                metrics.upstream(response);
+
+                if (!response.ok) {
+                    const errorText = await response.text();
+                    console.error(`Upstream API Error (${response.status}):`, errorText);
+                    return {
+                        statusCode: response.status >= 500 ? 502 : response.status,
+                        headers: { "Content-Type": "application/json", ...queueHeaders(response) },
+                        body: JSON.stringify({ error: `Upstream API Error: ${response.status} - ${errorText}` })
+                    };
+                }
+
+                const data = await response.json();
+
+                metrics.mark("read");
+
+                metrics.set({ usage: data.usage });
+                return {
+                    statusCode: 200,
+                    headers: { "Content-Type": "application/json", ...queueHeaders(response) },
+                    body: JSON.stringify(data)
+                };
+            });
+        } catch (error) {
+            console.error("Internal Proxy Error:", error);
+            const rejected = rejectionResponse(error);
+            if (rejected) return rejected;
+            return {
+                statusCode: 500,
+                headers: { "Content-Type": "application/json" },
+                body: JSON.stringify({ error: `Internal Server Error: ${error.message}` })
+            };
+        }
+    }
 
     // --- Revised Logic: Fetch First, Stream Later ---
     try {
         console.log(`Sending request to LongCat API (Model: ${model || "LongCat-Flash-Lite"}, Stream: ${shouldStream})...`);
 
-        const response = await fetch("https://api.longcat.chat/openai/v1/chat/completions", {
+        const response = await scheduledFetch("feature", "/chat/completions", {
             method: "POST",
             headers: {
                 "Content-Type": "application/json",
@@ -46,6 +112,7 @@ exports.handler = stream(async (event, context) => {
                 stream: shouldStream // Respect client preference
             })
         });
+        metrics.upstream(response);
 
         // 5. Check Upstream Status
         if (!response.ok) {
@@ -54,7 +121,7 @@ exports.handler = stream(async (event, context) => {
             // Return JSON Error Response directly (No Stream)
             return {
                 statusCode: response.status >= 500 ? 502 : response.status,
-                headers: { "Content-Type": "application/json" },
+                headers: { "Content-Type": "application/json", ...queueHeaders(response) },
                 body: JSON.stringify({ error: `Upstream API Error: ${response.status} - ${errorText}` })
             };
         }
@@ -84,26 +151,31 @@ exports.handler = stream(async (event, context) => {
                 headers: {
                     "Content-Type": "text/event-stream",
                     "Cache-Control": "no-cache",
-                    "Connection": "keep-alive"
+                    "Connection": "keep-alive",
+                    ...queueHeaders(response)
                 },
                 body: streamBody
             };
         } else {
             // Non-Streaming Mode: Return JSON directly
             const data = await response.json();
+            metrics.mark("read");
+            metrics.set({ usage: data.usage });
             return {
                 statusCode: 200,
-                headers: { "Content-Type": "application/json" },
+                headers: { "Content-Type": "application/json", ...queueHeaders(response) },
                 body: JSON.stringify(data)
             };
         }
 
     } catch (error) {
         console.error("Internal Proxy Error:", error);
+        const rejected = rejectionResponse(error);
+        if (rejected) return rejected;
         return {
             statusCode: 500,
             headers: { "Content-Type": "application/json" },
             body: JSON.stringify({ error: `Internal Server Error: ${error.message}` })
         };
     }
-});
+}));
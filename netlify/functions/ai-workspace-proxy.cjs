@@ -1,6 +1,94 @@
 const { stream } = require("@netlify/functions");
+const crypto = require("crypto");
+const zlib = require("zlib");
+const { createResponseCache } = require("../lib/response-cache.cjs");
+const { warmUpstream, upstreamStats } = require("../lib/upstream-client.cjs");
+const { scheduledFetch, queueHeaders, rejectionResponse, schedulerStats } = require("../lib/upstream-scheduler.cjs");
+const { withMetrics, estimateTokens } = require("../lib/request-metrics.cjs");
+
+// Deterministic modes only (safety_check, batch input prediction); chat / agent /
+// per-prompt input turns are never cached
+const responseCache = createResponseCache({ ttlMs: 30 * 60 * 1000, maxEntries: 300 });
+
+const MAX_PREDICTED_INPUTS = 50;
+
+// --- Context Blob Cache ---
+// The workspace sends project files as SHA-256 references (`fileRefs`) and only
+// uploads blobs this instance has not seen for its session. Blobs live for a
+// short TTL in a byte-bounded LRU; anything missing is reported back with a 409
+// so the client can upload exactly those hashes.
+const BLOB_TTL_MS = 30 * 60 * 1000;
+const BLOB_CACHE_MAX_BYTES = 32 * 1024 * 1024;
+const MAX_BODY_BYTES = 10 * 1024 * 1024;
+const blobCache = new Map(); // `${session}:${hash}` -> { content, expires }
+let blobCacheBytes = 0;
+
+function sha256Hex(text) {
+    return crypto.createHash("sha256").update(text, "utf8").digest("hex");
+}
+
+function dropBlob(key) {
+    const entry = blobCache.get(key);
+    if (!entry) return;
+    blobCache.delete(key);
+    blobCacheBytes -= entry.content.length;
+}
+
+function getBlob(key) {
+    const entry = blobCache.get(key);
+    if (!entry) return null;
+    if (entry.expires < Date.now()) {
+        dropBlob(key);
+        return null;
+    }
+    // Refresh LRU position and TTL
+    blobCache.delete(key);
+    entry.expires = Date.now() + BLOB_TTL_MS;
+    blobCache.set(key, entry);
+    return entry.content;
+}
+
+function putBlob(key, content) {
+    dropBlob(key);
+    blobCache.set(key, { content, expires: Date.now() + BLOB_TTL_MS });
+    blobCacheBytes += content.length;
+    for (const oldest of blobCache.keys()) {
+        if (blobCacheBytes <= BLOB_CACHE_MAX_BYTES) break;
+        dropBlob(oldest);
+    }
+}
+
+// Resolves { path: hash } against uploaded blobs and the cache
+function resolveFileRefs(session, fileRefs, blobs) {
+    for (const [hash, content] of Object.entries(blobs || {})) {
+        // Only accept blobs that really are content-addressed
+        if (typeof content === "string" && sha256Hex(content) === hash) {
+            putBlob(`${session}:${hash}`, content);
+        }
+    }
+
+    const files = {};
+    const missing = new Set();
+    for (const [path, hash] of Object.entries(fileRefs)) {
+        const content = getBlob(`${session}:${hash}`);
+        if (content === null) missing.add(hash);
+        else files[path] = content;
+    }
+    return { files, missing: Array.from(missing) };
+}
+
+// Request bodies may be gzip-compressed (Content-Encoding: gzip, base64 event body)
+function decodeBody(event) {
+    const headers = event.headers || {};
+    const encoding = String(headers["content-encoding"] || "").toLowerCase();
+    let raw = Buffer.from(event.body || "", event.isBase64Encoded ? "base64" : "utf8");
+    if (encoding === "gzip") {
+        raw = zlib.gunzipSync(raw, { maxOutputLength: MAX_BODY_BYTES });
+    }
+    return JSON.parse(raw.toString("utf8"));
+}
 
-exports.handler = stream(async (event, context) => {
+exports.handler = stream(withMetrics("ai-workspace-proxy", async (event, context, metrics) => {
     // 1. Method Check
     if (event.httpMethod !== "POST") {
         return { statusCode: 405, body: JSON.stringify({ error: "Method Not Allowed" }) };
@@ -16,13 +104,28 @@ exports.handler = stream(async (event, context) => {
     // 3. Parse Body
     let body;
     try {
-        body = JSON.parse(event.body);
+        body = decodeBody(event);
     } catch (e) {
         console.error("JSON Parse Error:", e);
         return { statusCode: 400, body: JSON.stringify({ error: "Invalid JSON in request body" }) };
     }
 
-    const { messages, files, currentFile, model, mode, prompt, logs, code } = body;
+    const { messages, currentFile, model, mode, prompt, logs, code } = body;
+    let { files } = body;
+    metrics.mark("parse");
+    metrics.set({ mode: mode || "chat", body_bytes: (event.body || "").length });
+
+    // --- Warm-up Ping ---
+    // Sent when the AI workspace opens: keeps this instance warm and opens the
+    // pooled upstream connection before the first real request needs it
+    if (mode === 'warmup') {
+        const upstream = await warmUpstream();
+        return {
+            statusCode: 200,
+            headers: { "Content-Type": "application/json", "Cache-Control": "no-store" },
+            body: JSON.stringify({ warm: true, upstream, pool: upstreamStats(), queue: schedulerStats() })
+        };
+    }
 
     // --- Special Mode: Safety Check (Non-Streaming) ---
     if (mode === 'safety_check') {
@@ -47,8 +150,160 @@ exports.handler = stream(async (event, context) => {
         const userPrompt = `Analyze this code:\n\n${code}`;
 
         try {
-             console.log("Processing Safety Check Request...");
-             const response = await fetch("https://api.longcat.chat/openai/v1/chat/completions", {
+            const safetyRequest = {
+                model: "LongCat-Flash-Lite",
+                messages: [
+                    { role: "system", content: systemPrompt },
+                    { role: "user", content: userPrompt }
+                ],
+                temperature: 0.1,
+                max_tokens: 300
+            };
+
+            metrics.prompt(safetyRequest.messages);
+            metrics.mark("context");
+
+            // Same code -> same verdict: served from cache, concurrent duplicates share one call
+            return await responseCache.run(responseCache.key(["safety_check", safetyRequest]), async () => {
+                console.log("Processing Safety Check Request...");
+                const response = await scheduledFetch("background", "/chat/completions", {
+                    method: "POST",
+                    headers: {
+                        "Content-Type": "application/json",
+                        "Authorization": `Bearer ${API_KEY}`
+                    },
+                    body: JSON.stringify(safetyRequest)
+                });
+                metrics.upstream(response);
+
+                if (!response.ok) {
+                    const err = await response.text();
+                    return { statusCode: response.status, headers: queueHeaders(response), body: err };
+                }
+
+                const data = await response.json();
+
+                metrics.mark("read");
+
+                metrics.set({ usage: data.usage });
+                let text = "";
+                if (data.choices && data.choices[0] && data.choices[0].message) {
+                    text = data.choices[0].message.content.trim();
+                }
+                text = text.replace(/```json/g, '').replace(/```/g, '').trim();
+
+                let valid = true;
+                try {
+                    JSON.parse(text);
+                } catch (e) {
+                    valid = false; // Don't pin a malformed verdict in the cache
+                }
+
+                return {
+                    statusCode: 200,
+                    headers: { "Content-Type": "application/json", ...queueHeaders(response) },
+                    body: text,
+                    cacheable: valid
+                };
+            });
+
+        } catch (e) {
+            console.error("Safety Check Error:", e);
+            return rejectionResponse(e) || { statusCode: 500, body: JSON.stringify({ error: "Safety Check Failed" }) };
+        }
+    }
+
+    // --- Special Mode: Input Solver, Batch Prediction (Non-Streaming) ---
+    // Predicts every stdin value of a run up front from the source, so the client
+    // only falls back to the per-prompt solver when the program diverges
+    if (mode === 'input_solver' && body.batch) {
+        const systemPrompt = `You predict the stdin of a Python program before it runs.
+        List, in order, every value the program will read with input() during a typical successful run of its main path.
+        For loops that keep asking, include enough entries to reach their exit (e.g. a quit command).
+        Return ONLY a JSON object: {"inputs": [{"prompt": "<text passed to input(), or empty>", "value": "<what to type>"}]}
+        At most ${MAX_PREDICTED_INPUTS} entries. No markdown, no explanation.`;
+
+        const batchRequest = {
+            model: "LongCat-Flash-Lite",
+            messages: [
+                { role: "system", content: systemPrompt },
+                { role: "user", content: `Program (${currentFile || "main.py"}):\n\n${String(code || "")}` }
+            ],
+            temperature: 0,
+            max_tokens: 800
+        };
+
+        metrics.prompt(batchRequest.messages);
+        metrics.mark("context");
+
+        try {
+            // Same source -> same prediction (re-runs of unchanged code skip the call)
+            return await responseCache.run(responseCache.key(["input_batch", batchRequest]), async () => {
+                console.log("Processing Input Prediction Request...");
+                const response = await scheduledFetch("input", "/chat/completions", {
+                    method: "POST",
+                    headers: {
+                        "Content-Type": "application/json",
+                        "Authorization": `Bearer ${API_KEY}`
+                    },
+                    body: JSON.stringify(batchRequest)
+                });
+                metrics.upstream(response);
+
+                if (!response.ok) {
+                    const err = await response.text();
+                    return { statusCode: response.status, headers: queueHeaders(response), body: err };
+                }
+
+                const data = await response.json();
+
+                metrics.mark("read");
+
+                metrics.set({ usage: data.usage });
+                let text = "";
+                if (data.choices && data.choices[0] && data.choices[0].message) {
+                    text = data.choices[0].message.content.trim();
+                }
+                text = text.replace(/```json/g, '').replace(/```/g, '').trim();
+
+                let inputs = [];
+                let valid = true;
+                try {
+                    const parsed = JSON.parse(text);
+                    inputs = (Array.isArray(parsed) ? parsed : parsed.inputs || [])
+                        .slice(0, MAX_PREDICTED_INPUTS)
+                        .map(item => (item && typeof item === "object")
+                            ? { prompt: String(item.prompt ?? ""), value: String(item.value ?? "") }
+                            : { prompt: "", value: String(item) });
+                } catch (e) {
+                    valid = false; // Client falls back to per-prompt solving
+                }
+
+                return {
+                    statusCode: 200,
+                    headers: { "Content-Type": "application/json", ...queueHeaders(response) },
+                    body: JSON.stringify({ inputs }),
+                    cacheable: valid
+                };
+            });
+
+        } catch (e) {
+            console.error("Input Prediction Error:", e);
+            return rejectionResponse(e) || { statusCode: 500, body: JSON.stringify({ error: "Input Prediction Failed" }) };
+        }
+    }
+
+    // --- Special Mode: Input Solver (Non-Streaming) ---
+    if (mode === 'input_solver') {
+        const systemPrompt = "You are an input provider for a running program. Return ONLY the string value to be entered. Do not add quotes or explanation.";
+        let logText = Array.isArray(logs) ? logs.map(l => l.content).join('') : String(logs || "");
+        const userPrompt = `The program is paused waiting for input.\nPrompt: '${prompt}'\n\nRecent Logs:\n${logText}\n\nProvide the input value now.`;
+
+        try {
+            metrics.prompt([{ content: systemPrompt }, { content: userPrompt }]);
+            metrics.mark("context");
+            console.log("Processing Input Solver Request...");
+            const response = await scheduledFetch("input", "/chat/completions", {
                 method: "POST",
                 headers: {
                     "Content-Type": "application/json",
@@ -60,44 +315,51 @@ exports.handler = stream(async (event, context) => {
                         { role: "system", content: systemPrompt },
                         { role: "user", content: userPrompt }
                     ],
-                    temperature: 0.1,
-                    max_tokens: 300
+                    temperature: 0.1
                 })
             });
+            metrics.upstream(response);
 
             if (!response.ok) {
                  const err = await response.text();
-                 return { statusCode: response.status, body: err };
+                 return { statusCode: response.status, headers: queueHeaders(response), body: err };
             }
-
             const data = await response.json();
+            metrics.mark("read");
+            metrics.set({ usage: data.usage });
             let text = "";
             if (data.choices && data.choices[0] && data.choices[0].message) {
                 text = data.choices[0].message.content.trim();
             }
-            text = text.replace(/```json/g, '').replace(/```/g, '').trim();
+            const cleanText = text.replace(/^["']|["']$/g, '');
 
             return {
                 statusCode: 200,
-                headers: { "Content-Type": "application/json" },
-                body: text
+                headers: { "Content-Type": "text/plain", ...queueHeaders(response) },
+                body: cleanText
             };
 
         } catch (e) {
-            console.error("Safety Check Error:", e);
-            return { statusCode: 500, body: JSON.stringify({ error: "Safety Check Failed" }) };
+            console.error("Input Solver Error:", e);
+            return rejectionResponse(e) || { statusCode: 500, body: "Error processing input request" };
         }
     }
 
-    // --- Special Mode: Input Solver (Non-Streaming) ---
-    if (mode === 'input_solver') {
-        const systemPrompt = "You are an input provider for a running program. Return ONLY the string value to be entered. Do not add quotes or explanation.";
-        let logText = Array.isArray(logs) ? logs.map(l => l.content).join('') : String(logs || "");
-        const userPrompt = `The program is paused waiting for input.\nPrompt: '${prompt}'\n\nRecent Logs:\n${logText}\n\nProvide the input value now.`;
+    // --- Special Mode: History Summary (Non-Streaming) ---
+    if (mode === 'summarize') {
+        const systemPrompt = `You compress the earlier part of a conversation between a user and an AI coding assistant working on a Python project.
+        Write a concise summary (at most 250 words) that preserves: the user's goals and requirements, decisions made, file names and functions touched,
+        errors encountered and how they were resolved, and anything still open. Plain text, no preamble.`;
+        const transcript = (Array.isArray(messages) ? messages : [])
+            .map(m => `${String(m.role).toUpperCase()}: ${m.content}`)
+            .join('\n\n');
+        const previous = body.summary ? `Summary so far:\n${body.summary}\n\nNew messages to fold in:\n` : '';
 
         try {
-            console.log("Processing Input Solver Request...");
-            const response = await fetch("https://api.longcat.chat/openai/v1/chat/completions", {
+            metrics.prompt([{ content: systemPrompt }, { content: previous + transcript }]);
+            metrics.mark("context");
+            console.log("Processing History Summary Request...");
+            const response = await scheduledFetch("background", "/chat/completions", {
                 method: "POST",
                 headers: {
                     "Content-Type": "application/json",
@@ -107,32 +369,35 @@ exports.handler = stream(async (event, context) => {
                     model: "LongCat-Flash-Lite",
                     messages: [
                         { role: "system", content: systemPrompt },
-                        { role: "user", content: userPrompt }
+                        { role: "user", content: previous + transcript }
                     ],
-                    temperature: 0.1
+                    temperature: 0.1,
+                    max_tokens: 500
                 })
             });
+            metrics.upstream(response);
 
             if (!response.ok) {
                  const err = await response.text();
-                 return { statusCode: response.status, body: err };
+                 return { statusCode: response.status, headers: queueHeaders(response), body: err };
             }
             const data = await response.json();
+            metrics.mark("read");
+            metrics.set({ usage: data.usage });
             let text = "";
             if (data.choices && data.choices[0] && data.choices[0].message) {
                 text = data.choices[0].message.content.trim();
             }
-            const cleanText = text.replace(/^["']|["']$/g, '');
 
             return {
                 statusCode: 200,
-                headers: { "Content-Type": "text/plain" },
-                body: cleanText
+                headers: { "Content-Type": "text/plain", ...queueHeaders(response) },
+                body: text
             };
 
         } catch (e) {
-            console.error("Input Solver Error:", e);
-            return { statusCode: 500, body: "Error processing input request" };
+            console.error("History Summary Error:", e);
+            return rejectionResponse(e) || { statusCode: 500, body: "Error summarizing history" };
         }
     }
 
@@ -141,6 +406,21 @@ exports.handler = stream(async (event, context) => {
         return { statusCode: 400, body: JSON.stringify({ error: "Missing or invalid 'messages' in request body" }) };
     }
 
+    // Content-addressed context: swap hash references for cached blobs
+    if (body.fileRefs && typeof body.fileRefs === "object") {
+        const session = String(body.session || "anonymous").slice(0, 64);
+        const resolved = resolveFileRefs(session, body.fileRefs, body.blobs);
+        if (resolved.missing.length > 0) {
+            console.log(`Context cache miss: ${resolved.missing.length} blob(s) requested from client.`);
+            return {
+                statusCode: 409,
+                headers: { "Content-Type": "application/json" },
+                body: JSON.stringify({ error: "Missing context blobs", missing: resolved.missing })
+            };
+        }
+        files = resolved.files;
+    }
+
     // Security Check
     if (files) {
         const BLACKLIST = ['.env', 'firebase-auth.js', 'secrets.py', 'config.js', 'keys.json'];
@@ -152,25 +432,35 @@ exports.handler = stream(async (event, context) => {
     }
 
     // 5. Construct Context
+    // The client already packs files into the model's token budget; this cap only
+    // guards against oversized requests from elsewhere.
     let systemContext = "Project Context:\n";
-    const MAX_CONTEXT_CHARS = 100000;
-    let currentChars = 0;
+    const MAX_CONTEXT_TOKENS = 64000;
+    let currentTokens = 0;
+    const partialFiles = new Set(Array.isArray(body.partialFiles) ? body.partialFiles : []);
+    const fileHeader = (path, active) => {
+        const notes = [];
+        if (active) notes.push("Active");
+        if (partialFiles.has(path)) notes.push("Partial: omitted code is shown as signatures or '... omitted' markers; never rewrite this file in full from this view");
+        return `\n--- File: ${path}${notes.length ? ` (${notes.join("; ")})` : ""} ---\n`;
+    };
 
     if (currentFile && files && files[currentFile]) {
         const content = files[currentFile];
-        systemContext += `\n--- File: ${currentFile} (Active) ---\n${content}\n`;
-        currentChars += content.length;
+        systemContext += `${fileHeader(currentFile, true)}${content}\n`;
+        currentTokens += estimateTokens(content);
     }
 
     if (files) {
         for (const [path, content] of Object.entries(files)) {
             if (path === currentFile) continue;
-            if (currentChars + content.length > MAX_CONTEXT_CHARS) {
-                systemContext += `\n--- File: ${path} ---\n(Content truncated...)\n`;
+            const tokens = estimateTokens(content);
+            if (currentTokens + tokens > MAX_CONTEXT_TOKENS) {
+                systemContext += `${fileHeader(path, false)}(Content truncated...)\n`;
                 continue;
             }
-            systemContext += `\n--- File: ${path} ---\n${content}\n`;
-            currentChars += content.length;
+            systemContext += `${fileHeader(path, false)}${content}\n`;
+            currentTokens += tokens;
         }
     }
 
@@ -188,14 +478,17 @@ exports.handler = stream(async (event, context) => {
           \`\`\`json_agent
           {
             "thought": "Brief analysis of what to do...",
-            "files": {
-                "main.py": "full content of file...",
-                "utils.py": "full content..."
+            "edits": {
+                "main.py": [
+                    { "search": "exact existing lines to change,\\nwith 1-2 unchanged lines of context", "replace": "the new lines" }
+                ]
             },
             "inputs": ["value1", "value2"],
             "command": "run"
           }
           \`\`\`
+          - To change an existing file, send "edits": search/replace hunks. Each "search" must be copied verbatim from the current file and match exactly one place; keep hunks small and non-overlapping.
+          - Use "files": { "main.py": "full content of file..." } only for a new or empty file, when rewriting most of the file, or when asked to resend the complete file after a failed patch.
           - If the code requires user input (stdin), you MUST provide the input values in the 'inputs' array.
           - Iterate until the output is correct and error-free.
         `;
@@ -207,6 +500,11 @@ exports.handler = stream(async (event, context) => {
         `;
     }
 
+    // Older turns are folded into a rolling summary by the client
+    const earlierConversation = typeof body.summary === "string" && body.summary.trim()
+        ? `\nEARLIER CONVERSATION (summarized):\n${body.summary.trim()}\n`
+        : "";
+
     const enhancedMessages = [
         {
             role: "system",
@@ -250,18 +548,24 @@ exports.handler = stream(async (event, context) => {
             - For REPLACEMENT, the json_agent MUST create a backup file (e.g., filename_backup_timestamp.py) before overwriting.
 
             ${modeInstructions}
-
+            ${earlierConversation}
             ${systemContext}`
         },
         ...messages
     ];
 
+    metrics.prompt(enhancedMessages);
+    metrics.mark("context");
+
     // --- Revised Streaming Logic ---
     try {
         console.log(`Sending context-aware request to LongCat API (Model: ${model || "LongCat-Flash-Lite"})...`);
 
+        // Aborted when the client disconnects (Stop button) so the upstream generation stops too
+        const upstreamController = new AbortController();
+
         // Fetch First
-        const response = await fetch("https://api.longcat.chat/openai/v1/chat/completions", {
+        const response = await scheduledFetch("interactive", "/chat/completions", {
             method: "POST",
             headers: {
                 "Content-Type": "application/json",
@@ -272,35 +576,43 @@ exports.handler = stream(async (event, context) => {
                 messages: enhancedMessages,
                 temperature: 0.7,
                 stream: true // ENABLE STREAMING
-            })
+            }),
+            signal: upstreamController.signal
         });
+        metrics.upstream(response);
 
         if (!response.ok) {
             const errorText = await response.text();
             console.error(`Upstream API Error (${response.status}):`, errorText);
             return {
                 statusCode: response.status >= 500 ? 502 : response.status,
-                headers: { "Content-Type": "application/json" },
+                headers: { "Content-Type": "application/json", ...queueHeaders(response) },
                 body: JSON.stringify({ error: `Upstream API Error: ${response.status} - ${errorText}` })
             };
         }
 
-        // Pipe Stream
+        // Pipe Stream (pull-based: upstream is only read as fast as the client consumes)
+        const reader = response.body.getReader();
         const streamBody = new ReadableStream({
-            async start(controller) {
-                // Pipe Upstream Stream
-                const reader = response.body.getReader();
+            async pull(controller) {
                 try {
-                    while (true) {
-                        const { done, value } = await reader.read();
-                        if (done) break;
-                        controller.enqueue(value);
+                    const { done, value } = await reader.read();
+                    if (done) {
+                        controller.close();
+                        return;
                     }
-                    controller.close();
+                    controller.enqueue(value);
                 } catch (e) {
+                    if (upstreamController.signal.aborted) return;
                     console.error("Stream Pipe Error:", e);
                     controller.close();
                 }
+            },
+            cancel() {
+                // Client went away: stop the upstream completion instead of letting it run to the end
+                console.log("Client disconnected. Cancelling upstream request.");
+                upstreamController.abort();
+                reader.cancel().catch(() => {});
             }
         });
 
@@ -309,17 +621,20 @@ exports.handler = stream(async (event, context) => {
             headers: {
                 "Content-Type": "text/event-stream",
                 "Cache-Control": "no-cache",
-                "Connection": "keep-alive"
+                "Connection": "keep-alive",
+                ...queueHeaders(response)
             },
             body: streamBody
         };
 
     } catch (error) {
         console.error("Streaming Error:", error);
+        const rejected = rejectionResponse(error);
+        if (rejected) return rejected;
         return {
             statusCode: 500,
             headers: { "Content-Type": "application/json" },
             body: JSON.stringify({ error: `Internal Server Error: ${error.message}` })
         };
     }
-});
+}));
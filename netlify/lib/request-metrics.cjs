@@ -0,0 +1,250 @@
+// Request Metrics for the AI proxies
+// Each request gets a metrics object. The handler marks phase boundaries
+// (parse, context, queue, upstream TTFB, read / stream) and records prompt
+// size and upstream status / usage. When the response leaves, the phases go
+// out as a Server-Timing header and one JSON log line is written. Completed
+// requests also feed rolling per-endpoint histograms (last HISTORY_SIZE
+// samples) that the local functions server exposes on /stats.
+
+const HISTORY_SIZE = 500;
+const BUCKETS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000];
+
+const series = new Map(); // `${fn} ${mode}` -> { count, errors, statuses, samples: { metric: number[] } }
+
+// Rough BPE token estimate (mirrors estimateTokens in js/context-packer.js)
+function estimateTokens(text) {
+    if (!text) return 0;
+    let tokens = 0;
+    const pieces = text.match(/[A-Za-z_]+|\d+|\s+|[^\sA-Za-z_\d]/g) || [];
+    for (const piece of pieces) {
+        const c = piece.charCodeAt(0);
+        if (c === 32 || c === 9 || c === 10 || c === 13) {
+            if (piece.length > 1 || c === 10) tokens++;
+        } else if (c >= 48 && c <= 57) {
+            tokens += Math.ceil(piece.length / 3);
+        } else {
+            tokens += Math.ceil(piece.length / 4);
+        }
+    }
+    return tokens;
+}
+
+function round(ms) {
+    return Math.round(ms * 10) / 10;
+}
+
+function record(fn, mode, statusCode, timings) {
+    const key = `${fn} ${mode || "default"}`;
+    let entry = series.get(key);
+    if (!entry) {
+        entry = { count: 0, errors: 0, statuses: {}, samples: {} };
+        series.set(key, entry);
+    }
+    entry.count++;
+    if (statusCode >= 400) entry.errors++;
+    entry.statuses[statusCode] = (entry.statuses[statusCode] || 0) + 1;
+    for (const [metric, ms] of Object.entries(timings)) {
+        const samples = entry.samples[metric] || (entry.samples[metric] = []);
+        samples.push(ms);
+        if (samples.length > HISTORY_SIZE) samples.shift();
+    }
+}
+
+function percentile(sorted, pct) {
+    return sorted.length ? sorted[Math.min(sorted.length - 1, Math.floor(sorted.length * pct / 100))] : null;
+}
+
+function histogram(samples) {
+    const sorted = samples.slice().sort((a, b) => a - b);
+    // Cumulative, like Prometheus "le" buckets
+    const buckets = {};
+    let i = 0;
+    for (const limit of BUCKETS_MS) {
+        while (i < sorted.length && sorted[i] <= limit) i++;
+        buckets[`le_${limit}`] = i;
+    }
+    buckets.le_inf = sorted.length;
+    return {
+        count: sorted.length,
+        p50: percentile(sorted, 50),
+        p90: percentile(sorted, 90),
+        p99: percentile(sorted, 99),
+        max: sorted.length ? sorted[sorted.length - 1] : null,
+        buckets
+    };
+}
+
+// Usage is in the last SSE event that has one (when the upstream sends it at all)
+function usageScanner() {
+    const decoder = new TextDecoder();
+    let carry = "";
+    let usage = null;
+    return {
+        push(chunk) {
+            const lines = (carry + decoder.decode(chunk, { stream: true })).split("\n");
+            carry = lines.pop();
+            for (const line of lines) {
+                if (!line.startsWith("data:") || !line.includes('"usage"')) continue;
+                try {
+                    const data = JSON.parse(line.slice(5).trim());
+                    if (data.usage) usage = data.usage;
+                } catch (e) {
+                    // Partial or non-JSON event: ignore
+                }
+            }
+        },
+        get usage() {
+            return usage;
+        }
+    };
+}
+
+class RequestMetrics {
+    constructor(fn) {
+        this.fn = fn;
+        this.started = performance.now();
+        this.last = this.started;
+        this.phases = {};
+        this.fields = {};
+    }
+
+    /** Ends the current phase: time since the previous mark is added to `phase`. */
+    mark(phase) {
+        const now = performance.now();
+        this.phases[phase] = (this.phases[phase] || 0) + (now - this.last);
+        this.last = now;
+    }
+
+    set(fields) {
+        Object.assign(this.fields, fields);
+    }
+
+    /** Size of the prompt sent upstream. */
+    prompt(messages) {
+        let chars = 0;
+        let tokens = 0;
+        for (const m of messages || []) {
+            const content = typeof m.content === "string" ? m.content : JSON.stringify(m.content || "");
+            chars += content.length;
+            tokens += estimateTokens(content) + 4;
+        }
+        this.set({ prompt_chars: chars, prompt_tokens: tokens, prompt_messages: (messages || []).length });
+    }
+
+    /** Call when scheduledFetch() resolves: splits queue wait from upstream TTFB. */
+    upstream(response) {
+        const now = performance.now();
+        const elapsed = now - this.last;
+        this.last = now;
+        const queue = response.queue || {};
+        const wait = Math.min(queue.waitMs || 0, elapsed);
+        this.phases.queue = (this.phases.queue || 0) + wait;
+        this.phases.upstream = (this.phases.upstream || 0) + elapsed - wait;
+        this.set({ upstream_status: response.status });
+        if (queue.retries) this.set({ upstream_retries: queue.retries });
+    }
+
+    serverTiming() {
+        const entries = Object.entries(this.phases).map(([phase, ms]) => `${phase};dur=${round(ms)}`);
+        entries.push(`total;dur=${round(performance.now() - this.started)}`);
+        return entries.join(", ");
+    }
+
+    finish(statusCode, extra = {}) {
+        if (this.done) return;
+        this.done = true;
+        const total = performance.now() - this.started;
+        const phases = Object.fromEntries(Object.entries(this.phases).map(([k, v]) => [k, round(v)]));
+        console.log(JSON.stringify({
+            type: "proxy_request",
+            fn: this.fn,
+            status: statusCode,
+            total_ms: round(total),
+            phases,
+            ...this.fields,
+            ...extra
+        }));
+        record(this.fn, this.fields.mode, statusCode, { total, ...this.phases });
+    }
+
+    /**
+     * Adds Server-Timing to a handler result and logs it. Streamed bodies are
+     * logged when the stream ends (with the stream duration and usage).
+     */
+    respond(result) {
+        if (!result) return result;
+        const statusCode = result.statusCode || 200;
+        const headers = { ...(result.headers || {}), "Server-Timing": this.serverTiming() };
+        if (headers["X-Cache"]) this.set({ cache: headers["X-Cache"] });
+        if (!(result.body instanceof ReadableStream)) {
+            this.finish(statusCode);
+            return { ...result, headers };
+        }
+
+        const reader = result.body.getReader();
+        const scanner = usageScanner();
+        let bytes = 0;
+        const end = (outcome) => {
+            this.mark("stream");
+            this.finish(statusCode, { stream_bytes: bytes, stream_outcome: outcome, usage: scanner.usage || undefined });
+        };
+        const body = new ReadableStream({
+            start: () => {
+                this.last = performance.now(); // Stream time starts when the headers go out
+            },
+            async pull(controller) {
+                try {
+                    const { done, value } = await reader.read();
+                    if (done) {
+                        end("complete");
+                        controller.close();
+                        return;
+                    }
+                    bytes += value.byteLength;
+                    scanner.push(value);
+                    controller.enqueue(value);
+                } catch (e) {
+                    end("error");
+                    controller.error(e);
+                }
+            },
+            cancel(reason) {
+                end("client_closed");
+                return reader.cancel(reason);
+            }
+        });
+        return { ...result, headers, body };
+    }
+}
+
+/**
+ * Wraps a proxy handler so every response gets Server-Timing and a log line.
+ * The handler receives the metrics object as its third argument.
+ */
+function withMetrics(fn, handler) {
+    return async (event, context) => {
+        const metrics = new RequestMetrics(fn);
+        try {
+            return metrics.respond(await handler(event, context, metrics));
+        } catch (e) {
+            metrics.finish(500, { error: e.message });
+            throw e;
+        }
+    };
+}
+
+/** Rolling histograms per endpoint and mode (last HISTORY_SIZE requests each). */
+function metricsSnapshot() {
+    const out = {};
+    for (const [key, entry] of series) {
+        out[key] = {
+            count: entry.count,
+            errors: entry.errors,
+            statuses: entry.statuses,
+            latency_ms: Object.fromEntries(Object.entries(entry.samples).map(([metric, samples]) => [metric, histogram(samples.map(round))]))
+        };
+    }
+    return { window: HISTORY_SIZE, buckets_ms: BUCKETS_MS, series: out };
+}
+
+module.exports = { withMetrics, metricsSnapshot, estimateTokens };
@@ -0,0 +1,91 @@
+// Response Cache for deterministic proxy modes
+// Entries are keyed by a SHA-256 of (mode, model, messages, parameters), expire
+// after a TTL and are evicted least-recently-used beyond a size bound. Identical
+// requests that arrive while one is already upstream share that call
+// (single-flight) instead of each paying the full latency.
+const crypto = require("crypto");
+
+function createResponseCache({ ttlMs = 10 * 60 * 1000, maxEntries = 500, maxBytes = 8 * 1024 * 1024 } = {}) {
+    const entries = new Map(); // key -> { response, size, expires } (Map order = LRU order)
+    const inFlight = new Map(); // key -> Promise<response>
+    let bytes = 0;
+
+    function drop(key) {
+        const entry = entries.get(key);
+        if (!entry) return;
+        entries.delete(key);
+        bytes -= entry.size;
+    }
+
+    function get(key) {
+        const entry = entries.get(key);
+        if (!entry) return null;
+        if (entry.expires < Date.now()) {
+            drop(key);
+            return null;
+        }
+        entries.delete(key);
+        entries.set(key, entry);
+        return entry.response;
+    }
+
+    function set(key, response) {
+        drop(key);
+        const size = Buffer.byteLength(response.body, "utf8");
+        if (size > maxBytes) return;
+        entries.set(key, { response, size, expires: Date.now() + ttlMs });
+        bytes += size;
+        for (const oldest of entries.keys()) {
+            if (entries.size <= maxEntries && bytes <= maxBytes) break;
+            drop(oldest);
+        }
+    }
+
+    return {
+        key: (parts) => crypto.createHash("sha256").update(JSON.stringify(parts)).digest("hex"),
+
+        /**
+         * Serves `key` from the cache, from an identical in-flight request, or by
+         * calling `produce()`. Only 200 responses with a string body are stored;
+         * `produce` can also opt a response out with `cacheable: false`.
+         * @returns {Promise<{statusCode, headers, body}>} with an X-Cache header (HIT / SHARED / MISS).
+         */
+        run: async (key, produce) => {
+            const cached = get(key);
+            if (cached) return withCacheHeader(cached, "HIT");
+
+            if (inFlight.has(key)) {
+                return withCacheHeader(await inFlight.get(key), "SHARED");
+            }
+
+            const promise = (async () => {
+                const response = await produce();
+                if (response.statusCode === 200 && typeof response.body === "string" && response.cacheable !== false) {
+                    set(key, response);
+                }
+                return response;
+            })();
+            inFlight.set(key, promise);
+            try {
+                return withCacheHeader(await promise, "MISS");
+            } finally {
+                inFlight.delete(key);
+            }
+        },
+
+        stats: () => ({ entries: entries.size, bytes, inFlight: inFlight.size })
+    };
+}
+
+function withCacheHeader({ cacheable, ...response }, status) {
+    const headers = { ...(response.headers || {}), "X-Cache": status };
+    if (status === "HIT") {
+        // Scheduling headers describe the original upstream call, not this hit
+        for (const name of Object.keys(headers)) {
+            if (/^x-queue-|^x-upstream-retries$/i.test(name)) delete headers[name];
+        }
+    }
+    return { ...response, headers };
+}
+
+module.exports = { createResponseCache };
@@ -0,0 +1,284 @@
+// Upstream Client for the LongCat API
+// Both proxies send their upstream calls through this module instead of plain
+// global fetch. Connections live in one keep-alive pool per function instance,
+// so warm instances skip TCP + TLS setup. HTTPS origins that negotiate h2
+// share a single multiplexed HTTP/2 session. Responses are standard Web
+// `Response` objects, so call sites keep their fetch-style code. The base URL
+// is configurable (LONGCAT_API_BASE) for local HTTP / HTTPS stand-ins.
+const http = require("http");
+const https = require("https");
+const http2 = require("http2");
+const { Readable } = require("stream");
+
+const DEFAULT_BASE_URL = "https://api.longcat.chat/openai/v1";
+
+function envNumber(name, fallback) {
+    const value = Number(process.env[name]);
+    return Number.isFinite(value) && value > 0 ? value : fallback;
+}
+
+const CONNECT_TIMEOUT_MS = envNumber("UPSTREAM_CONNECT_TIMEOUT_MS", 10 * 1000);
+const HEADERS_TIMEOUT_MS = envNumber("UPSTREAM_HEADERS_TIMEOUT_MS", 60 * 1000); // Until the status line (TTFB)
+const IDLE_TIMEOUT_MS = envNumber("UPSTREAM_IDLE_TIMEOUT_MS", 120 * 1000); // Silence while streaming the body
+const MAX_SOCKETS = envNumber("UPSTREAM_MAX_SOCKETS", 16);
+const HTTP2_MODE = (process.env.UPSTREAM_HTTP2 || "auto").toLowerCase(); // auto (https only) | on | off
+
+const agentOptions = {
+    keepAlive: true,
+    keepAliveMsecs: 15 * 1000,
+    maxSockets: MAX_SOCKETS,
+    maxFreeSockets: MAX_SOCKETS,
+    scheduling: "lifo", // Hottest socket first; idle ones age out
+    timeout: IDLE_TIMEOUT_MS
+};
+const agents = { "http:": new http.Agent(agentOptions), "https:": new https.Agent(agentOptions) };
+
+const h2Sessions = new Map(); // origin -> { session, ready: Promise<boolean> }
+const h1Only = new Set(); // Origins that did not negotiate HTTP/2
+
+const counters = { requests: 0, reused: 0, connections: 0, h2Streams: 0, h2Sessions: 0, errors: 0, timeouts: 0 };
+
+// Headers HTTP/2 forbids (connection-specific)
+const H2_FORBIDDEN = new Set(["connection", "host", "keep-alive", "proxy-connection", "transfer-encoding", "upgrade"]);
+
+function baseUrl() {
+    // Read per call: local servers may point this at a stand-in after startup
+    return (process.env.LONGCAT_API_BASE || DEFAULT_BASE_URL).replace(/\/+$/, "");
+}
+
+function resolveUrl(target) {
+    return new URL(/^https?:\/\//.test(target) ? target : baseUrl() + (target.startsWith("/") ? target : "/" + target));
+}
+
+function abortError(signal) {
+    return signal && signal.reason instanceof Error
+        ? signal.reason
+        : new DOMException("This operation was aborted", "AbortError");
+}
+
+function timeoutError(phase, ms) {
+    counters.timeouts++;
+    const err = new Error(`Upstream ${phase} timeout after ${ms}ms`);
+    err.name = "TimeoutError";
+    return err;
+}
+
+function toHeaders(raw) {
+    const headers = new Headers();
+    for (const [key, value] of Object.entries(raw)) {
+        if (key.startsWith(":") || value === undefined) continue;
+        for (const v of Array.isArray(value) ? value : [value]) headers.append(key, String(v));
+    }
+    return headers;
+}
+
+function toResponse(status, statusText, rawHeaders, body) {
+    // Null-body statuses must not carry a stream
+    const empty = status === 204 || status === 205 || status === 304;
+    if (empty) body.resume();
+    return new Response(empty ? null : Readable.toWeb(body), { status, statusText, headers: toHeaders(rawHeaders) });
+}
+
+function normalizeHeaders(headers) {
+    const out = {};
+    new Headers(headers || {}).forEach((value, key) => { out[key] = value; });
+    return out;
+}
+
+function logRequest(url, protocol, reused) {
+    console.log(`[Upstream] ${protocol} ${url.pathname} ${reused ? "reused" : "new"} connection ` +
+        `(reused ${counters.reused}/${counters.requests}, connections ${counters.connections}, h2 sessions ${counters.h2Sessions})`);
+}
+
+// --- HTTP/1.1 (keep-alive agent) ---
+
+function requestH1(url, { method, headers, body, signal }) {
+    return new Promise((resolve, reject) => {
+        const req = (url.protocol === "https:" ? https : http).request(url, {
+            method,
+            headers,
+            agent: agents[url.protocol],
+            timeout: IDLE_TIMEOUT_MS
+        });
+
+        let settled = false;
+        const fail = (err) => {
+            if (!settled) {
+                settled = true;
+                clearTimeout(headersTimer);
+                counters.errors++;
+                reject(err);
+            }
+            req.destroy(err);
+        };
+        const headersTimer = setTimeout(() => fail(timeoutError("headers", HEADERS_TIMEOUT_MS)), HEADERS_TIMEOUT_MS);
+
+        if (signal) {
+            if (signal.aborted) return fail(abortError(signal));
+            signal.addEventListener("abort", () => fail(abortError(signal)), { once: true });
+        }
+
+        req.on("socket", (socket) => {
+            counters.requests++;
+            if (req.reusedSocket) counters.reused++;
+            else counters.connections++;
+            logRequest(url, "h1", req.reusedSocket);
+            if (socket.connecting) {
+                const connectTimer = setTimeout(() => fail(timeoutError("connect", CONNECT_TIMEOUT_MS)), CONNECT_TIMEOUT_MS);
+                socket.once(url.protocol === "https:" ? "secureConnect" : "connect", () => clearTimeout(connectTimer));
+                socket.once("close", () => clearTimeout(connectTimer));
+            }
+        });
+        req.on("timeout", () => fail(timeoutError("idle", IDLE_TIMEOUT_MS)));
+        req.on("error", fail);
+        req.on("response", (res) => {
+            if (settled) return res.resume();
+            settled = true;
+            clearTimeout(headersTimer);
+            resolve(toResponse(res.statusCode, res.statusMessage, res.headers, res));
+        });
+
+        req.end(body);
+    });
+}
+
+// --- HTTP/2 (one multiplexed session per origin) ---
+
+function getSession(origin) {
+    const existing = h2Sessions.get(origin);
+    if (existing && !existing.session.closed && !existing.session.destroyed) return { entry: existing, reused: true };
+
+    const session = http2.connect(origin);
+    const entry = {
+        session,
+        active: 0,
+        ready: new Promise((resolve) => {
+            const timer = setTimeout(() => {
+                session.destroy();
+                resolve(false);
+            }, CONNECT_TIMEOUT_MS);
+            session.once("connect", () => {
+                clearTimeout(timer);
+                resolve(true);
+            });
+            session.once("error", () => {
+                clearTimeout(timer);
+                resolve(false);
+            });
+        })
+    };
+    session.on("error", () => {}); // Surfaced per stream; the session is simply dropped
+    session.on("close", () => {
+        if (h2Sessions.get(origin) === entry) h2Sessions.delete(origin);
+    });
+    session.setTimeout(IDLE_TIMEOUT_MS, () => session.close());
+    session.unref(); // Idle sessions must not keep the process alive
+    h2Sessions.set(origin, entry);
+    counters.h2Sessions++;
+    return { entry, reused: false };
+}
+
+function requestH2(entry, url, { method, headers, body, signal }, reused) {
+    const { session } = entry;
+    return new Promise((resolve, reject) => {
+        const h2Headers = { ":method": method, ":path": url.pathname + url.search };
+        for (const [key, value] of Object.entries(headers)) {
+            if (!H2_FORBIDDEN.has(key)) h2Headers[key] = value;
+        }
+
+        counters.requests++;
+        counters.h2Streams++;
+        if (reused) counters.reused++;
+        else counters.connections++;
+        logRequest(url, "h2", reused);
+
+        // Keep the process alive only while streams are open
+        if (entry.active++ === 0) session.ref();
+        const stream = session.request(h2Headers, { endStream: false });
+        let settled = false;
+        const fail = (err) => {
+            if (!settled) {
+                settled = true;
+                clearTimeout(headersTimer);
+                counters.errors++;
+                reject(err);
+            }
+            stream.destroy(err);
+        };
+        const headersTimer = setTimeout(() => fail(timeoutError("headers", HEADERS_TIMEOUT_MS)), HEADERS_TIMEOUT_MS);
+
+        if (signal) {
+            if (signal.aborted) return fail(abortError(signal));
+            signal.addEventListener("abort", () => fail(abortError(signal)), { once: true });
+        }
+
+        stream.setTimeout(IDLE_TIMEOUT_MS, () => fail(timeoutError("idle", IDLE_TIMEOUT_MS)));
+        stream.on("error", fail);
+        stream.on("close", () => {
+            if (--entry.active === 0 && !session.destroyed) session.unref();
+        });
+        stream.on("response", (resHeaders) => {
+            if (settled) return;
+            settled = true;
+            clearTimeout(headersTimer);
+            resolve(toResponse(Number(resHeaders[":status"]), "", resHeaders, stream));
+        });
+
+        stream.end(body);
+    });
+}
+
+function useHttp2(url) {
+    if (HTTP2_MODE === "off" || h1Only.has(url.origin)) return false;
+    return HTTP2_MODE === "on" || url.protocol === "https:";
+}
+
+// --- Public API ---
+
+/**
+ * fetch()-compatible request to the upstream API over the shared pool.
+ * @param {string} target - Path relative to LONGCAT_API_BASE (e.g. "/chat/completions") or an absolute URL.
+ * @param {{ method?: string, headers?: object, body?: string|Buffer, signal?: AbortSignal }} init
+ * @returns {Promise<Response>}
+ */
+async function upstreamFetch(target, init = {}) {
+    const url = resolveUrl(target);
+    const body = init.body === undefined || init.body === null ? undefined : Buffer.from(init.body);
+    const headers = normalizeHeaders(init.headers);
+    if (body) headers["content-length"] = String(body.length);
+    const options = { method: (init.method || "GET").toUpperCase(), headers, body, signal: init.signal };
+
+    if (useHttp2(url)) {
+        const { entry, reused } = getSession(url.origin);
+        if (await entry.ready) return requestH2(entry, url, options, reused);
+        // No h2 (ALPN refused or connect failed): remember and use the HTTP/1.1 pool
+        h1Only.add(url.origin);
+        h2Sessions.delete(url.origin);
+        console.log(`[Upstream] HTTP/2 unavailable for ${url.origin}; using HTTP/1.1 keep-alive pool.`);
+    }
+    return requestH1(url, options);
+}
+
+/**
+ * Opens (or keeps) a pooled connection to the upstream origin without calling
+ * a model: an OPTIONS request whose status is irrelevant. Used by the warm-up ping.
+ * @returns {Promise<{ ok: boolean, reused: boolean, ms: number }>}
+ */
+async function warmUpstream() {
+    const started = Date.now();
+    const before = counters.reused;
+    try {
+        const response = await upstreamFetch(baseUrl() + "/", { method: "OPTIONS" });
+        await response.arrayBuffer();
+        return { ok: true, reused: counters.reused > before, ms: Date.now() - started };
+    } catch (e) {
+        console.error("Upstream Warm-up Error:", e.message);
+        return { ok: false, reused: false, ms: Date.now() - started };
+    }
+}
+
+function upstreamStats() {
+    return { ...counters, h2Origins: h2Sessions.size, h1OnlyOrigins: h1Only.size };
+}
+
+module.exports = { upstreamFetch, warmUpstream, upstreamStats };
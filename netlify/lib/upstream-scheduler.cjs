@@ -0,0 +1,297 @@
+// Upstream Scheduler
+// All model calls of one Node process go through one queue. Each request has
+// a class: interactive chat > input solver > feature calls > background checks.
+// The highest-priority waiting request is dispatched first, within a global and
+// a per-class concurrency cap, paced by a token bucket. An upstream 429 empties
+// the bucket, halves its rate and pauses dispatch for the Retry-After period;
+// the request is then retried here instead of by the client. Queue position and
+// wait time are attached to the response for X-Queue-* headers.
+//
+// Scope: the state is module-level, i.e. per process. Under server_functions.cjs
+// (one process serving both proxies concurrently) priorities, caps and pacing
+// apply across all requests. A deployed Netlify/Lambda instance handles one
+// request at a time, so there the queue never holds more than that request:
+// priorities and caps do not interact between requests or instances, and only
+// the 429 handling (Retry-After wait and retry, and the bucket slowing the
+// instance's next calls) has an effect. This is not global upstream
+// prioritization; that would need shared state (e.g. a Redis-backed limiter).
+const { upstreamFetch } = require("./upstream-client.cjs");
+
+function envNumber(name, fallback) {
+    const value = Number(process.env[name]);
+    return Number.isFinite(value) && value > 0 ? value : fallback;
+}
+
+const CLASSES = {
+    interactive: { priority: 0, maxConcurrent: 6, maxWaitMs: 10 * 1000, maxQueue: 50 },
+    input: { priority: 1, maxConcurrent: 4, maxWaitMs: 15 * 1000, maxQueue: 50 },
+    feature: { priority: 2, maxConcurrent: 3, maxWaitMs: 20 * 1000, maxQueue: 50 },
+    background: { priority: 3, maxConcurrent: 2, maxWaitMs: 30 * 1000, maxQueue: 100 }
+};
+const CLASS_ORDER = Object.keys(CLASSES).sort((a, b) => CLASSES[a].priority - CLASSES[b].priority);
+
+const MAX_CONCURRENT = envNumber("UPSTREAM_MAX_CONCURRENCY", 8);
+const MAX_RATE = envNumber("UPSTREAM_RATE_PER_SEC", 5); // Token refill rate (requests / s)
+const BURST = envNumber("UPSTREAM_BURST", 10); // Bucket size
+const MIN_RATE = 0.2;
+const RATE_RECOVERY = 0.25; // Added back to the rate per successful call
+const MAX_429_RETRIES = 2;
+const DEFAULT_RETRY_AFTER_MS = 2000;
+const MAX_RETRY_AFTER_MS = 60 * 1000;
+
+const queues = Object.fromEntries(CLASS_ORDER.map(name => [name, []]));
+const running = Object.fromEntries(CLASS_ORDER.map(name => [name, 0]));
+let active = 0;
+let rate = MAX_RATE;
+let tokens = BURST;
+let lastRefill = Date.now();
+let pausedUntil = 0;
+let pumpTimer = null;
+
+const counters = { dispatched: 0, rejected: 0, throttled: 0, retried: 0 };
+
+class QueueRejectedError extends Error {
+    constructor(message, cls, retryAfterMs) {
+        super(message);
+        this.name = "QueueRejectedError";
+        this.status = 503;
+        this.cls = cls;
+        this.retryAfterMs = retryAfterMs;
+    }
+}
+
+function queuedCount() {
+    return CLASS_ORDER.reduce((sum, name) => sum + queues[name].length, 0);
+}
+
+// Requests that will be dispatched before a new one of class `cls`
+function depthAhead(cls) {
+    const priority = CLASSES[cls].priority;
+    return CLASS_ORDER.reduce((sum, name) => sum + (CLASSES[name].priority <= priority ? queues[name].length : 0), 0);
+}
+
+function refill(now) {
+    tokens = Math.min(BURST, tokens + (now - lastRefill) / 1000 * rate);
+    lastRefill = now;
+}
+
+function schedulePump(delayMs) {
+    if (pumpTimer) return;
+    pumpTimer = setTimeout(() => {
+        pumpTimer = null;
+        pump();
+    }, Math.max(1, Math.ceil(delayMs)));
+}
+
+function pump() {
+    const now = Date.now();
+    refill(now);
+    while (active < MAX_CONCURRENT) {
+        if (now < pausedUntil) return schedulePump(pausedUntil - now);
+        const cls = CLASS_ORDER.find(name => queues[name].length > 0 && running[name] < CLASSES[name].maxConcurrent);
+        if (!cls) return;
+        if (tokens < 1) return schedulePump((1 - tokens) / rate * 1000);
+        tokens -= 1;
+        start(queues[cls].shift());
+    }
+}
+
+function start(job) {
+    clearTimeout(job.timer);
+    if (job.signal) job.signal.removeEventListener("abort", job.onAbort);
+    active++;
+    running[job.cls]++;
+    counters.dispatched++;
+    let released = false;
+    job.resolve(() => {
+        if (released) return;
+        released = true;
+        active--;
+        running[job.cls]--;
+        pump();
+    });
+}
+
+function removeJob(job) {
+    const queue = queues[job.cls];
+    const index = queue.indexOf(job);
+    if (index !== -1) queue.splice(index, 1);
+}
+
+// Estimated time until a new request of this class would be served
+function retryEstimateMs(cls) {
+    return Math.max(pausedUntil - Date.now(), 0) + depthAhead(cls) / rate * 1000;
+}
+
+/**
+ * Waits for a dispatch slot. Resolves with a release() to call when the
+ * upstream response is finished.
+ */
+function acquire(cls, signal) {
+    return new Promise((resolve, reject) => {
+        const config = CLASSES[cls];
+        if (queues[cls].length >= config.maxQueue) {
+            counters.rejected++;
+            reject(new QueueRejectedError(`Upstream queue full (${cls})`, cls, retryEstimateMs(cls)));
+            return;
+        }
+        const job = { cls, resolve, signal };
+        job.timer = setTimeout(() => {
+            removeJob(job);
+            counters.rejected++;
+            reject(new QueueRejectedError(`Timed out after ${config.maxWaitMs}ms in the upstream queue (${cls})`, cls, retryEstimateMs(cls)));
+        }, config.maxWaitMs);
+        if (signal) {
+            job.onAbort = () => {
+                clearTimeout(job.timer);
+                removeJob(job);
+                reject(signal.reason instanceof Error ? signal.reason : new DOMException("This operation was aborted", "AbortError"));
+            };
+            if (signal.aborted) return job.onAbort();
+            signal.addEventListener("abort", job.onAbort, { once: true });
+        }
+        queues[cls].push(job);
+        pump();
+    });
+}
+
+function parseRetryAfter(value) {
+    if (!value) return DEFAULT_RETRY_AFTER_MS;
+    const seconds = Number(value);
+    const ms = Number.isFinite(seconds) ? seconds * 1000 : Date.parse(value) - Date.now();
+    return Math.min(Math.max(Number.isFinite(ms) ? ms : DEFAULT_RETRY_AFTER_MS, 0), MAX_RETRY_AFTER_MS);
+}
+
+function throttle(retryAfterMs) {
+    counters.throttled++;
+    rate = Math.max(MIN_RATE, rate / 2);
+    tokens = 0;
+    pausedUntil = Math.max(pausedUntil, Date.now() + retryAfterMs);
+    console.warn(`[Scheduler] Upstream 429: pausing ${retryAfterMs}ms, rate now ${rate.toFixed(2)}/s`);
+}
+
+// The slot is held until the body has been read (or cancelled), so streaming
+// responses count against the concurrency caps for their whole duration
+function withRelease(response, release) {
+    if (!response.body) {
+        release();
+        return response;
+    }
+    const reader = response.body.getReader();
+    const body = new ReadableStream({
+        async pull(controller) {
+            try {
+                const { done, value } = await reader.read();
+                if (done) {
+                    release();
+                    controller.close();
+                } else {
+                    controller.enqueue(value);
+                }
+            } catch (e) {
+                release();
+                controller.error(e);
+            }
+        },
+        cancel(reason) {
+            release();
+            return reader.cancel(reason);
+        }
+    });
+    return new Response(body, { status: response.status, statusText: response.statusText, headers: response.headers });
+}
+
+// --- Public API ---
+
+/**
+ * upstreamFetch() through the scheduler.
+ * @param {"interactive"|"input"|"feature"|"background"} cls - Request class.
+ * @returns {Promise<Response>} with a `queue` property ({ class, depth, waitMs, retries, retryAfterMs? }).
+ * @throws {QueueRejectedError} when the queue is full or the class's maximum wait runs out.
+ */
+async function scheduledFetch(cls, target, init = {}) {
+    if (!CLASSES[cls]) throw new Error(`Unknown upstream class: ${cls}`);
+    const enqueuedAt = Date.now();
+    const depth = depthAhead(cls);
+    let waitMs = 0;
+    let retries = 0;
+
+    for (;;) {
+        const queuedAt = Date.now();
+        const release = await acquire(cls, init.signal);
+        waitMs += Date.now() - queuedAt;
+
+        let response;
+        try {
+            response = await upstreamFetch(target, init);
+        } catch (e) {
+            release();
+            throw e;
+        }
+
+        if (response.status === 429) {
+            const retryAfterMs = parseRetryAfter(response.headers.get("retry-after"));
+            const text = await response.text().catch(() => "");
+            release();
+            throttle(retryAfterMs);
+            // Retry here while the pause still fits in the class's wait budget
+            if (retries < MAX_429_RETRIES && Date.now() - enqueuedAt + retryAfterMs <= CLASSES[cls].maxWaitMs) {
+                retries++;
+                counters.retried++;
+                continue;
+            }
+            const limited = new Response(text, { status: 429, headers: response.headers });
+            limited.queue = { class: cls, depth, waitMs, retries, retryAfterMs };
+            return limited;
+        }
+
+        rate = Math.min(MAX_RATE, rate + RATE_RECOVERY);
+        const scheduled = withRelease(response, release);
+        scheduled.queue = { class: cls, depth, waitMs, retries };
+        return scheduled;
+    }
+}
+
+/** X-Queue-* (and Retry-After) headers describing how a response was scheduled. */
+function queueHeaders(response) {
+    const queue = response && response.queue;
+    if (!queue) return {};
+    const headers = {
+        "X-Queue-Class": queue.class,
+        "X-Queue-Depth": String(queue.depth),
+        "X-Queue-Wait": String(queue.waitMs)
+    };
+    if (queue.retries) headers["X-Upstream-Retries"] = String(queue.retries);
+    if (queue.retryAfterMs !== undefined) headers["Retry-After"] = String(Math.ceil(queue.retryAfterMs / 1000));
+    return headers;
+}
+
+/** 503 + Retry-After for requests the queue turned away; null for other errors. */
+function rejectionResponse(error) {
+    if (!(error instanceof QueueRejectedError)) return null;
+    const retryAfter = Math.max(1, Math.ceil(error.retryAfterMs / 1000));
+    return {
+        statusCode: error.status,
+        headers: {
+            "Content-Type": "application/json",
+            "Retry-After": String(retryAfter),
+            "X-Queue-Class": error.cls,
+            "X-Queue-Depth": String(queuedCount())
+        },
+        body: JSON.stringify({ error: `AI service is busy: ${error.message}`, retryAfter })
+    };
+}
+
+function schedulerStats() {
+    return {
+        ...counters,
+        active,
+        queued: Object.fromEntries(CLASS_ORDER.map(name => [name, queues[name].length])),
+        running: { ...running },
+        rate: Number(rate.toFixed(2)),
+        tokens: Number(tokens.toFixed(2)),
+        pausedForMs: Math.max(0, pausedUntil - Date.now())
+    };
+}
+
+module.exports = { scheduledFetch, queueHeaders, rejectionResponse, schedulerStats, QueueRejectedError };
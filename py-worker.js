@@ -1,6 +1,10 @@
-importScripts("https://cdn.jsdelivr.net/pyodide/v0.23.4/full/pyodide.js");
+const DEFAULT_PYODIDE_INDEX_URL = "https://cdn.jsdelivr.net/pyodide/v0.23.4/full/";
 
+// Replaced by the config sent with INIT (see js/pyodide-config.js)
+let pyodideConfig = { indexURL: DEFAULT_PYODIDE_INDEX_URL, packageIndexURL: null, packageIndexOnly: false, integrity: {} };
 let pyodide = null;
+let supportSource = ""; // py/runtime_support.py, sent with INIT
+let lockfilePromise = null;
 let sharedBuffer = null;
 let int32View = null;
 let uint8View = null;
@@ -31,11 +35,18 @@ async function loadPyodideAndPackages(offline = false) {
             return waitAndReadInput();
         };
 
+        const lockFileURL = await loadPyodideScript();
         pyodide = await loadPyodide({
+            indexURL: pyodideConfig.indexURL,
+            lockFileURL,
             stdout: (text) => postMessage({ type: 'OUTPUT', content: text }),
             stderr: (text) => postMessage({ type: 'OUTPUT', content: text, error: true }),
             stdin: pythonInputHandler
         });
+        if (lockFileURL) URL.revokeObjectURL(lockFileURL);
+
+        // Syntax check, symbol index, safety analyzer and package index hook
+        pyodide.runPython(supportSource);
 
         // Explicitly set stdin to ensure it's registered
         pyodide.setStdin({ stdin: pythonInputHandler });
@@ -56,6 +67,7 @@ async function loadPyodideAndPackages(offline = false) {
         if (!offline) {
             try {
                 await pyodide.loadPackage("micropip");
+                if (pyodideConfig.packageIndexURL) configurePackageIndex();
                 postMessage({ type: 'OUTPUT', content: "Package Manager (Micropip) Ready.\n", system: true });
             } catch (e) {
                 postMessage({ type: 'OUTPUT', content: `Warning: Failed to load Package Manager: ${e}\n`, error: true });
@@ -133,27 +145,6 @@ def _input_patch(prompt=""):
 builtins.input = _input_patch
 `);
 
-        // Define syntax check function
-        pyodide.runPython(`
-import ast
-import json
-
-def check_syntax_json(code):
-    try:
-        ast.parse(code)
-        return json.dumps({"error": False})
-    except SyntaxError as e:
-        return json.dumps({
-            "error": True,
-            "lineno": e.lineno,
-            "offset": e.offset,
-            "msg": e.msg,
-            "text": e.text
-        })
-    except Exception:
-        return json.dumps({"error": False})
-`);
-
         postMessage({ type: 'LOADED' });
 
     } catch (err) {
@@ -161,10 +152,69 @@ def check_syntax_json(code):
     }
 }
 
+// A file of the Pyodide distribution, fetched with Subresource Integrity when
+// pyodideConfig.integrity lists it. Only pyodide.js and repodata.json go
+// through here; Pyodide fetches pyodide.asm.js/.wasm and the stdlib itself.
+function fetchDistFile(name) {
+    const integrity = pyodideConfig.integrity[name];
+    return fetch(pyodideConfig.indexURL + name, integrity ? { integrity } : undefined)
+        .then(response => {
+            if (!response.ok) throw new Error(`${name}: HTTP ${response.status}`);
+            return response;
+        });
+}
+
+// Loads pyodide.js. Returns a verified lockfile URL for loadPyodide when repodata.json has a hash.
+async function loadPyodideScript() {
+    const integrity = pyodideConfig.integrity;
+    if (integrity["pyodide.js"]) {
+        // Run exactly the bytes that were checked
+        const blob = await (await fetchDistFile("pyodide.js")).blob();
+        const url = URL.createObjectURL(blob);
+        try {
+            importScripts(url);
+        } finally {
+            URL.revokeObjectURL(url);
+        }
+    } else {
+        importScripts(pyodideConfig.indexURL + "pyodide.js");
+    }
+
+    let lockFileURL;
+    if (integrity["repodata.json"]) {
+        // Packages are checked by Pyodide against the hashes in the (verified) lockfile
+        const repodata = await loadLockfile();
+        lockFileURL = URL.createObjectURL(new Blob([JSON.stringify(repodata)], { type: "application/json" }));
+    }
+    return lockFileURL;
+}
+
+// Points micropip at the configured package index (server_preview.py --wheels)
+function configurePackageIndex() {
+    pyodide.globals.set("package_index_url", pyodideConfig.packageIndexURL);
+    pyodide.globals.set("package_index_only", pyodideConfig.packageIndexOnly);
+    pyodide.runPython(`configure_package_index(package_index_url, package_index_only)`);
+}
+
+// Pyodide's package lockfile (repodata.json): bundled packages and the import names they provide
+function loadLockfile() {
+    if (!lockfilePromise) {
+        lockfilePromise = fetchDistFile("repodata.json")
+            .then(response => response.json())
+            .catch(err => {
+                lockfilePromise = null;
+                throw err;
+            });
+    }
+    return lockfilePromise;
+}
+
 self.onmessage = async (event) => {
     const { type, content, buffer, offline } = event.data;
 
     if (type === 'INIT') {
+        if (event.data.pyodideConfig) pyodideConfig = event.data.pyodideConfig;
+        supportSource = event.data.supportSource;
         sharedBuffer = buffer;
         int32View = new Int32Array(sharedBuffer);
         uint8View = new Uint8Array(sharedBuffer);
@@ -222,14 +272,65 @@ for filename in os.listdir('.'):
         } catch (e) {
              // Ignore linting errors
         }
+    } else if (type === 'INDEX_SYMBOLS') {
+        if (!pyodide) return;
+        try {
+            pyodide.globals.set("symbols_payload", JSON.stringify(content));
+            const jsonResult = pyodide.runPython(`index_symbols_json(symbols_payload)`);
+            postMessage({ type: 'SYMBOLS_RESULT', content: jsonResult });
+        } catch (e) {
+            // Index keeps its last good state
+        }
+    } else if (type === 'ANALYZE_SAFETY') {
+        if (!pyodide) return;
+        let jsonResult = null;
+        try {
+            pyodide.globals.set("code_to_analyze", content);
+            jsonResult = pyodide.runPython(`analyze_safety_json(code_to_analyze)`);
+        } catch (e) {
+            // Reply anyway so the caller falls back instead of waiting
+        }
+        postMessage({ type: 'SAFETY_RESULT', content: jsonResult });
+    } else if (type === 'LOAD_PACKAGES') {
+        // Packages bundled with Pyodide: a single loadPackage call resolves and fetches them together
+        if (!pyodide) return;
+        const packages = content;
+        try {
+            await pyodide.loadPackage(packages);
+            packages.forEach(pkg => postMessage({ type: 'OUTPUT', content: `Successfully installed ${pkg}\n`, system: true }));
+        } catch (err) {
+            postMessage({ type: 'OUTPUT', content: `Failed to install ${packages.join(', ')}: ${err}\n`, error: true });
+        }
+    } else if (type === 'PACKAGE_INDEX') {
+        try {
+            const repodata = await loadLockfile();
+            const imports = {};
+            Object.entries(repodata.packages).forEach(([key, pkg]) => {
+                (pkg.imports || []).forEach(name => { imports[name] = key; });
+            });
+            postMessage({ type: 'PACKAGE_INDEX', content: { imports, packages: Object.keys(repodata.packages) } });
+        } catch (e) {
+            // Offline or CDN error: detection falls back to the bundled module index
+        }
     } else if (type === 'RESTORE_PACKAGES') {
         if (!pyodide) return;
         const packages = content; // content is array of strings
         if (packages && packages.length > 0) {
             postMessage({ type: 'OUTPUT', content: "Restoring installed packages...\n", system: true });
             try {
+                // Bundled packages load in one batch; only the rest go through micropip
+                let bundled = [];
+                try {
+                    const repodata = await loadLockfile();
+                    bundled = packages.filter(pkg => repodata.packages[pkg.toLowerCase()]);
+                } catch (e) {}
+                if (bundled.length > 0) {
+                    await pyodide.loadPackage(bundled.map(pkg => pkg.toLowerCase()));
+                }
+
                 const micropip = pyodide.pyimport("micropip");
                 for (const pkg of packages) {
+                    if (bundled.includes(pkg)) continue;
                     await micropip.install(pkg);
                 }
                 postMessage({ type: 'OUTPUT', content: "Packages restored.\n", system: true });
@@ -0,0 +1,499 @@
+# Python side of the editor tooling: syntax check, project symbol index, static
+# safety analysis and the package index hook. Shared by the worker
+# (py-worker.js) and the main-thread fallback (js/py-main-thread.js), which run
+# it in Pyodide's globals; script.js imports it with Vite's ?raw and sends it
+# with INIT. Plain CPython, so it also runs (and is tested) without a browser.
+
+import ast
+import json
+
+def check_syntax_json(code):
+    try:
+        ast.parse(code)
+        return json.dumps({"error": False})
+    except SyntaxError as e:
+        return json.dumps({
+            "error": True,
+            "lineno": e.lineno,
+            "offset": e.offset,
+            "msg": e.msg,
+            "text": e.text
+        })
+    except Exception:
+        return json.dumps({"error": False})
+
+
+# --- Project symbol index (definitions, imports, members, signatures) ---
+
+def _sym_signature(node):
+    try:
+        sig = "(" + ast.unparse(node.args) + ")"
+        if node.returns is not None:
+            sig += " -> " + ast.unparse(node.returns)
+        return sig
+    except Exception:
+        return "()"
+
+def _sym_doc(node):
+    doc = ast.get_docstring(node)
+    return doc.strip().split("\n")[0][:120] if doc else ""
+
+def _sym_names(target):
+    if isinstance(target, ast.Name):
+        yield target.id
+    elif isinstance(target, (ast.Tuple, ast.List)):
+        for elt in target.elts:
+            yield from _sym_names(elt)
+
+def _sym_collect(body, out, parent=None, seen_attrs=None):
+    for node in body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            out.append({"name": node.name, "kind": "method" if parent else "function",
+                        "line": node.lineno, "end": node.end_lineno, "parent": parent,
+                        "signature": _sym_signature(node), "doc": _sym_doc(node)})
+            if parent:
+                # Instance attributes assigned as self.x = ... inside methods
+                for sub in ast.walk(node):
+                    targets = sub.targets if isinstance(sub, ast.Assign) else [sub.target] if isinstance(sub, (ast.AnnAssign, ast.AugAssign)) else []
+                    for t in targets:
+                        if (isinstance(t, ast.Attribute) and isinstance(t.value, ast.Name)
+                                and t.value.id == "self" and t.attr not in seen_attrs):
+                            seen_attrs.add(t.attr)
+                            out.append({"name": t.attr, "kind": "attribute", "line": sub.lineno,
+                                        "end": sub.lineno, "parent": parent})
+        elif isinstance(node, ast.ClassDef):
+            out.append({"name": node.name, "kind": "class", "line": node.lineno, "end": node.end_lineno,
+                        "parent": parent, "bases": [ast.unparse(b) for b in node.bases],
+                        "signature": "(" + ", ".join(ast.unparse(b) for b in node.bases) + ")" if node.bases else "",
+                        "doc": _sym_doc(node)})
+            _sym_collect(node.body, out, node.name, set())
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for t in targets:
+                for name in _sym_names(t):
+                    if parent and name in seen_attrs:
+                        continue
+                    if parent:
+                        seen_attrs.add(name)
+                    out.append({"name": name, "kind": "attribute" if parent else "variable",
+                                "line": node.lineno, "end": node.end_lineno, "parent": parent})
+        elif isinstance(node, ast.Import) and not parent:
+            for alias in node.names:
+                out.append({"name": alias.asname or alias.name.split(".")[0], "kind": "import",
+                            "module": alias.name if alias.asname else alias.name.split(".")[0],
+                            "line": node.lineno, "end": node.lineno, "parent": None})
+        elif isinstance(node, ast.ImportFrom) and not parent:
+            module = "." * node.level + (node.module or "")
+            for alias in node.names:
+                if alias.name == "*":
+                    continue
+                out.append({"name": alias.asname or alias.name, "kind": "import", "module": module,
+                            "target": alias.name, "line": node.lineno, "end": node.lineno, "parent": None})
+        elif isinstance(node, (ast.If, ast.For, ast.While, ast.With, ast.AsyncWith, ast.Try)):
+            # Definitions guarded by if/try (e.g. optional imports) are still visible
+            _sym_collect(node.body, out, parent, seen_attrs)
+            _sym_collect(getattr(node, "orelse", []), out, parent, seen_attrs)
+            for handler in getattr(node, "handlers", []):
+                _sym_collect(handler.body, out, parent, seen_attrs)
+            _sym_collect(getattr(node, "finalbody", []), out, parent, seen_attrs)
+
+def _sym_imports(tree):
+    # Modules imported anywhere in the file (incl. function bodies); relative
+    # imports keep their leading dots. Optional imports guarded by
+    # try/except ImportError are skipped.
+    optional = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Try) and any(
+                isinstance(h.type, ast.Name) and h.type.id in ("ImportError", "ModuleNotFoundError")
+                for h in node.handlers):
+            for stmt in node.body:
+                optional.update(id(n) for n in ast.walk(stmt))
+    names = set()
+    for node in ast.walk(tree):
+        if id(node) in optional:
+            continue
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            base = "." * node.level + (node.module or "")
+            if node.module:
+                names.add(base)
+            else:
+                names.update(base + alias.name for alias in node.names if alias.name != "*")
+        elif (isinstance(node, ast.Call) and node.args and isinstance(node.args[0], ast.Constant)
+                and isinstance(node.args[0].value, str)
+                and getattr(node.func, "id", getattr(node.func, "attr", None)) in ("__import__", "import_module")):
+            names.add(node.args[0].value)
+    return sorted(names)
+
+def index_symbols_json(payload):
+    result = {}
+    for path, item in json.loads(payload).items():
+        try:
+            tree = ast.parse(item["code"])
+        except Exception:
+            result[path] = {"hash": item["hash"], "error": True}
+            continue
+        symbols = []
+        _sym_collect(tree.body, symbols)
+        result[path] = {"hash": item["hash"], "symbols": symbols, "imports": _sym_imports(tree)}
+    return json.dumps(result)
+
+
+# --- Static safety analysis (endless loops, unbounded recursion, huge ranges) ---
+
+_SAFE_EXIT_CALLS = ("exit", "quit", "sys.exit", "os._exit")
+_SAFE_LOOPS = (ast.For, ast.AsyncFor, ast.While)
+_SAFE_SCOPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)
+_SAFE_GUARDS = (ast.If, ast.IfExp, ast.BoolOp, ast.For, ast.AsyncFor, ast.While, ast.Try,
+                ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp) + ((ast.Match,) if hasattr(ast, "Match") else ())
+_SAFE_MUTATORS = ("append", "extend", "insert", "pop", "popleft", "popitem", "remove", "clear",
+                  "update", "add", "discard", "setdefault", "put", "get", "get_nowait", "sort", "reverse")
+_SAFE_RANK = {"low": 0, "medium": 1, "high": 2}
+_SAFE_RANGE_MEDIUM = 10 ** 7
+_SAFE_RANGE_HIGH = 10 ** 8
+# Constant folding saturates here: far above the thresholds, and big powers stay cheap
+_SAFE_INT_CAP = 10 ** 30
+# Builtins that only read their arguments
+_SAFE_PURE_CALLS = ("print", "len", "str", "repr", "int", "float", "bool", "abs", "min", "max", "sum",
+                    "sorted", "isinstance", "type", "format", "id", "hash", "round", "any", "all")
+
+def _safe_call_name(call):
+    func = call.func
+    if isinstance(func, ast.Name):
+        return func.id
+    if isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name):
+        return func.value.id + "." + func.attr
+    return getattr(func, "attr", None)
+
+def _safe_walk(node):
+    # ast.walk that does not descend into nested functions/classes/lambdas
+    stack = list(ast.iter_child_nodes(node))
+    while stack:
+        child = stack.pop()
+        yield child
+        if not isinstance(child, _SAFE_SCOPES):
+            stack.extend(ast.iter_child_nodes(child))
+
+def _safe_exits(node, nested=False):
+    # True if executing node can leave the enclosing loop (break outside nested
+    # loops, return, raise, sys.exit())
+    if isinstance(node, _SAFE_SCOPES):
+        return False
+    if isinstance(node, (ast.Return, ast.Raise)):
+        return True
+    if isinstance(node, ast.Break):
+        return not nested
+    if isinstance(node, ast.Call) and _safe_call_name(node) in _SAFE_EXIT_CALLS:
+        return True
+    inner = nested or isinstance(node, _SAFE_LOOPS)
+    return any(_safe_exits(child, inner) for child in ast.iter_child_nodes(node))
+
+def _safe_body_exits(body):
+    return any(_safe_exits(stmt) for stmt in body)
+
+def _safe_has_input(nodes):
+    return any(isinstance(n, ast.Call) and _safe_call_name(n) == "input"
+               for stmt in nodes for n in [stmt, *_safe_walk(stmt)])
+
+def _safe_clamp(value):
+    return max(-_SAFE_INT_CAP, min(_SAFE_INT_CAP, value))
+
+def _safe_const_int(node):
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        if node.value != node.value:  # nan
+            return None
+        return int(_safe_clamp(node.value))
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        value = _safe_const_int(node.operand)
+        return None if value is None else -value
+    if isinstance(node, ast.Call) and _safe_call_name(node) == "int" and len(node.args) == 1:
+        return _safe_const_int(node.args[0])
+    if isinstance(node, ast.BinOp):
+        left, right = _safe_const_int(node.left), _safe_const_int(node.right)
+        if left is None or right is None:
+            return None
+        if isinstance(node.op, ast.Add): return _safe_clamp(left + right)
+        if isinstance(node.op, ast.Sub): return _safe_clamp(left - right)
+        if isinstance(node.op, ast.Mult): return _safe_clamp(left * right)
+        if isinstance(node.op, ast.Pow) and right >= 0:
+            if abs(left) > 1 and abs(left).bit_length() * right > _SAFE_INT_CAP.bit_length():
+                return -_SAFE_INT_CAP if left < 0 and right % 2 else _SAFE_INT_CAP
+            return _safe_clamp(left ** right)
+    return None
+
+def _safe_range_span(node):
+    if not (isinstance(node, ast.Call) and _safe_call_name(node) == "range") or not 1 <= len(node.args) <= 3:
+        return None
+    values = [_safe_const_int(a) for a in node.args]
+    if None in values:
+        return None
+    start, stop, step = (0, values[0], 1) if len(values) == 1 else (values + [1])[:3]
+    if step == 0:
+        return None
+    return max(0, (stop - start + step - (1 if step > 0 else -1)) // step)
+
+class _SafetyAnalyzer:
+    def __init__(self, tree):
+        self.tree = tree
+        self.findings = []
+        # Module-level functions, and the globals each of them rebinds
+        self.functions = {}
+        self.imported = set()
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                declared = set()
+                for sub in _safe_walk(node):
+                    if isinstance(sub, (ast.Global, ast.Nonlocal)):
+                        declared.update(sub.names)
+                self.functions.setdefault(node.name, set()).update(declared)
+            elif isinstance(node, (ast.Import, ast.ImportFrom)):
+                self.imported.update((a.asname or a.name).split(".")[0] for a in node.names)
+
+    def add(self, risk, kind, node, reason, ambiguous=False):
+        self.findings.append({"risk_level": risk, "type": kind, "line": getattr(node, "lineno", 0),
+                              "reason": reason, "ambiguous": ambiguous})
+
+    def run(self):
+        self.visit_loops(self.tree.body, 1)
+        for node in ast.walk(self.tree):
+            if isinstance(node, ast.ClassDef):
+                for item in node.body:
+                    if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                        self.check_recursion(item, method=True)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                self.check_recursion(node, method=False)
+        return self.findings
+
+    # --- Loops ---
+
+    def visit_loops(self, body, iterations):
+        for stmt in body:
+            if isinstance(stmt, (ast.For, ast.AsyncFor)):
+                span = _safe_range_span(stmt.iter)
+                total = _safe_clamp(iterations * span) if span is not None else iterations
+                if span is not None and total >= _SAFE_RANGE_MEDIUM and iterations < _SAFE_RANGE_MEDIUM:
+                    count = f"about {total:,}" if total < _SAFE_INT_CAP else f"more than {_SAFE_INT_CAP:,}"
+                    self.add("high" if total >= _SAFE_RANGE_HIGH else "medium", "large_range", stmt,
+                             f"Line {stmt.lineno}: loop runs {count} iterations, which can freeze the browser.")
+                self.check_counter_loop(stmt)
+                self.visit_loops(stmt.body, total)
+                self.visit_loops(stmt.orelse, iterations)
+            elif isinstance(stmt, ast.While):
+                self.check_while(stmt)
+                self.visit_loops(stmt.body, iterations)
+                self.visit_loops(stmt.orelse, iterations)
+            elif isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                self.visit_loops(stmt.body, 1)
+            else:
+                for field in ("body", "orelse", "finalbody"):
+                    self.visit_loops(getattr(stmt, field, []), iterations)
+                for handler in getattr(stmt, "handlers", []):
+                    self.visit_loops(handler.body, iterations)
+                for case in getattr(stmt, "cases", []):
+                    self.visit_loops(case.body, iterations)
+
+    def check_counter_loop(self, loop):
+        # for _ in itertools.count() / iter(int, 1) never ends on its own
+        it = loop.iter
+        name = _safe_call_name(it) if isinstance(it, ast.Call) else None
+        endless = name in ("count", "itertools.count", "cycle", "itertools.cycle", "repeat", "itertools.repeat") and not (
+            name.endswith("repeat") and len(it.args) > 1)
+        endless = endless or (name == "iter" and len(it.args) == 2)
+        if endless and not _safe_body_exits(loop.body):
+            self.add("high", "infinite_loop", loop,
+                     f"Line {loop.lineno}: 'for' over an endless iterator ({name}()) has no break, return or raise.")
+
+    def check_while(self, loop):
+        test = loop.test
+        has_input = _safe_has_input(loop.body)
+        if isinstance(test, ast.Constant):
+            if not test.value:
+                return
+            if not _safe_body_exits(loop.body):
+                what = "waits for input() forever" if has_input else "never terminates"
+                self.add("high", "infinite_loop", loop,
+                         f"Line {loop.lineno}: 'while {ast.unparse(test)}' has no reachable break, return or raise, so it {what}.")
+            elif has_input and not self.exit_depends_on_input(loop):
+                self.add("medium", "infinite_loop", loop,
+                         f"Line {loop.lineno}: input() inside an unbounded loop whose exit does not depend on the input.",
+                         ambiguous=True)
+            return
+
+        if _safe_body_exits(loop.body):
+            return
+        names = {n.id for n in ast.walk(test) if isinstance(n, ast.Name)}
+        if not names:
+            return
+        # The condition rebinds walrus targets itself each time it is evaluated
+        rebound = {n.target.id for n in ast.walk(test) if isinstance(n, ast.NamedExpr)}
+        if names & (self.modified_names(loop.body) | rebound):
+            return
+        # Conditions reading attributes/calls, or bodies calling code that may
+        # rebind these names, can change in ways a local scan cannot see
+        dynamic = any(isinstance(n, (ast.Call, ast.Attribute, ast.Subscript)) for n in ast.walk(test))
+        if dynamic or self.opaque_calls(loop.body, names):
+            self.add("medium", "infinite_loop", loop,
+                     f"Line {loop.lineno}: the condition of 'while {ast.unparse(test)}' is not visibly updated inside the loop.",
+                     ambiguous=True)
+            return
+        self.add("high", "infinite_loop", loop,
+                 f"Line {loop.lineno}: 'while {ast.unparse(test)}' never updates {', '.join(sorted(names))} inside the loop.")
+
+    def modified_names(self, body):
+        names = set()
+        for stmt in body:
+            for node in [stmt, *_safe_walk(stmt)]:
+                targets = []
+                if isinstance(node, ast.Assign):
+                    targets = node.targets
+                elif isinstance(node, (ast.AugAssign, ast.AnnAssign, ast.NamedExpr, ast.For, ast.AsyncFor)):
+                    targets = [node.target]
+                elif isinstance(node, ast.Delete):
+                    targets = node.targets
+                elif isinstance(node, (ast.With, ast.AsyncWith)):
+                    targets = [i.optional_vars for i in node.items if i.optional_vars is not None]
+                elif isinstance(node, ast.Call):
+                    func = node.func
+                    if isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name) and func.attr in _SAFE_MUTATORS:
+                        names.add(func.value.id)
+                    if isinstance(func, ast.Name) and func.id in self.functions:
+                        names.update(self.functions[func.id])
+                for target in targets:
+                    for n in ast.walk(target):
+                        if isinstance(n, ast.Name):
+                            names.add(n.id)
+        return names
+
+    def opaque_calls(self, body, names):
+        # Calls whose effect on the condition names is unknown: imported callables,
+        # module.func() / obj.method() calls (heapq.heappop(pq), other.drain()) and any
+        # call that is handed a condition name (process(queue)), except read-only builtins
+        for stmt in body:
+            for node in [stmt, *_safe_walk(stmt)]:
+                if not isinstance(node, ast.Call):
+                    continue
+                func = node.func
+                if isinstance(func, ast.Name) and func.id in self.imported:
+                    return True
+                if isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name):
+                    return True
+                if isinstance(func, ast.Name) and func.id in _SAFE_PURE_CALLS:
+                    continue
+                args = [*node.args, *(k.value for k in node.keywords)]
+                if any(isinstance(n, ast.Name) and n.id in names for arg in args for n in ast.walk(arg)):
+                    return True
+        return False
+
+    def exit_depends_on_input(self, loop):
+        # Names assigned from an input() expression inside the loop
+        inputs = set()
+        for node in _safe_walk(loop):
+            if isinstance(node, ast.Assign) and _safe_has_input([node.value]):
+                for target in node.targets:
+                    inputs.update(n.id for n in ast.walk(target) if isinstance(n, ast.Name))
+        for node in _safe_walk(loop):
+            if isinstance(node, (ast.If, ast.While)) and _safe_body_exits(node.body):
+                test_names = {n.id for n in ast.walk(node.test) if isinstance(n, ast.Name)}
+                if test_names & inputs or _safe_has_input([node.test]):
+                    return True
+        # An exit that is not guarded by a condition (e.g. break at the end)
+        return any(isinstance(stmt, (ast.Break, ast.Return, ast.Raise)) for stmt in loop.body)
+
+    # --- Recursion ---
+
+    def is_self_call(self, node, fn, method):
+        if not isinstance(node, ast.Call):
+            return False
+        func = node.func
+        if method:
+            return (isinstance(func, ast.Attribute) and func.attr == fn.name
+                    and isinstance(func.value, ast.Name) and func.value.id in ("self", "cls"))
+        return isinstance(func, ast.Name) and func.id == fn.name
+
+    def check_recursion(self, fn, method):
+        parents = {}
+        calls = []
+        for node in _safe_walk(fn):
+            for child in ast.iter_child_nodes(node):
+                parents[child] = node
+            if self.is_self_call(node, fn, method):
+                calls.append(node)
+        for stmt in fn.body:
+            parents[stmt] = fn
+        if not calls:
+            return
+
+        def guarded(node):
+            while node is not fn:
+                node = parents.get(node, fn)
+                if isinstance(node, _SAFE_GUARDS):
+                    return True
+            return False
+
+        for call in calls:
+            if guarded(call):
+                continue
+            # Unconditional self-call: a base case has to return/raise before it
+            top = call
+            while parents.get(top, fn) is not fn:
+                top = parents[top]
+            before = fn.body[:fn.body.index(top)] if top in fn.body else []
+            if any(_safe_exits(stmt, nested=True) for stmt in before):
+                continue
+            self.add("high", "recursion", call,
+                     f"Line {call.lineno}: '{fn.name}' calls itself unconditionally with no base case, so the recursion never stops.")
+            return
+
+def analyze_safety(code):
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        # The run itself reports syntax errors
+        return {"safe": True, "risk_level": "low", "reason": "Code appears safe.", "type": "none", "ambiguous": False}
+    findings = _SafetyAnalyzer(tree).run()
+    if not findings:
+        return {"safe": True, "risk_level": "low", "reason": "Code appears safe.", "type": "none", "ambiguous": False}
+    # Definite findings outrank ambiguous ones of the same level
+    worst = max(findings, key=lambda f: (_SAFE_RANK[f["risk_level"]], not f["ambiguous"]))
+    return {"safe": worst["risk_level"] != "high", "risk_level": worst["risk_level"],
+            "reason": worst["reason"], "type": worst["type"], "line": worst["line"],
+            "ambiguous": worst["ambiguous"]}
+
+def analyze_safety_json(code):
+    return json.dumps(analyze_safety(code))
+
+
+# --- Package index (server_preview.py --wheels) ---
+
+def configure_package_index(index_url, index_only):
+    """Points micropip at a PyPI-style JSON API at index_url ("<index_url><name>/json")."""
+    import micropip
+    from pyodide.http import pyfetch
+
+    if hasattr(micropip, "set_index_urls"):
+        # micropip >= 0.4 takes JSON API URL templates
+        index_urls = [index_url + "{package_name}/json"]
+        if not index_only:
+            index_urls.append("https://pypi.org/pypi/{package_name}/json")
+        micropip.set_index_urls(index_urls)
+        return
+
+    # micropip 0.3 (Pyodide 0.23) always asks PyPI: wrap its metadata lookup.
+    # Wheel sha256 digests from the index are still checked by micropip.
+    from micropip import _micropip
+    pypi_json = _micropip._get_pypi_json
+
+    async def index_json(pkgname, fetch_kwargs):
+        try:
+            response = await pyfetch(index_url + pkgname + "/json", **fetch_kwargs)
+            if response.ok:
+                return json.loads(await response.string())
+        except OSError:
+            if index_only:
+                raise
+        if index_only:
+            raise ValueError(f"Can't find '{pkgname}' in the package index {index_url}")
+        return await pypi_json(pkgname, fetch_kwargs)
+
+    _micropip._get_pypi_json = index_json
@@ -1,6 +1,6 @@
 // Imports
 import { EditorView, basicSetup } from "https://esm.sh/codemirror";
-import { python } from "https://esm.sh/@codemirror/lang-python";
+import { python, pythonLanguage } from "https://esm.sh/@codemirror/lang-python";
 import { javascript } from "https://esm.sh/@codemirror/lang-javascript";
 import { html } from "https://esm.sh/@codemirror/lang-html";
 import { css } from "https://esm.sh/@codemirror/lang-css";
@@ -16,15 +16,23 @@ import { openSearchPanel, gotoLine } from "https://esm.sh/@codemirror/search";
 import { startCompletion } from "https://esm.sh/@codemirror/autocomplete";
 import { linter, lintGutter } from "https://esm.sh/@codemirror/lint";
 import { PyMainThread } from "./js/py-main-thread.js";
+import { loadPyodideConfig } from "./js/pyodide-config.js";
+import PY_RUNTIME_SUPPORT from "./py/runtime_support.py?raw";
 import { initAuth, signInWithEmail, signUpWithEmail, signOutUser } from "./js/firebase-auth.js";
 import { autoFixCode } from "./js/ai-debugger.js";
 import { refactorCode, generateCodeFromPrompt, generateDocs, generateTests, explainCode } from "./js/ai-features.js";
 import { initWorkspace } from "./js/ai-workspace.js";
 import { DialogLoader } from "./js/dialog-loader.js";
 import { showToast, showConfirm, showPrompt } from "./js/ui-utils.js";
-import { detectMissingLibraries } from "./js/library-detector.js";
-import { initSavedChats } from "./js/saved-chats.js";
+import { detectMissingLibraries, scanImports, setPyodidePackageIndex, hasPyodidePackageIndex } from "./js/library-detector.js";
+import { initSavedChats, openSavedChat } from "./js/saved-chats.js";
 import { persistence } from "./js/persistence.js";
+import { searchIndex } from "./js/search-index.js";
+import { FileTree } from "./js/file-tree.js";
+import { VirtualList } from "./js/virtual-list.js";
+import { symbolIndex } from "./js/symbol-index.js";
+import { cachedResponse } from "./js/response-cache.js";
+import { perfStart, perfEnd, perfCancel, perfMark } from "./js/perf-marks.js";
 
 // Import CSS
 import './css/themes.css';
@@ -127,6 +135,11 @@ const els = {
     editorContainer: document.getElementById('editor-container'),
     output: document.getElementById('console-output'),
     fileList: document.getElementById('file-list'),
+    projectSearch: document.getElementById('project-search'),
+    searchResults: document.getElementById('search-results'),
+    outlinePanel: document.getElementById('outline-panel'),
+    outlineList: document.getElementById('outline-list'),
+    btnCloseOutline: document.getElementById('btn-close-outline'),
     btnRun: document.getElementById('btn-run'),
     btnStop: document.getElementById('btn-stop'),
     btnStopConsole: document.getElementById('btn-stop-console'),
@@ -202,6 +215,7 @@ let state = {
     editor: null,
     wrapEnabled: false,
     pendingLintResolve: null,
+    pendingSafetyResolve: null,
     isRunning: false,
     isWaitingForInput: false,
     runAfterInit: null,
@@ -351,6 +365,7 @@ const pythonLinter = async (view) => {
             }
         };
 
+        perfStart('lint');
         state.worker.postMessage({ type: 'LINT', content: code });
 
         // Safety timeout
@@ -377,8 +392,16 @@ async function init() {
 
     initSettings(); // Initialize settings (themes, font size)
     await persistence.init(); // Initialize Persistence (IndexedDB)
+    searchIndex.init(); // Background full-text index (files & saved chats)
     migratePackages(); // Migrate legacy package list
     await loadFiles();
+    fileTree.reset(Object.keys(state.files));
+    searchIndex.syncFiles(state.files); // Only changed files are re-indexed
+    symbolIndex.init((msg) => { if (state.worker) state.worker.postMessage(msg); });
+    symbolIndex.onUpdate((paths) => {
+        if (paths.includes(state.currentFile)) renderOutline();
+    });
+    symbolIndex.sync(state.files); // Parsed by the worker once it is LOADED
     loadUserProfile(); // Load avatar
     initEditor();
 
@@ -785,11 +808,13 @@ function restartWorker() {
     if (state.worker) {
         state.worker.terminate();
     }
+    symbolIndex.setReady(false);
 
     // Reset UI State if needed
     state.isRunning = false;
     state.isWaitingForInput = false;
     updateRunButtonState(false);
+    perfStart('boot');
 
     // Check Environment Support
     const isSecureContext = window.crossOriginIsolated && typeof SharedArrayBuffer !== 'undefined';
@@ -819,7 +844,10 @@ function restartWorker() {
             }
 
             state.worker.onmessage = handleWorkerMessage;
-            state.worker.postMessage({ type: 'INIT', buffer: state.sharedBuffer, offline: !navigator.onLine });
+            const worker = state.worker;
+            loadPyodideConfig().then(pyodideConfig => {
+                worker.postMessage({ type: 'INIT', buffer: state.sharedBuffer, offline: !navigator.onLine, pyodideConfig, supportSource: PY_RUNTIME_SUPPORT });
+            });
 
         } else {
             // Fallback: Main Thread Mode (Low Performance, Blocking UI, but Compatible)
@@ -830,7 +858,10 @@ function restartWorker() {
             state.worker.onmessage = handleWorkerMessage;
 
             // Start Init (No buffer needed)
-            state.worker.postMessage({ type: 'INIT', offline: !navigator.onLine });
+            const worker = state.worker;
+            loadPyodideConfig().then(pyodideConfig => {
+                worker.postMessage({ type: 'INIT', offline: !navigator.onLine, pyodideConfig, supportSource: PY_RUNTIME_SUPPORT });
+            });
         }
 
         // Reset flags
@@ -906,12 +937,18 @@ function handleWorkerMessage(event) {
             state.restartTimeout = null;
         }
 
+        perfEnd('boot');
+        perfMark('loaded');
+
         // if (window.uiSetLoading) window.uiSetLoading(false);
         // if (window.uiSwitchView) window.uiSwitchView('view-files');
         addToTerminal("Python Ready.\n", "system");
+        symbolIndex.setReady(true);
 
         if (navigator.onLine) {
             restorePackages();
+            // Pyodide lockfile: maps import names to bundled packages for library detection
+            if (!hasPyodidePackageIndex() && state.worker) state.worker.postMessage({ type: 'PACKAGE_INDEX' });
         } else {
             addToTerminal("[System] Offline Mode: Package restoration skipped.\n", "system");
         }
@@ -932,6 +969,7 @@ function handleWorkerMessage(event) {
     } else if (type === 'OUTPUT') {
         const style = error ? 'stderr' : (system ? 'system' : 'stdout');
         addToTerminal(content, style);
+        if (!system) perfEnd('first-output');
 
         // --- Live Monitoring ---
         if (state.monitoringMode) {
@@ -950,6 +988,8 @@ function handleWorkerMessage(event) {
 
         // Detect finish
         if (system && content.includes("Process finished.")) {
+            perfEnd('run');
+            perfCancel('first-output');
             state.isRunning = false;
             state.isWaitingForInput = false;
             updateRunButtonState(false);
@@ -995,11 +1035,21 @@ function handleWorkerMessage(event) {
              }
         }
     } else if (type === 'LINT_RESULT') {
+        perfEnd('lint');
         if (state.pendingLintResolve) {
             const result = JSON.parse(content);
             state.pendingLintResolve(result);
             state.pendingLintResolve = null;
         }
+    } else if (type === 'SYMBOLS_RESULT') {
+        symbolIndex.handleResult(content);
+    } else if (type === 'SAFETY_RESULT') {
+        if (state.pendingSafetyResolve) {
+            state.pendingSafetyResolve(content ? JSON.parse(content) : null);
+            state.pendingSafetyResolve = null;
+        }
+    } else if (type === 'PACKAGE_INDEX') {
+        setPyodidePackageIndex(content);
     } else if (type === 'INPUT_REQUEST') {
         state.isWaitingForInput = true;
         handleInputRequest(content);
@@ -1019,6 +1069,9 @@ function handleWorkerMessage(event) {
              // Avoid loop if content identical
              if (state.files[path] !== data) {
                  state.files[path] = data;
+                 fileTree.add(path);
+                 searchIndex.updateFile(path, data);
+                 symbolIndex.update(path, data);
                  changed = true;
              }
         });
@@ -1216,7 +1269,8 @@ function initEditor() {
         basicSetup,
         languageCompartment.of(langExt),
         themeCompartment.of([themeExtension, cmTheme]), // cmTheme provides structural base
-        keymap.of([indentWithTab]),
+        keymap.of([indentWithTab, { key: "F12", run: gotoDefinition }]),
+        pythonLanguage.data.of({ autocomplete: symbolIndex.completionSource(() => state.currentFile) }),
         errorField, // Add error field extension
         linter(pythonLinter, { delay: 800 }), // Add Real-time Linter with debounce
         lintGutter(),
@@ -1312,6 +1366,8 @@ function saveCurrentFile() {
     state.saveTimeout = setTimeout(() => {
         // Save Content
         persistence.saveFile(state.currentFile, content);
+        searchIndex.updateFile(state.currentFile, content);
+        symbolIndex.update(state.currentFile, content);
 
         // Save State (Cursor)
         const cursor = state.editor.state.selection.main.head;
@@ -1324,14 +1380,45 @@ function updateFileHeader() {
     if (el) el.textContent = state.currentFile;
 }
 
+// --- File Explorer ---
+// The directory trie is updated incrementally on every create/rename/delete, and
+// the list is virtualized: only rows in the viewport are in the DOM.
+const FILE_ROW_HEIGHT = 65; // px-4 py-3 + 40px icon + 1px border
+const FILE_ROW_GAP = 12;
+const fileTree = new FileTree();
+let fileListView = null;
+let fileListDir = null;
+
 function renderFileList() {
-    els.fileList.innerHTML = '';
+    if (!fileListView) {
+        fileListView = new VirtualList(els.fileList, {
+            rowHeight: FILE_ROW_HEIGHT + FILE_ROW_GAP,
+            getKey: (item) => item.isBack ? '..' : item.path,
+            getSignature: (item) => {
+                if (item.isBack || item.isDir) return item.name;
+                return `${item.path === state.currentFile}:${fileTree.size > 1}`;
+            },
+            renderRow: renderFileRow
+        });
+    }
 
+    const items = fileTree.list(state.currentDir);
     // Render "Back to Parent" if in subdirectory
-    if (state.currentDir) {
-        const backDiv = document.createElement('div');
-        backDiv.className = "flex justify-between items-center px-4 py-3 cursor-pointer hover:bg-white/5 border-b border-white/5 transition-colors";
-        backDiv.innerHTML = `
+    const rows = state.currentDir ? [{ isBack: true, name: '..' }, ...items] : items;
+
+    if (fileListDir !== state.currentDir) {
+        fileListView.scrollToTop();
+        fileListDir = state.currentDir;
+    }
+    fileListView.setItems(rows);
+}
+
+function renderFileRow(div, entry) {
+    div.style.height = `${FILE_ROW_HEIGHT}px`;
+
+    if (entry.isBack) {
+        div.className = "flex justify-between items-center px-4 py-3 cursor-pointer hover:bg-white/5 border-b border-white/5 transition-colors";
+        div.innerHTML = `
             <div class="flex items-center gap-3">
                 <div class="w-10 h-10 rounded-xl bg-gray-800/50 flex items-center justify-center text-gray-500">
                     <i class="fa-solid fa-arrow-left"></i>
@@ -1342,143 +1429,105 @@ function renderFileList() {
                 </div>
             </div>
         `;
-        backDiv.onclick = () => {
+        div.onclick = () => {
             const parts = state.currentDir.slice(0, -1).split('/');
             parts.pop(); // remove current folder
             state.currentDir = parts.length > 0 ? parts.join('/') + '/' : '';
             renderFileList();
         };
-        els.fileList.appendChild(backDiv);
+        return;
     }
 
-    // Identify Items in Current Directory
-    const entries = new Set();
-
-    Object.keys(state.files).forEach(path => {
-        if (!path.startsWith(state.currentDir)) return;
-
-        const relative = path.substring(state.currentDir.length);
-        const parts = relative.split('/');
-
-        if (parts.length > 1) {
-            // It's a directory
-            entries.add({ type: 'folder', name: parts[0] });
-        } else {
-            // It's a file
-            entries.add({ type: 'file', name: parts[0] });
-        }
-    });
-
-    // Convert Set to Array and Sort (Folders first)
-    const sortedEntries = Array.from(entries).sort((a, b) => {
-        if (a.type === b.type) return a.name.localeCompare(b.name);
-        return a.type === 'folder' ? -1 : 1;
-    });
-
-    // Deduplicate (since multiple files can imply same folder)
-    const uniqueEntries = [];
-    const seen = new Set();
-    sortedEntries.forEach(e => {
-        if (!seen.has(e.name)) {
-            uniqueEntries.push(e);
-            seen.add(e.name);
-        }
-    });
-
-    uniqueEntries.forEach(entry => {
-        const div = document.createElement('div');
-        const isFolder = entry.type === 'folder';
-        const fullPath = state.currentDir + entry.name;
-        const isActive = !isFolder && fullPath === state.currentFile;
-
-        let baseClass = "relative flex justify-between items-center px-4 py-3 cursor-pointer transition-all border-b border-white/5 overflow-hidden group";
-        if (isActive) baseClass += " bg-green-900/10";
-        else baseClass += " hover:bg-white/5";
-        div.className = baseClass;
-
-        if (isFolder) {
-            div.onclick = () => {
-                state.currentDir += entry.name + '/';
-                renderFileList();
-            };
-        } else {
-            div.onclick = () => switchFile(fullPath);
-        }
-
-        // Icon logic
-        let iconClass = "fa-solid fa-file";
-        let iconColor = "text-gray-400";
-        let iconBg = "bg-gray-800";
-
-        if (isFolder) {
-            iconClass = "fa-solid fa-folder";
-            iconColor = "text-yellow-500";
-            iconBg = "bg-yellow-900/20";
-        } else if (entry.name.endsWith('.py')) {
-            iconClass = "fa-brands fa-python";
-            iconColor = "text-accent";
-            iconBg = "bg-green-900/20";
-        } else if (entry.name.endsWith('.json')) {
-            iconClass = "fa-solid fa-file-code";
-            iconColor = "text-yellow-500";
-            iconBg = "bg-yellow-900/20";
-        } else if (entry.name.endsWith('.txt')) {
-            iconClass = "fa-solid fa-file-lines";
-            iconColor = "text-gray-400";
-            iconBg = "bg-gray-800";
-        }
-
-        // Active Indicator
-        const activeIndicator = isActive ? `<div class="absolute left-0 top-0 bottom-0 w-1 bg-accent shadow-[0_0_10px_rgba(34,197,94,0.5)]"></div>` : '';
-        const activeDot = isActive ? '<div class="absolute bottom-1 right-1 w-2.5 h-2.5 bg-accent rounded-full border-2 border-darker shadow-lg z-10"></div>' : '';
+    const isFolder = entry.isDir;
+    const fullPath = isFolder ? entry.path.slice(0, -1) : entry.path;
+    const isActive = !isFolder && fullPath === state.currentFile;
 
-        // Random metadata (for visual demo)
-        const size = isFolder ? "" : "2 KB";
-        const time = isFolder ? "" : "10m ago";
+    let baseClass = "relative flex justify-between items-center px-4 py-3 cursor-pointer transition-all border-b border-white/5 overflow-hidden group";
+    if (isActive) baseClass += " bg-green-900/10";
+    else baseClass += " hover:bg-white/5";
+    div.className = baseClass;
 
-        div.innerHTML = `
-            ${activeIndicator}
-            <div class="flex items-center gap-3 pl-2">
-                <div class="w-10 h-10 rounded-xl ${iconBg} flex items-center justify-center ${iconColor} relative shrink-0">
-                    <i class="${iconClass} text-lg"></i>
-                    ${activeDot}
-                </div>
-                <div class="flex flex-col overflow-hidden">
-                    <span class="${isActive ? 'text-accent font-bold' : 'text-gray-300 font-medium'} text-sm truncate">${entry.name}</span>
-                    <span class="text-xs text-gray-500 truncate">${isFolder ? 'Folder' : `${size} • ${time}`}</span>
-                </div>
+    if (isFolder) {
+        div.onclick = () => {
+            state.currentDir = entry.path;
+            renderFileList();
+        };
+    } else {
+        div.onclick = () => switchFile(fullPath);
+    }
+
+    // Icon logic
+    let iconClass = "fa-solid fa-file";
+    let iconColor = "text-gray-400";
+    let iconBg = "bg-gray-800";
+
+    if (isFolder) {
+        iconClass = "fa-solid fa-folder";
+        iconColor = "text-yellow-500";
+        iconBg = "bg-yellow-900/20";
+    } else if (entry.name.endsWith('.py')) {
+        iconClass = "fa-brands fa-python";
+        iconColor = "text-accent";
+        iconBg = "bg-green-900/20";
+    } else if (entry.name.endsWith('.json')) {
+        iconClass = "fa-solid fa-file-code";
+        iconColor = "text-yellow-500";
+        iconBg = "bg-yellow-900/20";
+    } else if (entry.name.endsWith('.txt')) {
+        iconClass = "fa-solid fa-file-lines";
+        iconColor = "text-gray-400";
+        iconBg = "bg-gray-800";
+    }
+
+    // Active Indicator
+    const activeIndicator = isActive ? `<div class="absolute left-0 top-0 bottom-0 w-1 bg-accent shadow-[0_0_10px_rgba(34,197,94,0.5)]"></div>` : '';
+    const activeDot = isActive ? '<div class="absolute bottom-1 right-1 w-2.5 h-2.5 bg-accent rounded-full border-2 border-darker shadow-lg z-10"></div>' : '';
+
+    // Random metadata (for visual demo)
+    const size = isFolder ? "" : "2 KB";
+    const time = isFolder ? "" : "10m ago";
+
+    div.innerHTML = `
+        ${activeIndicator}
+        <div class="flex items-center gap-3 pl-2">
+            <div class="w-10 h-10 rounded-xl ${iconBg} flex items-center justify-center ${iconColor} relative shrink-0">
+                <i class="${iconClass} text-lg"></i>
+                ${activeDot}
             </div>
-            ${isFolder ? '<i class="fa-solid fa-chevron-right text-gray-600 text-xs"></i>' : ''}
-        `;
-
-        // Actions (Rename/Delete) for Files Only (simpler for now)
-        if (!isFolder) {
-            const actions = document.createElement('div');
-            actions.className = "flex items-center gap-2 z-10 pl-2";
-            actions.onclick = (e) => e.stopPropagation();
-
-            const renameBtn = document.createElement('button');
-            renameBtn.innerHTML = '<i class="fa-solid fa-pen"></i>';
-            renameBtn.className = "w-8 h-8 rounded-full flex items-center justify-center text-gray-500 hover:text-white hover:bg-white/10 transition-colors";
-            renameBtn.onclick = () => renameFile(fullPath);
-            actions.appendChild(renameBtn);
-
-            if (Object.keys(state.files).length > 1) {
-                const delBtn = document.createElement('button');
-                delBtn.innerHTML = '<i class="fa-solid fa-trash"></i>';
-                delBtn.className = "w-8 h-8 rounded-full flex items-center justify-center text-gray-500 hover:text-red-400 hover:bg-red-900/20 transition-colors";
-                delBtn.onclick = () => deleteFile(fullPath);
-                actions.appendChild(delBtn);
-            }
-            div.appendChild(actions);
+            <div class="flex flex-col overflow-hidden">
+                <span class="${isActive ? 'text-accent font-bold' : 'text-gray-300 font-medium'} text-sm truncate">${entry.name}</span>
+                <span class="text-xs text-gray-500 truncate">${isFolder ? 'Folder' : `${size} • ${time}`}</span>
+            </div>
+        </div>
+        ${isFolder ? '<i class="fa-solid fa-chevron-right text-gray-600 text-xs"></i>' : ''}
+    `;
+
+    // Actions (Rename/Delete) for Files Only (simpler for now)
+    if (!isFolder) {
+        const actions = document.createElement('div');
+        actions.className = "flex items-center gap-2 z-10 pl-2";
+        actions.onclick = (e) => e.stopPropagation();
+
+        const renameBtn = document.createElement('button');
+        renameBtn.innerHTML = '<i class="fa-solid fa-pen"></i>';
+        renameBtn.className = "w-8 h-8 rounded-full flex items-center justify-center text-gray-500 hover:text-white hover:bg-white/10 transition-colors";
+        renameBtn.onclick = () => renameFile(fullPath);
+        actions.appendChild(renameBtn);
+
+        if (fileTree.size > 1) {
+            const delBtn = document.createElement('button');
+            delBtn.innerHTML = '<i class="fa-solid fa-trash"></i>';
+            delBtn.className = "w-8 h-8 rounded-full flex items-center justify-center text-gray-500 hover:text-red-400 hover:bg-red-900/20 transition-colors";
+            delBtn.onclick = () => deleteFile(fullPath);
+            actions.appendChild(delBtn);
         }
-
-        els.fileList.appendChild(div);
-    });
+        div.appendChild(actions);
+    }
 }
 
 function switchFile(filename) {
     if (filename === state.currentFile) return;
+    perfStart('file-switch');
     state.currentFile = filename;
 
     // Switch editor content & language
@@ -1491,6 +1540,7 @@ function switchFile(filename) {
     });
 
     renderFileList();
+    renderOutline();
     updateFileHeader();
     localStorage.setItem('pyide_current', filename);
 
@@ -1498,6 +1548,160 @@ function switchFile(filename) {
     // Trigger click on Editor tab
     const editorTab = document.querySelector('.nav-btn[data-target="view-editor"]');
     if (editorTab) editorTab.click();
+    requestAnimationFrame(() => perfEnd('file-switch')); // Includes the next layout and paint
+}
+
+// --- Project Search ---
+async function runProjectSearch() {
+    const query = els.projectSearch.value.trim();
+    if (!query) {
+        els.searchResults.classList.add('hidden');
+        els.fileList.classList.remove('hidden');
+        return;
+    }
+
+    const { hits, elapsed } = await searchIndex.query(query, { limit: 30 });
+    // Ignore stale responses if the user kept typing
+    if (els.projectSearch.value.trim() !== query) return;
+
+    els.fileList.classList.add('hidden');
+    els.searchResults.classList.remove('hidden');
+    renderSearchResults(hits, elapsed);
+}
+
+function renderSearchResults(hits, elapsed) {
+    els.searchResults.innerHTML = '';
+
+    const summary = document.createElement('div');
+    summary.className = "text-[10px] text-muted uppercase tracking-wider px-1 pb-1";
+    summary.textContent = `${hits.length} result${hits.length !== 1 ? 's' : ''} • ${elapsed.toFixed(1)} ms`;
+    els.searchResults.appendChild(summary);
+
+    hits.forEach(hit => {
+        const isFile = hit.kind === 'file';
+        const div = document.createElement('div');
+        div.className = "bg-surface border border-white/5 rounded-xl p-3 flex flex-col gap-1";
+
+        const header = document.createElement('div');
+        header.className = "flex items-center gap-2 cursor-pointer";
+        header.innerHTML = `<i class="${isFile ? 'fa-solid fa-file-code text-accent' : 'fa-solid fa-comments text-yellow-500'} text-xs"></i>`;
+        const title = document.createElement('span');
+        title.className = "text-sm font-bold text-white truncate";
+        title.textContent = hit.title;
+        header.appendChild(title);
+        header.onclick = () => openSearchHit(hit, hit.lines[0] ? hit.lines[0].line : 1);
+        div.appendChild(header);
+
+        hit.lines.forEach(({ line, text }) => {
+            const row = document.createElement('div');
+            row.className = "flex gap-2 text-xs font-mono text-gray-400 bg-black/20 rounded px-2 py-1 cursor-pointer hover:text-white";
+            const lineNo = document.createElement('span');
+            lineNo.className = "text-gray-600 shrink-0";
+            lineNo.textContent = line;
+            const lineText = document.createElement('span');
+            lineText.className = "truncate";
+            lineText.textContent = text;
+            row.appendChild(lineNo);
+            row.appendChild(lineText);
+            row.onclick = () => openSearchHit(hit, line);
+            div.appendChild(row);
+        });
+
+        els.searchResults.appendChild(div);
+    });
+}
+
+function openSearchHit(hit, line) {
+    if (hit.kind === 'chat') {
+        if (window.uiSwitchView) window.uiSwitchView('view-saved-chats');
+        openSavedChat({ id: hit.ref, title: hit.title, timestamp: hit.meta ? hit.meta.timestamp : hit.ref });
+        return;
+    }
+
+    revealLine(hit.ref, line);
+}
+
+// Open a file in the editor with the cursor on the given (1-based) line
+function revealLine(path, line) {
+    if (!state.files.hasOwnProperty(path)) return;
+    if (path !== state.currentFile) {
+        switchFile(path);
+    } else {
+        const editorTab = document.querySelector('.nav-btn[data-target="view-editor"]');
+        if (editorTab) editorTab.click();
+    }
+
+    const doc = state.editor.state.doc;
+    const pos = doc.line(Math.min(Math.max(line, 1), doc.lines)).from;
+    state.editor.dispatch({
+        selection: { anchor: pos, head: pos },
+        effects: EditorView.scrollIntoView(pos, { y: "center" })
+    });
+    state.editor.focus();
+}
+
+// --- Symbols (Go to Definition & Outline) ---
+function gotoDefinition(view) {
+    const pos = view.state.selection.main.head;
+    const line = view.state.doc.lineAt(pos);
+    const text = line.text;
+
+    // Dotted name under the cursor, e.g. "utils.helper" or "self.run"
+    let start = pos - line.from;
+    let end = start;
+    while (start > 0 && /[\w.]/.test(text[start - 1])) start--;
+    while (end < text.length && /\w/.test(text[end])) end++;
+    const name = text.slice(start, end).replace(/^\.+|\.+$/g, '');
+    if (!name) return false;
+
+    const target = symbolIndex.findDefinition(name, state.currentFile, line.number);
+    if (!target) {
+        showToast(`No definition found for '${name}'`, 'info');
+        return true;
+    }
+    revealLine(target.path, target.line);
+    return true;
+}
+
+const OUTLINE_ICONS = {
+    class: 'fa-solid fa-cube text-yellow-500',
+    function: 'fa-solid fa-code text-accent',
+    method: 'fa-solid fa-code text-blue-400'
+};
+
+function toggleOutline(show) {
+    if (!els.outlinePanel) return;
+    const visible = show !== undefined ? show : els.outlinePanel.classList.contains('hidden');
+    els.outlinePanel.classList.toggle('hidden', !visible);
+    if (visible) renderOutline();
+}
+
+function renderOutline() {
+    if (!els.outlinePanel || els.outlinePanel.classList.contains('hidden')) return;
+
+    const symbols = symbolIndex.getSymbols(state.currentFile).filter(s => OUTLINE_ICONS[s.kind]);
+    els.outlineList.innerHTML = '';
+
+    if (symbols.length === 0) {
+        els.outlineList.innerHTML = `<div class="px-4 py-6 text-center text-xs text-muted">No classes or functions in ${state.currentFile}</div>`;
+        return;
+    }
+
+    symbols.forEach(sym => {
+        const row = document.createElement('div');
+        row.className = `flex items-center gap-2 py-2 pr-3 cursor-pointer hover:bg-hoverBg transition-colors ${sym.parent ? 'pl-8' : 'pl-4'}`;
+        row.innerHTML = `
+            <i class="${OUTLINE_ICONS[sym.kind]} text-[10px] w-4 shrink-0"></i>
+            <span class="outline-name text-text text-xs font-mono truncate"></span>
+            <span class="outline-sig text-muted text-[10px] font-mono truncate"></span>
+            <span class="ml-auto text-muted text-[10px] shrink-0">${sym.line}</span>
+        `;
+        row.querySelector('.outline-name').textContent = sym.name;
+        row.querySelector('.outline-sig').textContent = sym.signature || '';
+        if (sym.doc) row.title = sym.doc;
+        row.onclick = () => revealLine(state.currentFile, sym.line);
+        els.outlineList.appendChild(row);
+    });
 }
 
 async function createNewItem() {
@@ -1511,8 +1715,10 @@ async function createNewItem() {
             // Create a placeholder file to persist the folder
             const path = state.currentDir + folderName + '/.keep';
             state.files[path] = "";
+            fileTree.add(path);
             renderFileList();
             persistence.saveFile(path, "");
+            searchIndex.updateFile(path, "");
         }
     } else {
         const name = await showPrompt("New File", "Enter file name (e.g., script.py):", "script.py");
@@ -1523,9 +1729,12 @@ async function createNewItem() {
                 return;
             }
             state.files[path] = "# New file\n";
+            fileTree.add(path);
             renderFileList();
             switchFile(path);
             persistence.saveFile(path, state.files[path]);
+            searchIndex.updateFile(path, state.files[path]);
+            symbolIndex.update(path, state.files[path]);
         }
     }
 }
@@ -1542,10 +1751,15 @@ async function renameFile(oldPath) {
         }
         state.files[newPath] = state.files[oldPath];
         delete state.files[oldPath];
+        fileTree.rename(oldPath, newPath);
 
         // Persistence
         await persistence.deleteFile(oldPath);
         await persistence.saveFile(newPath, state.files[newPath]);
+        searchIndex.deleteFile(oldPath);
+        searchIndex.updateFile(newPath, state.files[newPath]);
+        symbolIndex.remove(oldPath);
+        symbolIndex.update(newPath, state.files[newPath]);
 
         // If current file renamed, update state AND language
         if (state.currentFile === oldPath) {
@@ -1586,8 +1800,11 @@ function getLanguageExtension(filename) {
 async function deleteFile(path) {
     if (await showConfirm("Delete File", `Delete ${path}?`)) {
         delete state.files[path];
+        fileTree.remove(path);
 
         await persistence.deleteFile(path);
+        searchIndex.deleteFile(path);
+        symbolIndex.remove(path);
 
         // If we deleted the current file, switch to another one
         if (state.currentFile === path) {
@@ -1597,8 +1814,10 @@ async function deleteFile(path) {
             } else {
                 // Should create a default file?
                 state.files['main.py'] = "";
+                fileTree.add('main.py');
                 switchFile('main.py');
                 persistence.saveFile('main.py', "");
+                searchIndex.updateFile('main.py', "");
             }
         }
         renderFileList();
@@ -1636,36 +1855,72 @@ async function runCode(inputs = []) {
     runLocalCode(userCode, inputs);
 }
 
+// Static analysis in the worker (ast): milliseconds, no network. Resolves null
+// when the worker is unavailable or does not answer in time.
+function analyzeSafetyLocally(code) {
+    if (!state.worker || state.isRunning) return Promise.resolve(null);
+    return new Promise((resolve) => {
+        const timeoutId = setTimeout(() => {
+            state.pendingSafetyResolve = null;
+            resolve(null);
+        }, 1500);
+        state.pendingSafetyResolve = (result) => {
+            clearTimeout(timeoutId);
+            resolve(result);
+        };
+        state.worker.postMessage({ type: 'ANALYZE_SAFETY', content: code });
+    });
+}
+
 async function analyzeCodeSafety(code) {
     if (!code || !code.trim()) return { safe: true };
 
+    // Definite verdicts come from the local analyzer; the AI is only asked
+    // about loops whose exit condition it cannot see (e.g. changed by a callee)
+    const local = await analyzeSafetyLocally(code);
+    if (!local) return { safe: true }; // Fail open
+    if (!local.ambiguous) return local;
+
     const controller = new AbortController();
     const timeoutId = setTimeout(() => controller.abort(), 5000); // 5s timeout
 
     try {
-        const response = await fetch("/.netlify/functions/ai-workspace-proxy", {
-            method: "POST",
-            headers: { "Content-Type": "application/json" },
-            body: JSON.stringify({
-                mode: 'safety_check',
-                code: code
-            }),
-            signal: controller.signal
+        // Re-running unchanged code reuses the previous verdict (also offline)
+        const result = await cachedResponse(['safety_check', code], async () => {
+            const response = await fetch("/.netlify/functions/ai-workspace-proxy", {
+                method: "POST",
+                headers: { "Content-Type": "application/json" },
+                body: JSON.stringify({
+                    mode: 'safety_check',
+                    code: code
+                }),
+                signal: controller.signal
+            });
+
+            if (!response.ok) {
+                 throw new Error("Safety check service unavailable");
+            }
+            return response.json();
         });
         clearTimeout(timeoutId);
-
-        if (!response.ok) {
-             throw new Error("Safety check service unavailable");
-        }
-
-        const result = await response.json();
         return result;
 
     } catch (e) {
         clearTimeout(timeoutId);
         console.error("Safety Analysis Failed:", e);
-        return { safe: true }; // Fail open
+        return local;
+    }
+}
+
+// External modules the code to run depends on: from the worker's import graph
+// (the current file plus the project modules it imports), or a plain scan of
+// the code when the graph isn't available (worker busy, snippet runs)
+async function collectImports(userCode) {
+    if (userCode === state.files[state.currentFile] &&
+        await symbolIndex.whenIndexed(state.currentFile, userCode)) {
+        return symbolIndex.externalImports(state.currentFile);
     }
+    return scanImports(userCode).filter(name => !symbolIndex.isLocalModule(name));
 }
 
 async function runLocalCode(userCode, inputs = []) {
@@ -1688,20 +1943,24 @@ async function runLocalCode(userCode, inputs = []) {
         const installed = JSON.parse(localStorage.getItem('pyide_packages') || '[]');
         const installedNames = installed.map(p => (typeof p === 'string' ? p : p.name));
 
-        const missing = detectMissingLibraries(userCode, state.files, installedNames);
+        const missing = detectMissingLibraries(await collectImports(userCode), installedNames);
 
         if (missing.length > 0) {
+            const names = missing.map(lib => lib.name);
             // Check offline before prompting
             if (!navigator.onLine) {
-                 addToTerminal(`[System] Warning: Missing libraries detected (${missing.join(', ')}), but cannot install while offline.\n`, "stderr");
+                 addToTerminal(`[System] Warning: Missing libraries detected (${names.join(', ')}), but cannot install while offline.\n`, "stderr");
             } else {
-                const listStr = missing.map(lib => `• ${lib}`).join('\n');
+                const listStr = missing.map(lib => `• ${lib.name}${lib.builtin ? ' (bundled)' : ''}`).join('\n');
                 if (await showConfirm("Missing Libraries Detected",
                     `The following libraries appear to be missing:\n\n${listStr}\n\nWould you like to install them now?`)) {
 
                     // Silent install - no terminal output
-                    missing.forEach(pkg => {
-                        if (state.worker) state.worker.postMessage({ type: 'INSTALL', content: pkg });
+                    // Pyodide-bundled packages load in one batch, the rest go through micropip
+                    const bundled = missing.filter(lib => lib.builtin).map(lib => lib.name);
+                    if (bundled.length > 0 && state.worker) state.worker.postMessage({ type: 'LOAD_PACKAGES', content: bundled });
+                    missing.filter(lib => !lib.builtin).forEach(lib => {
+                        if (state.worker) state.worker.postMessage({ type: 'INSTALL', content: lib.name });
                     });
                     return;
                 }
@@ -1724,6 +1983,23 @@ async function runLocalCode(userCode, inputs = []) {
         return;
     }
 
+    // --- Static Safety Check (Dev Mode) ---
+    if (state.isDevMode) {
+        const safety = await analyzeCodeSafety(userCode);
+        if (!safety.safe && !(state.isManualExecution && await showConfirm("Potential Hang Detected",
+            `${safety.reason}\n\nRunning this code may freeze the editor. Run anyway?`))) {
+            addToTerminal(`\n[System] Run blocked by safety check: ${safety.reason}\n`, "stderr");
+            // Agent runs get the finding back as the execution error
+            if (state.executionCallback) {
+                const callback = state.executionCallback;
+                state.executionCallback = null;
+                state.executionLogs = [];
+                callback({ logs: [{ content: `Safety check: ${safety.reason}\n`, type: 'stderr' }], error: safety.reason });
+            }
+            return;
+        }
+    }
+
     // Update UI
     updateRunButtonState(true);
 
@@ -1734,6 +2010,8 @@ async function runLocalCode(userCode, inputs = []) {
     state.isRunning = true;
 
     // Sync Files Before Run
+    perfStart('run');
+    perfStart('first-output');
     state.worker.postMessage({ type: 'SYNC_FILES', content: state.files });
     state.worker.postMessage({ type: 'RUN', content: userCode });
 }
@@ -1899,6 +2177,14 @@ async function runAction(action, arg) {
             gotoLine(view);
             toggleSidebar(false);
             break;
+        case 'goto-definition':
+            gotoDefinition(view);
+            toggleSidebar(false);
+            break;
+        case 'outline':
+            toggleOutline();
+            toggleSidebar(false);
+            break;
         case 'scroll-top':
              view.dispatch({
                 effects: EditorView.scrollIntoView(0, {y: "start"})
@@ -2425,9 +2711,19 @@ function bindEvents() {
     // Library
     if (els.btnInstallLib) els.btnInstallLib.onclick = installLibrary;
 
+    // Project Search (debounced)
+    if (els.projectSearch) {
+        let searchTimeout = null;
+        els.projectSearch.addEventListener('input', () => {
+            if (searchTimeout) clearTimeout(searchTimeout);
+            searchTimeout = setTimeout(runProjectSearch, 150);
+        });
+    }
+
     // Sidebar
     if (els.btnToggleSidebar) els.btnToggleSidebar.onclick = () => toggleSidebar(true);
     if (els.btnCloseSidebar) els.btnCloseSidebar.onclick = () => toggleSidebar(false);
+    if (els.btnCloseOutline) els.btnCloseOutline.onclick = () => toggleOutline(false);
     if (els.sidebarOverlay) els.sidebarOverlay.onclick = () => toggleSidebar(false);
 
     // Profile Editing
@@ -2554,6 +2850,9 @@ function bindEvents() {
                     if (!await showConfirm("Overwrite File", `File ${fullTestPath} already exists. Overwrite?`)) return;
                 }
                 state.files[fullTestPath] = testCode;
+                fileTree.add(fullTestPath);
+                searchIndex.updateFile(fullTestPath, testCode);
+                symbolIndex.update(fullTestPath, testCode);
                 renderFileList(); // Update file list UI
 
                 // Switch to it
@@ -0,0 +1,327 @@
+// Full-Text Search Worker
+// Maintains an inverted index over project files and saved chat sessions.
+// Per-document token maps are persisted in IndexedDB so the index is restored
+// (not re-tokenized) at startup; only changed documents are re-indexed.
+
+const DB_NAME = 'PyMob_SearchIndex';
+const DB_VERSION = 1;
+const DOC_STORE = 'docs';
+
+const MAX_LINES_PER_TOKEN = 50; // Line positions kept per token per document
+const MAX_PREFIX_EXPANSIONS = 50; // Vocabulary terms matched for a partial last word
+const PERSIST_DELAY_MS = 500;
+
+// BM25 parameters
+const K1 = 1.2;
+const B = 0.75;
+
+// In-memory index
+const docs = new Map(); // docId -> { id, kind, ref, title, meta, hash, content, length, tokens }
+const postings = new Map(); // token -> Map(docId -> { tf, lines })
+let totalLength = 0;
+
+// Pending IndexedDB writes (debounced)
+const dirtyDocs = new Set();
+const deletedDocs = new Set();
+let persistTimeout = null;
+
+let dbPromise = null;
+let readyPromise = null;
+
+function openDB() {
+    if (dbPromise) return dbPromise;
+
+    dbPromise = new Promise((resolve, reject) => {
+        const request = indexedDB.open(DB_NAME, DB_VERSION);
+
+        request.onupgradeneeded = (event) => {
+            const db = event.target.result;
+            if (!db.objectStoreNames.contains(DOC_STORE)) {
+                db.createObjectStore(DOC_STORE, { keyPath: 'id' });
+            }
+        };
+
+        request.onsuccess = (event) => resolve(event.target.result);
+        request.onerror = (event) => reject(event.target.error);
+    });
+
+    return dbPromise;
+}
+
+// --- Tokenizing ---
+
+// FNV-1a (32-bit) - cheap change detection, not a security hash
+function hashString(str) {
+    let h = 0x811c9dc5;
+    for (let i = 0; i < str.length; i++) {
+        h ^= str.charCodeAt(i);
+        h = Math.imul(h, 0x01000193);
+    }
+    return (h >>> 0).toString(16) + ':' + str.length;
+}
+
+// Lowercased words; snake_case identifiers also yield their parts
+function tokenize(text) {
+    const out = [];
+    const words = text.toLowerCase().match(/[a-z0-9_]+/g) || [];
+    for (const word of words) {
+        if (word.length >= 2) out.push(word);
+        if (word.includes('_')) {
+            for (const part of word.split('_')) {
+                if (part.length >= 2) out.push(part);
+            }
+        }
+    }
+    return out;
+}
+
+// token -> [tf, [line numbers...]] (lines are 1-based)
+function buildTokenMap(content) {
+    const tokens = {};
+    const lines = content.split('\n');
+    let length = 0;
+    for (let i = 0; i < lines.length; i++) {
+        for (const token of tokenize(lines[i])) {
+            length++;
+            let entry = tokens[token];
+            if (!entry) {
+                entry = tokens[token] = [0, []];
+            }
+            entry[0]++;
+            const lineList = entry[1];
+            if (lineList.length < MAX_LINES_PER_TOKEN && lineList[lineList.length - 1] !== i + 1) {
+                lineList.push(i + 1);
+            }
+        }
+    }
+    return { tokens, length };
+}
+
+// --- Index Maintenance ---
+
+function addPostings(doc) {
+    for (const [token, [tf, lines]] of Object.entries(doc.tokens)) {
+        let list = postings.get(token);
+        if (!list) {
+            list = new Map();
+            postings.set(token, list);
+        }
+        list.set(doc.id, { tf, lines });
+    }
+    totalLength += doc.length;
+}
+
+function removeDoc(docId) {
+    const doc = docs.get(docId);
+    if (!doc) return false;
+    for (const token of Object.keys(doc.tokens)) {
+        const list = postings.get(token);
+        if (!list) continue;
+        list.delete(docId);
+        if (list.size === 0) postings.delete(token);
+    }
+    totalLength -= doc.length;
+    docs.delete(docId);
+    return true;
+}
+
+function upsertDoc(id, kind, ref, title, content, meta = null) {
+    const hash = hashString(content);
+    const existing = docs.get(id);
+    if (existing && existing.hash === hash) {
+        if (existing.title !== title) {
+            existing.title = title;
+            markDirty(id);
+        }
+        return false;
+    }
+
+    removeDoc(id);
+    const { tokens, length } = buildTokenMap(content);
+    const doc = { id, kind, ref, title, meta, hash, content, length, tokens };
+    docs.set(id, doc);
+    addPostings(doc);
+    markDirty(id);
+    return true;
+}
+
+function deleteDoc(id) {
+    if (removeDoc(id)) {
+        dirtyDocs.delete(id);
+        deletedDocs.add(id);
+        schedulePersist();
+    }
+}
+
+function markDirty(id) {
+    deletedDocs.delete(id);
+    dirtyDocs.add(id);
+    schedulePersist();
+}
+
+function schedulePersist() {
+    if (persistTimeout) clearTimeout(persistTimeout);
+    persistTimeout = setTimeout(persist, PERSIST_DELAY_MS);
+}
+
+async function persist() {
+    persistTimeout = null;
+    if (dirtyDocs.size === 0 && deletedDocs.size === 0) return;
+
+    const toWrite = Array.from(dirtyDocs).map(id => docs.get(id)).filter(Boolean);
+    const toDelete = Array.from(deletedDocs);
+    dirtyDocs.clear();
+    deletedDocs.clear();
+
+    try {
+        const db = await openDB();
+        await new Promise((resolve, reject) => {
+            const tx = db.transaction(DOC_STORE, 'readwrite');
+            const store = tx.objectStore(DOC_STORE);
+            toWrite.forEach(doc => store.put(doc));
+            toDelete.forEach(id => store.delete(id));
+            tx.oncomplete = resolve;
+            tx.onerror = () => reject(tx.error);
+        });
+    } catch (e) {
+        console.error("Search Index Persist Error:", e);
+    }
+}
+
+async function loadFromDB() {
+    try {
+        const db = await openDB();
+        const stored = await new Promise((resolve, reject) => {
+            const request = db.transaction(DOC_STORE, 'readonly').objectStore(DOC_STORE).getAll();
+            request.onsuccess = () => resolve(request.result);
+            request.onerror = () => reject(request.error);
+        });
+        stored.forEach(doc => {
+            docs.set(doc.id, doc);
+            addPostings(doc);
+        });
+    } catch (e) {
+        console.error("Search Index Load Error:", e);
+    }
+}
+
+function sessionText(session) {
+    return (session.messages || []).map(m => m.content || "").join('\n');
+}
+
+// --- Querying ---
+
+function expandToken(token, isLast) {
+    if (postings.has(token) && !isLast) return [token];
+    const matches = postings.has(token) ? [token] : [];
+    if (isLast && token.length >= 2) {
+        for (const candidate of postings.keys()) {
+            if (matches.length >= MAX_PREFIX_EXPANSIONS) break;
+            if (candidate !== token && candidate.startsWith(token)) matches.push(candidate);
+        }
+    }
+    return matches;
+}
+
+function search(queryText, limit = 20, kind = null) {
+    const queryTokens = Array.from(new Set(tokenize(queryText)));
+    if (queryTokens.length === 0 || docs.size === 0) return [];
+
+    const N = docs.size;
+    const avgdl = totalLength / N || 1;
+    const scores = new Map(); // docId -> { score, lines: Map(line -> matchedTerms), matched: Set }
+
+    queryTokens.forEach((qt, qi) => {
+        const terms = expandToken(qt, qi === queryTokens.length - 1);
+        for (const term of terms) {
+            const list = postings.get(term);
+            const idf = Math.log(1 + (N - list.size + 0.5) / (list.size + 0.5));
+            // Prefix expansions score slightly below exact matches
+            const weight = term === qt ? 1 : 0.7;
+
+            for (const [docId, { tf, lines }] of list) {
+                const doc = docs.get(docId);
+                if (kind && doc.kind !== kind) continue;
+
+                const norm = tf * (K1 + 1) / (tf + K1 * (1 - B + B * doc.length / avgdl));
+                let entry = scores.get(docId);
+                if (!entry) {
+                    entry = { score: 0, lines: new Map(), matched: new Set() };
+                    scores.set(docId, entry);
+                }
+                entry.score += weight * idf * norm;
+                entry.matched.add(qi);
+                lines.forEach(line => entry.lines.set(line, (entry.lines.get(line) || 0) + 1));
+            }
+        }
+    });
+
+    // Documents matching every query word rank above partial matches
+    const ranked = Array.from(scores.entries())
+        .map(([docId, entry]) => ({ docId, ...entry, score: entry.score * (entry.matched.size / queryTokens.length) }))
+        .sort((a, b) => b.score - a.score)
+        .slice(0, limit);
+
+    return ranked.map(({ docId, score, lines }) => {
+        const doc = docs.get(docId);
+        const docLines = doc.content.split('\n');
+        const bestLines = Array.from(lines.entries())
+            .sort((a, b) => b[1] - a[1] || a[0] - b[0])
+            .slice(0, 3)
+            .map(([line]) => ({ line, text: (docLines[line - 1] || "").trim().slice(0, 200) }));
+
+        return { kind: doc.kind, ref: doc.ref, title: doc.title, meta: doc.meta, score, lines: bestLines };
+    });
+}
+
+// --- Message Handling ---
+
+self.onmessage = async (event) => {
+    const { type, content, requestId } = event.data;
+
+    if (type === 'INIT') {
+        readyPromise = loadFromDB();
+        await readyPromise;
+        postMessage({ type: 'READY', content: { docs: docs.size } });
+        return;
+    }
+
+    if (readyPromise) await readyPromise;
+
+    if (type === 'SYNC_FILES') {
+        // Full snapshot of the project: index changed files, drop removed ones
+        const files = content;
+        let changed = 0;
+        for (const [path, data] of Object.entries(files)) {
+            if (typeof data !== 'string') continue;
+            if (upsertDoc(`file:${path}`, 'file', path, path, data)) changed++;
+        }
+        for (const doc of Array.from(docs.values())) {
+            if (doc.kind === 'file' && !(doc.ref in files)) deleteDoc(doc.id);
+        }
+        postMessage({ type: 'SYNCED', content: { changed, docs: docs.size } });
+    } else if (type === 'UPDATE_FILE') {
+        upsertDoc(`file:${content.path}`, 'file', content.path, content.path, content.data || "");
+    } else if (type === 'DELETE_FILE') {
+        deleteDoc(`file:${content.path}`);
+    } else if (type === 'INDEX_SESSION') {
+        const session = content;
+        upsertDoc(`chat:${session.id}`, 'chat', session.id, session.title, sessionText(session), { timestamp: session.timestamp });
+    } else if (type === 'RENAME_SESSION') {
+        const doc = docs.get(`chat:${content.id}`);
+        if (doc) {
+            doc.title = content.title;
+            markDirty(doc.id);
+        }
+    } else if (type === 'DELETE_SESSION') {
+        deleteDoc(`chat:${content.id}`);
+    } else if (type === 'QUERY') {
+        const start = performance.now();
+        const hits = search(content.query, content.limit, content.kind);
+        postMessage({
+            type: 'QUERY_RESULT',
+            requestId,
+            content: { hits, elapsed: performance.now() - start }
+        });
+    }
+};
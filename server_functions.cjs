@@ -2,6 +2,15 @@ const http = require('http');
 const path = require('path');
 const fs = require('fs');
 const Module = require('module');
+const { Readable } = require('stream');
+const { pipeline } = require('stream/promises');
+const { startMockUpstream } = require('./mock_upstream.cjs');
+const { metricsSnapshot } = require('./netlify/lib/request-metrics.cjs');
+const { schedulerStats } = require('./netlify/lib/upstream-scheduler.cjs');
+const { upstreamStats } = require('./netlify/lib/upstream-client.cjs');
+
+// Request bodies above this are refused with 413 (matches the proxies' own limit)
+const MAX_BODY_BYTES = Number(process.env.FUNCTIONS_MAX_BODY_BYTES) || 10 * 1024 * 1024;
 
 // --- Monkey Patch require to mock @netlify/functions locally ---
 const originalRequire = Module.prototype.require;
@@ -28,49 +37,6 @@ if (!process.env.LONGCAT_API_KEY) {
 // We can try to rely on the installed @netlify/functions package behaving correctly in Node.
 // It usually returns a function that takes (req, context).
 
-// Intercept Fetch for Mock Mode
-const originalFetch = global.fetch;
-global.fetch = async (url, options) => {
-    if (url.toString().includes("api.longcat.chat") && process.env.LONGCAT_API_KEY === "mock-key") {
-        console.log("[Mock Fetch] Intercepting request to:", url);
-
-        // Simulate streaming response
-        const encoder = new TextEncoder();
-        const stream = new ReadableStream({
-            start(controller) {
-                const chunks = [
-                    'data: {"choices":[{"delta":{"content":"Hello! "}}]}\n\n',
-                    'data: {"choices":[{"delta":{"content":"I am a "}}]}\n\n',
-                    'data: {"choices":[{"delta":{"content":"simulated AI "}}]}\n\n',
-                    'data: {"choices":[{"delta":{"content":"assistant running locally."}}]}\n\n',
-                    'data: [DONE]\n\n'
-                ];
-
-                let i = 0;
-                const interval = setInterval(() => {
-                    if (i >= chunks.length) {
-                        clearInterval(interval);
-                        controller.close();
-                        return;
-                    }
-                    controller.enqueue(encoder.encode(chunks[i]));
-                    i++;
-                }, 100);
-            }
-        });
-
-        return new Response(stream, {
-            status: 200,
-            headers: { 'Content-Type': 'text/event-stream' }
-        });
-    }
-
-    // Pass through other requests (or if we have a real key)
-    // Note: Node.js 18+ has built-in fetch.
-    if (originalFetch) return originalFetch(url, options);
-    return fetch(url, options);
-};
-
 // Import Handlers
 // We need to use absolute paths or relative to this script
 const workspaceProxyPath = path.resolve(__dirname, 'netlify/functions/ai-workspace-proxy.cjs');
@@ -79,13 +45,70 @@ const featureProxyPath = path.resolve(__dirname, 'netlify/functions/ai-proxy.cjs
 const workspaceHandler = require(workspaceProxyPath).handler;
 const featureHandler = require(featureProxyPath).handler;
 
+// --- Streaming I/O ---
+
+class BodyTooLargeError extends Error {}
+
+// Collects the request body as Buffer chunks (one copy at the end), refusing
+// anything over MAX_BODY_BYTES as soon as the declared or received size exceeds it
+function readBody(req) {
+    return new Promise((resolve, reject) => {
+        const declared = Number(req.headers['content-length']);
+        if (declared > MAX_BODY_BYTES) {
+            reject(new BodyTooLargeError(`Request body of ${declared} bytes exceeds ${MAX_BODY_BYTES}`));
+            return;
+        }
+        const chunks = [];
+        let size = 0;
+        req.on('data', chunk => {
+            size += chunk.length;
+            if (size > MAX_BODY_BYTES) {
+                req.pause();
+                reject(new BodyTooLargeError(`Request body exceeds ${MAX_BODY_BYTES} bytes`));
+                return;
+            }
+            chunks.push(chunk);
+        });
+        req.on('end', () => resolve(Buffer.concat(chunks, size)));
+        req.on('error', reject);
+    });
+}
+
+// Pipes a Web ReadableStream into the response with backpressure: the stream is
+// only pulled while `res` accepts data. If the client disconnects (e.g. Stop
+// button), the pipeline destroys the source, which cancels the handler's stream
+// so it can abort its upstream request.
+async function sendStream(res, body) {
+    try {
+        await pipeline(Readable.fromWeb(body), res);
+    } catch (err) {
+        if (res.destroyed && !res.writableFinished) {
+            console.log("[Stream] Client disconnected. Cancelled response stream.");
+            return;
+        }
+        console.error("Stream Pipe Error:", err);
+        res.destroy(err);
+    }
+}
+
+function sendError(res, statusCode, message) {
+    if (res.headersSent) {
+        res.destroy();
+        return;
+    }
+    res.writeHead(statusCode, { 'Content-Type': 'application/json' });
+    res.end(JSON.stringify({ error: message }));
+}
+
 const server = http.createServer(async (req, res) => {
     console.log(`[Request] ${req.method} ${req.url}`);
 
     // CORS
     res.setHeader('Access-Control-Allow-Origin', '*');
-    res.setHeader('Access-Control-Allow-Methods', 'POST, OPTIONS');
-    res.setHeader('Access-Control-Allow-Headers', 'Content-Type');
+    res.setHeader('Access-Control-Allow-Methods', 'GET, POST, OPTIONS');
+    res.setHeader('Access-Control-Allow-Headers', 'Content-Type, Content-Encoding');
+    res.setHeader('Access-Control-Expose-Headers', 'Server-Timing, X-Cache, X-Queue-Class, X-Queue-Depth, X-Queue-Wait, Retry-After');
+    res.setHeader('Timing-Allow-Origin', '*'); // Server-Timing visible to the app on another dev port
 
     if (req.method === 'OPTIONS') {
         res.statusCode = 204;
@@ -93,6 +116,19 @@ const server = http.createServer(async (req, res) => {
         return;
     }
 
+    // Rolling latency histograms and pool / queue state of this process
+    if (req.method === 'GET' && req.url.split('?')[0] === '/stats') {
+        res.writeHead(200, { 'Content-Type': 'application/json', 'Cache-Control': 'no-store' });
+        res.end(JSON.stringify({
+            uptime_s: Math.round(process.uptime()),
+            rss_mb: Math.round(process.memoryUsage().rss / 1024 / 1024 * 10) / 10,
+            requests: metricsSnapshot(),
+            scheduler: schedulerStats(),
+            upstream: upstreamStats()
+        }, null, 2));
+        return;
+    }
+
     if (req.method !== 'POST') {
         res.statusCode = 405;
         res.end('Method Not Allowed');
@@ -111,78 +147,87 @@ const server = http.createServer(async (req, res) => {
     }
 
     // Read Body
-    let body = '';
-    req.on('data', chunk => body += chunk);
-    req.on('end', async () => {
-        try {
-            // Create Mock Event (Netlify Style)
-            const event = {
-                body: body, // Raw string body
-                httpMethod: 'POST',
-                headers: req.headers,
-                rawUrl: `http://localhost:8888${req.url}`,
-                path: req.url
-            };
-            const context = {};
-
-            // Call Handler
-            // The @netlify/functions stream wrapper returns a Response object (Web API)
-            // or a Netlify-style response object depending on version/context.
-            // We'll check what we get.
-
-            const result = await handler(event, context);
-
-            // 1. Check if it's a standard Web Response
-            if (result instanceof Response) {
-                 res.statusCode = result.status;
-                 result.headers.forEach((v, k) => res.setHeader(k, v));
-
-                 if (result.body) {
-                     const reader = result.body.getReader();
-                     while (true) {
-                         const { done, value } = await reader.read();
-                         if (done) break;
-                         res.write(value);
-                     }
-                 }
-                 res.end();
-                 return;
-            }
+    let raw;
+    try {
+        raw = await readBody(req);
+    } catch (err) {
+        if (err instanceof BodyTooLargeError) {
+            console.warn("[Request] " + err.message);
+            res.setHeader('Connection', 'close'); // The rest of the upload is not read
+            sendError(res, 413, err.message);
+        } else {
+            console.error("Request Read Error:", err);
+            res.destroy();
+        }
+        return;
+    }
 
-            // 2. Check if it's a Netlify-style Response Object (legacy or wrapper specific)
-            if (result && (result.statusCode || result.body)) {
-                res.statusCode = result.statusCode || 200;
-                if (result.headers) {
-                    Object.entries(result.headers).forEach(([k, v]) => res.setHeader(k, v));
-                }
-
-                if (result.body instanceof ReadableStream) {
-                     const reader = result.body.getReader();
-                     while (true) {
-                         const { done, value } = await reader.read();
-                         if (done) break;
-                         res.write(value);
-                     }
-                     res.end();
-                } else {
-                    res.end(typeof result.body === 'string' ? result.body : JSON.stringify(result.body));
-                }
-                return;
+    try {
+        // Encoded (e.g. gzip) bodies are binary; Netlify hands those over base64-encoded
+        const isBase64Encoded = !!req.headers['content-encoding'];
+
+        // Create Mock Event (Netlify Style)
+        const event = {
+            body: isBase64Encoded ? raw.toString('base64') : raw.toString('utf8'),
+            isBase64Encoded,
+            httpMethod: 'POST',
+            headers: req.headers,
+            rawUrl: `http://localhost:8888${req.url}`,
+            path: req.url
+        };
+        const context = {};
+
+        // Call Handler
+        // The @netlify/functions stream wrapper returns a Response object (Web API)
+        // or a Netlify-style response object depending on version/context.
+        const result = await handler(event, context);
+
+        // 1. Check if it's a standard Web Response
+        if (result instanceof Response) {
+            res.statusCode = result.status;
+            result.headers.forEach((v, k) => res.setHeader(k, v));
+            if (result.body) {
+                await sendStream(res, result.body);
+            } else {
+                res.end();
             }
+            return;
+        }
 
-            // Fallback
-            res.statusCode = 500;
-            res.end(JSON.stringify({ error: "Unknown response format from handler" }));
+        // 2. Check if it's a Netlify-style Response Object (legacy or wrapper specific)
+        if (result && (result.statusCode || result.body)) {
+            res.statusCode = result.statusCode || 200;
+            if (result.headers) {
+                Object.entries(result.headers).forEach(([k, v]) => res.setHeader(k, v));
+            }
 
-        } catch (err) {
-            console.error("Handler Error:", err);
-            res.statusCode = 500;
-            res.end(JSON.stringify({ error: err.message }));
+            if (result.body instanceof ReadableStream) {
+                await sendStream(res, result.body);
+            } else {
+                res.end(typeof result.body === 'string' ? result.body : JSON.stringify(result.body));
+            }
+            return;
         }
-    });
+
+        // Fallback
+        sendError(res, 500, "Unknown response format from handler");
+
+    } catch (err) {
+        console.error("Handler Error:", err);
+        sendError(res, 500, err.message);
+    }
 });
 
-server.listen(8888, () => {
-    console.log('Local Functions Server running on port 8888');
-    console.log('Mock Mode:', process.env.LONGCAT_API_KEY === 'mock-key');
+// Mock Mode: without an API key (or an explicit LONGCAT_API_BASE, e.g. a separately
+// started mock_upstream.cjs) the proxies talk to an in-process mock upstream.
+// Its scenario is configured with the MOCK_* variables (see mock_upstream.cjs).
+const mockMode = process.env.LONGCAT_API_KEY === 'mock-key';
+const startMock = mockMode && !process.env.LONGCAT_API_BASE
+    ? startMockUpstream({ port: 0 }).then(mock => { process.env.LONGCAT_API_BASE = mock.url; })
+    : Promise.resolve();
+startMock.then(() => {
+    server.listen(8888, () => {
+        console.log('Local Functions Server running on port 8888');
+        console.log('Mock Mode:', mockMode, mockMode ? `(upstream ${process.env.LONGCAT_API_BASE})` : '');
+    });
 });
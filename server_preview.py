@@ -1,16 +1,440 @@
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+"""Static preview server with the cross-origin isolation headers the app needs.
+
+Threaded, so the browser's parallel asset requests are served concurrently.
+Files are revalidated with strong ETags (304 Not Modified), precompressed
+`.br` / `.gz` siblings are served when the client accepts them, byte ranges
+are supported and content-hashed build assets are cached as immutable.
+
+Self-hosted mode: --pyodide serves an extracted Pyodide distribution under
+/pyodide/ and --wheels serves a directory of wheels as a package index
+(PyPI JSON API under /pypi/, PEP 503 under /simple/). The app picks both up
+from the generated /pyodide-local.json, which also carries SRI hashes of the
+core Pyodide files, so boots never touch the public CDN.
+
+    python3 server_preview.py 3000
+    python3 server_preview.py 3000 --dir dist --access-log
+    python3 server_preview.py 3000 --access-log preview_access.log
+    python3 server_preview.py 3000 --dir dist --pyodide pyodide-0.23.4 --wheels wheels --index-only
+"""
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import quote, urlsplit
+import argparse
+import base64
+import hashlib
+import html
+import io
+import json
+import os
+import re
+import shutil
 import sys
+import threading
+import time
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'  # Always revalidated, answered with 304 while unchanged
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]  # Preference order
+COPY_CHUNK = 64 * 1024
+
+# Vite-style content hashes: name-BkD8a9xQ.js, name.3f2a9c1e.css
+HASHED_ASSET_RE = re.compile(r'[-.]([A-Za-z0-9_-]{8,})\.(?:m?js|css|wasm|woff2?|ttf|png|jpe?g|gif|svg|webp|avif|ico|json|whl|zip)$')
+
+# Pyodide files whose SRI hashes go into pyodide-local.json (when present). Only
+# these are enforced: the app runs the verified bytes of pyodide.js and hands
+# the verified repodata.json (with its package hashes) to loadPyodide.
+# pyodide.asm.js, pyodide.asm.wasm and python_stdlib.zip are fetched by Pyodide
+# itself, which has no integrity option for them in 0.23.
+PYODIDE_VERIFIED_FILES = ['pyodide.js', 'repodata.json']
+PYODIDE_LOCAL_CONFIG = '/pyodide-local.json'
+PYODIDE_MOUNT = '/pyodide/'
+WHEELS_MOUNT = '/wheels/'
+
+# name-version(-build)-python-abi-platform.whl (PEP 427)
+WHEEL_RE = re.compile(r'^(?P<name>[^-]+)-(?P<version>[^-]+)(?:-\d[^-]*)?-[^-]+-[^-]+-[^-]+\.whl$')
+
+_digest_cache = {}  # (path, mtime_ns, size, algorithm) -> digest bytes
+_digest_lock = threading.Lock()
+_log_lock = threading.Lock()
+
+
+def file_digest(path, st, algorithm='sha256'):
+    """Digest of the file content, cached per (path, mtime, size)."""
+    key = (path, st.st_mtime_ns, st.st_size, algorithm)
+    with _digest_lock:
+        digest = _digest_cache.get(key)
+    if digest is None:
+        h = hashlib.new(algorithm)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                h.update(block)
+        digest = h.digest()
+        with _digest_lock:
+            _digest_cache[key] = digest
+    return digest
+
+
+def file_etag(path, st):
+    """Strong ETag: SHA-256 of the file content."""
+    return '"' + file_digest(path, st).hex()[:32] + '"'
+
+
+def sri_hash(path):
+    """Subresource Integrity value, checked by fetch() / <script integrity> in the app."""
+    return 'sha384-' + base64.b64encode(file_digest(path, os.stat(path), 'sha384')).decode()
+
+
+def canonical_name(name):
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+
+def version_key(version):
+    """Orders release versions well enough to pick the latest (pre-releases sort first)."""
+    return [int(part) if part.isdigit() else -1 for part in re.split(r'[.+!-]', version)]
+
+
+def wheel_index(directory):
+    """Wheels in `directory` by canonical project name: {name: [(version, filename, path), ...]}."""
+    projects = {}
+    for filename in sorted(os.listdir(directory)):
+        match = WHEEL_RE.match(filename)
+        path = os.path.join(directory, filename)
+        if match and os.path.isfile(path):
+            projects.setdefault(canonical_name(match.group('name')), []).append((match.group('version'), filename, path))
+    return projects
+
+
+def is_hashed_asset(path):
+    match = HASHED_ASSET_RE.search(os.path.basename(path))
+    if not match:
+        return False
+    tag = match.group(1)
+    # A real hash mixes digits or cases; plain words like "-functions" are not one
+    return any(c.isdigit() for c in tag) or (tag.lower() != tag and tag.upper() != tag)
+
+
+def accepted_encodings(header):
+    accepted = set()
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        q = params.strip()
+        if q.startswith('q='):
+            try:
+                if float(q[2:] or 0) == 0:
+                    continue
+            except ValueError:
+                pass  # Malformed q-value (gzip;q=abc): treat as q=1
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+def parse_range(header, size):
+    """Single byte range -> (start, end) inclusive, None if absent/unsupported, 'invalid' if unsatisfiable."""
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+    start, _, end = header[6:].strip().partition('-')
+    try:
+        if start == '':
+            length = int(end)
+            if length == 0:
+                return 'invalid'
+            return max(size - length, 0), size - 1
+        start = int(start)
+        end = int(end) if end else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        return 'invalid'
+    return start, min(end, size - 1)
+
+
+class PreviewRequestHandler(SimpleHTTPRequestHandler):
+    extensions_map = {
+        **SimpleHTTPRequestHandler.extensions_map,
+        '.wasm': 'application/wasm',
+        '.js': 'text/javascript',
+        '.mjs': 'text/javascript',
+        '.json': 'application/json',
+        '.webmanifest': 'application/manifest+json',
+        '.whl': 'application/zip',
+        '.data': 'application/octet-stream',
+        '.tar': 'application/x-tar',
+    }
+    protocol_version = 'HTTP/1.1'  # Keep-alive: assets reuse connections
+    access_log = None  # None, '-' (stderr) or a file path
+    pyodide_dir = None  # Served under /pyodide/
+    wheels_dir = None  # Served under /wheels/, indexed under /pypi/ and /simple/
+    index_only = False  # Tell the app not to fall back to PyPI
 
-class CORSRequestHandler(SimpleHTTPRequestHandler):
     def end_headers(self):
         self.send_header('Cross-Origin-Opener-Policy', 'same-origin')
         self.send_header('Cross-Origin-Embedder-Policy', 'require-corp')
         SimpleHTTPRequestHandler.end_headers(self)
 
-port = 3000
-if len(sys.argv) > 1:
-    port = int(sys.argv[1])
+    # --- Access log with latency ---
+
+    def handle_one_request(self):
+        self._started = time.perf_counter()
+        self._status = None
+        self._sent = 0
+        self._encoding = '-'
+        self._remaining = None
+        super().handle_one_request()
+        if self.access_log and self._status is not None:
+            elapsed_ms = (time.perf_counter() - self._started) * 1000
+            line = (f'{time.strftime("%Y-%m-%dT%H:%M:%S")} {self.client_address[0]} {self.command} {self.path} '
+                    f'{self._status} {self._sent}B {self._encoding} {elapsed_ms:.1f}ms\n')
+            with _log_lock:
+                if self.access_log == '-':
+                    sys.stderr.write(line)
+                else:
+                    with open(self.access_log, 'a') as f:
+                        f.write(line)
+
+    def send_response(self, code, message=None):
+        self._status = code
+        super().send_response(code, message)
+
+    def log_request(self, code='-', size='-'):
+        if not self.access_log:
+            super().log_request(code, size)
+
+    # --- Self-hosted Pyodide and wheel index ---
+
+    def translate_path(self, path):
+        route = urlsplit(path).path
+        for prefix, root in ((PYODIDE_MOUNT, self.pyodide_dir), (WHEELS_MOUNT, self.wheels_dir)):
+            if root and route.startswith(prefix):
+                directory, self.directory = self.directory, root
+                try:
+                    return super().translate_path('/' + path[len(prefix):])
+                finally:
+                    self.directory = directory
+        return super().translate_path(path)
+
+    def base_url(self):
+        return 'http://' + (self.headers.get('Host') or f'{self.server.server_address[0]}:{self.server.server_address[1]}')
+
+    def generated_document(self):
+        """(content_type, bytes) for the virtual routes, None to serve files, False for 404."""
+        route = urlsplit(self.path).path
+        if route == PYODIDE_LOCAL_CONFIG and (self.pyodide_dir or self.wheels_dir):
+            config = {'packageIndexOnly': self.index_only, 'integrity': {}}
+            if self.pyodide_dir:
+                config['indexURL'] = PYODIDE_MOUNT
+                for name in PYODIDE_VERIFIED_FILES:
+                    path = os.path.join(self.pyodide_dir, name)
+                    if os.path.isfile(path):
+                        config['integrity'][name] = sri_hash(path)
+            if self.wheels_dir:
+                config['packageIndexURL'] = '/pypi/'
+            return 'application/json', json.dumps(config, indent=2).encode()
+        if not self.wheels_dir:
+            return None
+
+        match = re.fullmatch(r'/pypi/([^/]+)/json/?', route)
+        if match:
+            return self.json_project(canonical_name(match.group(1)))
+        if route == '/simple/':
+            links = ''.join(f'<a href="{quote(name)}/">{html.escape(name)}</a>\n' for name in wheel_index(self.wheels_dir))
+            return 'text/html; charset=utf-8', f'<!DOCTYPE html>\n<html><body>\n{links}</body></html>\n'.encode()
+        match = re.fullmatch(r'/simple/([^/]+)/?', route)
+        if match:
+            files = wheel_index(self.wheels_dir).get(canonical_name(match.group(1)))
+            if not files:
+                return False
+            links = ''.join(
+                f'<a href="{WHEELS_MOUNT}{quote(filename)}#sha256={file_digest(path, os.stat(path)).hex()}">{html.escape(filename)}</a>\n'
+                for _, filename, path in files)
+            return 'text/html; charset=utf-8', f'<!DOCTYPE html>\n<html><body>\n{links}</body></html>\n'.encode()
+        return None
+
+    def json_project(self, name):
+        """PyPI JSON API document, the format micropip resolves against."""
+        files = wheel_index(self.wheels_dir).get(name)
+        if not files:
+            return False
+        releases = {}
+        for version, filename, path in files:
+            st = os.stat(path)
+            releases.setdefault(version, []).append({
+                'filename': filename,
+                'url': self.base_url() + WHEELS_MOUNT + quote(filename),
+                'digests': {'sha256': file_digest(path, st).hex()},
+                'packagetype': 'bdist_wheel',
+                'size': st.st_size,
+            })
+        latest = max(releases, key=version_key)
+        document = {'info': {'name': name, 'version': latest}, 'releases': releases, 'urls': releases[latest]}
+        return 'application/json', json.dumps(document).encode()
+
+    def send_generated(self, content_type, body):
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        if self.not_modified(etag, None):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', REVALIDATE)
+            self.end_headers()
+            return None
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', REVALIDATE)
+        self.end_headers()
+        self._remaining = len(body)
+        return io.BytesIO(body)
+
+    # --- Conditional / compressed / ranged responses ---
+
+    def send_head(self):
+        generated = self.generated_document()
+        if generated is False:
+            self.send_error(404, 'Project not found')
+            return None
+        if generated:
+            return self.send_generated(*generated)
+
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            index = os.path.join(path, 'index.html')
+            if not self.path.split('?', 1)[0].endswith('/') or not os.path.isfile(index):
+                return super().send_head()  # Redirects and directory listings
+            path = index
+        if not os.path.isfile(path):
+            return super().send_head()  # 404
+
+        content_type = self.guess_type(path)
+        served, encoding = path, None
+        accepted = accepted_encodings(self.headers.get('Accept-Encoding'))
+        source_mtime = os.stat(path).st_mtime
+        for name, suffix in ENCODINGS:
+            candidate = path + suffix
+            # Stale siblings (older than the source) are ignored
+            if name in accepted and os.path.isfile(candidate) and os.stat(candidate).st_mtime >= source_mtime:
+                served, encoding = candidate, name
+                break
+        has_variants = any(os.path.isfile(path + suffix) for _, suffix in ENCODINGS)
+
+        try:
+            f = open(served, 'rb')
+        except OSError:
+            self.send_error(404, 'File not found')
+            return None
+        try:
+            st = os.fstat(f.fileno())
+            etag = file_etag(served, st)
+            last_modified = formatdate(st.st_mtime, usegmt=True)
+            cache_control = IMMUTABLE if is_hashed_asset(path) else REVALIDATE
+
+            def common_headers():
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', last_modified)
+                self.send_header('Cache-Control', cache_control)
+                if has_variants:
+                    self.send_header('Vary', 'Accept-Encoding')
+
+            if self.not_modified(etag, st.st_mtime):
+                f.close()
+                self.send_response(304)
+                common_headers()
+                self.end_headers()
+                return None
+
+            size = st.st_size
+            byte_range = None
+            if_range = self.headers.get('If-Range')
+            if if_range is None or if_range == etag:
+                byte_range = parse_range(self.headers.get('Range'), size)
+            if byte_range == 'invalid':
+                f.close()
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return None
+
+            if byte_range:
+                start, end = byte_range
+                f.seek(start)
+                self.send_response(206)
+                self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+                self._remaining = end - start + 1
+            else:
+                self.send_response(200)
+                self._remaining = size
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(self._remaining))
+            self.send_header('Accept-Ranges', 'bytes')
+            if encoding:
+                self.send_header('Content-Encoding', encoding)
+                self._encoding = encoding
+            common_headers()
+            self.end_headers()
+            return f
+        except Exception:
+            f.close()
+            raise
+
+    def not_modified(self, etag, mtime):
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            tags = [t.strip() for t in if_none_match.split(',')]
+            return '*' in tags or etag in tags or ('W/' + etag) in tags
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since and mtime is not None:
+            try:
+                return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def copyfile(self, source, outputfile):
+        # Only the selected range (or the whole file) is sent
+        remaining = self._remaining
+        if remaining is None:
+            shutil.copyfileobj(source, outputfile)
+            return
+        while remaining > 0:
+            block = source.read(min(COPY_CHUNK, remaining))
+            if not block:
+                break
+            outputfile.write(block)
+            remaining -= len(block)
+            self._sent += len(block)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the app with COOP/COEP headers.')
+    parser.add_argument('port', nargs='?', type=int, default=3000)
+    parser.add_argument('--dir', default='.', help='Directory to serve (e.g. dist after a build)')
+    parser.add_argument('--access-log', nargs='?', const='-', metavar='FILE',
+                        help='Log every request with its latency (to stderr, or to FILE)')
+    parser.add_argument('--pyodide', metavar='DIR',
+                        help='Serve this Pyodide distribution (extracted release tarball) instead of the CDN')
+    parser.add_argument('--wheels', metavar='DIR', help='Serve the wheels in DIR as the package index for micropip')
+    parser.add_argument('--index-only', action='store_true',
+                        help='Install packages from --wheels only, never from PyPI (air-gapped networks)')
+    args = parser.parse_args()
+
+    for option in ('pyodide', 'wheels'):
+        directory = getattr(args, option)
+        if directory and not os.path.isdir(directory):
+            parser.error(f'--{option}: {directory} is not a directory')
+    if args.pyodide and not os.path.isfile(os.path.join(args.pyodide, 'pyodide.js')):
+        parser.error(f'--pyodide: no pyodide.js in {args.pyodide}')
+
+    PreviewRequestHandler.access_log = args.access_log
+    PreviewRequestHandler.pyodide_dir = args.pyodide and os.path.abspath(args.pyodide)
+    PreviewRequestHandler.wheels_dir = args.wheels and os.path.abspath(args.wheels)
+    PreviewRequestHandler.index_only = args.index_only
+    handler = lambda *a, **kw: PreviewRequestHandler(*a, directory=args.dir, **kw)
+
+    print(f"Starting server on port {args.port}...")
+    httpd = ThreadingHTTPServer(('0.0.0.0', args.port), handler)
+    httpd.daemon_threads = True
+    httpd.serve_forever()
+
 
-print(f"Starting server on port {port}...")
-httpd = HTTPServer(('0.0.0.0', port), CORSRequestHandler)
-httpd.serve_forever()
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,374 @@
+"""Browser performance benchmark for the app's latency-sensitive paths.
+
+Drives the app in Chromium with Playwright and reads the User Timing spans the
+app records itself (js/perf-marks.js), so the numbers exclude Playwright's own
+overhead:
+
+    boot_cold_ms / boot_warm_ms   navigation start to the worker's LOADED (new context / reload)
+    first_output_ms               RUN posted to the first stdout/stderr of print("ok")
+    run_files_<n>_ms              trivial run with <n> project files synced first
+    lint_ms                       LINT posted to LINT_RESULT for a 500-line file
+    terminal_<n>_ms               printing <n> lines until "Process finished." (+ lines/s)
+    file_switch_<kb>kb_ms         file list click to the next frame, between two <kb> KB files
+    saved_chats_<n>_ms            saved chats list with <n> sessions, to the first page's paint
+
+Every metric runs --repeat times in a fresh browser context (empty cache and
+IndexedDB); the median is reported. Results go to a JSON report. Medians
+depend on the machine, so no values are committed: tests/e2e/bench_baseline.json
+only holds the tolerances (a default plus optional per-metric overrides).
+--update-baseline records this machine's medians into a baseline file, and
+--baseline then checks later runs against it, exiting with 1 on a regression.
+--tolerance overrides the default tolerance for one run.
+
+    pip install playwright && playwright install chromium
+    python3 tests/e2e/bench_browser.py --out bench_report.json
+    python3 tests/e2e/bench_browser.py --baseline tests/e2e/bench_baseline.json
+    python3 tests/e2e/bench_browser.py --only boot,lint --repeat 5 --url http://localhost:5173
+    python3 tests/e2e/bench_browser.py --update-baseline tests/e2e/bench_baseline.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+
+from playwright.sync_api import sync_playwright
+
+from helpers import (APP_TIMEOUT_MS, DIALOG_STUBS_SCRIPT, LOGIN_BYPASS_SCRIPT, PYTHON_TIMEOUT_MS, VIEWPORT,
+                     open_app, open_sidebar, start_dev_server)
+
+PREFIX = 'pymob:'  # js/perf-marks.js
+DEFAULT_TOLERANCE = 0.25
+LINT_SOURCE_KB = 20  # About 500 lines
+
+SAMPLE_LINES = [
+    'def process(records):',
+    '    totals = {}',
+    '    for record in records:',
+    "        key = record.get('name', '').strip().lower()",
+    "        totals[key] = totals.get(key, 0) + record.get('value', 0)",
+    '    return sorted(totals.items(), key=lambda item: -item[1])',
+    '',
+]
+
+SEED_FILES = """files => import('./js/persistence.js').then(({ persistence }) =>
+    Promise.all(Object.entries(files).map(([path, content]) => persistence.saveFile(path, content))))"""
+
+SEED_SESSIONS = """count => import('./js/persistence.js').then(({ persistence }) => {
+    const now = Date.now();
+    return Promise.all(Array.from({ length: count }, (_, i) => persistence.saveSession({
+        id: now - i,
+        title: `Benchmark session ${i}`,
+        timestamp: now - i * 60000,
+        isSession: true,
+        messages: [
+            { role: 'user', content: `Question ${i}: why does my loop not terminate?` },
+            { role: 'assistant', content: '```python\\nfor i in range(10):\\n    print(i)\\n```\\nThe range is finite.' }
+        ]
+    })));
+})"""
+
+SET_CODE = """code => {
+    const view = window.appState.editor;
+    view.dispatch({ changes: { from: 0, to: view.state.doc.length, insert: code } });
+}"""
+
+
+def python_source(size_kb):
+    lines, size, n = [], 0, 0
+    while size < size_kb * 1024:
+        line = SAMPLE_LINES[n % len(SAMPLE_LINES)].replace('process', f'process_{n // len(SAMPLE_LINES)}')
+        lines.append(line)
+        size += len(line) + 1
+        n += 1
+    return '\n'.join(lines) + '\n'
+
+
+# --- Page plumbing ---
+
+@contextmanager
+def app_context(browser):
+    context = browser.new_context(viewport=VIEWPORT)
+    context.set_default_timeout(APP_TIMEOUT_MS)
+    context.add_init_script(DIALOG_STUBS_SCRIPT)
+    context.add_init_script(LOGIN_BYPASS_SCRIPT)
+    try:
+        yield context
+    finally:
+        context.close()
+
+
+def wait_for_loaded(page):
+    """Waits for the worker's LOADED; returns its time since navigation start in ms."""
+    page.wait_for_function(f"() => performance.getEntriesByName('{PREFIX}loaded', 'mark').length > 0",
+                           timeout=PYTHON_TIMEOUT_MS)
+    return page.evaluate(f"() => performance.getEntriesByName('{PREFIX}loaded', 'mark')[0].startTime")
+
+
+def ready_page(context, url):
+    page = open_app(context.new_page(), url)
+    wait_for_loaded(page)
+    return page
+
+
+def reload_app(page, python=True):
+    page.reload()
+    page.wait_for_selector('.cm-editor')
+    page.wait_for_function('() => window.appState !== undefined')
+    if python:
+        wait_for_loaded(page)
+
+
+def timed(page, span, action, timeout=PYTHON_TIMEOUT_MS):
+    """Runs action() and returns the duration of the next `span` measure in ms."""
+    name = PREFIX + span
+    before = page.evaluate("name => performance.getEntriesByName(name, 'measure').length", name)
+    action()
+    page.wait_for_function("([name, before]) => performance.getEntriesByName(name, 'measure').length > before",
+                           arg=[name, before], timeout=timeout)
+    return page.evaluate("name => performance.getEntriesByName(name, 'measure').at(-1).duration", name)
+
+
+def run(page, code, span='run'):
+    page.evaluate(SET_CODE, code)
+    return timed(page, span, lambda: page.evaluate('() => { window.cmdRunCode(); }'))
+
+
+def open_files_view(page):
+    page.click('.nav-btn[data-target="view-files"]')
+    page.wait_for_selector('#view-files', state='visible')
+
+
+# --- Benchmarks: each returns {metric: value} for one repetition ---
+
+def bench_boot(browser, url, args):
+    with app_context(browser) as context:
+        page = open_app(context.new_page(), url)
+        cold = wait_for_loaded(page)
+        reload_app(page, python=False)
+        warm = wait_for_loaded(page)
+    return {'boot_cold_ms': cold, 'boot_warm_ms': warm}
+
+
+def bench_first_output(browser, url, args):
+    with app_context(browser) as context:
+        page = ready_page(context, url)
+        return {'first_output_ms': run(page, 'print("ok")', span='first-output')}
+
+
+def bench_run_files(browser, url, args):
+    results = {}
+    for count in args.files:
+        with app_context(browser) as context:
+            page = ready_page(context, url)
+            page.evaluate(SEED_FILES, {f'pkg/mod_{i}.py': f'VALUE = {i}\n' for i in range(count)})
+            reload_app(page)  # loadFiles() picks the seeded files up
+            results[f'run_files_{count}_ms'] = run(page, 'print("ok")')
+    return results
+
+
+def bench_lint(browser, url, args):
+    source = python_source(LINT_SOURCE_KB)
+    with app_context(browser) as context:
+        page = ready_page(context, url)
+        # The first round also absorbs the lint of the initial document
+        timed(page, 'lint', lambda: page.evaluate(SET_CODE, source))
+        return {'lint_ms': timed(page, 'lint', lambda: page.evaluate(SET_CODE, source + '# edited\n'))}
+
+
+def bench_terminal(browser, url, args):
+    results = {}
+    for lines in args.lines:
+        with app_context(browser) as context:
+            page = ready_page(context, url)
+            elapsed = run(page, f'for i in range({lines}):\n    print("line", i)')
+        results[f'terminal_{lines}_ms'] = elapsed
+        results[f'terminal_{lines}_lines_per_s'] = lines / elapsed * 1000
+    return results
+
+
+def bench_file_switch(browser, url, args):
+    results = {}
+    for kb in args.file_kb:
+        with app_context(browser) as context:
+            page = open_app(context.new_page(), url)
+            names = [f'big_a_{kb}kb.py', f'big_b_{kb}kb.py']
+            page.evaluate(SEED_FILES, {name: python_source(kb) for name in names})
+            reload_app(page, python=False)
+            if page.evaluate('window.appState.currentFile') == names[0]:
+                names.reverse()
+            # Warm-up switch into the first large file, then the measured large -> large switch
+            for name in names:
+                open_files_view(page)
+                elapsed = timed(page, 'file-switch', lambda: page.click(f'#file-list >> text="{name}"'),
+                                timeout=APP_TIMEOUT_MS)
+            results[f'file_switch_{kb}kb_ms'] = elapsed
+    return results
+
+
+def bench_saved_chats(browser, url, args):
+    results = {}
+    for count in args.sessions:
+        with app_context(browser) as context:
+            page = open_app(context.new_page(), url)
+            page.evaluate(SEED_SESSIONS, count)
+            open_sidebar(page)
+            results[f'saved_chats_{count}_ms'] = timed(
+                page, 'saved-chats-render', lambda: page.click('#btn-saved-chats'), timeout=APP_TIMEOUT_MS)
+    return results
+
+
+BENCHMARKS = {
+    'boot': bench_boot,
+    'first-output': bench_first_output,
+    'run-files': bench_run_files,
+    'lint': bench_lint,
+    'terminal': bench_terminal,
+    'file-switch': bench_file_switch,
+    'saved-chats': bench_saved_chats,
+}
+
+
+# --- Report ---
+
+def unit(metric):
+    return 'lines/s' if metric.endswith('_per_s') else 'ms'
+
+
+def summarize(samples):
+    return {
+        name: {
+            'unit': unit(name),
+            'median': statistics.median(values),
+            'min': min(values),
+            'max': max(values),
+            'samples': values,
+        }
+        for name, values in samples.items()
+    }
+
+
+def print_summary(metrics):
+    print(f"\n{'metric':<34} {'median':>10} {'min':>10} {'max':>10}")
+    for name, m in metrics.items():
+        print(f"{name:<34} {m['median']:>10.1f} {m['min']:>10.1f} {m['max']:>10.1f}  {m['unit']}")
+
+
+def compare(metrics, baseline, tolerance=None):
+    """Prints per-metric deltas against the baseline; returns the list of regressions."""
+    default = baseline.get('tolerance', DEFAULT_TOLERANCE) if tolerance is None else tolerance
+    previous = baseline.get('metrics', {})
+    regressions = []
+    print(f'\nBaseline comparison (default tolerance {default * 100:.0f}%):')
+    for name, m in metrics.items():
+        entry = previous.get(name) or {}
+        before, after = entry.get('value'), m['median']
+        if not before:
+            print(f'  {name}: no baseline value')
+            continue
+        allowed = entry.get('tolerance', default)
+        change = (after - before) / before
+        worse = change < -allowed if m['unit'] != 'ms' else change > allowed
+        print(f"  {name}: {before:.1f}->{after:.1f} {m['unit']} ({change * 100:+.0f}%, "
+              f"allowed {allowed * 100:.0f}%){' !' if worse else ''}")
+        if worse:
+            regressions.append(name)
+    return regressions
+
+
+def update_baseline(path, metrics):
+    """Writes the medians into the baseline, keeping its tolerances."""
+    baseline = {'tolerance': DEFAULT_TOLERANCE, 'metrics': {}}
+    if os.path.exists(path):
+        with open(path) as f:
+            baseline = json.load(f)
+    for name, m in metrics.items():
+        baseline.setdefault('metrics', {}).setdefault(name, {})['value'] = round(m['median'], 1)
+    baseline['recorded'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2)
+        f.write('\n')
+    print(f'\nBaseline updated: {path}')
+
+
+def int_list(text):
+    return [int(v) for v in text.split(',') if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the app in Chromium using its performance marks.')
+    parser.add_argument('--url', default=os.environ.get('PYMOB_URL'), help='Running app (default: start a Vite dev server)')
+    parser.add_argument('--only', default=','.join(BENCHMARKS), help=f"Comma-separated benchmarks ({', '.join(BENCHMARKS)})")
+    parser.add_argument('--repeat', type=int, default=3, help='Repetitions per metric (the median is reported)')
+    parser.add_argument('--files', type=int_list, default=[10, 100, 1000], help='Project file counts for run-files')
+    parser.add_argument('--lines', type=int_list, default=[10000, 100000], help='Printed line counts for terminal')
+    parser.add_argument('--file-kb', type=int_list, default=[200, 2000], help='File sizes in KB for file-switch')
+    parser.add_argument('--sessions', type=int_list, default=[200, 800], help='Saved session counts for saved-chats')
+    parser.add_argument('--out', default='bench_report.json', help='JSON report path')
+    parser.add_argument('--baseline', help='Baseline to check against (e.g. tests/e2e/bench_baseline.json)')
+    parser.add_argument('--tolerance', type=float, help='Override the baseline default tolerance (0.25 = 25%% slower)')
+    parser.add_argument('--update-baseline', metavar='PATH', help='Write the medians of this run into a baseline file')
+    parser.add_argument('--headed', action='store_true', help='Show the browser')
+    args = parser.parse_args()
+
+    selected = [name.strip() for name in args.only.split(',') if name.strip()]
+    unknown = [name for name in selected if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        # A baseline without values would pass every run: refuse it up front
+        if not any(entry.get('value') for entry in baseline.get('metrics', {}).values()):
+            parser.error(f'{args.baseline} has no recorded values; record them with '
+                         f'--update-baseline {args.baseline} on the reference machine first')
+
+    server = None
+    url = args.url
+    if not url:
+        server, url = start_dev_server()
+        print(f'Started Vite dev server at {url}')
+    samples = {}
+    try:
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=not args.headed)
+            chromium_version = browser.version
+            for name in selected:
+                for i in range(args.repeat):
+                    print(f'Running {name} ({i + 1}/{args.repeat})...', flush=True)
+                    for metric, value in BENCHMARKS[name](browser, url.rstrip('/'), args).items():
+                        samples.setdefault(metric, []).append(value)
+            browser.close()
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=10)
+
+    metrics = summarize(samples)
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'chromium': chromium_version,
+        'config': {k: v for k, v in vars(args).items() if k not in ('baseline', 'out', 'update_baseline')},
+        'metrics': metrics,
+    }
+    print_summary(metrics)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'\nReport written to {args.out}')
+    if args.update_baseline:
+        update_baseline(args.update_baseline, metrics)
+
+    if baseline:
+        regressions = compare(metrics, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""Shared fixtures for the Playwright end-to-end suite.
+
+One dev server is started per run (or PYMOB_URL points at a running one) and
+one Chromium per pytest process. Every test gets a fresh browser context, so
+tests are independent and run in parallel with pytest-xdist:
+
+    pip install pytest pytest-xdist playwright && playwright install chromium
+    python -m pytest tests/e2e -n auto
+    PYMOB_URL=http://localhost:5173 python -m pytest tests/e2e -n 4 -k workspace
+
+Waits are event driven: the `app` fixture returns once the editor is mounted
+and `window.appState` exists, and `python_ready` waits for the worker's
+LOADED message ("Python Ready." in the console). Nothing sleeps.
+"""
+import os
+import re
+
+import pytest
+
+# Without Playwright the suite is skipped, so `pytest tests` still runs the rest
+pytest.importorskip('playwright.sync_api')
+from playwright.sync_api import sync_playwright
+
+from helpers import (APP_TIMEOUT_MS, DIALOG_STUBS_SCRIPT, LOGIN_BYPASS_SCRIPT, PYTHON_TIMEOUT_MS, ROOT,
+                     VIEWPORT, open_app, start_dev_server)
+
+ARTIFACTS_DIR = ROOT / 'test-results'
+
+
+# --- Server: started once by the controlling process, inherited by xdist workers ---
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_sessionstart(session):
+    config = session.config
+    if hasattr(config, 'workerinput') or config.option.collectonly or os.environ.get('PYMOB_URL'):
+        return
+    config._pymob_server, os.environ['PYMOB_URL'] = start_dev_server()
+
+
+def pytest_sessionfinish(session):
+    process = getattr(session.config, '_pymob_server', None)
+    if process:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+@pytest.fixture(scope='session')
+def app_url():
+    if os.environ.get('PYMOB_URL'):
+        yield os.environ['PYMOB_URL'].rstrip('/')
+        return
+    # Run from a parent directory: this conftest loaded after session start
+    process, url = start_dev_server()
+    yield url
+    process.terminate()
+    process.wait(timeout=10)
+
+
+# --- Browser: one per process, one context per test ---
+
+@pytest.fixture(scope='session')
+def browser():
+    with sync_playwright() as p:
+        browser = p.chromium.launch()
+        yield browser
+        browser.close()
+
+
+@pytest.fixture
+def context(browser):
+    context = browser.new_context(viewport=VIEWPORT)
+    context.set_default_timeout(APP_TIMEOUT_MS)
+    context.add_init_script(DIALOG_STUBS_SCRIPT)
+    yield context
+    context.close()
+
+
+@pytest.fixture
+def console_logs(context):
+    """Console messages of every page in the context, as 'type: text'."""
+    logs = []
+    context.on('console', lambda msg: logs.append(f'{msg.type}: {msg.text}'))
+    return logs
+
+
+@pytest.fixture
+def logged_in(context):
+    """Login bypass: the app behaves as for a signed-in user with details."""
+    context.add_init_script(LOGIN_BYPASS_SCRIPT)
+    return context
+
+
+@pytest.fixture
+def app(logged_in, app_url):
+    """The app, loaded and unlocked (does not wait for Python)."""
+    return open_app(logged_in.new_page(), app_url)
+
+
+@pytest.fixture
+def python_ready(app):
+    """The app after the worker reported LOADED."""
+    app.wait_for_function(
+        "() => document.getElementById('console-output').textContent.includes('Python Ready.')",
+        timeout=PYTHON_TIMEOUT_MS)
+    return app
+
+
+# --- Failure artifacts ---
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    report = outcome.get_result()
+    if report.when != 'call' or not report.failed:
+        return
+    for name in ('python_ready', 'app'):
+        page = item.funcargs.get(name)
+        if page is not None:
+            ARTIFACTS_DIR.mkdir(exist_ok=True)
+            path = ARTIFACTS_DIR / (re.sub(r'[^\w.-]+', '_', item.nodeid) + '.png')
+            try:
+                page.screenshot(path=str(path))
+            except Exception:
+                pass  # Page already gone
+            break
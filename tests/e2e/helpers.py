@@ -0,0 +1,114 @@
+"""Page and server helpers shared by the end-to-end tests and bench_browser.py."""
+import json
+import socket
+import subprocess
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+VIEWPORT = {'width': 375, 'height': 812}  # The app is mobile first
+SERVER_START_TIMEOUT_S = 60
+APP_TIMEOUT_MS = 20000
+PYTHON_TIMEOUT_MS = 120000  # Cold Pyodide boot from the CDN
+
+# Hides the login / onboarding screens for the whole page lifetime. A style
+# rule instead of DOM surgery: the Firebase auth callback can fire at any time
+# and re-blur the app, which is why the old scripts slept before bypassing.
+LOGIN_BYPASS_SCRIPT = """
+(() => {
+    const style = document.createElement('style');
+    style.id = 'e2e-login-bypass';
+    style.textContent = `
+        #login-overlay, #view-onboarding { display: none !important; }
+        #app-content { filter: none !important; pointer-events: auto !important; }
+    `;
+    const install = () => document.head.appendChild(style);
+    if (document.head) install();
+    else document.addEventListener('DOMContentLoaded', install, { once: true });
+})();
+"""
+
+# Native dialogs would block the page; answer them and log alerts instead
+DIALOG_STUBS_SCRIPT = """
+window.prompt = () => 'test';
+window.confirm = () => true;
+window.alert = (msg) => console.log('ALERT_CALLED:', msg);
+"""
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for_http(url, timeout_s):
+    deadline = time.monotonic() + timeout_s
+    while True:
+        try:
+            with urllib.request.urlopen(url, timeout=2):
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+
+def start_dev_server():
+    """Vite dev server on a free port; returns (process, url)."""
+    port = free_port()
+    process = subprocess.Popen(
+        ['npx', 'vite', '--port', str(port), '--strictPort', '--host', '127.0.0.1'],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+    try:
+        wait_for_http(url, SERVER_START_TIMEOUT_S)
+    except OSError:
+        process.terminate()
+        raise
+    return process, url
+
+
+def open_app(page, app_url, path='/'):
+    """Loads the app and returns once the editor is mounted and appState exists."""
+    page.goto(app_url + path)
+    page.wait_for_selector('.cm-editor')
+    page.wait_for_function('() => window.appState !== undefined')
+    return page
+
+
+def chat_completion(content):
+    """Non-streaming OpenAI-style body, as the proxies return it."""
+    return json.dumps({'choices': [{'message': {'content': content}}]})
+
+
+def fulfill_json(body, status=200):
+    return lambda route: route.fulfill(status=status, content_type='application/json', body=body)
+
+
+def editor_text(page):
+    return page.inner_text('.cm-content')
+
+
+def clear_editor(page):
+    page.click('.cm-content')
+    page.keyboard.press('Control+a')
+    page.keyboard.press('Backspace')
+
+
+def open_sidebar(page):
+    if page.evaluate("document.getElementById('sidebar-menu').classList.contains('-translate-x-full')"):
+        page.click('#btn-toggle-sidebar')
+    page.wait_for_function("() => !document.getElementById('sidebar-menu').classList.contains('-translate-x-full')")
+
+
+def open_workspace(page):
+    open_sidebar(page)
+    page.click('#btn-ai-workspace')
+    page.wait_for_selector('#view-ai-workspace', state='visible')
+
+
+def open_settings(page):
+    page.click(".nav-btn[data-target='view-settings']")
+    page.wait_for_selector('#view-settings', state='visible')
@@ -0,0 +1,63 @@
+"""Editor tools: snippets, line operations, formatter, auto-fix and AI refactor."""
+import json
+
+from playwright.sync_api import expect
+
+from helpers import chat_completion, clear_editor, fulfill_json, open_sidebar
+
+
+def test_snippet_insert(app):
+    clear_editor(app)
+    open_sidebar(app)
+    app.click("button[onclick*='insert-snippet'][onclick*='def']")
+    expect(app.locator('.cm-content')).to_contain_text('def function_name')
+
+
+def test_duplicate_line(app):
+    clear_editor(app)
+    app.keyboard.type('Line 1\nLine 2')
+    app.keyboard.press('Control+Home')
+    open_sidebar(app)
+    app.click("button[onclick*='duplicate-line']")
+    app.wait_for_function("() => document.querySelector('.cm-content').innerText.split('Line 1').length === 3")
+
+
+def test_format_pep8(python_ready):
+    page = python_ready
+    clear_editor(page)
+    page.keyboard.type("def  foo( ):\n  print( 'bar' )")
+    open_sidebar(page)
+    page.click("button[onclick*='format-pep8']")
+    # ast.unparse output
+    expect(page.locator('.cm-content')).to_contain_text('def foo():')
+    expect(page.locator('.cm-content')).to_contain_text("print('bar')")
+
+
+def test_auto_fix_applies_fix(app):
+    app.route('**/functions/ai-proxy', fulfill_json(chat_completion("print('Hello World') # FIX: Corrected syntax")))
+    app.evaluate("window.appState.lastError = 'SyntaxError: unexpected EOF while parsing'")
+    expect(app.locator('#btn-auto-fix')).to_be_visible()
+    app.click('#btn-auto-fix')
+    expect(app.locator('.cm-content')).to_contain_text("print('Hello World')")
+    expect(app.locator('.cm-content')).to_contain_text('# FIX: Corrected syntax')
+
+
+def test_auto_fix_reports_api_error(app):
+    app.route('**/functions/ai-proxy', fulfill_json(json.dumps({'error': 'LongCat API Overloaded'}), status=500))
+    app.evaluate("window.appState.lastError = 'IndentationError: unexpected indent'")
+    with app.expect_console_message(lambda msg: 'LongCat API Overloaded' in msg.text):
+        app.click('#btn-auto-fix')
+
+
+def test_refactor_uses_non_streaming_request(app):
+    streams = []
+
+    def handle(route):
+        streams.append(route.request.post_data_json.get('stream'))
+        route.fulfill(status=200, content_type='application/json', body=chat_completion('# Refactored Code'))
+
+    app.route('**/functions/ai-proxy', handle)
+    open_sidebar(app)
+    app.click('#btn-ai-refactor')
+    expect(app.locator('.cm-content')).to_contain_text('# Refactored Code')
+    assert streams == [False]
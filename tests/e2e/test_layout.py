@@ -0,0 +1,58 @@
+"""Page shell: assets, styling, terminal, breadcrumbs, dialogs and the login gate."""
+import re
+
+from playwright.sync_api import expect
+
+from helpers import open_app
+
+
+def test_assets_load_without_404(logged_in, app_url):
+    page = logged_in.new_page()
+    missing = []
+    # pyodide-local.json is an optional probe (see js/pyodide-config.js)
+    page.on('response', lambda response: missing.append(response.url)
+            if response.status == 404 and 'pyodide-local.json' not in response.url else None)
+    with page.expect_response(lambda response: 'tailwindcss.js' in response.url) as tailwind:
+        open_app(page, app_url)
+    assert tailwind.value.status == 200
+    assert missing == []
+
+    # Tailwind utilities are applied: w-8 on the run button, grid on the snippets list
+    assert page.evaluate("getComputedStyle(document.getElementById('btn-run')).width") == '32px'
+    assert page.evaluate("getComputedStyle(document.getElementById('snippets-list')).display") == 'grid'
+
+
+def test_terminal_styles(app):
+    expect(app.locator('#btn-copy-console')).to_be_attached()
+    app.evaluate("document.getElementById('console-pane').classList.remove('hidden')")
+    style = app.evaluate("""() => {
+        const s = getComputedStyle(document.querySelector('.terminal-container'));
+        return { wordBreak: s.wordBreak, overflowWrap: s.overflowWrap, wordWrap: s.wordWrap };
+    }""")
+    assert style['wordBreak'] == 'normal'
+    assert 'break-word' in (style['overflowWrap'], style['wordWrap'])
+
+
+def test_files_view_has_no_placeholder_breadcrumb(app):
+    app.click('.nav-btn[data-target="view-files"]')
+    expect(app.locator('#view-files')).to_be_visible()
+    assert 'MyPythonProject' not in app.content()
+
+
+def test_custom_dialogs(app):
+    app.evaluate("import('./js/ui-utils.js').then(m => m.showToast('This is a success toast!', 'success'))")
+    expect(app.get_by_text('This is a success toast!')).to_be_visible()
+
+    app.evaluate("import('./js/ui-utils.js').then(m => { m.showConfirm('Confirm Action', 'Are you sure you want to proceed?'); })")
+    cancel = app.locator('#modal-confirm-custom #modal-confirm-custom-cancel')
+    expect(cancel).to_be_visible()
+    cancel.click()
+
+    app.evaluate("import('./js/ui-utils.js').then(m => { m.showPrompt('Enter Name', 'Please enter your name:', 'John Doe'); })")
+    expect(app.get_by_text('Please enter your name:')).to_be_visible()
+
+
+def test_login_gate_without_bypass(context, app_url):
+    page = open_app(context.new_page(), app_url)
+    expect(page.locator('#login-overlay')).to_be_visible()
+    expect(page.locator('#app-content')).to_have_class(re.compile(r'\bblur-active\b'))
@@ -0,0 +1,55 @@
+"""Saved chats view: empty state, legacy localStorage chats and the detail view."""
+from playwright.sync_api import expect
+
+from helpers import open_app, open_sidebar
+
+LEGACY_CHAT = """
+localStorage.setItem('pyide_saved_chats', JSON.stringify([{
+    id: 123,
+    title: "Test Chat 1",
+    content: "```python\\nprint('Hello World')\\n```\\nThis is a test chat.",
+    role: "assistant",
+    timestamp: Date.now()
+}]));
+"""
+
+# Older versions saved sessions without an id or a timestamp
+LEGACY_SESSION_WITHOUT_KEYS = """
+localStorage.setItem('pyide_saved_sessions', JSON.stringify([{
+    title: "Untimed Session",
+    messages: [{ role: "assistant", content: "Saved before ids existed." }]
+}]));
+"""
+
+
+def open_saved_chats(page):
+    open_sidebar(page)
+    expect(page.locator('#btn-saved-chats')).to_be_visible()
+    page.click('#btn-saved-chats')
+    expect(page.locator('#view-saved-chats')).to_be_visible()
+
+
+def open_with_legacy_data(context, app_url, script):
+    """Loads the app with legacy localStorage data already present, as after an upgrade."""
+    context.add_init_script(script)
+    return open_app(context.new_page(), app_url)
+
+
+def test_empty_state(app):
+    open_saved_chats(app)
+    expect(app.get_by_text('No saved chats yet.')).to_be_visible()
+
+
+def test_legacy_chat_is_migrated_and_opens(logged_in, app_url):
+    app = open_with_legacy_data(logged_in, app_url, LEGACY_CHAT)
+    open_saved_chats(app)  # Startup migrates localStorage chats into IndexedDB
+    app.get_by_text('Test Chat 1').click()
+    expect(app.locator('.markdown-body')).to_contain_text('This is a test chat')
+    expect(app.locator('code').first).to_contain_text("print('Hello World')")
+
+
+def test_legacy_session_without_id_or_timestamp_is_listed(logged_in, app_url):
+    app = open_with_legacy_data(logged_in, app_url, LEGACY_SESSION_WITHOUT_KEYS)
+    open_saved_chats(app)
+    expect(app.get_by_text('Untimed Session')).to_be_visible()
+    assert app.evaluate("localStorage.getItem('pyide_saved_sessions')") is None
@@ -0,0 +1,77 @@
+"""Settings view: AI mode, themes, gutter width and the library list."""
+import re
+
+from playwright.sync_api import expect
+
+from helpers import chat_completion, open_settings
+
+
+def test_gemini_key_setting_is_gone(app):
+    open_settings(app)
+    expect(app.locator('#setting-gemini-key')).to_have_count(0)
+    expect(app.locator('#setting-ai-mode')).to_be_visible()
+
+
+def test_default_ai_mode_is_super_fast(app):
+    open_settings(app)
+    expect(app.locator('#current-ai-mode')).to_contain_text('Super Fast')
+
+
+def test_ai_mode_selects_backend_model(app):
+    open_settings(app)
+    app.click('#setting-ai-mode')
+    app.locator('#modal-selection-list > div').filter(has_text='Ultra').filter(has_not_text='Super').click()
+    expect(app.locator('#current-ai-mode')).to_contain_text('Ultra')
+
+    models = []
+
+    def handle(route):
+        models.append((route.request.post_data_json or {}).get('model'))
+        route.fulfill(status=200, content_type='application/json', body=chat_completion("print('Fixed') # FIX: Logic"))
+
+    app.route('**/functions/ai-proxy', handle)
+    app.click(".nav-btn[data-target='view-editor']")
+    app.evaluate("window.appState.lastError = 'SyntaxError: test'")
+    with app.expect_request('**/functions/ai-proxy'):
+        app.click('#btn-auto-fix')
+    expect(app.locator('.cm-content')).to_contain_text("print('Fixed')")
+    assert models == ['LongCat-Flash-Thinking']
+
+
+def test_default_theme_is_one_dark(app):
+    open_settings(app)
+    expect(app.locator('#current-theme-name')).to_contain_text('One Dark')
+    assert app.evaluate("getComputedStyle(document.documentElement).getPropertyValue('--color-dark').trim()").lower() == '#282c34'
+
+
+def test_theme_switch_to_github_light(app):
+    open_settings(app)
+    app.click('#setting-theme')
+    items = app.locator('#modal-selection-list > div')
+    assert items.count() >= 6
+    expect(items.nth(3).locator('div.rounded-full')).to_have_count(1)  # Preview swatch
+
+    items.filter(has_text='GitHub Light').click()
+    app.wait_for_function(
+        "() => getComputedStyle(document.documentElement).getPropertyValue('--color-dark').trim().toLowerCase() === '#ffffff'")
+    assert '255, 255, 255' in app.evaluate("getComputedStyle(document.querySelector('.cm-editor')).backgroundColor")
+
+
+def test_gutter_width(app):
+    def gutter_width():
+        return app.evaluate("document.querySelector('.cm-gutters').getBoundingClientRect().width")
+
+    compact = gutter_width()
+    open_settings(app)
+    app.click('#setting-gutter-width')
+    app.click('#modal-selection-list > div:nth-child(3)')  # Wide
+    expect(app.locator('body')).to_have_class(re.compile(r'\bgutter-wide\b'))
+
+    app.click(".nav-btn[data-target='view-editor']")
+    app.wait_for_function(f"() => document.querySelector('.cm-gutters').getBoundingClientRect().width > {compact}")
+
+
+def test_library_list(app):
+    open_settings(app)
+    app.click('#btn-open-libs')
+    expect(app.locator('#lib-list div').first).to_be_visible()
@@ -0,0 +1,123 @@
+"""AI workspace: chat replies, SSE clean-up, developer-mode agent guard and saving sessions."""
+import json
+
+import pytest
+from playwright.sync_api import expect
+
+from helpers import chat_completion, fulfill_json, open_sidebar, open_workspace
+
+PROXY = '**/functions/ai-workspace-proxy'
+
+
+def send(page, text):
+    page.fill('#ai-chat-input', text)
+    page.click('#btn-ai-send')
+
+
+def enable_developer_mode(page):
+    toggle = page.locator('#btn-toggle-ai-mode')
+    if 'CHAT' in toggle.inner_text():
+        toggle.click()
+    expect(toggle).to_contain_text('DEV')
+
+
+def test_workspace_layout(app):
+    expect(app.locator('#btn-toggle-command-bar')).not_to_be_visible()  # Magic wand was removed
+    open_workspace(app)
+    assert app.locator('#view-ai-workspace > div:first-child').bounding_box()['height'] >= 64  # h-16
+
+
+def test_chat_reply(app):
+    payloads = []
+
+    def handle(route):
+        payloads.append(route.request.post_data_json)
+        route.fulfill(status=200, content_type='application/json',
+                      body=chat_completion('Hello! I am ready to help you with your code.'))
+
+    app.route(PROXY, handle)
+    open_workspace(app)
+    send(app, 'Hello AI')
+    expect(app.get_by_text('Hello! I am ready to help you with your code.')).to_be_visible()
+    expect(app.locator('#ai-chat-input')).to_be_enabled()  # Loading state cleared
+    assert payloads[0]['stream'] is True
+
+
+@pytest.mark.parametrize('separator, expected', [(' ', 'Hello World!'), ('', 'Strict JSON Extraction!')],
+                         ids=['data-space', 'data-no-space'])
+def test_sse_body_with_json_content_type(app, separator, expected):
+    # HTTP 200 that claims JSON but carries SSE events
+    words = expected.split(' ')
+    chunks = [w + ' ' for w in words[:-1]] + [words[-1]]
+    body = ''.join(f'data:{separator}{json.dumps({"choices": [{"delta": {"content": c}}]})}\n\n' for c in chunks)
+    body += f'data:{separator}[DONE]\n\n'
+    app.route(PROXY, fulfill_json(body))
+    open_workspace(app)
+    send(app, 'Test SSE Cleanup')
+    expect(app.get_by_text(expected)).to_be_visible()
+
+
+def test_permission_request_ui(app):
+    app.route(PROXY, fulfill_json(chat_completion('I need permission to run this command. <<PERM_REQUEST>>')))
+    open_workspace(app)
+    enable_developer_mode(app)
+    send(app, 'Run command')
+    expect(app.locator('.btn-perm-yes')).to_be_visible()
+
+
+def test_agent_cannot_write_other_files(app):
+    agent_reply = """I will create a new file.
+```json_agent
+{"thought": "Malicious write", "files": {"evil.py": "print('hacked')"}, "command": "run"}
+```"""
+    app.route(PROXY, fulfill_json(chat_completion(agent_reply)))
+    open_workspace(app)
+    enable_developer_mode(app)
+    send(app, 'Do something risky')
+    expect(app.get_by_text('Security: Blocked modification of 1 files (evil.py)', exact=False)).to_be_visible()
+    assert 'evil.py' not in app.evaluate('Object.keys(window.appState.files)')
+
+
+def test_failed_patch_requests_full_file(app):
+    replies = [
+        'Patching.\n```json_agent\n' + json.dumps({
+            'thought': 'Edit main.py', 'command': 'none',
+            'edits': {'main.py': [{'search': 'text that is not in the file', 'replace': 'x = 1'}]}}) + '\n```',
+        'Resending the full file.',
+    ]
+    requests = []
+
+    def handle(route):
+        requests.append(route.request.post_data_json)
+        route.fulfill(status=200, content_type='application/json', body=chat_completion(replies[len(requests) - 1]))
+
+    app.route(PROXY, handle)
+    open_workspace(app)
+    enable_developer_mode(app)
+    send(app, 'Change main.py')
+    expect(app.get_by_text('Requesting full file', exact=False)).to_be_visible()
+    # The follow-up goes out after the first turn has finished
+    expect(app.get_by_text('Resending the full file.')).to_be_visible()
+    assert 'Patch Failed' in requests[1]['messages'][-1]['content']
+
+
+def test_saved_session_round_trip(app):
+    app.route(PROXY, fulfill_json(chat_completion('Saved Response')))
+    open_workspace(app)
+    send(app, 'Test Save')
+    expect(app.get_by_text('Saved Response')).to_be_visible()
+
+    app.click('#btn-save-ai-file')
+    saved = app.wait_for_function("""() => import('./js/persistence.js').then(async ({ persistence }) => {
+        const [summary] = await persistence.listSessions(0, 1);
+        return summary ? JSON.stringify(await persistence.getSession(summary.id)) : null;
+    })""").json_value()
+    assert 'Test Save' in saved
+
+    # Replayed in the saved chats view with the live chat's markup
+    open_sidebar(app)
+    app.click('#btn-saved-chats')
+    app.locator('#view-saved-chats .bg-surface').first.click()
+    messages = app.locator('#view-saved-chats .ai-chat-message')
+    expect(messages.nth(1)).to_be_attached()
+    assert {'ai-chat-message', 'user', 'animate-slide-up'} <= set(messages.first.get_attribute('class').split())
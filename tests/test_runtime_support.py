@@ -0,0 +1,66 @@
+"""py/runtime_support.py under CPython: the same source Pyodide runs at startup."""
+import json
+from pathlib import Path
+
+import pytest
+
+SOURCE = Path(__file__).resolve().parents[1] / 'py' / 'runtime_support.py'
+
+DIJKSTRA = """import heapq
+
+def dijkstra(graph, src):
+    dist = {src: 0}
+    pq = [(0, src)]
+    while pq:
+        d, u = heapq.heappop(pq)
+        for v, w in graph[u]:
+            if d + w < dist.get(v, float('inf')):
+                dist[v] = d + w
+                heapq.heappush(pq, (d + w, v))
+    return dist
+"""
+
+
+@pytest.fixture(scope='module')
+def support():
+    namespace = {}
+    exec(compile(SOURCE.read_text(), str(SOURCE), 'exec'), namespace)
+    return namespace
+
+
+def test_syntax_check(support):
+    assert json.loads(support['check_syntax_json']('x = 1\n')) == {'error': False}
+    result = json.loads(support['check_syntax_json']('def f(:\n'))
+    assert result['error'] is True and result['lineno'] == 1
+
+
+def test_symbol_index(support):
+    payload = {'pkg/util.py': {'hash': 'h1', 'code': 'import os\n\nclass Box:\n    def open(self, path):\n        """Opens."""\n'}}
+    result = json.loads(support['index_symbols_json'](json.dumps(payload)))['pkg/util.py']
+    assert result['hash'] == 'h1'
+    assert 'Box' in [symbol['name'] for symbol in result['symbols']]
+    assert json.loads(support['index_symbols_json'](json.dumps({'bad.py': {'hash': 'h2', 'code': 'def ('}})))['bad.py']['error']
+
+
+@pytest.mark.parametrize('code, risk, ambiguous', [
+    ('while True:\n    pass\n', 'high', False),
+    ('n = 10\nwhile n > 0:\n    n -= 1\n', 'low', False),
+    ('for i in range(10 ** 9):\n    pass\n', 'high', False),
+    ('for i in range(100):\n    print(i)\n', 'low', False),
+    ('for i in range(2 ** 100):\n    pass\n', 'high', False),
+    ('for i in range(10 ** 1000):\n    pass\n', 'high', False),
+    ('for i in range(2 ** 10):\n    pass\n', 'low', False),
+    # Conditions that are only read stay definite
+    ('x = 1\nwhile x:\n    print(x)\n', 'high', False),
+    ('n = 5\nwhile n > 0:\n    print(len(str(n)))\n', 'high', False),
+    # Calls that may consume the condition's container are ambiguous, not a hang
+    (DIJKSTRA, 'medium', True),
+    ('def process(q):\n    q.pop()\n\nq = [1, 2]\nwhile q:\n    process(q)\n', 'medium', True),
+    ('import heapq\nh = [3, 1]\nwhile h:\n    heapq.heappop(h)\n', 'medium', True),
+    # A walrus in the condition rebinds its target on every check
+    ('while (line := input()) != "q":\n    print(line)\n', 'low', False),
+], ids=['while-true', 'counter', 'huge-range', 'small-range', 'pow-100', 'pow-1000', 'small-pow',
+        'read-only-name', 'read-only-compare', 'dijkstra', 'call-with-name', 'module-call', 'walrus-input'])
+def test_safety(support, code, risk, ambiguous):
+    result = support['analyze_safety'](code)
+    assert (result['risk_level'], result['ambiguous']) == (risk, ambiguous)
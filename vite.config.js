@@ -59,6 +59,17 @@ export default defineConfig(({ command, mode }) => {
                 }
               }
             },
+            {
+              // Self-hosted distribution (server_preview.py --pyodide)
+              urlPattern: ({ url, sameOrigin }) => sameOrigin && url.pathname.startsWith('/pyodide/'),
+              handler: 'StaleWhileRevalidate',
+              options: {
+                cacheName: 'pyodide-local-cache',
+                cacheableResponse: {
+                  statuses: [200]
+                }
+              }
+            },
             {
               urlPattern: /^https:\/\/esm\.sh\/.*/i,
               handler: 'StaleWhileRevalidate',